@@ -0,0 +1,6 @@
+"""
+AgenticMemory shared runtime
+
+Code shared by the ClientData, Retrieve and PostCall Lambda functions. Shipped
+in the AgenticMemoriesLambdaLayer, so it is importable from every handler.
+"""
@@ -0,0 +1,149 @@
+"""
+Archive codec for JSON objects written to S3
+
+Encodes archived webhook/response payloads as compact JSON, optionally
+compressed with gzip or zstd, and decodes any of those formats (including the
+legacy pretty-printed JSON) transparently.
+
+Codecs:
+- pretty: indent=2 JSON (legacy format, uncompressed)
+- json: compact JSON, uncompressed
+- gzip: compact JSON + gzip (Content-Encoding: gzip)
+- zstd: compact JSON + zstd (Content-Encoding: zstd); falls back to gzip when
+  the zstandard package is not installed
+
+Payloads that are already JSON text can be passed as RawJSON and are stored
+as received instead of being parsed and re-serialized.
+"""
+
+import gzip
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+logger = logging.getLogger()
+
+ARCHIVE_CODECS = ('pretty', 'json', 'gzip', 'zstd')
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+
+class RawJSON(bytes):
+    """UTF-8 JSON that is already serialized; archived verbatim."""
+
+
+def resolve_codec(codec: str) -> str:
+    """
+    Map a configured codec name to one usable in this environment.
+
+    Args:
+        codec: One of ARCHIVE_CODECS
+
+    Returns:
+        The codec that will actually be used (zstd -> gzip without zstandard)
+    """
+    if codec not in ARCHIVE_CODECS:
+        raise ValueError(f"Unknown archive codec: {codec} (expected one of {', '.join(ARCHIVE_CODECS)})")
+    if codec == 'zstd' and zstandard is None:
+        logger.warning("zstandard not installed, falling back to gzip archive codec")
+        return 'gzip'
+    return codec
+
+
+def encode_archive(obj: Any, codec: str = 'gzip', level: Optional[int] = None) -> Tuple[bytes, Dict[str, str]]:
+    """
+    Serialize obj for archival.
+
+    Args:
+        obj: JSON-serializable object, or RawJSON
+        codec: One of ARCHIVE_CODECS
+        level: Compression level (codec default when None)
+
+    Returns:
+        (body, put_object_kwargs) where put_object_kwargs carries ContentType and,
+        for compressed codecs, ContentEncoding
+    """
+    codec = resolve_codec(codec)
+    headers = {'ContentType': 'application/json'}
+
+    if codec == 'pretty':
+        if isinstance(obj, RawJSON):
+            obj = json.loads(obj)
+        return json.dumps(obj, indent=2).encode('utf-8'), headers
+
+    if isinstance(obj, RawJSON):
+        body = bytes(obj)
+    else:
+        body = json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if codec == 'gzip':
+        body = gzip.compress(body, compresslevel=6 if level is None else level, mtime=0)
+        headers['ContentEncoding'] = 'gzip'
+    elif codec == 'zstd':
+        body = zstandard.ZstdCompressor(level=3 if level is None else level).compress(body)
+        headers['ContentEncoding'] = 'zstd'
+    return body, headers
+
+
+def decode_archive(body: bytes) -> Any:
+    """
+    Decode an archived object written with any codec.
+
+    The format is detected from the payload's magic bytes, so objects written
+    before compression was enabled decode the same way.
+
+    Args:
+        body: Raw object bytes as returned by S3
+
+    Returns:
+        The decoded JSON value
+    """
+    if body[:2] == _GZIP_MAGIC:
+        body = gzip.decompress(body)
+    elif body[:4] == _ZSTD_MAGIC:
+        if zstandard is None:
+            raise RuntimeError("Archive is zstd-compressed but the zstandard package is not installed")
+        body = zstandard.ZstdDecompressor().decompressobj().decompress(body)
+    return json.loads(body)
+
+
+def put_json_archive(
+    s3_client: Any,
+    bucket: str,
+    key: str,
+    obj: Any,
+    metadata: Dict[str, str],
+    codec: str = 'gzip',
+    level: Optional[int] = None
+) -> int:
+    """
+    Write obj to S3 with the given codec.
+
+    The codec name is also recorded in the object metadata (archive_codec).
+
+    Returns:
+        Number of bytes written
+    """
+    codec = resolve_codec(codec)
+    body, headers = encode_archive(obj, codec, level)
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=key,
+        Body=body,
+        Metadata={**metadata, 'archive_codec': codec},
+        **headers
+    )
+    return len(body)
+
+
+def read_json_archive(s3_client: Any, bucket: str, key: str) -> Any:
+    """
+    Read and decode an archived JSON object from S3, whatever codec wrote it.
+    """
+    response = s3_client.get_object(Bucket=bucket, Key=key)
+    return decode_archive(response['Body'].read())
@@ -0,0 +1,354 @@
+"""
+Caller profile snapshots
+
+A caller profile is a small per-caller document holding everything the
+conversation-initiation webhook needs to personalize a call: name, account
+tier, preferences, last interaction, memory count and last-call timestamp.
+
+post_call rebuilds it from Mem0 after ingesting a call and writes it to
+profiles/{caller}.json; client_data reads that one object instead of fetching
+and scanning every memory, and builds the same profile itself when none exists.
+"""
+
+import logging
+import re
+from datetime import datetime
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from agentic_memory_runtime.archive_codec import put_json_archive, read_json_archive
+
+logger = logging.getLogger()
+
+# Bump when the profile layout changes; readers ignore other versions
+PROFILE_SCHEMA_VERSION = 1
+
+PROFILE_PREFIX = 'profiles'
+
+# How many facts / conversation highlights the prompt context uses
+TOP_FACTS = 5
+TOP_HIGHLIGHTS = 3
+
+# Memory categories and the (lowercase, substring) keywords that tag them.
+# tier/preference/interaction select the profile fields; the rest are the
+# distinctions the greeting makes between them.
+CATEGORY_KEYWORDS = {
+    'tier': ['premium', 'gold', 'silver', 'basic', 'vip'],
+    'preference': ['prefer', 'likes', 'wants', 'needs'],
+    'interaction': ['last time', 'previous', 'inquiry', 'issue', 'request'],
+    'tier_premium': ['premium'],
+    'tier_vip': ['vip'],
+    'tier_metal': ['gold', 'silver'],
+    'followup_inquiry': ['inquiry', 'question'],
+    'followup_concern': ['issue', 'problem'],
+    'channel_email': ['email'],
+    'channel_phone': ['phone'],
+}
+
+_KEYWORD_CATEGORIES: Dict[str, FrozenSet[str]] = {}
+for _category, _keywords in CATEGORY_KEYWORDS.items():
+    for _keyword in _keywords:
+        _KEYWORD_CATEGORIES[_keyword] = _KEYWORD_CATEGORIES.get(_keyword, frozenset()) | {_category}
+
+# Flattened keyword table scanned once per memory. Each keyword is a C-level
+# substring test; on short memory texts that is faster than any regex
+# alternation, which re-enters the matcher at every character position
+_KEYWORD_TABLE = tuple(_KEYWORD_CATEGORIES.items())
+
+
+# Name patterns in priority order: for each memory, the first pattern whose
+# first match is a valid name wins
+NAME_PATTERNS = [
+    # Direct name patterns
+    r"(?:name is|called|goes by)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+    r"(?:user(?:'s)?\s+name:?\s*)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+    r"(?:customer name:?\s*)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+    r"(?:my name is|i am|i'm)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+    # More flexible patterns
+    r"user\s+name\s+is\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+    r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+is\s+(?:the\s+)?(?:user|customer|caller)",
+    # Semantic memory patterns
+    r"user\s+([A-Z][a-z]+)",
+    r"customer\s+([A-Z][a-z]+)",
+]
+
+# Every name pattern contains one of these literals, so a memory without any of
+# them cannot match and is skipped after a single scan. The prefilter uses the
+# patterns' flags, so it accepts exactly what they could; the leading lookahead
+# lets the regex engine skip positions that cannot start a keyword.
+NAME_KEYWORDS = ['name is', 'called', 'goes by', 'user', 'customer', 'caller', 'i am', "i'm"]
+
+_NAME_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in NAME_PATTERNS]
+_NAME_PREFILTER = re.compile(r"(?=[ncgui])(?:name is|call(?:ed|er)|goes by|user|customer|i am|i'm)", re.IGNORECASE)
+_VALID_NAME = re.compile(r"^[A-Za-z\s]{2,30}$")
+
+# Common non-names the patterns pick up
+EXCLUDED_NAMES = frozenset({'wants', 'needs', 'help', 'account', 'update', 'email', 'phone', 'address', 'user', 'customer'})
+
+
+def extract_caller_name(all_memories: List[str]) -> Optional[str]:
+    """
+    Extract caller's name from memories using multiple patterns.
+
+    Memories are tried in order and, within a memory, NAME_PATTERNS in priority
+    order; memories containing none of NAME_KEYWORDS are skipped without
+    running the patterns.
+
+    Args:
+        all_memories: List of memory strings (factual and semantic)
+
+    Returns:
+        Extracted name or None if not found
+    """
+    for memory in all_memories:
+        if not _NAME_PREFILTER.search(memory):
+            continue
+        for pattern in _NAME_PATTERNS:
+            match = pattern.search(memory)
+            if match:
+                name = match.group(1).strip()
+                # Basic validation - should be 1-3 words, only letters and spaces
+                if _VALID_NAME.match(name) and len(name.split()) <= 3 and name.lower() not in EXCLUDED_NAMES:
+                    return name.title()  # Proper case
+
+    return None
+
+
+def classify_memory(text: str) -> Tuple[str, FrozenSet[str]]:
+    """
+    Lowercase a memory once and tag it with every category it matches.
+
+    Args:
+        text: Memory text
+
+    Returns:
+        (lowercased text, categories from CATEGORY_KEYWORDS)
+    """
+    lowered = text.lower()
+    categories = frozenset()
+    for keyword, keyword_categories in _KEYWORD_TABLE:
+        if keyword in lowered:
+            categories = categories | keyword_categories
+    return lowered, categories
+
+
+def greeting_features(
+    account_status: Optional[Tuple[str, FrozenSet[str]]],
+    last_interaction: Optional[Tuple[str, FrozenSet[str]]],
+    first_preference: Optional[Tuple[str, FrozenSet[str]]]
+) -> Dict[str, Optional[str]]:
+    """
+    Reduce classified profile fields to what the personalized greeting needs.
+
+    Args:
+        account_status: classify_memory() output for the account status fact
+        last_interaction: classify_memory() output for the last interaction
+        first_preference: classify_memory() output for the first preference
+
+    Returns:
+        {'account_tier': 'premium'|'vip'|'metal'|None, 'account_status_lower',
+         'last_interaction_kind': 'inquiry'|'concern'|None,
+         'preferred_channel': 'email'|'phone'|None}
+    """
+    def first_of(classified, options):
+        if classified:
+            for option in options:
+                if option in classified[1]:
+                    return option.split('_', 1)[1]
+        return None
+
+    return {
+        'account_tier': first_of(account_status, ('tier_premium', 'tier_vip', 'tier_metal')),
+        'account_status_lower': account_status[0] if account_status else None,
+        'last_interaction_kind': first_of(last_interaction, ('followup_inquiry', 'followup_concern')),
+        'preferred_channel': first_of(first_preference, ('channel_email', 'channel_phone'))
+    }
+
+
+def split_memories(memories: List[Any]) -> Tuple[List[str], List[str]]:
+    """
+    Separate Mem0 memories into factual and semantic texts.
+
+    Memories without a recognised metadata.type are treated as factual.
+
+    Args:
+        memories: Mem0 get_all results
+
+    Returns:
+        (factual_memories, semantic_memories)
+    """
+    factual_memories = []
+    semantic_memories = []
+
+    for mem in memories or []:
+        if isinstance(mem, dict):
+            metadata = mem.get('metadata') or {}
+            mem_type = metadata.get('type', 'unknown')
+            memory_text = mem.get('memory', '')
+
+            if memory_text:
+                if mem_type == 'semantic':
+                    semantic_memories.append(memory_text)
+                else:
+                    factual_memories.append(memory_text)
+
+    return factual_memories, semantic_memories
+
+
+def classify_profile_fields(
+    top_facts: List[str],
+    highlights: List[str]
+) -> Tuple[Optional[str], List[str], Optional[str], Dict[str, Optional[str]]]:
+    """
+    Pick account status, preferences and last interaction in one classifier pass.
+
+    Each memory is lowercased and scanned once; the greeting features are
+    derived from those same classifications instead of rescanning.
+
+    Args:
+        top_facts: Factual memories used for the prompt context
+        highlights: Semantic memories used for the prompt context
+
+    Returns:
+        (account_status, preferences, last_interaction, greeting_features)
+    """
+    account_status = None
+    preferences = []
+    for fact in top_facts:
+        classified = classify_memory(fact)
+        if 'tier' in classified[1]:
+            account_status = (fact, classified)
+        if 'preference' in classified[1]:
+            preferences.append((fact, classified))
+
+    last_interaction = None
+    for conv in highlights:
+        classified = classify_memory(conv)
+        if 'interaction' in classified[1]:
+            last_interaction = (conv, classified)
+            break
+
+    features = greeting_features(
+        account_status[1] if account_status else None,
+        last_interaction[1] if last_interaction else None,
+        preferences[0][1] if preferences else None
+    )
+    return (
+        account_status[0] if account_status else None,
+        [fact for fact, _ in preferences],
+        last_interaction[0] if last_interaction else None,
+        features
+    )
+
+
+def build_caller_profile(
+    caller_id: str,
+    memories: List[Any],
+    last_call_ts: Optional[str] = None,
+    last_conversation_id: Optional[str] = None,
+    memory_count: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Derive a caller profile from the caller's Mem0 memories.
+
+    Args:
+        caller_id: Caller's phone number
+        memories: Mem0 get_all results for the caller (or a bounded prefix of them)
+        last_call_ts: ISO timestamp of the most recent call, if known
+        last_conversation_id: ElevenLabs conversation ID of that call
+        memory_count: Total memories, when memories is only a bounded prefix
+
+    Returns:
+        Profile dict (see module docstring)
+    """
+    factual_memories, semantic_memories = split_memories(memories)
+    top_facts = factual_memories[:TOP_FACTS]
+    highlights = semantic_memories[:TOP_HIGHLIGHTS]
+
+    account_status, preferences, last_interaction, features = classify_profile_fields(top_facts, highlights)
+
+    return {
+        'schema_version': PROFILE_SCHEMA_VERSION,
+        'caller_id': caller_id,
+        'caller_name': extract_caller_name(factual_memories + semantic_memories),
+        'account_status': account_status,
+        'preferences': preferences,
+        'last_interaction': last_interaction,
+        'greeting_features': features,
+        'memory_count': memory_count if memory_count is not None else len(memories or []),
+        'top_facts': top_facts,
+        'highlights': highlights,
+        'last_call_ts': last_call_ts,
+        'last_conversation_id': last_conversation_id,
+        'updated_at': datetime.utcnow().isoformat()
+    }
+
+
+def profile_is_current(profile: Dict[str, Any], stamp: Optional[Dict[str, Optional[str]]]) -> bool:
+    """
+    Whether a profile already reflects the last call post_call ingested.
+
+    post_call rebuilds the profile before it bumps the caller's version stamp,
+    so a profile is current when it was built for the stamp's conversation, or
+    rebuilt after the stamp was written. A failed or skipped rebuild leaves an
+    older profile behind a newer stamp.
+
+    Args:
+        profile: Stored caller profile
+        stamp: read_caller_stamp() result (None: no call ingested, or unknown)
+
+    Returns:
+        False if the stamp records a later call than the profile
+    """
+    if not stamp or not (stamp.get('conversation_id') or stamp.get('bumped_at')):
+        return True
+    if stamp.get('conversation_id') and profile.get('last_conversation_id') == stamp['conversation_id']:
+        return True
+    return bool(stamp.get('bumped_at') and profile.get('updated_at') and profile['updated_at'] >= stamp['bumped_at'])
+
+
+def profile_key(caller_id: str) -> str:
+    """S3 key of a caller's profile (leading + stripped, as elsewhere in the bucket)."""
+    return f"{PROFILE_PREFIX}/{caller_id.lstrip('+')}.json"
+
+
+def save_caller_profile(s3_client: Any, bucket: str, profile: Dict[str, Any], codec: str = 'gzip') -> str:
+    """
+    Write a caller profile to S3.
+
+    Returns:
+        S3 key written
+    """
+    key = profile_key(profile['caller_id'])
+    put_json_archive(
+        s3_client,
+        bucket,
+        key,
+        profile,
+        metadata={
+            'caller_id': profile['caller_id'],
+            'schema_version': str(PROFILE_SCHEMA_VERSION),
+            'payload_type': 'caller_profile'
+        },
+        codec=codec
+    )
+    return key
+
+
+def load_caller_profile(s3_client: Any, bucket: str, caller_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a caller's profile from S3.
+
+    Returns:
+        The profile, or None if there is none (or it has an unknown schema version)
+    """
+    try:
+        profile = read_json_archive(s3_client, bucket, profile_key(caller_id))
+    except Exception as e:
+        error_code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+        if error_code not in ('NoSuchKey', '404'):
+            logger.warning(f"Could not read caller profile for {caller_id}: {str(e)}")
+        return None
+
+    if not isinstance(profile, dict) or profile.get('schema_version') != PROFILE_SCHEMA_VERSION:
+        return None
+    return profile
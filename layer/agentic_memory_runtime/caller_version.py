@@ -0,0 +1,101 @@
+"""
+Caller version stamps
+
+post_call bumps a tiny per-caller S3 object every time it ingests a call.
+Readers compare its ETag (a HEAD request, no body transfer) against the stamp
+their cached data was computed under to detect that new memories exist. The
+object's metadata names the conversation and time of the bump, so a caller
+profile can be checked against the last call that was ingested.
+"""
+
+import logging
+import re
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger()
+
+VERSION_PREFIX = 'caller-versions'
+
+_NON_DIGITS = re.compile(r'\D')
+
+
+def normalize_caller_id(caller_id: str) -> str:
+    """
+    Normalize a phone number for use as a cache key.
+
+    '+1 (612) 555-0100' and '16125550100' both become '+16125550100'.
+    """
+    digits = _NON_DIGITS.sub('', caller_id or '')
+    return f"+{digits}" if digits else (caller_id or '').strip()
+
+
+def version_key(caller_id: str) -> str:
+    """S3 key of a caller's version stamp."""
+    return f"{VERSION_PREFIX}/{caller_id.lstrip('+')}"
+
+
+def bump_caller_version(s3_client: Any, bucket: str, caller_id: str, conversation_id: Optional[str] = None) -> str:
+    """
+    Write a new version stamp for caller_id.
+
+    Returns:
+        The new stamp (ETag)
+    """
+    bumped_at = datetime.utcnow().isoformat()
+    body = f"{bumped_at} {conversation_id or ''} {uuid.uuid4().hex}"
+    response = s3_client.put_object(
+        Bucket=bucket,
+        Key=version_key(caller_id),
+        Body=body.encode('utf-8'),
+        ContentType='text/plain',
+        Metadata={
+            'caller_id': caller_id,
+            'conversation_id': conversation_id or '',
+            'bumped_at': bumped_at,
+            'payload_type': 'caller_version'
+        }
+    )
+    return (response or {}).get('ETag', '')
+
+
+def read_caller_stamp(s3_client: Any, bucket: str, caller_id: str) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Read caller_id's version stamp and what it records about the last ingested call.
+
+    Returns:
+        {'version': ETag, 'conversation_id', 'bumped_at'} (the last two None for
+        stamps written without them), or None if post_call has never ingested a
+        call for this caller
+
+    Raises:
+        Exception: Any S3 error other than a missing object
+    """
+    try:
+        head = s3_client.head_object(Bucket=bucket, Key=version_key(caller_id))
+    except Exception as e:
+        error_code = getattr(e, 'response', {}).get('Error', {}).get('Code')
+        if error_code in ('NoSuchKey', '404', 'NotFound'):
+            return None
+        raise
+    metadata = head.get('Metadata') or {}
+    return {
+        'version': head['ETag'],
+        'conversation_id': metadata.get('conversation_id') or None,
+        'bumped_at': metadata.get('bumped_at') or None
+    }
+
+
+def get_caller_version(s3_client: Any, bucket: str, caller_id: str) -> Optional[str]:
+    """
+    Read the current version stamp for caller_id.
+
+    Returns:
+        The stamp, or None if post_call has never ingested a call for this caller
+
+    Raises:
+        Exception: Any S3 error other than a missing object
+    """
+    stamp = read_caller_stamp(s3_client, bucket, caller_id)
+    return stamp['version'] if stamp else None
@@ -0,0 +1,129 @@
+"""
+Lazy, memoized service clients
+
+Importing mem0 and boto3 and constructing their clients dominates Lambda cold
+start (mem0's package import alone pulls in its OSS vector-store stack, and
+MemoryClient validates the API key over the network on construction). Handlers
+bind LazyClient proxies at module level instead, so a client is only imported
+and built on the first code path that actually uses it, and then reused for
+the life of the container.
+
+The clients are built from the shared RuntimeConfig with bounded, keep-alive
+connection pools, so warm invocations reuse open TLS connections instead of
+handshaking again (the Mem0 one is the shared transport in transport.py).
+"""
+
+import threading
+from typing import Any, Callable, Optional
+
+from agentic_memory_runtime.config import RuntimeConfig, get_config
+from agentic_memory_runtime.transport import build_http_client
+
+
+class LazyClient:
+    """Proxy that builds the wrapped client on first attribute access."""
+
+    def __init__(self, factory: Callable[[], Any], name: str):
+        self._factory = factory
+        self._name = name
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self) -> Any:
+        """Return the wrapped client, constructing it if needed (thread-safe)."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    @property
+    def built(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.get(), attr)
+
+    def __repr__(self) -> str:
+        return f"<LazyClient {self._name} ({'built' if self.built else 'not built'})>"
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _memoized(name: str, factory: Callable[[], Any]) -> Any:
+    if name not in _clients:
+        with _clients_lock:
+            if name not in _clients:
+                _clients[name] = factory()
+    return _clients[name]
+
+
+def build_s3_config(config: RuntimeConfig) -> Any:
+    """botocore Config sizing the S3 pool for the handlers' concurrent uploads, with TCP keep-alive."""
+    from botocore.config import Config
+    return Config(
+        max_pool_connections=config.s3_max_pool_connections,
+        connect_timeout=config.s3_connect_timeout_seconds,
+        read_timeout=config.s3_read_timeout_seconds,
+        retries={'max_attempts': config.s3_max_attempts, 'mode': 'standard'},
+        tcp_keepalive=True
+    )
+
+
+def get_mem0_client(config: Optional[RuntimeConfig] = None) -> Any:
+    """Process-wide Mem0 MemoryClient built from MEM0_API_KEY / MEM0_ORG_ID / MEM0_PROJECT_ID."""
+    def build():
+        from mem0 import MemoryClient
+        cfg = config or get_config()
+        return MemoryClient(
+            api_key=cfg.mem0_api_key,
+            org_id=cfg.mem0_org_id,
+            project_id=cfg.mem0_project_id,
+            client=build_http_client(cfg)
+        )
+    return _memoized('mem0', build)
+
+
+def get_s3_client(config: Optional[RuntimeConfig] = None) -> Any:
+    """Process-wide boto3 S3 client (a LocalS3Client when LOCAL_S3_PATH is set)."""
+    def build():
+        cfg = config or get_config()
+        if cfg.local_s3_path:
+            from agentic_memory_runtime.local_s3 import LocalS3Client
+            return LocalS3Client(cfg.local_s3_path)
+        import boto3
+        return boto3.client('s3', config=build_s3_config(cfg))
+    return _memoized('s3', build)
+
+
+def build_sqs_config(config: RuntimeConfig) -> Any:
+    """botocore Config for the ingest queue client: S3's timeouts and retry budget, with TCP keep-alive."""
+    from botocore.config import Config
+    return Config(
+        connect_timeout=config.s3_connect_timeout_seconds,
+        read_timeout=config.s3_read_timeout_seconds,
+        retries={'max_attempts': config.s3_max_attempts, 'mode': 'standard'},
+        tcp_keepalive=True
+    )
+
+
+def get_sqs_client(config: Optional[RuntimeConfig] = None) -> Any:
+    """Process-wide boto3 SQS client for the post-call ingest queue."""
+    def build():
+        import boto3
+        return boto3.client('sqs', config=build_sqs_config(config or get_config()))
+    return _memoized('sqs', build)
+
+
+def lazy_mem0_client() -> LazyClient:
+    return LazyClient(get_mem0_client, 'mem0')
+
+
+def lazy_s3_client() -> LazyClient:
+    return LazyClient(get_s3_client, 's3')
+
+
+def lazy_sqs_client() -> LazyClient:
+    return LazyClient(get_sqs_client, 'sqs')
@@ -0,0 +1,122 @@
+"""
+Runtime configuration
+
+Every handler reads the same Mem0, S3, HTTP pool and logging settings from its
+environment. They are parsed once, at module init, into a frozen RuntimeConfig
+shared by the clients, metrics and handlers; the env_* helpers parse the
+function-specific settings the handlers keep as module constants.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+TRUE_VALUES = ('true', '1', 'yes', 'on')
+
+
+def env_str(name: str, default: str = '', environ: Optional[Mapping[str, str]] = None) -> str:
+    return (os.environ if environ is None else environ).get(name, default)
+
+
+def env_int(name: str, default: int, environ: Optional[Mapping[str, str]] = None) -> int:
+    return int(env_str(name, str(default), environ))
+
+
+def env_float(name: str, default: float, environ: Optional[Mapping[str, str]] = None) -> float:
+    return float(env_str(name, str(default), environ))
+
+
+def env_bool(name: str, default: bool, environ: Optional[Mapping[str, str]] = None) -> bool:
+    return env_str(name, 'true' if default else 'false', environ).strip().lower() in TRUE_VALUES
+
+
+@dataclass(frozen=True)
+class RuntimeConfig:
+    """Settings shared by all handlers."""
+
+    mem0_api_key: Optional[str]
+    mem0_org_id: Optional[str]
+    mem0_project_id: Optional[str]
+    s3_bucket_name: str
+    archive_codec: str
+    caller_profile_enabled: bool
+    metrics_namespace: str
+    log_level: str
+
+    # Mem0 HTTP connection pool (httpx, see transport); idle connections are kept alive across warm invocations
+    mem0_timeout_seconds: float
+    http_connect_timeout_seconds: float
+    http_pool_timeout_seconds: float
+    http_max_connections: int
+    http_max_keepalive_connections: int
+    http_keepalive_expiry_seconds: float
+    http2_enabled: bool
+
+    # S3 connection pool (botocore)
+    s3_max_pool_connections: int
+    s3_connect_timeout_seconds: float
+    s3_read_timeout_seconds: float
+    s3_max_attempts: int
+
+    # Directory served by LocalS3Client instead of S3 (local runs and tests); empty uses S3
+    local_s3_path: str = ''
+
+
+def load_config(environ: Optional[Mapping[str, str]] = None) -> RuntimeConfig:
+    """
+    Parse a RuntimeConfig from the environment.
+
+    Args:
+        environ: Variables to read (defaults to os.environ)
+
+    Returns:
+        Parsed configuration
+    """
+    env = os.environ if environ is None else environ
+    http_max_connections = env_int('HTTP_MAX_CONNECTIONS', 20, env)
+    return RuntimeConfig(
+        mem0_api_key=env.get('MEM0_API_KEY'),
+        mem0_org_id=env.get('MEM0_ORG_ID'),
+        mem0_project_id=env.get('MEM0_PROJECT_ID'),
+        s3_bucket_name=env_str('S3_BUCKET_NAME', '', env),
+        archive_codec=env_str('ARCHIVE_CODEC', 'gzip', env),
+        caller_profile_enabled=env_bool('CALLER_PROFILE_ENABLED', True, env),
+        metrics_namespace=env_str('METRICS_NAMESPACE', 'AgenticMemories', env),
+        log_level=env_str('LOG_LEVEL', 'INFO', env).upper(),
+        mem0_timeout_seconds=env_float('MEM0_TIMEOUT', 30.0, env),
+        http_connect_timeout_seconds=env_float('HTTP_CONNECT_TIMEOUT_SECONDS', 2.0, env),
+        http_pool_timeout_seconds=env_float('HTTP_POOL_TIMEOUT_SECONDS', 5.0, env),
+        http_max_connections=http_max_connections,
+        # Every pooled connection may stay open: a smaller keep-alive pool closes connections after each fan-out burst
+        http_max_keepalive_connections=env_int('HTTP_MAX_KEEPALIVE_CONNECTIONS', http_max_connections, env),
+        http_keepalive_expiry_seconds=env_float('HTTP_KEEPALIVE_EXPIRY_SECONDS', 30.0, env),
+        http2_enabled=env_bool('HTTP2_ENABLED', True, env),
+        s3_max_pool_connections=env_int('S3_MAX_POOL_CONNECTIONS', 20, env),
+        s3_connect_timeout_seconds=env_float('S3_CONNECT_TIMEOUT_SECONDS', 2.0, env),
+        s3_read_timeout_seconds=env_float('S3_READ_TIMEOUT_SECONDS', 10.0, env),
+        s3_max_attempts=env_int('S3_MAX_ATTEMPTS', 3, env),
+        local_s3_path=env_str('LOCAL_S3_PATH', '', env)
+    )
+
+
+_config: Optional[RuntimeConfig] = None
+
+
+def get_config() -> RuntimeConfig:
+    """Process-wide RuntimeConfig, parsed on first call."""
+    global _config
+    if _config is None:
+        _config = load_config()
+    return _config
+
+
+def configure_logging(level: Optional[str] = None) -> logging.Logger:
+    """
+    Set the root logger level (LOG_LEVEL, default INFO) and return it.
+
+    Lambda installs its own handler on the root logger, so only the level is set.
+    """
+    logger = logging.getLogger()
+    logger.setLevel(getattr(logging, level or get_config().log_level, logging.INFO))
+    return logger
@@ -0,0 +1,216 @@
+"""
+Deferred background writer
+
+Runs non-critical side effects (S3 archival) on a background thread so a
+handler can return its response without waiting for them.
+
+Lambda freezes the execution environment once the handler has returned and
+every registered extension has asked for its next event. PostInvokeDrain is
+an internal extension (a thread of the function's own process) that asks
+for the next event only after the writer has drained, so queued work runs
+after the response is sent instead of on the next thaw, where it would
+compete with that invocation or be lost if the environment is recycled
+first. Registering it also makes Lambda send SIGTERM before shutdown, so
+drain_on_sigterm gets a last chance at anything still pending.
+"""
+
+import json
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+import urllib.request
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger()
+
+
+class DeferredWriter:
+    """Bounded FIFO of callables executed by a single daemon thread."""
+
+    def __init__(self, max_pending: int = 100, name: str = 'deferred-writer'):
+        self.name = name
+        self._queue: 'queue.Queue' = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+
+    def submit(self, task_name: str, fn: Callable[[], Any]) -> bool:
+        """
+        Queue fn to run in the background without blocking.
+
+        Args:
+            task_name: Label used in logs
+            fn: Zero-argument callable
+
+        Returns:
+            False if the backlog is full and the task was dropped
+        """
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait((task_name, fn))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logger.error(f"{self.name}: backlog full, dropped {task_name}")
+            return False
+
+    def pending(self) -> int:
+        """Number of tasks queued or running."""
+        return self._queue.unfinished_tasks
+
+    def drain(self, timeout: float) -> bool:
+        """
+        Wait up to timeout seconds for the backlog to finish.
+
+        Returns:
+            True if nothing is pending any more
+        """
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for logging/metrics."""
+        return {
+            'pending': self.pending(),
+            'completed': self.completed,
+            'failed': self.failed,
+            'dropped': self.dropped
+        }
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            task_name, fn = self._queue.get()
+            start = time.perf_counter()
+            try:
+                fn()
+                self.completed += 1
+                logger.info(f"{self.name}: {task_name} done in {(time.perf_counter() - start) * 1000:.0f}ms")
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"{self.name}: {task_name} failed: {str(e)}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+
+def drain_on_sigterm(writer: DeferredWriter, timeout: float = 0.5) -> bool:
+    """
+    Drain writer when the runtime receives SIGTERM before shutdown.
+
+    Lambda only sends SIGTERM when an extension is registered (see
+    PostInvokeDrain); without one this is a no-op safety net. Must be called
+    from the main thread.
+
+    Returns:
+        True if the handler was installed
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return False
+
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handle_sigterm(signum, frame):
+        drained = writer.drain(timeout)
+        logger.info(f"{writer.name}: SIGTERM drain {'complete' if drained else 'timed out'} {writer.stats()}")
+        if callable(previous):
+            previous(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    return True
+
+
+class PostInvokeDrain:
+    """
+    Internal Lambda extension that keeps the environment running after each
+    response until a DeferredWriter has drained.
+
+    The handler calls invocation_done() when it has submitted its work (in a
+    finally block); the extension then drains the writer, bounded by the
+    invocation's deadline, before asking the Extensions API for the next
+    event. The response is not delayed: Lambda returns it as soon as the
+    handler does.
+    """
+
+    API_VERSION = '2020-01-01'
+
+    def __init__(self, writer: DeferredWriter, runtime_api: Optional[str] = None, name: Optional[str] = None):
+        self.writer = writer
+        self.runtime_api = runtime_api if runtime_api is not None else os.environ.get('AWS_LAMBDA_RUNTIME_API')
+        self.name = name or writer.name
+        self.registered = False
+        self._done = threading.Event()
+        self._extension_id = None
+
+    def register(self) -> bool:
+        """
+        Register with the Extensions API and start the event loop thread.
+
+        Must run during init (module import). Outside Lambda, or if the
+        registration fails, work simply runs on the next thaw as before.
+
+        Returns:
+            True if the extension was registered
+        """
+        if not self.runtime_api:
+            return False
+        try:
+            request = urllib.request.Request(
+                f"http://{self.runtime_api}/{self.API_VERSION}/extension/register",
+                data=json.dumps({'events': ['INVOKE']}).encode('utf-8'),
+                headers={'Lambda-Extension-Name': self.name},
+                method='POST'
+            )
+            with urllib.request.urlopen(request, timeout=2) as response:
+                self._extension_id = response.headers['Lambda-Extension-Identifier']
+        except Exception as e:
+            logger.warning(f"{self.name}: could not register post-invoke drain: {str(e)}")
+            return False
+        threading.Thread(target=self._run, name=f"{self.name}-extension", daemon=True).start()
+        self.registered = True
+        return True
+
+    def invocation_done(self) -> None:
+        """Signal that the current invocation has submitted all of its work."""
+        self._done.set()
+
+    def _next_event(self) -> Dict[str, Any]:
+        request = urllib.request.Request(
+            f"http://{self.runtime_api}/{self.API_VERSION}/extension/event/next",
+            headers={'Lambda-Extension-Identifier': self._extension_id}
+        )
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+
+    def _run(self) -> None:
+        while True:
+            try:
+                event = self._next_event()
+            except Exception as e:
+                logger.error(f"{self.name}: extension event loop stopped: {str(e)}")
+                return
+            if event.get('eventType') != 'INVOKE':
+                continue
+            # Leave 100ms of the invocation's deadline for the extension's own next request
+            deadline = (event.get('deadlineMs') or (time.time() + 3) * 1000) / 1000 - 0.1
+            self._done.wait(max(0.0, deadline - time.time()))
+            self._done.clear()
+            if not self.writer.drain(max(0.0, deadline - time.time())):
+                logger.warning(f"{self.name}: post-invoke drain timed out {self.writer.stats()}")
@@ -0,0 +1,113 @@
+"""
+Deadlines and hedged requests
+
+A blocking client call cannot be interrupted, but the caller does not have to
+wait for it: hedged_call runs it on an executor and stops waiting at the
+deadline. Optionally a second, identical request (the hedge) is fired once the
+first has been outstanding longer than a typical request takes, e.g. the p95
+of recent latencies from a LatencyTracker; whichever finishes first wins.
+Abandoned requests finish in the background and their results are discarded.
+"""
+
+import math
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from typing import Any, Callable, Dict, List, Optional
+
+
+class DeadlineExceeded(TimeoutError):
+    """No request finished before the deadline."""
+
+
+class LatencyTracker:
+    """Rolling window of recent request latencies."""
+
+    def __init__(self, window: int = 100, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Nearest-rank percentile of the window, or None until min_samples are recorded."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        rank = max(1, math.ceil(pct / 100 * len(samples)))
+        return samples[rank - 1]
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+
+def hedged_call(
+    fn: Callable[[], Any],
+    executor: Executor,
+    timeout: float,
+    hedge_delay: Optional[float] = None,
+    tracker: Optional[LatencyTracker] = None,
+    stats: Optional[Dict[str, int]] = None
+) -> Any:
+    """
+    Call fn with a deadline, hedging it after hedge_delay seconds.
+
+    Args:
+        fn: Zero-argument request
+        executor: Executor the requests run on (needs two free workers to hedge)
+        timeout: Seconds to wait for any request to finish
+        hedge_delay: Seconds before firing the hedge (None or >= timeout disables it)
+        tracker: Records the latency of every successful request
+        stats: Counters updated in place: 'hedges' fired and 'hedge_wins'
+
+    Returns:
+        The first successful result
+
+    Raises:
+        DeadlineExceeded: No request succeeded before the deadline
+        Exception: The error of the last request, if every request failed
+    """
+    deadline = time.monotonic() + timeout
+    stats = stats if stats is not None else {}
+
+    def timed() -> Any:
+        start = time.monotonic()
+        result = fn()
+        if tracker is not None:
+            tracker.record(time.monotonic() - start)
+        return result
+
+    pending: List[Future] = [executor.submit(timed)]
+    hedge: Optional[Future] = None
+    hedge_at = deadline if hedge_delay is None else min(deadline, time.monotonic() + max(0.0, hedge_delay))
+    error: Optional[BaseException] = None
+
+    while pending:
+        now = time.monotonic()
+        if now >= deadline:
+            break
+        wake_at = hedge_at if hedge is None and hedge_at < deadline else deadline
+        done, _ = wait(pending, timeout=max(0.0, wake_at - now), return_when=FIRST_COMPLETED)
+
+        for future in done:
+            pending.remove(future)
+            if future.exception() is None:
+                if future is hedge:
+                    stats['hedge_wins'] = stats.get('hedge_wins', 0) + 1
+                return future.result()
+            error = future.exception()
+
+        # Fire the hedge once the primary is slow, or straight away if it already failed
+        if hedge is None and hedge_at < deadline and (time.monotonic() >= hedge_at or not pending):
+            hedge = executor.submit(timed)
+            pending.append(hedge)
+            stats['hedges'] = stats.get('hedges', 0) + 1
+
+    if pending or error is None:
+        raise DeadlineExceeded(f"No response within {timeout:.3f}s")
+    raise error
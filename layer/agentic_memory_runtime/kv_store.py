@@ -0,0 +1,292 @@
+"""
+Shared key-value stores with per-item TTL
+
+Pluggable backend for state that should outlive one warm Lambda container
+(e.g. cached retrieve results), shared between containers or processes.
+
+Backends:
+- DynamoDBKVStore: production store; also works against DynamoDB Local via an endpoint URL
+- FileKVStore: one JSON file per key in a local directory, shared by processes on one host
+- InMemoryKVStore: process-local stand-in for tests and benchmarks
+
+Values are JSON-serializable. Expired items are never returned, even if the
+backend has not physically removed them yet (DynamoDB TTL deletion lags).
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from agentic_memory_runtime.clients import LazyClient
+
+
+class KVStore(ABC):
+    """Interface implemented by all key-value store backends."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under key, or None if missing or expired."""
+
+    @abstractmethod
+    def put(self, key: str, value: Any, ttl_seconds: float) -> None:
+        """Store value under key for ttl_seconds."""
+
+    @abstractmethod
+    def put_if_absent(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        """
+        Store value under key only if key is missing or expired.
+
+        Returns:
+            True if the value was stored, False if a live item already exists
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove key if present."""
+
+    @abstractmethod
+    def delete_if_equal(self, key: str, value: Any) -> bool:
+        """
+        Remove key only if it still holds value.
+
+        Returns:
+            True if the item was removed, False if it is missing or holds another value
+        """
+
+
+class InMemoryKVStore(KVStore):
+    """Thread-safe in-process store. Items are lost when the process exits."""
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        self._items: Dict[str, Tuple[Any, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if self._clock() >= item[1]:
+                del self._items[key]
+                return None
+            return json.loads(item[0])
+
+    def put(self, key: str, value: Any, ttl_seconds: float) -> None:
+        # Stored serialized so callers cannot mutate cached values in place
+        with self._lock:
+            self._items[key] = (json.dumps(value), self._clock() + ttl_seconds)
+
+    def put_if_absent(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        with self._lock:
+            item = self._items.get(key)
+            now = self._clock()
+            if item is not None and now < item[1]:
+                return False
+            self._items[key] = (json.dumps(value), now + ttl_seconds)
+            return True
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
+    def delete_if_equal(self, key: str, value: Any) -> bool:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None or json.loads(item[0]) != value:
+                return False
+            del self._items[key]
+            return True
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class FileKVStore(KVStore):
+    """
+    One JSON file per key under a directory.
+
+    Writes go to a temporary file that is renamed into place, so concurrent
+    readers never see a partial item. put_if_absent hard-links the temporary
+    file into place, which fails atomically if the key's file already exists.
+    """
+
+    def __init__(self, directory: str, clock: Callable[[], float] = time.time):
+        self.directory = directory
+        self._clock = clock
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest() + '.json')
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                item = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if item.get('key') != key or self._clock() >= item.get('expires_at', 0):
+            return None
+        return item.get('value')
+
+    def _write_tmp(self, key: str, value: Any, ttl_seconds: float) -> str:
+        item = {'key': key, 'value': value, 'expires_at': self._clock() + ttl_seconds}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(item, f, separators=(',', ':'))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+
+    def put(self, key: str, value: Any, ttl_seconds: float) -> None:
+        tmp_path = self._write_tmp(key, value, ttl_seconds)
+        try:
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def put_if_absent(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        path = self._path(key)
+        tmp_path = self._write_tmp(key, value, ttl_seconds)
+        try:
+            for _ in range(2):
+                try:
+                    os.link(tmp_path, path)
+                    return True
+                except FileExistsError:
+                    if self.get(key) is not None:
+                        return False
+                    # Expired (or unreadable) item: remove it and retry the link once
+                    self.delete(key)
+            return False
+        finally:
+            os.unlink(tmp_path)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def delete_if_equal(self, key: str, value: Any) -> bool:
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                item = json.load(f)
+                inode = os.fstat(f.fileno()).st_ino
+        except (OSError, ValueError):
+            return False
+        if item.get('key') != key or item.get('value') != value:
+            return False
+        # Items are replaced by rename, so an unchanged inode means the file still holds value
+        try:
+            if os.stat(path).st_ino != inode:
+                return False
+            os.unlink(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+
+class DynamoDBKVStore(KVStore):
+    """
+    DynamoDB table with a string partition key 'pk'.
+
+    Items are {'pk': key, 'value': JSON string, 'expires_at': epoch seconds};
+    enable TTL on expires_at so DynamoDB removes expired items.
+    """
+
+    def __init__(self, table_name: str, dynamodb_client: Any = None, endpoint_url: Optional[str] = None,
+                 clock: Callable[[], float] = time.time):
+        if dynamodb_client is None:
+            # Built on first use, so creating the store at module init does not import boto3
+            def build():
+                import boto3
+                return boto3.client('dynamodb', endpoint_url=endpoint_url or None)
+            dynamodb_client = LazyClient(build, 'dynamodb')
+        self.table_name = table_name
+        self._dynamodb = dynamodb_client
+        self._clock = clock
+
+    def get(self, key: str) -> Optional[Any]:
+        response = self._dynamodb.get_item(TableName=self.table_name, Key={'pk': {'S': key}})
+        item = response.get('Item')
+        if not item or self._clock() >= float(item['expires_at']['N']):
+            return None
+        return json.loads(item['value']['S'])
+
+    def _item(self, key: str, value: Any, ttl_seconds: float) -> Dict[str, Any]:
+        return {
+            'pk': {'S': key},
+            'value': {'S': json.dumps(value, separators=(',', ':'))},
+            'expires_at': {'N': str(int(self._clock() + ttl_seconds))}
+        }
+
+    def put(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._dynamodb.put_item(TableName=self.table_name, Item=self._item(key, value, ttl_seconds))
+
+    def put_if_absent(self, key: str, value: Any, ttl_seconds: float) -> bool:
+        # Expired items may linger until TTL deletion, so they count as absent
+        try:
+            self._dynamodb.put_item(
+                TableName=self.table_name,
+                Item=self._item(key, value, ttl_seconds),
+                ConditionExpression='attribute_not_exists(pk) OR expires_at <= :now',
+                ExpressionAttributeValues={':now': {'N': str(int(self._clock()))}}
+            )
+            return True
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def delete(self, key: str) -> None:
+        self._dynamodb.delete_item(TableName=self.table_name, Key={'pk': {'S': key}})
+
+    def delete_if_equal(self, key: str, value: Any) -> bool:
+        # Values are serialized the same way on write, so the stored JSON string compares exactly
+        try:
+            self._dynamodb.delete_item(
+                TableName=self.table_name,
+                Key={'pk': {'S': key}},
+                ConditionExpression='#value = :value',
+                ExpressionAttributeNames={'#value': 'value'},
+                ExpressionAttributeValues={':value': {'S': json.dumps(value, separators=(',', ':'))}}
+            )
+            return True
+        except Exception as e:
+            if getattr(e, 'response', {}).get('Error', {}).get('Code') == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+
+def create_kv_store(backend: str, table_name: Optional[str] = None, path: Optional[str] = None) -> KVStore:
+    """
+    Build a key-value store.
+
+    Args:
+        backend: dynamodb, file or memory
+        table_name: DynamoDB table (dynamodb backend); DYNAMODB_ENDPOINT_URL points it at DynamoDB Local
+        path: Directory for the file backend
+
+    Returns:
+        The store
+    """
+    if backend == 'dynamodb':
+        if not table_name:
+            raise ValueError("A table name is required for the dynamodb key-value store backend")
+        return DynamoDBKVStore(table_name, endpoint_url=os.environ.get('DYNAMODB_ENDPOINT_URL'))
+    if backend == 'file':
+        return FileKVStore(path or os.path.join(tempfile.gettempdir(), 'agentic-memory-kv'))
+    if backend == 'memory':
+        return InMemoryKVStore()
+    raise ValueError(f"Unknown key-value store backend: {backend}")
@@ -0,0 +1,25 @@
+"""
+Lexical tokenization shared by the reranker and the working-set index
+"""
+
+import re
+from typing import Any, List
+
+_TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# Too common in memories and agent queries to say anything about relevance
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'did', 'do', 'does', 'for', 'from', 'has', 'have', 'he',
+    'her', 'his', 'i', 'in', 'is', 'it', 'its', 'me', 'my', 'of', 'on', 'or', 'she', 'that', 'the', 'their',
+    'them', 'they', 'this', 'to', 'was', 'we', 'were', 'what', 'when', 'where', 'which', 'who', 'with', 'you',
+    'your', 'about', 'user', 'caller', 'customer'
+})
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords."""
+    return [token for token in _TOKEN.findall((text or '').lower()) if token not in STOPWORDS]
+
+
+def memory_text(memory: Any) -> str:
+    return memory.get('memory', '') if isinstance(memory, dict) else str(memory)
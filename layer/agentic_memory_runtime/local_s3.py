@@ -0,0 +1,214 @@
+"""
+Local filesystem stand-in for the S3 client
+
+Implements the subset of the boto3 S3 client API the handlers use, so the
+whole pipeline (archives, caller profiles and versions, audio uploads, the
+conversation index) can run against a directory instead of a bucket. Enabled
+by setting LOCAL_S3_PATH (see clients.get_s3_client).
+
+Objects live at {root}/{bucket}/{key}; their content type, user metadata and
+ETag live in a JSON sidecar at {root}/.meta/{bucket}/{key}.json. Writes are
+atomic (temporary file renamed into place). Errors carry the same
+e.response['Error']['Code'] values botocore uses (NoSuchKey, 404,
+PreconditionFailed, NoSuchUpload), so callers' error handling is exercised
+unchanged.
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+
+class LocalS3Error(Exception):
+    """Error shaped like botocore's ClientError."""
+
+    def __init__(self, code: str, message: str, operation: str):
+        super().__init__(f"An error occurred ({code}) when calling the {operation} operation: {message}")
+        self.response = {'Error': {'Code': code, 'Message': message}}
+
+
+def _body_bytes(body: Any) -> bytes:
+    if body is None:
+        return b''
+    if isinstance(body, str):
+        return body.encode('utf-8')
+    if hasattr(body, 'read'):
+        return body.read()
+    return bytes(body)
+
+
+class LocalS3Client:
+    """
+    S3 client backed by a local directory.
+
+    Args:
+        root: Directory holding one subdirectory per bucket
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._uploads: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, bucket: str, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, bucket, key))
+        if not path.startswith(os.path.normpath(os.path.join(self.root, bucket)) + os.sep):
+            raise LocalS3Error('InvalidKey', f"Invalid key: {key}", 'PutObject')
+        return path
+
+    def _meta_path(self, bucket: str, key: str) -> str:
+        return os.path.join(self.root, '.meta', bucket, key) + '.json'
+
+    def _write(self, path: str, data: bytes) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    def _store(self, bucket: str, key: str, data: bytes, content_type: Optional[str],
+               metadata: Optional[Dict[str, str]], etag: Optional[str] = None) -> str:
+        etag = etag or f'"{hashlib.md5(data).hexdigest()}"'
+        meta = {
+            'ContentType': content_type or 'binary/octet-stream',
+            'Metadata': dict(metadata or {}),
+            'ETag': etag,
+            'LastModified': datetime.now(timezone.utc).isoformat()
+        }
+        # Metadata first: an object without its sidecar would be listed with defaults
+        self._write(self._meta_path(bucket, key), json.dumps(meta).encode('utf-8'))
+        self._write(self._path(bucket, key), data)
+        return etag
+
+    def _head(self, bucket: str, key: str, operation: str) -> Dict[str, Any]:
+        path = self._path(bucket, key)
+        if not os.path.isfile(path):
+            code = 'NoSuchKey' if operation == 'GetObject' else '404'
+            raise LocalS3Error(code, f"Not Found: {key}", operation)
+        try:
+            with open(self._meta_path(bucket, key), 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            meta = {'ContentType': 'binary/octet-stream', 'Metadata': {}, 'ETag': '""',
+                    'LastModified': datetime.fromtimestamp(os.path.getmtime(path), timezone.utc).isoformat()}
+        return {
+            'ContentLength': os.path.getsize(path),
+            'ContentType': meta['ContentType'],
+            'Metadata': meta['Metadata'],
+            'ETag': meta['ETag'],
+            'LastModified': datetime.fromisoformat(meta['LastModified'])
+        }
+
+    def put_object(self, Bucket: str, Key: str, Body: Any = None, ContentType: Optional[str] = None,
+                   Metadata: Optional[Dict[str, str]] = None, IfNoneMatch: Optional[str] = None,
+                   **kwargs: Any) -> Dict[str, Any]:
+        data = _body_bytes(Body)
+        with self._lock:
+            if IfNoneMatch == '*' and os.path.isfile(self._path(Bucket, Key)):
+                raise LocalS3Error('PreconditionFailed', f"Object exists: {Key}", 'PutObject')
+            return {'ETag': self._store(Bucket, Key, data, ContentType, Metadata)}
+
+    def get_object(self, Bucket: str, Key: str, **kwargs: Any) -> Dict[str, Any]:
+        head = self._head(Bucket, Key, 'GetObject')
+        with open(self._path(Bucket, Key), 'rb') as f:
+            head['Body'] = io.BytesIO(f.read())
+        return head
+
+    def head_object(self, Bucket: str, Key: str, **kwargs: Any) -> Dict[str, Any]:
+        return self._head(Bucket, Key, 'HeadObject')
+
+    def delete_object(self, Bucket: str, Key: str, **kwargs: Any) -> Dict[str, Any]:
+        # Like S3, deleting a missing key succeeds
+        for path in (self._path(Bucket, Key), self._meta_path(Bucket, Key)):
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+        return {}
+
+    def copy_object(self, Bucket: str, Key: str, CopySource: Dict[str, str], MetadataDirective: str = 'COPY',
+                    Metadata: Optional[Dict[str, str]] = None, ContentType: Optional[str] = None,
+                    **kwargs: Any) -> Dict[str, Any]:
+        source = self._head(CopySource['Bucket'], CopySource['Key'], 'CopyObject')
+        with open(self._path(CopySource['Bucket'], CopySource['Key']), 'rb') as f:
+            data = f.read()
+        if MetadataDirective != 'REPLACE':
+            Metadata, ContentType = source['Metadata'], source['ContentType']
+        with self._lock:
+            etag = self._store(Bucket, Key, data, ContentType, Metadata)
+        return {'CopyObjectResult': {'ETag': etag}}
+
+    def list_objects_v2(self, Bucket: str, Prefix: str = '', MaxKeys: int = 1000,
+                        ContinuationToken: Optional[str] = None, StartAfter: Optional[str] = None,
+                        **kwargs: Any) -> Dict[str, Any]:
+        bucket_root = os.path.join(self.root, Bucket)
+        keys: List[str] = []
+        for directory, _, files in os.walk(bucket_root):
+            for name in files:
+                if name.startswith('.') and name.endswith('.tmp'):
+                    continue
+                key = os.path.relpath(os.path.join(directory, name), bucket_root).replace(os.sep, '/')
+                after = ContinuationToken or StartAfter
+                if key.startswith(Prefix) and (after is None or key > after):
+                    keys.append(key)
+        keys.sort()
+
+        page, truncated = keys[:MaxKeys], len(keys) > MaxKeys
+        contents = []
+        for key in page:
+            head = self._head(Bucket, key, 'ListObjectsV2')
+            contents.append({'Key': key, 'Size': head['ContentLength'], 'ETag': head['ETag'],
+                             'LastModified': head['LastModified']})
+        response = {'Contents': contents, 'KeyCount': len(contents), 'IsTruncated': truncated, 'Prefix': Prefix}
+        if truncated:
+            response['NextContinuationToken'] = page[-1]
+        return response
+
+    def create_multipart_upload(self, Bucket: str, Key: str, ContentType: Optional[str] = None,
+                                Metadata: Optional[Dict[str, str]] = None, **kwargs: Any) -> Dict[str, Any]:
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self._uploads[upload_id] = {'Bucket': Bucket, 'Key': Key, 'ContentType': ContentType,
+                                        'Metadata': Metadata, 'parts': {}}
+        return {'UploadId': upload_id, 'Bucket': Bucket, 'Key': Key}
+
+    def _upload(self, upload_id: str, operation: str) -> Dict[str, Any]:
+        upload = self._uploads.get(upload_id)
+        if upload is None:
+            raise LocalS3Error('NoSuchUpload', f"Unknown upload: {upload_id}", operation)
+        return upload
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: Any,
+                    **kwargs: Any) -> Dict[str, Any]:
+        data = _body_bytes(Body)
+        with self._lock:
+            self._upload(UploadId, 'UploadPart')['parts'][PartNumber] = data
+        return {'ETag': f'"{hashlib.md5(data).hexdigest()}"'}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: Dict[str, Any],
+                                  **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            upload = self._upload(UploadId, 'CompleteMultipartUpload')
+            numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+            data = b''.join(upload['parts'][n] for n in numbers)
+            etag = f'"{hashlib.md5(data).hexdigest()}-{len(numbers)}"'
+            self._store(Bucket, Key, data, upload['ContentType'], upload['Metadata'], etag=etag)
+            del self._uploads[UploadId]
+        return {'Bucket': Bucket, 'Key': Key, 'ETag': etag}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str, **kwargs: Any) -> Dict[str, Any]:
+        with self._lock:
+            self._upload(UploadId, 'AbortMultipartUpload')
+            del self._uploads[UploadId]
+        return {}
@@ -0,0 +1,120 @@
+"""
+Bounded memory fetch
+
+The conversation-initiation context only uses the first few factual and
+semantic memories plus a memory count, so fetching a caller's entire history
+makes latency and payload size grow with every call they make. These helpers
+page through Mem0's v2 get_all and stop as soon as enough memories of each
+type have been seen; the total count comes from the paginated response.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Tuple
+
+logger = logging.getLogger()
+
+
+def _page_results(response: Any) -> Tuple[List[Any], Any, bool]:
+    """
+    Normalize a get_all response.
+
+    Returns:
+        (results, count or None, has_next_page)
+    """
+    if isinstance(response, dict):
+        return response.get('results', []) or [], response.get('count'), bool(response.get('next'))
+    # Unpaginated list: everything was returned at once
+    return response or [], len(response or []), False
+
+
+def _memory_type(memory: Any) -> str:
+    metadata = (memory.get('metadata') or {}) if isinstance(memory, dict) else {}
+    return 'semantic' if metadata.get('type') == 'semantic' else 'factual'
+
+
+def fetch_memories_paged(
+    client: Any,
+    caller_id: str,
+    want_factual: int,
+    want_semantic: int,
+    page_size: int = 20,
+    max_pages: int = 5
+) -> Tuple[List[Any], int]:
+    """
+    Page through a caller's memories until enough of each type are collected.
+
+    Memories keep get_all order, so the first want_factual factual and first
+    want_semantic semantic memories are the same ones an unbounded fetch
+    would yield (untyped memories count as factual, as in split_memories).
+
+    Args:
+        client: Mem0 MemoryClient
+        caller_id: Mem0 user_id
+        want_factual: Factual memories needed
+        want_semantic: Semantic memories needed
+        page_size: Memories per page
+        max_pages: Hard cap on requests
+
+    Returns:
+        (fetched memories, total memory count)
+    """
+    memories = []
+    seen = {'factual': 0, 'semantic': 0}
+    total = 0
+
+    for page in range(1, max_pages + 1):
+        response = client.get_all(version='v2', filters={'user_id': caller_id}, page=page, page_size=page_size)
+        results, count, has_next = _page_results(response)
+        memories.extend(results)
+        for memory in results:
+            seen[_memory_type(memory)] += 1
+        total = count if count is not None else len(memories)
+
+        if not has_next or (seen['factual'] >= want_factual and seen['semantic'] >= want_semantic):
+            break
+
+    logger.info(f"Bounded fetch for {caller_id}: {len(memories)} of {total} memories in {page} page(s)")
+    return memories, total
+
+
+def fetch_memories_by_type(
+    client: Any,
+    caller_id: str,
+    want_factual: int,
+    want_semantic: int
+) -> Tuple[List[Any], int]:
+    """
+    Fetch the first memories of each type with metadata.type filters, concurrently.
+
+    One request per type, each a single page of exactly the size needed. Only
+    memories tagged by post_call (metadata.type factual/semantic) are seen.
+
+    Args:
+        client: Mem0 MemoryClient
+        caller_id: Mem0 user_id
+        want_factual: Factual memories needed
+        want_semantic: Semantic memories needed
+
+    Returns:
+        (fetched memories, total count of typed memories)
+    """
+    def fetch(memory_type: str, size: int) -> Tuple[List[Any], int]:
+        response = client.get_all(
+            version='v2',
+            filters={'AND': [{'user_id': caller_id}, {'metadata': {'type': memory_type}}]},
+            page=1,
+            page_size=max(1, size)
+        )
+        results, count, _ = _page_results(response)
+        return results[:size], count if count is not None else len(results)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        factual = executor.submit(fetch, 'factual', want_factual)
+        semantic = executor.submit(fetch, 'semantic', want_semantic)
+        factual_memories, factual_count = factual.result()
+        semantic_memories, semantic_count = semantic.result()
+
+    total = factual_count + semantic_count
+    logger.info(f"Filtered fetch for {caller_id}: {len(factual_memories)}+{len(semantic_memories)} of {total} memories")
+    return factual_memories + semantic_memories, total
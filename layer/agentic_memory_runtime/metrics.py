@@ -0,0 +1,103 @@
+"""
+CloudWatch metrics via Embedded Metric Format (EMF)
+
+Lambda forwards stdout to CloudWatch Logs, which extracts EMF records into
+metrics asynchronously: no PutMetricData call and no latency on the handler.
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from agentic_memory_runtime.config import get_config
+
+METRICS_NAMESPACE = get_config().metrics_namespace
+
+
+def emit_metrics(
+    metrics: Dict[str, float],
+    dimensions: Optional[Dict[str, str]] = None,
+    unit: str = 'Count',
+    namespace: str = METRICS_NAMESPACE,
+    units: Optional[Dict[str, str]] = None
+) -> Dict:
+    """
+    Print one EMF record to stdout.
+
+    Args:
+        metrics: Metric name -> value
+        dimensions: Dimension name -> value (e.g. {'Function': 'client_data'})
+        unit: CloudWatch unit applied to every metric in the record
+        namespace: CloudWatch namespace
+        units: Per-metric units overriding unit
+
+    Returns:
+        The record that was printed
+    """
+    dimensions = dimensions or {}
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': namespace,
+                'Dimensions': [list(dimensions)],
+                'Metrics': [{'Name': name, 'Unit': (units or {}).get(name, unit)} for name in metrics]
+            }]
+        },
+        **dimensions,
+        **metrics
+    }
+    print(json.dumps(record))
+    return record
+
+
+class MetricsRecorder:
+    """
+    Collects counts and timings during an invocation and emits them as one EMF record.
+
+    Thread-safe, so concurrent tasks can record into the same recorder.
+    """
+
+    def __init__(self, dimensions: Optional[Dict[str, str]] = None, namespace: str = METRICS_NAMESPACE):
+        self.dimensions = dimensions or {}
+        self.namespace = namespace
+        self._values: Dict[str, float] = {}
+        self._units: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def put(self, name: str, value: float, unit: str = 'Count') -> None:
+        """Set a metric, replacing any earlier value."""
+        with self._lock:
+            self._values[name] = value
+            self._units[name] = unit
+
+    def count(self, name: str, value: float = 1) -> None:
+        """Add to a Count metric."""
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+            self._units[name] = 'Count'
+
+    @contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        """Record the duration of the block as a Milliseconds metric (also on error)."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.put(name, round((time.perf_counter() - start) * 1000, 3), 'Milliseconds')
+
+    def flush(self) -> Optional[Dict]:
+        """
+        Emit everything recorded so far and reset.
+
+        Returns:
+            The record that was printed, or None if nothing was recorded
+        """
+        with self._lock:
+            values, units = self._values, self._units
+            self._values, self._units = {}, {}
+        if not values:
+            return None
+        return emit_metrics(values, self.dimensions, namespace=self.namespace, units=units)
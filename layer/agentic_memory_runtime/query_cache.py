@@ -0,0 +1,97 @@
+"""
+Retrieve query-result cache
+
+Agents tend to repeat near-identical lookups during one call, and every Mem0
+search is dead air on the line. Results are cached under (caller, normalized
+query, limit) in the container's TTLCache and, optionally, in a shared KVStore
+so other warm containers can serve them too.
+
+Every entry carries the caller's version stamp (see caller_version), which
+post_call bumps after writing new memories; an entry computed under another
+stamp is a miss, so post-call writes invalidate a caller's cached results in
+every container without enumerating them.
+"""
+
+import hashlib
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from agentic_memory_runtime.caller_version import normalize_caller_id
+from agentic_memory_runtime.kv_store import KVStore
+from agentic_memory_runtime.ttl_cache import TTLCache
+
+logger = logging.getLogger()
+
+_NON_WORD = re.compile(r"[^\w\s']+")
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query for cache keys.
+
+    Case, punctuation and whitespace differences do not change the key:
+    'What did they say about travel?' == 'what did they say  about travel'.
+    """
+    return _WHITESPACE.sub(' ', _NON_WORD.sub(' ', (query or '').lower())).strip()
+
+
+def query_cache_key(user_id: str, query: str, limit: int) -> str:
+    """Cache key for a search; hashed so it is safe as a file name or DynamoDB key."""
+    raw = f"{normalize_caller_id(user_id)}\x1f{limit}\x1f{normalize_query(query)}"
+    return 'query:' + hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class QueryCache:
+    """Two-level (container, shared) cache of search results with version stamps."""
+
+    def __init__(self, local: TTLCache, shared: Optional[KVStore] = None):
+        self.local = local
+        self.shared = shared
+        self._shared_counters = {'shared_hits': 0, 'shared_errors': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.local.enabled
+
+    def get(self, key: str, version: Optional[str]) -> Optional[List[Any]]:
+        """
+        Look up cached memories for key.
+
+        Returns:
+            Memories, or None on a miss (or when the entry has another version stamp)
+        """
+        memories = self.local.get(key, version)
+        if memories is not None or self.shared is None:
+            return memories
+
+        try:
+            entry = self.shared.get(key)
+        except Exception as e:
+            logger.warning(f"Shared query cache read failed: {str(e)}")
+            self._shared_counters['shared_errors'] += 1
+            return None
+
+        if isinstance(entry, dict) and entry.get('version') == version:
+            self._shared_counters['shared_hits'] += 1
+            self.local.put(key, entry['memories'], version)
+            return entry['memories']
+        return None
+
+    def put(self, key: str, memories: List[Any], version: Optional[str]) -> None:
+        """Cache memories for key in both levels (shared write failures are logged, not raised)."""
+        self.local.put(key, memories, version)
+        if self.shared is None or not self.enabled:
+            return
+        try:
+            self.shared.put(key, {'version': version, 'memories': memories}, self.local.ttl_seconds)
+        except Exception as e:
+            logger.warning(f"Shared query cache write failed: {str(e)}")
+            self._shared_counters['shared_errors'] += 1
+
+    def drain_counters(self) -> Dict[str, int]:
+        """Local TTLCache counters plus shared-level hits/errors since the last call."""
+        counters = {**self.local.drain_counters(), **self._shared_counters}
+        self._shared_counters = {'shared_hits': 0, 'shared_errors': 0}
+        return counters
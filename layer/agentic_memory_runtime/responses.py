@@ -0,0 +1,39 @@
+"""
+API Gateway proxy responses
+"""
+
+import json
+from typing import Any, Dict, Optional
+
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
+# Conversation initiation responses are also fetched from the browser widget
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,X-Workspace-Key',
+    'Access-Control-Allow-Methods': 'POST,OPTIONS'
+}
+
+
+def json_response(status_code: int, body: Any, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Build a JSON API Gateway proxy response.
+
+    Args:
+        status_code: HTTP status code
+        body: JSON-serializable response body
+        headers: Extra headers, added to Content-Type
+
+    Returns:
+        {'statusCode', 'headers', 'body'}
+    """
+    return {
+        'statusCode': status_code,
+        'headers': {**JSON_HEADERS, **(headers or {})},
+        'body': json.dumps(body)
+    }
+
+
+def error_response(status_code: int, message: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """JSON response with body {'error': message}."""
+    return json_response(status_code, {'error': message}, headers)
@@ -0,0 +1,133 @@
+"""
+Shared HTTP transport for the Mem0 API
+
+MemoryClient accepts an httpx.Client; every handler passes it the one built
+here (see clients.get_mem0_client) instead of letting MemoryClient create its
+own with a 300s timeout and default pool limits. The transport:
+
+- keeps up to HTTP_MAX_CONNECTIONS connections, all of them eligible for
+  keep-alive by default, so a burst of concurrent adds or searches does not
+  close connections it will need again on the next burst
+- negotiates HTTP/2 when the h2 package is installed (HTTP2_ENABLED), so
+  concurrent requests multiplex over one TLS connection
+- bounds connect, read/write and pool-wait time separately
+- counts requests, new connections, TLS handshakes and connect time through
+  httpcore's trace hook, which handlers publish as Mem0* metrics
+
+httpx is imported only when the client is built, so importing this module
+costs nothing at cold start.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from agentic_memory_runtime.config import RuntimeConfig
+from agentic_memory_runtime.metrics import MetricsRecorder
+
+COUNTERS = ('requests', 'connections', 'tls_handshakes', 'http2_requests', 'connect_failures')
+
+
+def http2_available() -> bool:
+    """True if httpx can negotiate HTTP/2 (the optional h2 package is installed)."""
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class ConnectionStats:
+    """
+    Connection reuse counters for an httpx client.
+
+    trace() is installed as the httpcore trace extension of every request and
+    runs on the requesting thread, so per-thread phase start times give the
+    time spent connecting. Thread-safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = dict.fromkeys(COUNTERS, 0)
+        self._connect_ms = 0.0
+        self._local = threading.local()
+
+    def trace(self, event_name: str, info: Dict[str, Any]) -> None:
+        """httpcore trace callback ('connection.connect_tcp.started', 'http2.send_request_headers.started', ...)."""
+        if event_name in ('connection.connect_tcp.started', 'connection.start_tls.started'):
+            self._local.phase_start = time.perf_counter()
+            return
+        if event_name in ('connection.connect_tcp.complete', 'connection.start_tls.complete'):
+            elapsed_ms = (time.perf_counter() - getattr(self._local, 'phase_start', time.perf_counter())) * 1000
+            with self._lock:
+                self._connect_ms += elapsed_ms
+                self._counters['connections' if 'connect_tcp' in event_name else 'tls_handshakes'] += 1
+            return
+        if event_name in ('connection.connect_tcp.failed', 'connection.start_tls.failed'):
+            with self._lock:
+                self._counters['connect_failures'] += 1
+            return
+        if event_name.endswith('.send_request_headers.started'):
+            with self._lock:
+                self._counters['requests'] += 1
+                if event_name.startswith('http2.'):
+                    self._counters['http2_requests'] += 1
+
+    def drain_counters(self) -> Dict[str, float]:
+        """
+        Return the counters accumulated since the last drain and reset them.
+
+        Adds reused_requests (requests that did not open a connection) and
+        connect_ms (TCP connect + TLS handshake time).
+        """
+        with self._lock:
+            counters, connect_ms = self._counters, self._connect_ms
+            self._counters, self._connect_ms = dict.fromkeys(COUNTERS, 0), 0.0
+        counters['reused_requests'] = max(0, counters['requests'] - counters['connections'])
+        counters['connect_ms'] = round(connect_ms, 3)
+        return counters
+
+    def put_metrics(self, metrics: MetricsRecorder, prefix: str = 'Mem0') -> None:
+        """Drain into metrics as e.g. Mem0Requests, Mem0Connections, Mem0ConnectMs (nothing if idle)."""
+        counters = self.drain_counters()
+        if not counters['requests'] and not counters['connect_failures']:
+            return
+        for name, value in counters.items():
+            unit = 'Milliseconds' if name.endswith('_ms') else 'Count'
+            metrics.put(f"{prefix}{name.title().replace('_', '')}", value, unit)
+
+
+# Shared by the process-wide Mem0 client
+mem0_connection_stats = ConnectionStats()
+
+
+def build_http_client(config: RuntimeConfig, stats: Optional[ConnectionStats] = mem0_connection_stats) -> Any:
+    """
+    httpx client for the Mem0 API with a bounded keep-alive pool.
+
+    Args:
+        config: Pool size, keep-alive, HTTP/2 and timeout settings
+        stats: Receives the connection trace of every request (None disables)
+    """
+    import httpx
+
+    event_hooks = {}
+    if stats is not None:
+        def trace_request(request: Any) -> None:
+            request.extensions['trace'] = stats.trace
+        event_hooks['request'] = [trace_request]
+
+    return httpx.Client(
+        http2=config.http2_enabled and http2_available(),
+        limits=httpx.Limits(
+            max_connections=config.http_max_connections,
+            max_keepalive_connections=config.http_max_keepalive_connections,
+            keepalive_expiry=config.http_keepalive_expiry_seconds
+        ),
+        timeout=httpx.Timeout(
+            config.mem0_timeout_seconds,
+            connect=config.http_connect_timeout_seconds,
+            pool=config.http_pool_timeout_seconds
+        ),
+        event_hooks=event_hooks
+    )
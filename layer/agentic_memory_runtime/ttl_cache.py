@@ -0,0 +1,97 @@
+"""
+In-process LRU cache with TTL and version stamps
+
+Lives at module level in a handler so entries survive across invocations of a
+warm Lambda container. Each entry remembers the version stamp it was computed
+under; a lookup with a different stamp is treated as stale. Expired and stale
+entries are kept (until replaced or evicted) so peek() can still serve them as
+a last-known-good fallback.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire after ttl_seconds."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = self._zero_counters()
+
+    @staticmethod
+    def _zero_counters() -> Dict[str, int]:
+        return {'hits': 0, 'misses': 0, 'expired': 0, 'stale': 0, 'evictions': 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def get(self, key: str, version: Optional[str] = None) -> Optional[Any]:
+        """
+        Look up key.
+
+        Args:
+            key: Cache key
+            version: Current version stamp; entries stored under another stamp are stale
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+
+            value, entry_version, expires_at = entry
+            if self._clock() >= expires_at:
+                reason = 'expired'
+            elif entry_version != version:
+                reason = 'stale'
+            else:
+                self._entries.move_to_end(key)
+                self._counters['hits'] += 1
+                return value
+
+            self._counters[reason] += 1
+            self._counters['misses'] += 1
+            return None
+
+    def peek(self, key: str) -> Optional[Any]:
+        """Return the entry for key even if expired or stale, without touching counters or LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def put(self, key: str, value: Any, version: Optional[str] = None) -> None:
+        """Store value under key, evicting the least recently used entries past max_entries."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (value, version, self._clock() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def invalidate(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def drain_counters(self) -> Dict[str, int]:
+        """Return counters accumulated since the last call and reset them."""
+        with self._lock:
+            counters, self._counters = self._counters, self._zero_counters()
+        counters['size'] = len(self._entries)
+        return counters
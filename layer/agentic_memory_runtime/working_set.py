@@ -0,0 +1,184 @@
+"""
+Per-call retrieval working set
+
+After ingesting a call, post_call publishes the caller's memories (the ones it
+fetched to rebuild the caller profile) plus a small inverted index (query term
+-> postings) to a shared KVStore under the caller's 'latest' key, once Mem0
+has extracted the memories of that call. At conversation initiation
+client_data copies the latest set under the new call's key (caller_id and
+call_sid) with a TTL of about a call's length. During the call retrieve
+answers tool lookups from that working set with BM25 over the index and only
+searches Mem0 when nothing in it scores above a floor, saving a remote round
+trip per tool call.
+
+A set records the last ingested conversation it includes. Readers compare it
+with the caller's version stamp (see caller_version) and ignore a set that
+predates the last ingested call, as client_data does with caller profiles.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from agentic_memory_runtime.caller_version import normalize_caller_id
+from agentic_memory_runtime.kv_store import KVStore
+from agentic_memory_runtime.lexical import memory_text, tokenize
+
+
+# Bump when the working set layout changes; readers ignore other versions
+WORKING_SET_SCHEMA_VERSION = 1
+
+# Memory fields kept in the working set (what retrieve returns to the agent)
+MEMORY_FIELDS = ('id', 'memory', 'metadata', 'created_at', 'updated_at')
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def working_set_key(caller_id: str, call_sid: Optional[str] = None) -> str:
+    """Store key of a call's working set, or of the caller's latest one when call_sid is None."""
+    return f"working-set:{normalize_caller_id(caller_id)}:{call_sid or 'latest'}"
+
+
+def build_working_set(caller_id: str, call_sid: Optional[str], memories: List[Any], max_memories: int = 200,
+                      conversation_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build a working set from a caller's Mem0 memories.
+
+    Args:
+        caller_id: Caller's phone number
+        call_sid: Call the set was built for
+        memories: Mem0 get_all results (first max_memories are kept)
+        max_memories: Cap keeping the item well under store size limits
+        conversation_id: Last ingested conversation whose memories are included
+
+    Returns:
+        {'schema_version', 'caller_id', 'call_sid', 'conversation_id', 'built_at',
+        'memories', 'lengths', 'postings'} where postings maps each term to
+        [[memory index, term frequency], ...]
+    """
+    kept = []
+    for memory in memories or []:
+        if isinstance(memory, dict) and memory.get('memory'):
+            kept.append({field: memory[field] for field in MEMORY_FIELDS if field in memory})
+            if len(kept) >= max_memories:
+                break
+
+    postings: Dict[str, List[List[int]]] = {}
+    lengths = []
+    for i, memory in enumerate(kept):
+        tokens = tokenize(memory_text(memory))
+        lengths.append(len(tokens))
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            postings.setdefault(token, []).append([i, count])
+
+    return {
+        'schema_version': WORKING_SET_SCHEMA_VERSION,
+        'caller_id': caller_id,
+        'call_sid': call_sid,
+        'conversation_id': conversation_id,
+        'built_at': datetime.utcnow().isoformat(),
+        'memories': kept,
+        'lengths': lengths,
+        'postings': postings
+    }
+
+
+def search_working_set(working_set: Dict[str, Any], query: str, limit: int, min_score: float = 0.0) -> List[Any]:
+    """
+    BM25 search over a working set's index.
+
+    Args:
+        working_set: build_working_set() output
+        query: Search query
+        limit: Maximum memories returned
+        min_score: BM25 score a memory needs to be returned; a query that only
+            matches common terms (low IDF) then misses instead of answering
+            with weak hits
+
+    Returns:
+        Memories containing at least one query term and scoring at least
+        min_score, best first; empty on a miss
+    """
+    # Only retrieve searches; client_data builds sets without paying numpy's import at init
+    import numpy as np
+
+    memories = working_set.get('memories') or []
+    n_docs = len(memories)
+    postings = working_set.get('postings') or {}
+    terms = [term for term in dict.fromkeys(tokenize(query)) if term in postings]
+    if not n_docs or not terms:
+        return []
+
+    lengths = np.asarray(working_set['lengths'], dtype=np.float64)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / (lengths.mean() or 1.0))
+    scores = np.zeros(n_docs)
+    for term in terms:
+        docs, tf = np.asarray(postings[term], dtype=np.int64).T
+        idf = np.log1p((n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+        scores += np.bincount(docs, weights=idf * tf * (BM25_K1 + 1) / (tf + norm[docs]), minlength=n_docs)
+
+    matched = np.flatnonzero((scores > 0) & (scores >= min_score))
+    order = matched[np.argsort(-scores[matched], kind='stable')][:limit]
+    return [memories[i] for i in order]
+
+
+def working_set_is_current(working_set: Dict[str, Any], stamp: Optional[Dict[str, Optional[str]]]) -> bool:
+    """
+    Whether a working set includes the last call post_call ingested.
+
+    Args:
+        working_set: Stored working set
+        stamp: read_caller_stamp() result (None: no call ingested)
+
+    Returns:
+        False if the stamp records a call the set was not built from
+    """
+    if not stamp or not stamp.get('conversation_id'):
+        return True
+    return working_set.get('conversation_id') == stamp['conversation_id']
+
+
+def publish_working_set(store: KVStore, working_set: Dict[str, Any], ttl_seconds: float) -> None:
+    """Write a working set under its call key and the caller's latest key."""
+    store.put(working_set_key(working_set['caller_id'], working_set['call_sid']), working_set, ttl_seconds)
+    if working_set['call_sid']:
+        store.put(working_set_key(working_set['caller_id']), working_set, ttl_seconds)
+
+
+def load_working_set(store: KVStore, caller_id: str, call_sid: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Read the working set for a call (or the caller's latest one).
+
+    Returns:
+        The working set, or None if there is none (or it has an unknown schema version)
+    """
+    working_set = store.get(working_set_key(caller_id, call_sid))
+    if not isinstance(working_set, dict) or working_set.get('schema_version') != WORKING_SET_SCHEMA_VERSION:
+        return None
+    return working_set
+
+
+def publish_call_working_set(store: KVStore, caller_id: str, call_sid: str,
+                             stamp: Optional[Dict[str, Optional[str]]], ttl_seconds: float) -> Optional[Dict[str, Any]]:
+    """
+    Copy the caller's latest working set under a new call's key.
+
+    Args:
+        store: Working set store
+        caller_id: Caller's phone number
+        call_sid: Call starting now
+        stamp: The caller's read_caller_stamp(); a latest set predating it is not copied
+        ttl_seconds: Lifetime of the call's copy (about a call's length)
+
+    Returns:
+        The call's working set, or None if the caller has no current one
+    """
+    working_set = load_working_set(store, caller_id)
+    if working_set is None or not working_set_is_current(working_set, stamp):
+        return None
+    working_set = {**working_set, 'call_sid': call_sid}
+    store.put(working_set_key(caller_id, call_sid), working_set, ttl_seconds)
+    return working_set
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Shared helpers for the local benchmark scripts.
+
+Loads Lambda handlers with dummy credentials and replaces the remote services
+with in-process stand-ins that simulate network latency, so benchmarks run
+without AWS or Mem0 access.
+"""
+
+import importlib.util
+import io
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List
+from unittest import mock
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+TEST_DATA_DIR = os.path.join(PROJECT_ROOT, 'test_data')
+LAYER_DIR = os.path.join(PROJECT_ROOT, 'layer')
+
+DUMMY_ENV = {
+    'MEM0_API_KEY': 'bench-key',
+    'MEM0_ORG_ID': 'bench-org',
+    'MEM0_PROJECT_ID': 'bench-project',
+    'ELEVENLABS_HMAC_KEY': 'bench-hmac-key',
+    'ELEVENLABS_WORKSPACE_KEY': 'bench-workspace-key',
+    'S3_BUCKET_NAME': 'bench-bucket',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+}
+
+
+def load_handler(function_name: str, **env: str) -> Any:
+    """
+    Import src/<function_name>/handler.py under a unique module name.
+
+    Args:
+        function_name: client_data, retrieve or post_call
+        **env: Extra environment variables set before import
+    """
+    for key, value in {**DUMMY_ENV, **env}.items():
+        os.environ[key] = value
+
+    handler_dir = os.path.join(PROJECT_ROOT, 'src', function_name)
+    for path in (handler_dir, LAYER_DIR):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    spec = importlib.util.spec_from_file_location(f'{function_name}_handler', os.path.join(handler_dir, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch('mem0.MemoryClient'):
+        spec.loader.exec_module(module)
+
+    # Handlers log at INFO per request; keep benchmark output readable
+    logging.getLogger().setLevel(logging.CRITICAL)
+    return module
+
+
+class SimulatedMemoryClient:
+    """Mem0 stand-in whose calls sleep for a fixed latency."""
+
+    def __init__(self, add_latency: float = 0.0, search_latency: float = 0.0, memories: List[Dict] = None):
+        self.add_latency = add_latency
+        self.search_latency = search_latency
+        self.memories = memories or []
+        self.add_calls = 0
+        self._lock = threading.Lock()
+
+    def add(self, messages, **kwargs):
+        time.sleep(self.add_latency)
+        with self._lock:
+            self.add_calls += 1
+        return {'results': []}
+
+    def search(self, query, **kwargs):
+        time.sleep(self.search_latency)
+        return {'results': self.memories[:kwargs.get('limit', 10)]}
+
+    def get_all(self, **kwargs):
+        time.sleep(self.search_latency)
+        return {'results': list(self.memories)}
+
+
+class SimulatedS3:
+    """Dict-backed S3 stand-in whose calls sleep for a fixed latency."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.objects: Dict[str, bytes] = {}
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        time.sleep(self.latency)
+        data = Body.encode('utf-8') if isinstance(Body, str) else bytes(Body)
+        with self._lock:
+            self.objects[Key] = data
+            self.bytes_written += len(data)
+        return {}
+
+    def get_object(self, Bucket, Key, **kwargs):
+        time.sleep(self.latency)
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def list_test_conversations() -> List[str]:
+    """Paths of the real conversation payloads in test_data/."""
+    return sorted(
+        os.path.join(TEST_DATA_DIR, name)
+        for name in os.listdir(TEST_DATA_DIR)
+        if name.startswith('conv_') and name.endswith('.json')
+    )
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark archive codecs over the payloads in test_data/.
+
+Reports encoded size, encode/decode time and an estimated S3 PUT latency
+(fixed request overhead + size / upload bandwidth) for each codec. Pass
+--bucket to also time real PUTs against an S3 bucket.
+
+Usage:
+    python3 scripts/benchmark_archive_codec.py [--rounds 20] [--bandwidth-mbps 80] [--bucket my-bucket]
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.archive_codec import ARCHIVE_CODECS, decode_archive, encode_archive, put_json_archive, resolve_codec
+from bench_support import TEST_DATA_DIR, percentile
+
+PUT_OVERHEAD_MS = 15.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--bandwidth-mbps', type=float, default=80.0, help='Assumed Lambda->S3 upload bandwidth')
+    parser.add_argument('--bucket', help='Also time real PUTs to this bucket (under benchmark/archive-codec/)')
+    args = parser.parse_args()
+
+    s3_client = None
+    if args.bucket:
+        import boto3
+        s3_client = boto3.client('s3')
+
+    bytes_per_ms = args.bandwidth_mbps * 1024 * 1024 / 8 / 1000
+    codecs = [c for c in ARCHIVE_CODECS if resolve_codec(c) == c]
+
+    for path in sorted(glob.glob(os.path.join(TEST_DATA_DIR, '*.json'))):
+        with open(path) as f:
+            payload = json.load(f)
+        print(f"\n{os.path.basename(path)}")
+        print(f"  {'codec':<8}{'bytes':>10}{'ratio':>8}{'encode':>10}{'decode':>10}{'est. PUT':>10}{'real PUT p50':>14}")
+
+        baseline = None
+        for codec in codecs:
+            encode_ms, decode_ms = [], []
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                body, _ = encode_archive(payload, codec)
+                encode_ms.append((time.perf_counter() - start) * 1000)
+                start = time.perf_counter()
+                decode_archive(body)
+                decode_ms.append((time.perf_counter() - start) * 1000)
+
+            baseline = baseline or len(body)
+            est_put = PUT_OVERHEAD_MS + len(body) / bytes_per_ms + percentile(encode_ms, 50)
+
+            real = ''
+            if s3_client:
+                samples = []
+                for i in range(min(args.rounds, 5)):
+                    start = time.perf_counter()
+                    put_json_archive(s3_client, args.bucket, f"benchmark/archive-codec/{codec}/{i}.json", payload, {}, codec)
+                    samples.append((time.perf_counter() - start) * 1000)
+                real = f"{percentile(samples, 50):12.1f}ms"
+
+            print(f"  {codec:<8}{len(body):>10}{baseline / len(body):>7.1f}x"
+                  f"{percentile(encode_ms, 50):>8.2f}ms{percentile(decode_ms, 50):>8.2f}ms{est_put:>8.1f}ms{real:>14}")
+
+
+if __name__ == '__main__':
+    main()
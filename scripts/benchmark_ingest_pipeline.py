@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark inline vs. queue-backed post-call ingestion locally.
+
+Replays the conversation files in test_data/ through the PostCall handler with
+simulated Mem0/S3 latency and a SQLite queue, then reports webhook-stage
+latency for both modes and worker throughput for queue mode.
+
+Usage:
+    python3 scripts/benchmark_ingest_pipeline.py [--webhooks 20] [--mem0-latency 0.5] [--s3-latency 0.02]
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import time
+
+from bench_support import SimulatedMemoryClient, SimulatedS3, list_test_conversations, load_handler, percentile
+
+
+def sign(body: str, key: str) -> str:
+    timestamp = int(time.time())
+    mac = hmac.new(key.encode('utf-8'), f"{timestamp}.{body}".encode('utf-8'), hashlib.sha256)
+    return f"t={timestamp},v0={mac.hexdigest()}"
+
+
+def run_webhooks(handler, bodies, hmac_key):
+    latencies = []
+    for body in bodies:
+        event = {'body': body, 'headers': {'elevenlabs-signature': sign(body, hmac_key)}}
+        start = time.perf_counter()
+        handler.lambda_handler(event, None)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def report(label, latencies):
+    print(f"{label:<28} p50={percentile(latencies, 50):8.1f}ms  p99={percentile(latencies, 99):8.1f}ms  "
+          f"total={sum(latencies) / 1000:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--webhooks', type=int, default=20)
+    parser.add_argument('--mem0-latency', type=float, default=0.5, help='Seconds per simulated Mem0 add')
+    parser.add_argument('--s3-latency', type=float, default=0.02, help='Seconds per simulated S3 request')
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'ingest.db')
+    handler = load_handler('post_call', INGEST_QUEUE_BACKEND='sqlite', INGEST_QUEUE_PATH=db_path)
+    hmac_key = os.environ['ELEVENLABS_HMAC_KEY']
+    handler.HMAC_KEY = hmac_key
+
+    conversations = [open(path).read() for path in list_test_conversations()]
+    bodies = [conversations[i % len(conversations)] for i in range(args.webhooks)]
+
+    print(f"Replaying {len(bodies)} webhooks (Mem0 add {args.mem0_latency}s, S3 {args.s3_latency}s)\n")
+
+    # Inline mode: webhook does all S3 and Mem0 work before returning
+    handler.client = SimulatedMemoryClient(add_latency=args.mem0_latency)
+    handler.s3_client = SimulatedS3(latency=args.s3_latency)
+    handler.INGEST_MODE = 'inline'
+    report('inline webhook', run_webhooks(handler, bodies, hmac_key))
+
+    # Queue mode: webhook persists + enqueues, worker drains afterwards
+    handler.client = SimulatedMemoryClient(add_latency=args.mem0_latency)
+    handler.s3_client = SimulatedS3(latency=args.s3_latency)
+    handler.INGEST_MODE = 'queue'
+    report('queue webhook', run_webhooks(handler, bodies, hmac_key))
+
+    start = time.perf_counter()
+    stats = handler.drain_ingest_queue(handler.get_ingest_queue(), retry_delay=0)
+    elapsed = time.perf_counter() - start
+    print(f"{'queue worker drain':<28} {stats['succeeded']}/{stats['processed']} jobs in {elapsed:.2f}s "
+          f"({stats['processed'] / elapsed:.1f} jobs/s, concurrency={handler.INGEST_WORKER_CONCURRENCY})")
+    print(json.dumps(stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass memory classifier against the original keyword scans.
+
+Times the stage between "memories split into facts/highlights" and "first
+message built". The reference is the previous code verbatim: separate
+any(word in fact.lower()) scans for tier, preference and interaction keywords,
+then a greeting that lowercases the chosen fields again. The new path is
+classify_profile_fields + generate_personalized_greeting with pre-classified
+features. Both must produce the same greeting for every synthetic caller.
+
+Usage:
+    python3 scripts/benchmark_memory_classifier.py [--rounds 2000] [--callers 200] [--seed 7]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.caller_profile import TOP_FACTS, TOP_HIGHLIGHTS, classify_profile_fields
+from bench_support import load_handler, percentile
+
+FACTS = [
+    'Has a premium account since 2021',
+    'Gold status member',
+    'VIP customer for five years',
+    'Prefers email updates over phone calls',
+    'Prefers phone communication',
+    'Likes detailed explanations',
+    'Needs a callback after 5pm',
+    'Lives in Minneapolis with two dogs',
+    'Drives a blue Volvo',
+]
+HIGHLIGHTS = [
+    'Asked a question about the previous bill',
+    'Reported a problem with the router last time',
+    'Talked about travelling to Norway',
+    'Made a request for a technician visit',
+    'Chatted about the weather',
+]
+
+
+def reference_greeting(caller_name, account_status, last_interaction, preferences):
+    """The original generate_personalized_greeting for a named returning caller."""
+    greeting = f"Hello {caller_name}!"
+    context_parts = []
+    if account_status:
+        if 'premium' in account_status.lower():
+            context_parts.append("I see you're a premium customer")
+        elif 'vip' in account_status.lower():
+            context_parts.append("thank you for being a VIP member")
+        elif any(tier in account_status.lower() for tier in ['gold', 'silver']):
+            context_parts.append(f"I see you have {account_status.lower()} status")
+    if last_interaction:
+        if 'inquiry' in last_interaction.lower() or 'question' in last_interaction.lower():
+            context_parts.append("following up on your recent inquiry")
+        elif 'issue' in last_interaction.lower() or 'problem' in last_interaction.lower():
+            context_parts.append("I hope we resolved your previous concern")
+    if preferences and len(context_parts) < 2:
+        pref_text = preferences[0].lower()
+        if 'email' in pref_text:
+            context_parts.append("I know you prefer email updates")
+        elif 'phone' in pref_text:
+            context_parts.append("I know you prefer phone communication")
+    if context_parts:
+        if len(context_parts) == 1:
+            greeting += f" {context_parts[0]}."
+        else:
+            greeting += f" {context_parts[0]}, and {context_parts[1]}."
+    return greeting + " How can I assist you today?"
+
+
+def reference_stage(top_facts, highlights):
+    account_status, last_interaction, preferences = None, None, []
+    for fact in top_facts:
+        if any(word in fact.lower() for word in ['premium', 'gold', 'silver', 'basic', 'vip']):
+            account_status = fact
+        if any(word in fact.lower() for word in ['prefer', 'likes', 'wants', 'needs']):
+            preferences.append(fact)
+    for conv in highlights:
+        if not last_interaction and any(word in conv.lower() for word in ['last time', 'previous', 'inquiry', 'issue', 'request']):
+            last_interaction = conv
+    return reference_greeting('Dana', account_status, last_interaction, preferences)
+
+
+def classified_stage(top_facts, highlights, greeting):
+    account_status, preferences, last_interaction, features = classify_profile_fields(top_facts, highlights)
+    return greeting('Dana', True, account_status, last_interaction, preferences, features=features)
+
+
+def time_ms(fn, callers, rounds):
+    samples = []
+    for i in range(rounds):
+        top_facts, highlights = callers[i % len(callers)]
+        start = time.perf_counter()
+        fn(top_facts, highlights)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentile(samples, 50), percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=2000)
+    parser.add_argument('--callers', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    greeting = load_handler('client_data').generate_personalized_greeting
+    rng = random.Random(args.seed)
+    callers = [
+        ([rng.choice(FACTS) for _ in range(TOP_FACTS)], [rng.choice(HIGHLIGHTS) for _ in range(TOP_HIGHLIGHTS)])
+        for _ in range(args.callers)
+    ]
+
+    for top_facts, highlights in callers:
+        assert classified_stage(top_facts, highlights, greeting) == reference_stage(top_facts, highlights)
+
+    # With a stored caller profile the classification already happened in post_call
+    stored = {id(f): classify_profile_fields(f, h) for f, h in callers}
+
+    def stored_stage(top_facts, highlights):
+        account_status, preferences, last_interaction, features = stored[id(top_facts)]
+        return greeting('Dana', True, account_status, last_interaction, preferences, features=features)
+
+    rows = [
+        ('reference', time_ms(reference_stage, callers, args.rounds)),
+        ('classifier', time_ms(lambda f, h: classified_stage(f, h, greeting), callers, args.rounds)),
+        ('stored profile', time_ms(stored_stage, callers, args.rounds)),
+    ]
+    print(f"{'':<16}{'p50':>10}{'p99':>10}{'speedup':>10}")
+    for label, (p50, p99) in rows:
+        print(f"{label:<16}{p50 * 1000:>8.1f}us{p99 * 1000:>8.1f}us{rows[0][1][0] / p50:>9.2f}x")
+    print(f"{args.callers} synthetic callers, identical greetings")
+
+
+if __name__ == '__main__':
+    main()
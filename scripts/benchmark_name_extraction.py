@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark extract_caller_name against the original per-call regex loop.
+
+Builds synthetic memory lists of 10 to 10k entries (mostly facts without a
+name, with the name-bearing memory placed last, the worst case) and checks
+both implementations return the same name before timing them.
+
+Usage:
+    python3 scripts/benchmark_name_extraction.py [--rounds 20] [--seed 7]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.caller_profile import extract_caller_name
+from bench_support import percentile
+
+SIZES = [10, 100, 1000, 10000]
+
+FILLER_MEMORIES = [
+    'Prefers email updates over phone calls',
+    'Has a premium account since 2021',
+    'Asked about the previous billing issue',
+    'Lives in Minneapolis with two dogs',
+    'Wants to upgrade the internet plan next month',
+    'Reported slow speeds in the evening',
+    'Travelled to Norway last summer',
+    'Interested in the family bundle',
+    'Needs a callback after 5pm on weekdays',
+    'Scheduled a technician visit for Tuesday',
+]
+
+
+def reference_extract_caller_name(all_memories):
+    """The original implementation, kept verbatim as the baseline."""
+    name_patterns = [
+        r"(?:name is|called|goes by)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"(?:user(?:'s)?\s+name:?\s*)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"(?:customer name:?\s*)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"(?:my name is|i am|i'm)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"user\s+name\s+is\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+is\s+(?:the\s+)?(?:user|customer|caller)",
+        r"user\s+([A-Z][a-z]+)",
+        r"customer\s+([A-Z][a-z]+)",
+    ]
+    for memory in all_memories:
+        for pattern in name_patterns:
+            match = re.search(pattern, memory, re.IGNORECASE)
+            if match:
+                name = match.group(1).strip()
+                if re.match(r"^[A-Za-z\s]{2,30}$", name) and len(name.split()) <= 3:
+                    excluded_words = {'wants', 'needs', 'help', 'account', 'update', 'email', 'phone', 'address', 'user', 'customer'}
+                    if name.lower() not in excluded_words:
+                        return name.title()
+    return None
+
+
+def synthetic_memories(size, rng):
+    memories = [f"{rng.choice(FILLER_MEMORIES)} ({i})" for i in range(size - 1)]
+    memories.append("The user's name is Dana Reyes")
+    return memories
+
+
+def time_ms(fn, memories, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(memories)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentile(samples, 50)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'memories':>10}{'reference p50':>16}{'compiled p50':>16}{'speedup':>10}")
+    for size in SIZES:
+        memories = synthetic_memories(size, rng)
+        expected = reference_extract_caller_name(memories)
+        assert extract_caller_name(memories) == expected, f"results differ at {size} memories"
+
+        reference = time_ms(reference_extract_caller_name, memories, args.rounds)
+        compiled = time_ms(extract_caller_name, memories, args.rounds)
+        print(f"{size:>10}{reference:>14.3f}ms{compiled:>14.3f}ms{reference / compiled:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark streaming vs. full parsing of post-call webhook bodies.
+
+For the conversation payloads in test_data/ (as sent: compact JSON in a
+{"type", "data"} envelope, and pretty-printed as stored) and a synthetic
+post_call_audio body, compares what post_call does before writing anything:
+
+- full: json.loads the body, then re-serialize the data object for the archive
+  (for audio: decode full_audio from the parsed string)
+- stream: scan_webhook the body, then take the raw data text for the archive
+  (for audio: decode full_audio straight from its span of the body)
+
+Reports p50 latency and tracemalloc peak (allocations on top of the body).
+
+Usage:
+    python3 scripts/benchmark_payload_parse.py [--rounds 50] [--audio-mb 10]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.archive_codec import RawJSON, encode_archive
+from audio_upload import iter_base64_decoded
+from bench_support import list_test_conversations, percentile
+from payload_stream import scan_webhook
+
+
+def drain_audio(full_audio) -> int:
+    """Stand-in for the multipart upload: decode and drop each slice."""
+    return sum(len(chunk) for chunk in iter_base64_decoded(full_audio))
+
+
+def full_parse(raw: bytes):
+    data = json.loads(raw)['data']
+    if 'full_audio' in data:
+        return drain_audio(data['full_audio'])
+    return encode_archive(data, 'json')[0]
+
+
+def stream_parse(raw: bytes):
+    scan = scan_webhook(raw)
+    if 'full_audio' in scan.data:
+        return drain_audio(scan.data['full_audio'])
+    return encode_archive(RawJSON(scan.data_bytes()), 'json')[0]
+
+
+def measure(fn, raw: bytes, rounds: int):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(raw)
+        samples.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    fn(raw)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return percentile(samples, 50), peak
+
+
+def bodies(audio_mb: float):
+    for path in list_test_conversations():
+        with open(path) as f:
+            data = json.load(f)
+        name = os.path.basename(path)
+        envelope = {'type': 'post_call_transcription', 'event_timestamp': 0, 'data': data}
+        yield f"{name} (compact)", json.dumps(envelope, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        yield f"{name} (pretty)", json.dumps(envelope, indent=4, ensure_ascii=False).encode('utf-8')
+    audio = base64.b64encode(os.urandom(int(audio_mb * 1024 * 1024))).decode('ascii')
+    yield f"post_call_audio ({audio_mb:g} MB)", json.dumps({
+        'type': 'post_call_audio', 'event_timestamp': 0,
+        'data': {'agent_id': 'agent_bench', 'conversation_id': 'conv_bench', 'full_audio': audio}
+    }).encode('ascii')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=50)
+    parser.add_argument('--audio-mb', type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'body':<50}{'bytes':>10}{'full p50':>10}{'stream p50':>12}{'full peak':>12}{'stream peak':>13}")
+    for name, raw in bodies(args.audio_mb):
+        full, stream = full_parse(raw), stream_parse(raw)
+        assert full == stream if isinstance(full, int) else json.loads(full) == json.loads(stream)
+        full_ms, full_peak = measure(full_parse, raw, args.rounds)
+        stream_ms, stream_peak = measure(stream_parse, raw, args.rounds)
+        print(f"{name:<50}{len(raw):>10}{full_ms:>9.2f}ms{stream_ms:>10.2f}ms"
+              f"{full_peak / 1024:>10.0f}KiB{stream_peak / 1024:>10.0f}KiB")
+
+
+if __name__ == '__main__':
+    main()
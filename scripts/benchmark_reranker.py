@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark the NumPy lexical reranker against a pure-Python reference.
+
+Reranks synthetic Mem0 candidate batches (10-500 candidates) with
+LexicalReranker and with a direct per-candidate, per-term implementation of
+the same BM25 + recency + upstream score, checks both pick the same top N, and
+reports p50/p99 latency. It also reports precision@N on the synthetic set:
+each batch has N relevant memories (sharing the query's terms) hidden in a
+noisy upstream order, as a vector search that missed the exact terms would
+return them.
+
+Usage:
+    python3 scripts/benchmark_reranker.py [--rounds 300] [--top 3] [--seed 7]
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.rerank import LexicalReranker, memory_text, memory_timestamp, tokenize
+from bench_support import percentile
+
+NOW = 1_780_000_000.0
+
+TOPICS = {
+    'travel': 'Planning a trip to Norway in June for a fjord cruise',
+    'billing': 'Reported a billing issue with the March invoice',
+    'preferences': 'Prefers email updates and morning callbacks',
+    'pets': 'Has two dogs named Biscuit and Juniper',
+    'car': 'Drives a blue Volvo that needs a service',
+}
+FILLER = ('mentioned', 'weather', 'weekend', 'family', 'work', 'schedule', 'dinner', 'garden', 'music', 'coffee')
+
+
+def make_batch(rng, size, topic, top):
+    """Candidates with `top` relevant memories placed at random positions."""
+    relevant = set(rng.sample(range(size), top))
+    candidates = []
+    for i in range(size):
+        if i in relevant:
+            text = f"{TOPICS[topic]} {' '.join(rng.sample(FILLER, 2))}"
+        else:
+            other = rng.choice([t for t in TOPICS if t != topic])
+            text = f"{' '.join(rng.sample(FILLER, 4))} {TOPICS[other].split()[-1]}"
+        candidates.append({
+            'id': f'm{i}',
+            'memory': text,
+            'score': round(0.8 - i * 0.3 / size, 4),
+            'metadata': {'timestamp': NOW - rng.uniform(0, 365) * 86400},
+            'relevant': i in relevant,
+        })
+    return candidates
+
+
+def reference_rerank(query, candidates, top_n, reranker):
+    """Same score as LexicalReranker, one candidate and one term at a time."""
+    terms = list(dict.fromkeys(tokenize(query)))
+    docs = [tokenize(memory_text(c)) for c in candidates]
+    n = len(docs)
+    avg_length = (sum(len(d) for d in docs) / n) or 1.0
+    doc_counts = [Counter(doc) for doc in docs]
+    idf = {}
+    for term in terms:
+        df = sum(1 for counts in doc_counts if term in counts)
+        idf[term] = math.log1p((n - df + 0.5) / (df + 0.5))
+    lexical = []
+    for doc, counts in zip(docs, doc_counts):
+        score = 0.0
+        for term in terms:
+            tf = counts[term]
+            score += idf[term] * tf * (reranker.k1 + 1) / (tf + reranker.k1 * (1 - reranker.b + reranker.b * len(doc) / avg_length))
+        lexical.append(score)
+    top_lexical = max(lexical) or 1.0
+    top_score = max(c['score'] for c in candidates) or 1.0
+    w_lexical, w_recency, w_upstream = reranker.weights
+    scores = []
+    for i, c in enumerate(candidates):
+        age_days = max(0.0, (NOW - memory_timestamp(c)) / 86400)
+        recency = math.exp(-math.log(2) * age_days / reranker.half_life_days)
+        scores.append(w_lexical * lexical[i] / top_lexical + w_recency * recency + w_upstream * c['score'] / top_score)
+    order = sorted(range(n), key=lambda i: -scores[i])[:top_n]
+    return [candidates[i] for i in order]
+
+
+def time_ms(fn, batches, rounds):
+    samples = []
+    for i in range(rounds):
+        query, candidates = batches[i % len(batches)]
+        start = time.perf_counter()
+        fn(query, candidates)
+        samples.append((time.perf_counter() - start) * 1000)
+    return percentile(samples, 50), percentile(samples, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=300)
+    parser.add_argument('--top', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    reranker = LexicalReranker()
+    queries = {'travel': 'norway trip cruise', 'billing': 'billing invoice issue', 'preferences': 'email preference',
+               'pets': 'dogs names', 'car': 'volvo service'}
+
+    print(f"{'candidates':>10}{'numpy p50':>12}{'numpy p99':>12}{'python p50':>12}{'python p99':>12}{'speedup':>10}"
+          f"{'P@N mem0':>10}{'P@N rerank':>12}")
+    for size in (10, 25, 50, 100, 250, 500):
+        batches = []
+        for _ in range(20):
+            topic = rng.choice(list(TOPICS))
+            batches.append((queries[topic], make_batch(rng, size, topic, args.top)))
+
+        for query, candidates in batches:
+            fast = [c['id'] for c in reranker.rerank(query, candidates, args.top, now=NOW)]
+            slow = [c['id'] for c in reference_rerank(query, candidates, args.top, reranker)]
+            assert sorted(fast) == sorted(slow), (fast, slow)
+
+        fast_p50, fast_p99 = time_ms(lambda q, c: reranker.rerank(q, c, args.top, now=NOW), batches, args.rounds)
+        slow_p50, slow_p99 = time_ms(lambda q, c: reference_rerank(q, c, args.top, reranker), batches, args.rounds)
+
+        upstream_hits = sum(c['relevant'] for _, cands in batches for c in cands[:args.top])
+        rerank_hits = sum(c['relevant'] for q, cands in batches for c in reranker.rerank(q, cands, args.top, now=NOW))
+        total = args.top * len(batches)
+        print(f"{size:>10}{fast_p50:>10.3f}ms{fast_p99:>10.3f}ms{slow_p50:>10.3f}ms{slow_p99:>10.3f}ms"
+              f"{slow_p50 / fast_p50:>9.1f}x{upstream_hits / total:>10.2f}{rerank_hits / total:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
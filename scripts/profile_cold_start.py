@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Profile Lambda handler cold starts (module init time and import tree).
+
+Each handler is imported in a fresh interpreter under `python -X importtime`,
+the way the Lambda runtime does during its init phase. The script reports the
+median init duration per handler and the slowest imports (cumulative time, as
+parsed from the -X importtime output), plus the cost of the dependencies the
+handlers now import lazily on first use (mem0, boto3).
+
+Use --write-baseline to record init times and --baseline to fail (exit 1) when
+a handler's init regresses by more than --max-regression-pct.
+
+Usage:
+    python3 scripts/profile_cold_start.py [--rounds 5] [--top 10]
+    python3 scripts/profile_cold_start.py --write-baseline cold_start.json
+    python3 scripts/profile_cold_start.py --baseline cold_start.json --max-regression-pct 25
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from bench_support import DUMMY_ENV, LAYER_DIR, PROJECT_ROOT
+
+HANDLERS = ['client_data', 'retrieve', 'post_call']
+
+# Dependencies imported on first use rather than at init
+LAZY_DEPENDENCIES = ['mem0', 'boto3']
+
+# Runs in the child interpreter: import the handler and print the init time
+INIT_SNIPPET = """
+import importlib.util, json, sys, time
+sys.stderr.write('--- handler init ---\\n')
+sys.stderr.flush()
+start = time.perf_counter()
+spec = importlib.util.spec_from_file_location('handler', sys.argv[1])
+module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(module)
+print(json.dumps({'init_ms': (time.perf_counter() - start) * 1000}))
+"""
+
+IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, float, float, int]]:
+    """
+    Parse -X importtime output.
+
+    Returns:
+        [(module, self_ms, cumulative_ms, depth), ...] in output order
+    """
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append((module, int(self_us) / 1000, int(cumulative_us) / 1000, (len(indent) - 1) // 2))
+    return rows
+
+
+def run_child(code: str, args: List[str], handler_dir: str) -> Tuple[str, str]:
+    env = {**os.environ, **DUMMY_ENV, 'PYTHONPATH': os.pathsep.join([handler_dir, LAYER_DIR])}
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code, *args],
+        capture_output=True, text=True, env=env, cwd=handler_dir
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'child failed')
+    return result.stdout, result.stderr
+
+
+def profile_handler(name: str, rounds: int) -> Dict:
+    handler_dir = os.path.join(PROJECT_ROOT, 'src', name)
+    init_ms, rows = [], []
+    for _ in range(rounds):
+        stdout, stderr = run_child(INIT_SNIPPET, [os.path.join(handler_dir, 'handler.py')], handler_dir)
+        init_ms.append(json.loads(stdout.strip().splitlines()[-1])['init_ms'])
+        rows = parse_importtime(stderr.split('--- handler init ---', 1)[-1])
+
+    # Top-level imports only (depth 0), sorted by cumulative time
+    top_level = sorted((r for r in rows if r[3] == 0), key=lambda r: r[2], reverse=True)
+    return {
+        'init_ms': statistics.median(init_ms),
+        'imported_modules': len(rows),
+        'top_imports': [(module, cumulative) for module, _, cumulative, _ in top_level],
+        'lazy_loaded': [dep for dep in LAZY_DEPENDENCIES if any(r[0] == dep for r in rows)]
+    }
+
+
+def profile_dependency(module: str) -> float:
+    _, stderr = run_child(f'import {module}', [], PROJECT_ROOT)
+    rows = [r for r in parse_importtime(stderr) if r[0] == module]
+    return rows[-1][2] if rows else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='Slowest top-level imports shown per handler')
+    parser.add_argument('--baseline', help='JSON file of {handler: init_ms} to compare against')
+    parser.add_argument('--max-regression-pct', type=float, default=25.0)
+    parser.add_argument('--write-baseline', help='Write measured init times to this JSON file')
+    args = parser.parse_args()
+
+    results = {name: profile_handler(name, args.rounds) for name in HANDLERS}
+
+    for name, result in results.items():
+        print(f"\n{name}: init {result['init_ms']:.1f}ms (median of {args.rounds}), {result['imported_modules']} modules")
+        if result['lazy_loaded']:
+            print(f"  WARNING: imported at init despite lazy loading: {', '.join(result['lazy_loaded'])}")
+        for module, cumulative in result['top_imports'][:args.top]:
+            print(f"  {cumulative:9.1f}ms  {module}")
+
+    print("\nDeferred to first use:")
+    for dep in LAZY_DEPENDENCIES:
+        print(f"  {profile_dependency(dep):9.1f}ms  import {dep}")
+
+    measured = {name: round(result['init_ms'], 1) for name, result in results.items()}
+    if args.write_baseline:
+        with open(args.write_baseline, 'w') as f:
+            json.dump(measured, f, indent=2)
+        print(f"\nBaseline written to {args.write_baseline}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\nBaseline comparison (max +{args.max_regression_pct:.0f}%):")
+        regressions = []
+        for name, init_ms in measured.items():
+            limit = baseline.get(name, init_ms) * (1 + args.max_regression_pct / 100)
+            status = 'OK' if init_ms <= limit else 'REGRESSION'
+            print(f"  {name:<12}{baseline.get(name, float('nan')):>9.1f}ms -> {init_ms:>7.1f}ms  {status}")
+            if status != 'OK':
+                regressions.append(name)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Print an archived ClientData/PostCall JSON object, whatever codec wrote it.
+
+Handles legacy pretty JSON, compact JSON, gzip and zstd archives.
+
+Usage:
+    python3 scripts/read_archive.py s3://bucket/post-call/+16129782029/conv_xxx.json
+    python3 scripts/read_archive.py ./downloaded-object.json
+"""
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.archive_codec import decode_archive, read_json_archive
+
+
+def main():
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+
+    location = sys.argv[1]
+    if location.startswith('s3://'):
+        import boto3
+        bucket, _, key = location[len('s3://'):].partition('/')
+        obj = read_json_archive(boto3.client('s3'), bucket, key)
+    else:
+        with open(location, 'rb') as f:
+            obj = decode_archive(f.read())
+
+    print(json.dumps(obj, indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
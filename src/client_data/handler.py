@@ -6,68 +6,89 @@ Returns personalized data by retrieving all memories for the caller's phone numb
 """
 
 import json
-import os
-import logging
-import re
-from typing import Dict, Any, List, Optional
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime
 
-import boto3
-from mem0 import MemoryClient
+from agentic_memory_runtime.archive_codec import put_json_archive
+from agentic_memory_runtime.caller_profile import (
+    TOP_FACTS, TOP_HIGHLIGHTS, build_caller_profile, classify_memory, extract_caller_name, greeting_features,
+    load_caller_profile, profile_is_current
+)
+from agentic_memory_runtime.caller_version import normalize_caller_id, read_caller_stamp
+from agentic_memory_runtime.clients import lazy_mem0_client, lazy_s3_client
+from agentic_memory_runtime.config import configure_logging, env_float, env_int, env_str, get_config
+from agentic_memory_runtime.deferred_writer import DeferredWriter, PostInvokeDrain, drain_on_sigterm
+from agentic_memory_runtime.kv_store import create_kv_store
+from agentic_memory_runtime.memory_fetch import fetch_memories_by_type, fetch_memories_paged
+from agentic_memory_runtime.metrics import MetricsRecorder
+from agentic_memory_runtime.responses import CORS_HEADERS, error_response, json_response
+from agentic_memory_runtime.transport import mem0_connection_stats
+from agentic_memory_runtime.ttl_cache import TTLCache
+from agentic_memory_runtime.working_set import publish_call_working_set
 
 # Configure logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-
-# Initialize Mem0 client outside handler for reuse across invocations
-client = MemoryClient(
-    api_key=os.environ['MEM0_API_KEY'],
-    org_id=os.environ['MEM0_ORG_ID'],
-    project_id=os.environ['MEM0_PROJECT_ID']
-)
+logger = configure_logging()
+config = get_config()
 
-# Initialize S3 client outside handler for reuse
-s3_client = boto3.client('s3')
-S3_BUCKET_NAME = os.environ.get('S3_BUCKET_NAME', '')
+# Mem0 client, imported and built on first use and reused across invocations
+client = lazy_mem0_client()
 
+# S3 client, built on first use and reused across invocations
+s3_client = lazy_s3_client()
+S3_BUCKET_NAME = config.s3_bucket_name
 
-def extract_caller_name(all_memories: List[str]) -> Optional[str]:
-    """
-    Extract caller's name from memories using multiple patterns.
-    
-    Args:
-        all_memories: List of memory strings (factual and semantic)
-        
-    Returns:
-        Extracted name or None if not found
-    """
-    name_patterns = [
-        # Direct name patterns
-        r"(?:name is|called|goes by)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
-        r"(?:user(?:'s)?\s+name:?\s*)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
-        r"(?:customer name:?\s*)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
-        r"(?:my name is|i am|i'm)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
-        # More flexible patterns  
-        r"user\s+name\s+is\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
-        r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+is\s+(?:the\s+)?(?:user|customer|caller)",
-        # Semantic memory patterns
-        r"user\s+([A-Z][a-z]+)",
-        r"customer\s+([A-Z][a-z]+)",
-    ]
-    
-    for memory in all_memories:
-        for pattern in name_patterns:
-            match = re.search(pattern, memory, re.IGNORECASE)
-            if match:
-                name = match.group(1).strip()
-                # Basic validation - should be 1-3 words, only letters and spaces
-                if re.match(r"^[A-Za-z\s]{2,30}$", name) and len(name.split()) <= 3:
-                    # Additional validation - exclude common non-names
-                    excluded_words = {'wants', 'needs', 'help', 'account', 'update', 'email', 'phone', 'address', 'user', 'customer'}
-                    if name.lower() not in excluded_words:
-                        return name.title()  # Proper case
-    
-    return None
+# JSON archive codec: gzip (default), zstd, json (compact) or pretty (legacy indent=2)
+ARCHIVE_CODEC = config.archive_codec
+
+# 'deferred' archives to S3 on a background thread after the response is built; 'sync' waits for S3
+ARCHIVE_MODE = env_str('CLIENT_DATA_ARCHIVE_MODE', 'deferred')
+
+# Read the caller profile precomputed by post_call before falling back to get_all
+CALLER_PROFILE_ENABLED = config.caller_profile_enabled
+
+# Memory fetch when no caller profile exists: 'all' (full get_all), 'bounded' (paged,
+# stops once the context has enough memories) or 'typed' (metadata.type filtered pages)
+MEMORY_FETCH_MODE = env_str('MEMORY_FETCH_MODE', 'all')
+MEMORY_FETCH_PAGE_SIZE = env_int('MEMORY_FETCH_PAGE_SIZE', 20)
+MEMORY_FETCH_MAX_PAGES = env_int('MEMORY_FETCH_MAX_PAGES', 5)
+
+# Warm-container cache of built caller context, invalidated by post_call's version stamp
+context_cache = TTLCache(
+    max_entries=env_int('CONTEXT_CACHE_SIZE', 256),
+    ttl_seconds=env_float('CONTEXT_CACHE_TTL_SECONDS', 300)
+)
+
+# Latency budget for building caller context (S3 profile / Mem0); past it the
+# handler answers with the last cached context or a generic greeting
+CONTEXT_BUDGET_MS = env_int('CONTEXT_BUDGET_MS', 1500)
+RESPONSE_RESERVE_MS = env_int('RESPONSE_RESERVE_MS', 250)
+
+# Reused across invocations; lookups that outlive their budget finish here, each Mem0
+# request bounded by MEM0_TIMEOUT. When every worker is still busy with such lookups a new
+# one would only queue behind them, so the handler answers degraded straight away
+CONTEXT_MAX_WORKERS = env_int('CONTEXT_MAX_WORKERS', 4)
+context_executor = ThreadPoolExecutor(max_workers=CONTEXT_MAX_WORKERS, thread_name_prefix='caller-context')
+context_slots = threading.BoundedSemaphore(CONTEXT_MAX_WORKERS)
+
+# Retrieval working set published by post_call (same WORKING_SET_BACKEND / WORKING_SET_TABLE),
+# copied under each new call's caller_id and call_sid for retrieve when it includes the
+# caller's last ingested call. The copy lives for WORKING_SET_CALL_TTL_SECONDS. 'none' disables
+WORKING_SET_BACKEND = env_str('WORKING_SET_BACKEND', 'none')
+WORKING_SET_CALL_TTL_SECONDS = env_float('WORKING_SET_CALL_TTL_SECONDS', 2 * 3600)
+working_set_store = create_kv_store(
+    WORKING_SET_BACKEND,
+    table_name=env_str('WORKING_SET_TABLE'),
+    path=env_str('WORKING_SET_PATH') or None
+) if WORKING_SET_BACKEND != 'none' else None
+
+# Archives are written after the response is sent, before Lambda freezes the environment
+# (see PostInvokeDrain); anything still pending at shutdown is drained on SIGTERM
+archive_writer = DeferredWriter(max_pending=env_int('CLIENT_DATA_ARCHIVE_BACKLOG', 100), name='client-data-archive')
+archive_drain = PostInvokeDrain(archive_writer)
+archive_drain.register()
+drain_on_sigterm(archive_writer)
 
 
 def generate_personalized_greeting(
@@ -75,7 +96,8 @@ def generate_personalized_greeting(
     is_returning: bool,
     account_status: Optional[str] = None,
     last_interaction: Optional[str] = None,
-    preferences: List[str] = None
+    preferences: List[str] = None,
+    features: Optional[Dict[str, Optional[str]]] = None
 ) -> str:
     """
     Generate a personalized greeting based on caller information.
@@ -86,6 +108,8 @@ def generate_personalized_greeting(
         account_status: Account status information
         last_interaction: Information about last interaction
         preferences: List of caller preferences
+        features: Pre-classified greeting_features() of the fields above (e.g. from
+            the caller profile); classified here when omitted
         
     Returns:
         Personalized greeting message
@@ -100,30 +124,36 @@ def generate_personalized_greeting(
     # Returning caller
     if caller_name:
         greeting = f"Hello {caller_name}!"
+
+        if features is None:
+            features = greeting_features(
+                classify_memory(account_status) if account_status else None,
+                classify_memory(last_interaction) if last_interaction else None,
+                classify_memory(preferences[0]) if preferences else None
+            )
         
         # Add contextual information
         context_parts = []
         
-        if account_status:
-            # Extract account type
-            if 'premium' in account_status.lower():
-                context_parts.append("I see you're a premium customer")
-            elif 'vip' in account_status.lower():
-                context_parts.append("thank you for being a VIP member")
-            elif any(tier in account_status.lower() for tier in ['gold', 'silver']):
-                context_parts.append(f"I see you have {account_status.lower()} status")
+        account_tier = features.get('account_tier')
+        if account_tier == 'premium':
+            context_parts.append("I see you're a premium customer")
+        elif account_tier == 'vip':
+            context_parts.append("thank you for being a VIP member")
+        elif account_tier == 'metal':
+            context_parts.append(f"I see you have {features['account_status_lower']} status")
         
-        if last_interaction:
-            if 'inquiry' in last_interaction.lower() or 'question' in last_interaction.lower():
-                context_parts.append("following up on your recent inquiry")
-            elif 'issue' in last_interaction.lower() or 'problem' in last_interaction.lower():
-                context_parts.append("I hope we resolved your previous concern")
+        last_interaction_kind = features.get('last_interaction_kind')
+        if last_interaction_kind == 'inquiry':
+            context_parts.append("following up on your recent inquiry")
+        elif last_interaction_kind == 'concern':
+            context_parts.append("I hope we resolved your previous concern")
         
-        if preferences and len(context_parts) < 2:
-            pref_text = preferences[0].lower()
-            if 'email' in pref_text:
+        if len(context_parts) < 2:
+            preferred_channel = features.get('preferred_channel')
+            if preferred_channel == 'email':
                 context_parts.append("I know you prefer email updates")
-            elif 'phone' in pref_text:
+            elif preferred_channel == 'phone':
                 context_parts.append("I know you prefer phone communication")
         
         if context_parts:
@@ -141,12 +171,249 @@ def generate_personalized_greeting(
     return greeting
 
 
+def build_caller_context(caller_id: str, profile: Dict[str, Any]) -> Tuple[Dict[str, str], str, str]:
+    """
+    Build the dynamic variables, prompt context and first message for a caller.
+
+    Args:
+        caller_id: Caller's phone number
+        profile: Caller profile (stored snapshot or built from get_all)
+
+    Returns:
+        (dynamic_vars, memory_context, first_message)
+    """
+    memory_count = profile.get('memory_count', 0)
+    top_facts = profile.get('top_facts') or []
+    highlights = profile.get('highlights') or []
+    caller_name = profile.get('caller_name')
+
+    # Build simple context string for prompt override (no complex templating)
+    context_parts = []
+
+    if top_facts:
+        context_parts.append("CALLER CONTEXT:")
+        context_parts.append(f"This caller has {memory_count} previous interactions.")
+        context_parts.append("Known information:")
+        for fact in top_facts:
+            context_parts.append(f"- {fact}")
+
+    if highlights:
+        context_parts.append("Previous conversation highlights:")
+        for conv in highlights:
+            context_parts.append(f"- {conv}")
+
+    # Generate personalized first message
+    first_message = generate_personalized_greeting(
+        caller_name=caller_name,
+        is_returning=memory_count > 0,
+        account_status=profile.get('account_status'),
+        last_interaction=profile.get('last_interaction'),
+        preferences=profile.get('preferences') or [],
+        features=profile.get('greeting_features')
+    )
+
+    if context_parts:
+        context_parts.append(f"\nFirst Message Override: {first_message}")
+        context_parts.append("\nInstructions: Use this context to personalize your responses. Reference past conversations naturally.")
+    else:
+        context_parts.append("NEW CALLER: This is their first interaction. Focus on building rapport and gathering information.")
+
+    memory_context = "\n".join(context_parts)
+
+    # Add caller name to dynamic variables if found
+    dynamic_vars = {
+        "caller_id": caller_id,
+        "memory_count": str(memory_count),
+        "memory_summary": top_facts[0] if top_facts else "New caller",  # Just the first/most important fact
+        "returning_caller": "yes" if memory_count > 0 else "no"
+    }
+
+    if caller_name:
+        dynamic_vars["caller_name"] = caller_name
+
+    return dynamic_vars, memory_context, first_message
+
+
+def load_profile(caller_id: str, stamp: Optional[Dict[str, Optional[str]]] = None) -> Dict[str, Any]:
+    """
+    Get the caller profile, preferring the snapshot precomputed by post_call.
+
+    The snapshot is skipped when it is older than the last ingested call
+    recorded in the caller's version stamp (its rebuild failed or was skipped),
+    or has no memories (Mem0 had not extracted them when it was built).
+
+    Args:
+        caller_id: Caller's phone number
+        stamp: The caller's read_caller_stamp(), if it was read
+
+    Returns:
+        Caller profile (built from Mem0 when no usable snapshot exists)
+    """
+    if CALLER_PROFILE_ENABLED and S3_BUCKET_NAME:
+        profile = load_caller_profile(s3_client, S3_BUCKET_NAME, caller_id)
+        if profile and profile.get('memory_count') and profile_is_current(profile, stamp):
+            logger.info(f"Using caller profile for {caller_id} (updated {profile.get('updated_at')})")
+            return profile
+        if profile:
+            logger.info(f"Caller profile for {caller_id} is empty or predates conversation "
+                        f"{(stamp or {}).get('conversation_id')}, rebuilding from Mem0")
+
+    # No usable profile (first call, or post_call has not built one for the last call): derive it from Mem0
+    logger.info(f"Retrieving memories for user_id: {caller_id} (fetch mode: {MEMORY_FETCH_MODE})")
+    if MEMORY_FETCH_MODE == 'bounded':
+        memories, memory_count = fetch_memories_paged(
+            client, caller_id, TOP_FACTS, TOP_HIGHLIGHTS,
+            page_size=MEMORY_FETCH_PAGE_SIZE, max_pages=MEMORY_FETCH_MAX_PAGES
+        )
+        return build_caller_profile(caller_id, memories, memory_count=memory_count)
+
+    if MEMORY_FETCH_MODE == 'typed':
+        memories, memory_count = fetch_memories_by_type(client, caller_id, TOP_FACTS, TOP_HIGHLIGHTS)
+        return build_caller_profile(caller_id, memories, memory_count=memory_count)
+
+    result = client.get_all(user_id=caller_id)
+
+    # Extract memories from result (format: {"results": [...]})
+    memories = result.get('results', []) if isinstance(result, dict) else result
+
+    logger.info(f"Retrieved {len(memories) if memories else 0} memories for {caller_id}")
+    return build_caller_profile(caller_id, memories)
+
+
+def context_budget_ms(context: Any) -> int:
+    """
+    Time the handler may spend building caller context before answering degraded.
+
+    The configured budget, capped so that RESPONSE_RESERVE_MS of the Lambda's
+    remaining time is always left to serialize and return the response.
+
+    Args:
+        context: Lambda context (may be None outside Lambda)
+
+    Returns:
+        Budget in milliseconds (at least 1)
+    """
+    budget = CONTEXT_BUDGET_MS
+    get_remaining = getattr(context, 'get_remaining_time_in_millis', None)
+    if callable(get_remaining):
+        budget = min(budget, get_remaining() - RESPONSE_RESERVE_MS)
+    return max(1, budget)
+
+
+def publish_working_set_for_call(caller_id: str, call_sid: str, stamp: Optional[Dict[str, Optional[str]]]) -> None:
+    """Copy the caller's current working set under this call's key for retrieve (errors are logged)."""
+    try:
+        working_set = publish_call_working_set(working_set_store, caller_id, call_sid, stamp,
+                                               WORKING_SET_CALL_TTL_SECONDS)
+    except Exception as e:
+        # retrieve searches Mem0 for this call
+        logger.error(f"Failed to publish working set for {caller_id} / {call_sid}: {str(e)}", exc_info=True)
+        return
+    if working_set is None:
+        logger.info(f"No current working set for {caller_id}, retrieve will search Mem0 during {call_sid}")
+    else:
+        logger.info(f"Published working set for {caller_id} / {call_sid}: {len(working_set['memories'])} memories")
+
+
+def resolve_caller_context(caller_id: str, call_sid: Optional[str] = None) -> Tuple[Dict[str, str], str, str]:
+    """
+    Build (or fetch from the warm cache) the caller context for caller_id.
+
+    Runs on context_executor so the handler can stop waiting when the budget
+    runs out; a late result still lands in the cache. With a call_sid the
+    caller's working set is also published for the call.
+
+    Returns:
+        (dynamic_vars, memory_context, first_message)
+    """
+    cache_key = normalize_caller_id(caller_id)
+    stamp = None
+    stamp_read = False
+    wants_working_set = working_set_store is not None and bool(call_sid)
+    cacheable = context_cache.enabled and bool(S3_BUCKET_NAME)
+    if S3_BUCKET_NAME and (cacheable or CALLER_PROFILE_ENABLED or wants_working_set):
+        try:
+            stamp = read_caller_stamp(s3_client, S3_BUCKET_NAME, caller_id)
+            stamp_read = True
+        except Exception as e:
+            logger.warning(f"Could not read caller version for {caller_id}, bypassing cache: {str(e)}")
+            cacheable = False
+
+    # A working set can only be checked against a stamp that was read
+    if wants_working_set and stamp_read:
+        publish_working_set_for_call(caller_id, call_sid, stamp)
+
+    version = stamp['version'] if stamp else None
+    if cacheable:
+        cached = context_cache.get(cache_key, version=version)
+        if cached:
+            logger.info(f"Context cache hit for {caller_id}")
+            dynamic_vars, memory_context, first_message = cached
+            return {**dynamic_vars, 'caller_id': caller_id}, memory_context, first_message
+
+    built = build_caller_context(caller_id, load_profile(caller_id, stamp))
+    if cacheable:
+        context_cache.put(cache_key, built, version=version)
+    return built
+
+
+def submit_caller_context(caller_id: str, call_sid: Optional[str] = None) -> Optional[Future]:
+    """
+    Start resolve_caller_context on context_executor if a worker is free.
+
+    Returns:
+        The lookup's future, or None when every worker is busy
+    """
+    if not context_slots.acquire(blocking=False):
+        return None
+
+    def run() -> Tuple[Dict[str, str], str, str]:
+        try:
+            return resolve_caller_context(caller_id, call_sid)
+        finally:
+            context_slots.release()
+
+    try:
+        return context_executor.submit(run)
+    except Exception:
+        context_slots.release()
+        raise
+
+
+def degraded_caller_context(caller_id: str) -> Tuple[Dict[str, str], str, str]:
+    """
+    Best available context when the budget ran out: the last cached context for
+    this caller (even if expired or stale), otherwise a generic greeting.
+
+    Returns:
+        (dynamic_vars, memory_context, first_message)
+    """
+    cached = context_cache.peek(normalize_caller_id(caller_id))
+    if cached:
+        logger.info(f"Serving last known context for {caller_id}")
+        dynamic_vars, memory_context, first_message = cached
+        return {**dynamic_vars, 'caller_id': caller_id}, memory_context, first_message
+
+    dynamic_vars = {
+        "caller_id": caller_id,
+        "memory_count": "unknown",
+        "memory_summary": "Unavailable",
+        "returning_caller": "unknown"
+    }
+    memory_context = (
+        "CALLER CONTEXT UNAVAILABLE: Caller history could not be loaded in time. "
+        "Do not assume this is a new caller; ask for their name and how you can help."
+    )
+    return dynamic_vars, memory_context, "Hello! How may I help you today?"
+
+
 def save_client_data_to_s3(
     caller_id: str,
     agent_id: str,
     call_sid: str,
     received_payload: Dict[str, Any],
-    response_payload: Dict[str, Any]
+    response_payload: Dict[str, Any],
+    received_at: Optional[datetime] = None
 ) -> None:
     """
     Save received webhook payload and sent response payload to S3.
@@ -160,6 +427,8 @@ def save_client_data_to_s3(
         call_sid: Twilio call SID
         received_payload: The incoming webhook payload from ElevenLabs
         response_payload: The response we sent back to ElevenLabs
+        received_at: When the webhook arrived (defaults to now); archives written
+            after the response still land under the request's timestamp
     """
     if not S3_BUCKET_NAME:
         logger.warning("S3_BUCKET_NAME not configured, skipping S3 save")
@@ -170,7 +439,8 @@ def save_client_data_to_s3(
         sanitized_caller_id = caller_id.lstrip('+')
         
         # Create timestamp for unique directory
-        timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        received_at = received_at or datetime.utcnow()
+        timestamp = received_at.strftime('%Y%m%d_%H%M%S')
         
         # Build S3 key prefix
         key_prefix = f"client-data/{sanitized_caller_id}/{timestamp}_{call_sid}"
@@ -179,18 +449,19 @@ def save_client_data_to_s3(
         received_key = f"{key_prefix}/received.json"
         logger.info(f"Saving received payload to S3: s3://{S3_BUCKET_NAME}/{received_key}")
         
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=received_key,
-            Body=json.dumps(received_payload, indent=2),
-            ContentType='application/json',
-            Metadata={
+        put_json_archive(
+            s3_client,
+            S3_BUCKET_NAME,
+            received_key,
+            received_payload,
+            metadata={
                 'caller_id': caller_id,
                 'agent_id': agent_id,
                 'call_sid': call_sid,
-                'timestamp': datetime.utcnow().isoformat(),
+                'timestamp': received_at.isoformat(),
                 'payload_type': 'received'
-            }
+            },
+            codec=ARCHIVE_CODEC
         )
         logger.info(f"Successfully saved received payload for call {call_sid}")
         
@@ -198,18 +469,19 @@ def save_client_data_to_s3(
         response_key = f"{key_prefix}/response.json"
         logger.info(f"Saving response payload to S3: s3://{S3_BUCKET_NAME}/{response_key}")
         
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=response_key,
-            Body=json.dumps(response_payload, indent=2),
-            ContentType='application/json',
-            Metadata={
+        put_json_archive(
+            s3_client,
+            S3_BUCKET_NAME,
+            response_key,
+            response_payload,
+            metadata={
                 'caller_id': caller_id,
                 'agent_id': agent_id,
                 'call_sid': call_sid,
-                'timestamp': datetime.utcnow().isoformat(),
+                'timestamp': received_at.isoformat(),
                 'payload_type': 'response'
-            }
+            },
+            codec=ARCHIVE_CODEC
         )
         logger.info(f"Successfully saved response payload for call {call_sid}")
         
@@ -234,6 +506,11 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         Security is based on keeping the webhook URL secret (URL obscurity).
         This is different from PostCall webhooks which use HMAC signatures.
     """
+    received_at = datetime.utcnow()
+
+    if archive_writer.pending():
+        logger.info(f"Archive backlog from previous invocations: {json.dumps(archive_writer.stats())}")
+
     try:
         # Parse request body
         body = json.loads(event.get('body', '{}'))
@@ -250,121 +527,36 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
 
         if not caller_id:
             logger.error(f"Missing caller_id in request. Body received: {json.dumps(body)}")
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json'},
-                'body': json.dumps({'error': 'Missing caller_id parameter in request body'})
-            }
+            return error_response(400, 'Missing caller_id parameter in request body')
 
         logger.info(f"Conversation initiation - caller_id: {caller_id}, agent_id: {agent_id}, called_number: {called_number}, call_sid: {call_sid}")
-        logger.info(f"Retrieving memories for user_id: {caller_id}")
-
-        # Retrieve all memories for the caller
-        result = client.get_all(user_id=caller_id)
-
-        # Extract memories from result (format: {"results": [...]})
-        memories = result.get('results', []) if isinstance(result, dict) else result
-
-        logger.info(f"Retrieved {len(memories) if memories else 0} memories for {caller_id}")
-
-        # Separate factual and semantic memories
-        factual_memories = []
-        semantic_memories = []
-
-        if memories:
-            for mem in memories:
-                if isinstance(mem, dict):
-                    metadata = mem.get('metadata', {})
-                    mem_type = metadata.get('type', 'unknown')
-                    memory_text = mem.get('memory', '')
-
-                    if memory_text:
-                        if mem_type == 'factual':
-                            factual_memories.append(memory_text)
-                        elif mem_type == 'semantic':
-                            semantic_memories.append(memory_text)
-                        else:
-                            factual_memories.append(memory_text)
-
-        # Build simple context string for prompt override (no complex templating)
-        context_parts = []
-        
-        # Extract caller name from both factual and semantic memories
-        caller_name = None
-        all_memories_for_name = factual_memories + semantic_memories
-        if all_memories_for_name:
-            caller_name = extract_caller_name(all_memories_for_name)
-        
-        # Determine if this is a new or returning caller
-        is_returning_caller = len(memories) > 0
-        
-        # Build contextual information for greeting
-        contextual_info = []
-        account_status = None
-        last_interaction = None
-        preferences = []
-        
-        if factual_memories:
-            context_parts.append("CALLER CONTEXT:")
-            context_parts.append(f"This caller has {len(memories)} previous interactions.")
-            context_parts.append("Known information:")
-            
-            # Extract contextual information for greeting
-            for fact in factual_memories[:5]:
-                context_parts.append(f"- {fact}")
-                
-                # Extract account status
-                if any(word in fact.lower() for word in ['premium', 'gold', 'silver', 'basic', 'vip']):
-                    account_status = fact
-                
-                # Extract preferences
-                if any(word in fact.lower() for word in ['prefer', 'likes', 'wants', 'needs']):
-                    preferences.append(fact)
-
-        if semantic_memories:
-            context_parts.append("Previous conversation highlights:")
-            for conv in semantic_memories[:3]:
-                context_parts.append(f"- {conv}")
-                
-                # Extract last interaction info
-                if not last_interaction and any(word in conv.lower() for word in ['last time', 'previous', 'inquiry', 'issue', 'request']):
-                    last_interaction = conv
-
-        # Generate personalized first message
-        first_message = generate_personalized_greeting(
-            caller_name=caller_name,
-            is_returning=is_returning_caller,
-            account_status=account_status,
-            last_interaction=last_interaction,
-            preferences=preferences
-        )
 
-        if context_parts:
-            context_parts.append(f"\nFirst Message Override: {first_message}")
-            context_parts.append("\nInstructions: Use this context to personalize your responses. Reference past conversations naturally.")
-        else:
-            context_parts.append("NEW CALLER: This is their first interaction. Focus on building rapport and gathering information.")
-
-        memory_context = "\n".join(context_parts)
-
-        # Simple memory summary for dynamic variables
-        memory_count = len(memories) if memories else 0
-        memory_summary = ""
-        if factual_memories:
-            memory_summary = factual_memories[0]  # Just the first/most important fact
-        else:
-            memory_summary = "New caller"
-
-        # Add caller name to dynamic variables if found
-        dynamic_vars = {
-            "caller_id": caller_id,
-            "memory_count": str(memory_count),
-            "memory_summary": memory_summary,
-            "returning_caller": "yes" if memory_count > 0 else "no"
-        }
-        
-        if caller_name:
-            dynamic_vars["caller_name"] = caller_name
+        metrics = MetricsRecorder({'Function': 'client_data'})
+        budget_ms = context_budget_ms(context)
+        future = submit_caller_context(caller_id, call_sid)
+        context_partial = False
+        with metrics.timer('ContextMs'):
+            if future is None:
+                logger.warning(f"All {CONTEXT_MAX_WORKERS} context workers are busy, returning degraded response for {caller_id}")
+                context_partial = True
+                dynamic_vars, memory_context, first_message = degraded_caller_context(caller_id)
+            else:
+                try:
+                    dynamic_vars, memory_context, first_message = future.result(timeout=budget_ms / 1000)
+                except FuturesTimeoutError:
+                    # The lookup keeps running in the background and caches its result for the next call
+                    logger.warning(f"Context budget of {budget_ms}ms exceeded for {caller_id}, returning degraded response")
+                    context_partial = True
+                    dynamic_vars, memory_context, first_message = degraded_caller_context(caller_id)
+
+        dynamic_vars = {**dynamic_vars, 'context_partial': 'yes' if context_partial else 'no'}
+
+        for name, value in context_cache.drain_counters().items():
+            metrics.put(f"ContextCache{name.title()}", value)
+        metrics.put('ContextBudgetOverruns', int(context_partial))
+        metrics.put('ContextPoolSaturated', int(future is None))
+        mem0_connection_stats.put_metrics(metrics)
+        metrics.flush()
 
         # Build response with ElevenLabs conversation_initiation_client_data format
         # Official format per ElevenLabs docs:
@@ -386,33 +578,28 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
             }
         }
         
-        # Save received and response payloads to S3 (async, non-blocking)
-        try:
-            save_client_data_to_s3(
-                caller_id=caller_id,
-                agent_id=agent_id or 'unknown',
-                call_sid=call_sid or 'unknown',
-                received_payload=body,
-                response_payload=response_data
-            )
-        except Exception as e:
-            logger.error(f"Failed to save to S3, but continuing: {str(e)}")
-
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token,X-Workspace-Key',
-                'Access-Control-Allow-Methods': 'POST,OPTIONS'
-            },
-            'body': json.dumps(response_data)
-        }
+        # Archive received and response payloads to S3 off the critical path:
+        # ElevenLabs is waiting on this response before the call can start
+        archive_kwargs = dict(
+            caller_id=caller_id,
+            agent_id=agent_id or 'unknown',
+            call_sid=call_sid or 'unknown',
+            received_payload=body,
+            response_payload=response_data,
+            received_at=received_at
+        )
+        if ARCHIVE_MODE == 'deferred':
+            archive_writer.submit(f"client-data archive {call_sid}", lambda: save_client_data_to_s3(**archive_kwargs))
+        else:
+            try:
+                save_client_data_to_s3(**archive_kwargs)
+            except Exception as e:
+                logger.error(f"Failed to save to S3, but continuing: {str(e)}")
+
+        return json_response(200, response_data, CORS_HEADERS)
 
     except Exception as e:
         logger.error(f"Error processing request: {str(e)}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({'error': str(e)})
-        }
\ No newline at end of file
+        return error_response(500, str(e))
+    finally:
+        archive_drain.invocation_done()
\ No newline at end of file
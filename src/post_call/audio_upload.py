@@ -0,0 +1,130 @@
+"""
+Streaming base64 audio upload
+
+Decodes base64 audio in fixed-size slices and uploads it to S3 as multipart
+parts, so memory use is bounded by the part size instead of growing with the
+length of the call (no full decoded copy of the MP3 is ever held).
+"""
+
+import base64
+import logging
+from typing import Any, Dict, Iterator, Union
+
+logger = logging.getLogger()
+
+# S3 requires every multipart part except the last to be at least 5 MiB
+MIN_PART_SIZE = 5 * 1024 * 1024
+
+# Base64 characters decoded per step (multiple of 4 -> 48 KiB of binary)
+DECODE_CHUNK_CHARS = 64 * 1024
+
+
+def iter_base64_decoded(data: Union[str, bytes], chunk_chars: int = DECODE_CHUNK_CHARS) -> Iterator[bytes]:
+    """
+    Decode base64 data incrementally.
+
+    Args:
+        data: Base64 text (str, ASCII bytes, or a sliceable view of either such as
+            payload_stream.TextSpan); embedded whitespace is ignored
+        chunk_chars: Characters consumed per step
+
+    Yields:
+        Decoded binary chunks of at most ~chunk_chars * 3 / 4 bytes
+
+    Raises:
+        binascii.Error: If the data is not valid base64
+    """
+    carry = data[:0]
+    whitespace = ' \n\r\t' if isinstance(carry, str) else b' \n\r\t'
+    for offset in range(0, len(data), chunk_chars):
+        piece = carry + data[offset:offset + chunk_chars]
+        if any(c in piece for c in whitespace):
+            piece = piece[:0].join(piece.split())
+
+        # Only whole 4-character groups can be decoded; keep the rest for the next step
+        usable = len(piece) - len(piece) % 4
+        carry = piece[usable:]
+        if usable:
+            yield base64.b64decode(piece[:usable])
+
+    if carry:
+        yield base64.b64decode(carry)
+
+
+def stream_base64_to_s3(
+    s3_client: Any,
+    bucket: str,
+    key: str,
+    data: Union[str, bytes],
+    content_type: str,
+    metadata: Dict[str, str],
+    part_size: int = MIN_PART_SIZE
+) -> int:
+    """
+    Decode base64 data and upload it to S3 without materializing the decoded object.
+
+    Objects smaller than part_size are written with a single put_object; larger
+    ones use a multipart upload that is aborted if any part fails.
+
+    Args:
+        s3_client: boto3 S3 client
+        bucket: Target bucket
+        key: Target key
+        data: Base64-encoded object content
+        content_type: Content-Type of the decoded object
+        metadata: S3 user metadata
+        part_size: Bytes buffered before each part upload
+
+    Returns:
+        Number of decoded bytes uploaded
+    """
+    buffer = bytearray()
+    upload_id = None
+    parts = []
+    total = 0
+
+    try:
+        for chunk in iter_base64_decoded(data):
+            buffer += chunk
+            total += len(chunk)
+            if len(buffer) < part_size:
+                continue
+
+            if upload_id is None:
+                upload_id = s3_client.create_multipart_upload(
+                    Bucket=bucket, Key=key, ContentType=content_type, Metadata=metadata
+                )['UploadId']
+
+            part_number = len(parts) + 1
+            response = s3_client.upload_part(
+                Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=buffer
+            )
+            parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+            buffer = bytearray()
+
+        if upload_id is None:
+            s3_client.put_object(
+                Bucket=bucket, Key=key, Body=bytes(buffer), ContentType=content_type, Metadata=metadata
+            )
+            return total
+
+        if buffer:
+            part_number = len(parts) + 1
+            response = s3_client.upload_part(
+                Bucket=bucket, Key=key, UploadId=upload_id, PartNumber=part_number, Body=buffer
+            )
+            parts.append({'ETag': response['ETag'], 'PartNumber': part_number})
+
+        s3_client.complete_multipart_upload(
+            Bucket=bucket, Key=key, UploadId=upload_id, MultipartUpload={'Parts': parts}
+        )
+        logger.info(f"Uploaded s3://{bucket}/{key} in {len(parts)} parts ({total} bytes)")
+        return total
+
+    except Exception:
+        if upload_id is not None:
+            try:
+                s3_client.abort_multipart_upload(Bucket=bucket, Key=key, UploadId=upload_id)
+            except Exception as e:
+                logger.error(f"Error aborting multipart upload for {key}: {str(e)}")
+        raise
@@ -0,0 +1,218 @@
+"""
+Conversation-to-caller index for post-call audio
+
+The post_call_audio webhook only carries agent_id and conversation_id. The
+transcription webhook for the same conversation knows the caller, so it
+records conversation_id -> caller_id in a small S3 object
+(conversation-index/{conversation_id}.json). The audio path reads that one
+object to write the MP3 straight to the caller's prefix
+(post-call/{caller_id}/{conversation_id}.mp3, next to the JSON archive).
+
+Audio that arrives before its transcript is parked under
+post-call/audio-only/{agent_id}/{conversation_id}.mp3. The transcription path
+moves its own conversation's parked audio once the index entry exists, and
+reconcile_orphan_audio sweeps whatever is left (e.g. audio whose lookup raced
+the index write). The sweep resumes where the previous run stopped (the last
+key it examined is kept in reconcile-state/), and audio that is still
+unmatched after max_age_seconds (e.g. web calls without a caller, or audio
+parked before the index existed) is moved to post-call/audio-unmatched/ so
+later runs do not examine it again.
+"""
+
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger()
+
+INDEX_PREFIX = 'conversation-index/'
+ORPHAN_AUDIO_PREFIX = 'post-call/audio-only/'
+UNMATCHED_AUDIO_PREFIX = 'post-call/audio-unmatched/'
+RECONCILE_CURSOR_KEY = 'reconcile-state/orphan-audio.json'
+
+NOT_FOUND_CODES = ('NoSuchKey', '404', 'NotFound')
+
+
+def _is_not_found(error: Exception) -> bool:
+    return getattr(error, 'response', {}).get('Error', {}).get('Code') in NOT_FOUND_CODES
+
+
+def index_key(conversation_id: str) -> str:
+    return f"{INDEX_PREFIX}{conversation_id}.json"
+
+
+def caller_audio_key(caller_id: str, conversation_id: str) -> str:
+    return f"post-call/{caller_id}/{conversation_id}.mp3"
+
+
+def orphan_audio_key(agent_id: str, conversation_id: str) -> str:
+    return f"{ORPHAN_AUDIO_PREFIX}{agent_id}/{conversation_id}.mp3"
+
+
+def record_conversation_caller(s3_client: Any, bucket: str, conversation_id: str, caller_id: str,
+                               agent_id: Optional[str] = None) -> None:
+    """Write the index entry mapping conversation_id to caller_id."""
+    entry = {
+        'conversation_id': conversation_id,
+        'caller_id': caller_id,
+        'agent_id': agent_id,
+        'indexed_at': datetime.utcnow().isoformat()
+    }
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=index_key(conversation_id),
+        Body=json.dumps(entry, separators=(',', ':')).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+
+def lookup_conversation_caller(s3_client: Any, bucket: str, conversation_id: str) -> Optional[str]:
+    """
+    Read the caller_id recorded for conversation_id.
+
+    Returns:
+        The caller_id, or None if the transcription webhook has not been ingested yet
+
+    Raises:
+        Exception: Any S3 error other than a missing object
+    """
+    try:
+        obj = s3_client.get_object(Bucket=bucket, Key=index_key(conversation_id))
+    except Exception as e:
+        if _is_not_found(e):
+            return None
+        raise
+    return json.loads(obj['Body'].read()).get('caller_id') or None
+
+
+def move_object(s3_client: Any, bucket: str, source_key: str, target_key: str,
+                metadata: Optional[Dict[str, str]] = None) -> None:
+    """Copy source_key to target_key (merging metadata into the source's), then delete the source."""
+    head = s3_client.head_object(Bucket=bucket, Key=source_key)
+    s3_client.copy_object(
+        Bucket=bucket,
+        Key=target_key,
+        CopySource={'Bucket': bucket, 'Key': source_key},
+        MetadataDirective='REPLACE',
+        ContentType=head.get('ContentType', 'audio/mpeg'),
+        Metadata={**head.get('Metadata', {}), **(metadata or {})}
+    )
+    s3_client.delete_object(Bucket=bucket, Key=source_key)
+
+
+def relocate_orphan_audio(s3_client: Any, bucket: str, agent_id: str, conversation_id: str, caller_id: str) -> bool:
+    """
+    Move parked audio to the caller's prefix (copy, then delete the original).
+
+    Returns:
+        True if audio was moved, False if there was none parked
+    """
+    source_key = orphan_audio_key(agent_id, conversation_id)
+    target_key = caller_audio_key(caller_id, conversation_id)
+    try:
+        move_object(s3_client, bucket, source_key, target_key, {'external_number': caller_id})
+    except Exception as e:
+        if _is_not_found(e):
+            return False
+        raise
+    logger.info(f"Moved audio for {conversation_id} from s3://{bucket}/{source_key} to {target_key}")
+    return True
+
+
+def read_reconcile_cursor(s3_client: Any, bucket: str) -> Optional[str]:
+    """Last parked key the previous reconcile run examined (None: start from the beginning)."""
+    try:
+        obj = s3_client.get_object(Bucket=bucket, Key=RECONCILE_CURSOR_KEY)
+    except Exception as e:
+        if _is_not_found(e):
+            return None
+        raise
+    return json.loads(obj['Body'].read()).get('start_after') or None
+
+
+def save_reconcile_cursor(s3_client: Any, bucket: str, start_after: Optional[str]) -> None:
+    """Record where the next reconcile run starts (None: from the beginning)."""
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=RECONCILE_CURSOR_KEY,
+        Body=json.dumps({'start_after': start_after, 'saved_at': datetime.utcnow().isoformat()},
+                        separators=(',', ':')).encode('utf-8'),
+        ContentType='application/json'
+    )
+
+
+def reconcile_orphan_audio(s3_client: Any, bucket: str, max_objects: Optional[int] = None,
+                           max_age_seconds: Optional[float] = None, resume: bool = False) -> Dict[str, int]:
+    """
+    Move every parked audio object whose conversation has since been indexed.
+
+    Args:
+        s3_client: boto3 S3 client (or LocalS3Client)
+        bucket: Archive bucket
+        max_objects: Stop after examining this many objects (None: the whole prefix)
+        max_age_seconds: Move unmatched audio parked longer than this to
+            post-call/audio-unmatched/ (None keeps it parked)
+        resume: Start after the last key the previous run examined, and record
+            where this run stopped (back to the beginning once the prefix is done)
+
+    Returns:
+        Counters: examined, moved, unmatched (no index entry yet), expired
+        (moved to post-call/audio-unmatched/), failed
+    """
+    stats = {'examined': 0, 'moved': 0, 'unmatched': 0, 'expired': 0, 'failed': 0}
+    start_after = None
+    if resume:
+        try:
+            start_after = read_reconcile_cursor(s3_client, bucket)
+        except Exception as e:
+            logger.warning(f"Could not read reconcile cursor, starting from the beginning: {str(e)}")
+    now = datetime.now(timezone.utc)
+
+    def finish(last_key: Optional[str]) -> Dict[str, int]:
+        if resume:
+            try:
+                save_reconcile_cursor(s3_client, bucket, last_key)
+            except Exception as e:
+                logger.warning(f"Could not save reconcile cursor: {str(e)}")
+        return stats
+
+    token = None
+    last_key = start_after
+    while True:
+        kwargs = {'Bucket': bucket, 'Prefix': ORPHAN_AUDIO_PREFIX}
+        if token:
+            kwargs['ContinuationToken'] = token
+        elif start_after:
+            kwargs['StartAfter'] = start_after
+        response = s3_client.list_objects_v2(**kwargs)
+
+        for obj in response.get('Contents', []):
+            if max_objects is not None and stats['examined'] >= max_objects:
+                return finish(last_key)
+            last_key = obj['Key']
+            parts = obj['Key'][len(ORPHAN_AUDIO_PREFIX):].split('/')
+            if len(parts) != 2 or not parts[1].endswith('.mp3'):
+                continue
+            agent_id, conversation_id = parts[0], parts[1][:-len('.mp3')]
+            stats['examined'] += 1
+            try:
+                caller_id = lookup_conversation_caller(s3_client, bucket, conversation_id)
+                if caller_id is not None:
+                    if relocate_orphan_audio(s3_client, bucket, agent_id, conversation_id, caller_id):
+                        stats['moved'] += 1
+                elif max_age_seconds is not None and obj.get('LastModified') and \
+                        (now - obj['LastModified']).total_seconds() > max_age_seconds:
+                    move_object(s3_client, bucket, obj['Key'], f"{UNMATCHED_AUDIO_PREFIX}{agent_id}/{conversation_id}.mp3")
+                    logger.info(f"Audio for {conversation_id} was never matched to a caller, moved out of {ORPHAN_AUDIO_PREFIX}")
+                    stats['expired'] += 1
+                else:
+                    stats['unmatched'] += 1
+            except Exception as e:
+                logger.error(f"Failed to reconcile audio for {conversation_id}: {str(e)}", exc_info=True)
+                stats['failed'] += 1
+
+        if not response.get('IsTruncated'):
+            # The whole prefix has been examined; the next run starts over
+            return finish(None)
+        token = response.get('NextContinuationToken')
@@ -6,147 +6,268 @@ Stores factual and semantic memories in Mem0 after call completion.
 Saves conversation JSON and audio MP3 to S3.
 """
 
+import base64
 import json
 import os
-import logging
-import hmac
-import hashlib
 import time
-import base64
-from typing import Dict, Any, List, Optional
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple, Union
 from datetime import datetime
 
-import boto3
-from mem0 import MemoryClient
+from agentic_memory_runtime.archive_codec import RawJSON, put_json_archive
+from agentic_memory_runtime.caller_profile import build_caller_profile, save_caller_profile
+from agentic_memory_runtime.caller_version import bump_caller_version
+from agentic_memory_runtime.clients import lazy_mem0_client, lazy_s3_client
+from agentic_memory_runtime.config import configure_logging, env_float, env_int, env_str, get_config
+from agentic_memory_runtime.kv_store import create_kv_store
+from agentic_memory_runtime.metrics import MetricsRecorder
+from agentic_memory_runtime.responses import json_response
+from agentic_memory_runtime.transport import mem0_connection_stats
+from agentic_memory_runtime.working_set import build_working_set, publish_working_set
+from audio_upload import MIN_PART_SIZE, stream_base64_to_s3
+from conversation_index import (
+    caller_audio_key,
+    lookup_conversation_caller,
+    orphan_audio_key,
+    reconcile_orphan_audio,
+    record_conversation_caller,
+    relocate_orphan_audio,
+)
+from ingest_ledger import IngestLedger, create_ingest_ledger
+from ingest_queue import IngestQueue, create_ingest_queue, ingest_queue_backend
+from payload_stream import WebhookScan, scan_webhook
+from transcript_chunker import chunk_transcript, clean_turns, submit_windows
+from webhook_auth import ReplayCache, WebhookVerifier
 
 # Configure logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-
-# Initialize Mem0 client outside handler for reuse across invocations
-client = MemoryClient(
-    api_key=os.environ['MEM0_API_KEY'],
-    org_id=os.environ['MEM0_ORG_ID'],
-    project_id=os.environ['MEM0_PROJECT_ID']
-)
+logger = configure_logging()
+config = get_config()
+
+# Mem0 client, imported and built on first use and reused across invocations
+client = lazy_mem0_client()
 
-# Initialize S3 client outside handler for reuse
-s3_client = boto3.client('s3')
+# S3 client, built on first use and reused across invocations
+s3_client = lazy_s3_client()
 
 HMAC_KEY = os.environ['ELEVENLABS_HMAC_KEY']
 S3_BUCKET_NAME = os.environ['S3_BUCKET_NAME']
 
+# Signatures older (or further in the future) than this are rejected; accepted ones are
+# remembered for as long, per container, so a captured request cannot be replayed
+HMAC_TOLERANCE_SECONDS = env_int('HMAC_TOLERANCE_SECONDS', 30 * 60)
+HMAC_REPLAY_CACHE_SIZE = env_int('HMAC_REPLAY_CACHE_SIZE', 4096)
+
+# Optional previous signing secret, accepted alongside HMAC_KEY while rotating it
+webhook_verifier = WebhookVerifier(
+    [HMAC_KEY, env_str('ELEVENLABS_HMAC_KEY_PREVIOUS')],
+    tolerance_seconds=HMAC_TOLERANCE_SECONDS,
+    replay_cache=ReplayCache(HMAC_REPLAY_CACHE_SIZE, ttl_seconds=HMAC_TOLERANCE_SECONDS) if HMAC_REPLAY_CACHE_SIZE > 0 else None
+)
+
+# Upper bound on concurrent post-call tasks (S3 archive + conversation index + factual + semantic writes)
+MAX_WORKERS = env_int('POST_CALL_MAX_WORKERS', 4)
+
+# Ingestion mode: 'inline' processes in the webhook, 'queue' defers to worker_handler
+INGEST_MODE = env_str('POST_CALL_MODE', 'inline')
+INGEST_BATCH_SIZE = env_int('INGEST_BATCH_SIZE', 10)
+INGEST_MAX_ATTEMPTS = env_int('INGEST_MAX_ATTEMPTS', 3)
+INGEST_RETRY_DELAY_SECONDS = env_float('INGEST_RETRY_DELAY_SECONDS', 30)
+INGEST_WORKER_CONCURRENCY = env_int('INGEST_WORKER_CONCURRENCY', 2)
+
+# A misconfigured queue fails the cold start instead of the first webhook (the queue itself is built lazily)
+if INGEST_MODE == 'queue':
+    ingest_queue_backend()
+
+_ingest_queue: Optional[IngestQueue] = None
+
+# Deduplicates webhook retries by conversation_id and webhook type (INGEST_LEDGER_BACKEND, see ingest_ledger)
+_ingest_ledger: Optional[IngestLedger] = None
+_ingest_ledger_loaded = False
+
+# Semantic memory is written as overlapping transcript windows (window size 0 = single add)
+SEMANTIC_WINDOW_SIZE = env_int('SEMANTIC_WINDOW_SIZE', 24)
+SEMANTIC_WINDOW_OVERLAP = env_int('SEMANTIC_WINDOW_OVERLAP', 4)
+SEMANTIC_MAX_CONCURRENCY = env_int('SEMANTIC_MAX_CONCURRENCY', 4)
+
+# Audio is decoded and uploaded in multipart parts of this size (S3 minimum is 5 MiB)
+AUDIO_PART_SIZE = max(MIN_PART_SIZE, int(env_float('AUDIO_PART_SIZE_MB', 5) * 1024 * 1024))
+
+# 'slim' replaces base64 binary fields in the JSON archive with a pointer to the binary object; 'full' keeps them
+ARCHIVE_MODE = env_str('POST_CALL_ARCHIVE_MODE', 'slim')
+
+# JSON archive codec: gzip (default), zstd, json (compact) or pretty (legacy indent=2)
+ARCHIVE_CODEC = config.archive_codec
+
+# 'stream' scans webhook bodies for the fields ingestion reads (see payload_stream); 'full' uses json.loads
+PARSE_MODE = env_str('POST_CALL_PARSE_MODE', 'stream')
+
+# Rebuild the caller profile read by client_data after memories are stored
+CALLER_PROFILE_ENABLED = config.caller_profile_enabled
+
+# Caller's retrieval working set (memories + lexical index) that client_data copies for each
+# call and retrieve searches before Mem0: 'dynamodb' (WORKING_SET_TABLE), 'file'
+# (WORKING_SET_PATH) or 'memory'; 'none' disables. Built from the memories fetched for the
+# caller profile, so it needs CALLER_PROFILE_ENABLED. It has to last until the caller's next
+# call; readers check it against the caller's version stamp, so it never outlives a newer call
+WORKING_SET_BACKEND = env_str('WORKING_SET_BACKEND', 'none')
+WORKING_SET_TTL_SECONDS = env_float('WORKING_SET_TTL_SECONDS', 30 * 86400)
+WORKING_SET_MAX_MEMORIES = env_int('WORKING_SET_MAX_MEMORIES', 200)
+working_set_store = create_kv_store(
+    WORKING_SET_BACKEND,
+    table_name=env_str('WORKING_SET_TABLE'),
+    path=env_str('WORKING_SET_PATH') or None
+) if WORKING_SET_BACKEND != 'none' else None
+
+# Parked audio-only objects examined per reconcile_handler run (each run resumes where the
+# last one stopped); audio still unmatched after RECONCILE_MAX_AGE_HOURS is moved to
+# post-call/audio-unmatched/ so it is not examined again
+RECONCILE_MAX_OBJECTS = env_int('RECONCILE_MAX_OBJECTS', 1000)
+RECONCILE_MAX_AGE_HOURS = env_float('RECONCILE_MAX_AGE_HOURS', 7 * 24)
+
+# Tasks whose failure does not make a queued job retry (they are rebuilt on the next call)
+BEST_EFFORT_TASKS = frozenset({'caller_profile', 'caller_version'})
+
 
-def verify_hmac_signature(body: str, signature_header: str) -> bool:
+def verify_hmac_signature(body: Union[str, bytes], signature_header: str, is_base64: bool = False) -> bool:
     """
     Verify HMAC signature from ElevenLabs webhook.
 
-    Format: t=timestamp,v0=hash
-    The hash is the hex encoded sha256 HMAC signature of timestamp.request_body
+    Format: t=timestamp,v0=hash[,v0=hash...]
+    The hash is the hex encoded sha256 HMAC signature of timestamp.request_body.
+    Malformed, stale and replayed signatures are rejected before the body is
+    hashed (see webhook_auth).
 
     Args:
-        body: Raw request body
+        body: Raw request body (base64 text when is_base64)
         signature_header: ElevenLabs-Signature header value (format: t=timestamp,v0=hash)
+        is_base64: API Gateway isBase64Encoded flag
 
     Returns:
         True if signature is valid, False otherwise
     """
     try:
-        # Parse signature header: t=timestamp,v0=hash
-        parts = signature_header.split(',')
-        if len(parts) != 2:
-            logger.error("Invalid signature format")
-            return False
-
-        timestamp = parts[0].split('=')[1]
-        hmac_signature = parts[1]  # v0=hash
+        valid, reason = webhook_verifier.verify(body, signature_header, is_base64)
+    except Exception as e:
+        logger.error(f"Error verifying HMAC: {str(e)}", exc_info=True)
+        valid, reason = False, 'error'
+    if not valid:
+        logger.error(f"Rejected webhook signature: {reason}")
+        metrics = MetricsRecorder({'Function': 'post_call', 'Reason': reason})
+        metrics.count('WebhookRejections')
+        metrics.flush()
+    return valid
 
-        # Validate timestamp (reject if older than 30 minutes)
-        tolerance = int(time.time()) - 30 * 60
-        if int(timestamp) < tolerance:
-            logger.error("Signature timestamp too old")
-            return False
 
-        # Validate signature
-        full_payload_to_sign = f"{timestamp}.{body}"
-        mac = hmac.new(
-            key=HMAC_KEY.encode('utf-8'),
-            msg=full_payload_to_sign.encode('utf-8'),
-            digestmod=hashlib.sha256
-        )
-        expected_signature = 'v0=' + mac.hexdigest()
+def binary_field_pointer(key: str, content_type: str, size_bytes: int) -> Dict[str, Any]:
+    """
+    Build the pointer stored in the JSON archive in place of a stripped binary field.
 
-        return hmac.compare_digest(hmac_signature, expected_signature)
+    Args:
+        key: S3 key of the binary object
+        content_type: Content-Type of the binary object
+        size_bytes: Decoded size of the binary object
 
-    except Exception as e:
-        logger.error(f"Error verifying HMAC: {str(e)}", exc_info=True)
-        return False
+    Returns:
+        Pointer dict referencing the binary object
+    """
+    return {
+        'archived_as': f"s3://{S3_BUCKET_NAME}/{key}",
+        'bucket': S3_BUCKET_NAME,
+        'key': key,
+        'content_type': content_type,
+        'size_bytes': size_bytes
+    }
 
 
-def save_to_s3(external_number: str, conversation_id: str, payload: Dict[str, Any]) -> None:
+def save_to_s3(external_number: str, conversation_id: str, payload: Dict[str, Any],
+               scan: Optional[WebhookScan] = None, raise_errors: bool = False) -> None:
     """
     Save conversation JSON and audio MP3 to S3.
 
     Directory structure: post-call/{external_number}/{conversation_id}.json and .mp3
 
+    In slim archive mode (default) the base64 full_audio field is stored only once,
+    as the binary MP3, and replaced in the JSON by a pointer to that object.
+
     Args:
         external_number: Caller's phone number (e.g., +15074595005)
         conversation_id: ElevenLabs conversation ID (e.g., conv_01jxd5y165f62a0v7gtr6bkg56)
-        payload: Full webhook payload
+        payload: Webhook data (as parsed, or the fields kept by scan_webhook)
+        scan: Streaming parse of the body; the archive is then its raw data text
+        raise_errors: Re-raise a failed MP3 or JSON upload, so a ledger or queue
+            retry runs the s3_archive stage again; otherwise failures are only logged
+
+    Raises:
+        Exception: The upload error, when raise_errors is set
     """
     try:
         # Sanitize external_number for S3 key (keep + prefix for consistency with client-data)
         sanitized_number = external_number  # Keep the + prefix
-        
-        # Save JSON payload with post-call/ prefix
-        json_key = f"post-call/{sanitized_number}/{conversation_id}.json"
-        logger.info(f"Saving JSON to S3: s3://{S3_BUCKET_NAME}/{json_key}")
-        
-        s3_client.put_object(
-            Bucket=S3_BUCKET_NAME,
-            Key=json_key,
-            Body=json.dumps(payload, indent=2),
-            ContentType='application/json',
-            Metadata={
-                'external_number': external_number,
-                'conversation_id': conversation_id,
-                'timestamp': datetime.utcnow().isoformat()
-            }
-        )
-        logger.info(f"Successfully saved JSON for conversation {conversation_id}")
+
+        replace = {}
 
         # Save MP3 audio if present (legacy - audio now comes via separate post_call_audio webhook)
         full_audio_base64 = payload.get('full_audio')
         if full_audio_base64:
             try:
-                # Decode base64 audio to binary
-                audio_binary = base64.b64decode(full_audio_base64)
-                
                 mp3_key = f"post-call/{sanitized_number}/{conversation_id}.mp3"
-                logger.info(f"Saving MP3 to S3: s3://{S3_BUCKET_NAME}/{mp3_key} ({len(audio_binary)} bytes)")
-                
-                s3_client.put_object(
-                    Bucket=S3_BUCKET_NAME,
-                    Key=mp3_key,
-                    Body=audio_binary,
-                    ContentType='audio/mpeg',
-                    Metadata={
+                logger.info(f"Saving MP3 to S3: s3://{S3_BUCKET_NAME}/{mp3_key} (~{len(full_audio_base64) * 3 // 4} bytes)")
+
+                # Decode and upload in bounded parts instead of holding a decoded copy
+                audio_bytes = stream_base64_to_s3(
+                    s3_client,
+                    S3_BUCKET_NAME,
+                    mp3_key,
+                    full_audio_base64,
+                    content_type='audio/mpeg',
+                    metadata={
                         'external_number': external_number,
                         'conversation_id': conversation_id,
                         'timestamp': datetime.utcnow().isoformat()
-                    }
+                    },
+                    part_size=AUDIO_PART_SIZE
                 )
                 logger.info(f"Successfully saved MP3 for conversation {conversation_id}")
+
+                if ARCHIVE_MODE == 'slim':
+                    # Only strip the base64 once the binary copy exists, so audio is never lost
+                    replace['full_audio'] = binary_field_pointer(mp3_key, 'audio/mpeg', audio_bytes)
+                    logger.info(f"Stripped {len(full_audio_base64)} base64 chars of full_audio from JSON archive")
             except Exception as e:
                 logger.error(f"Error saving MP3 to S3: {str(e)}", exc_info=True)
+                if raise_errors:
+                    raise
         else:
             logger.warning(f"No full_audio field found in payload for conversation {conversation_id}")
 
+        # Save JSON payload with post-call/ prefix; a scanned body is archived as received
+        archive_payload = RawJSON(scan.data_bytes(replace)) if scan else {**payload, **replace}
+        json_key = f"post-call/{sanitized_number}/{conversation_id}.json"
+        logger.info(f"Saving JSON to S3: s3://{S3_BUCKET_NAME}/{json_key}")
+
+        json_bytes = put_json_archive(
+            s3_client,
+            S3_BUCKET_NAME,
+            json_key,
+            archive_payload,
+            metadata={
+                'external_number': external_number,
+                'conversation_id': conversation_id,
+                'timestamp': datetime.utcnow().isoformat(),
+                'archive_mode': 'slim' if replace else 'full'
+            },
+            codec=ARCHIVE_CODEC
+        )
+        logger.info(f"Successfully saved JSON for conversation {conversation_id} ({json_bytes} bytes, {ARCHIVE_CODEC})")
+
     except Exception as e:
         logger.error(f"Error saving to S3: {str(e)}", exc_info=True)
+        if raise_errors:
+            raise
 
 
-def handle_audio_webhook(data: Dict[str, Any], response: Dict[str, Any]) -> Dict[str, Any]:
+def handle_audio_webhook(data: Dict[str, Any]) -> bool:
     """
     Handle post_call_audio webhook separately.
     
@@ -154,13 +275,19 @@ def handle_audio_webhook(data: Dict[str, Any], response: Dict[str, Any]) -> Dict
     - agent_id
     - conversation_id  
     - full_audio (base64-encoded MP3)
+
+    The caller is looked up in the conversation index written by the
+    transcription webhook, and the MP3 is stored next to the caller's JSON
+    archive. If the transcript has not been ingested yet, the MP3 is parked
+    under post-call/audio-only/{agent_id}/ until it is reconciled.
     
     Args:
         data: Audio webhook data object
-        response: Pre-built 200 OK response
-        
+
     Returns:
-        200 OK response (processing is async, errors logged but don't affect response)
+        False if the audio could not be saved (a retry may succeed), True otherwise
+
+    Errors are logged but not raised (processing is async).
     """
     try:
         conversation_id = data.get('conversation_id', 'unknown')
@@ -171,53 +298,804 @@ def handle_audio_webhook(data: Dict[str, Any], response: Dict[str, Any]) -> Dict
         
         if not full_audio_base64:
             logger.error(f"No full_audio field in audio webhook for {conversation_id}")
-            return response
-        
-        # We don't have caller_id in audio webhook, so we need to use a placeholder
-        # The audio webhook is sent separately and doesn't include metadata
-        # We'll save it under a special "audio-only" directory for now
-        # In production, you might want to correlate this with the transcription webhook
-        # or extract caller_id from your database using conversation_id
+            return True
         
-        # For now, save under agent_id directory
+        # The audio webhook has no caller_id; the transcription webhook indexed it by conversation_id
+        caller_id = None
         try:
-            # Decode base64 audio to binary
-            audio_binary = base64.b64decode(full_audio_base64)
-            
-            # Save to S3 with agent_id as fallback organization
-            mp3_key = f"post-call/audio-only/{agent_id}/{conversation_id}.mp3"
-            logger.info(f"Saving audio-only MP3 to S3: s3://{S3_BUCKET_NAME}/{mp3_key} ({len(audio_binary)} bytes)")
-            
-            s3_client.put_object(
-                Bucket=S3_BUCKET_NAME,
-                Key=mp3_key,
-                Body=audio_binary,
-                ContentType='audio/mpeg',
-                Metadata={
-                    'agent_id': agent_id,
-                    'conversation_id': conversation_id,
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'webhook_type': 'post_call_audio'
-                }
+            caller_id = lookup_conversation_caller(s3_client, S3_BUCKET_NAME, conversation_id)
+        except Exception as e:
+            logger.warning(f"Conversation index lookup failed for {conversation_id}, parking audio: {str(e)}")
+
+        metadata = {
+            'agent_id': agent_id,
+            'conversation_id': conversation_id,
+            'timestamp': datetime.utcnow().isoformat(),
+            'webhook_type': 'post_call_audio'
+        }
+        if caller_id:
+            mp3_key = caller_audio_key(caller_id, conversation_id)
+            metadata['external_number'] = caller_id
+        else:
+            # Arrived before its transcript: reconciled into the caller's prefix later
+            mp3_key = orphan_audio_key(agent_id, conversation_id)
+
+        try:
+            logger.info(f"Saving MP3 to S3: s3://{S3_BUCKET_NAME}/{mp3_key} (~{len(full_audio_base64) * 3 // 4} bytes)")
+
+            # Decode and upload in bounded parts instead of holding a decoded copy
+            audio_bytes = stream_base64_to_s3(
+                s3_client,
+                S3_BUCKET_NAME,
+                mp3_key,
+                full_audio_base64,
+                content_type='audio/mpeg',
+                metadata=metadata,
+                part_size=AUDIO_PART_SIZE
             )
-            logger.info(f"Successfully saved audio-only MP3 for conversation {conversation_id}")
-            
+            logger.info(f"Successfully saved MP3 for conversation {conversation_id} ({audio_bytes} bytes)")
+
         except Exception as e:
-            logger.error(f"Error saving audio-only MP3 to S3: {str(e)}", exc_info=True)
+            logger.error(f"Error saving audio MP3 to S3: {str(e)}", exc_info=True)
+            return False
         
         # Audio webhooks don't trigger memory storage (no transcript/analysis data)
         logger.info(f"Audio webhook processing complete for {conversation_id}")
+        return True
         
     except Exception as e:
         logger.error(f"Error processing audio webhook: {str(e)}", exc_info=True)
-    
-    return response
+        return False
+
+
+def build_factual_content(analysis: Dict[str, Any]) -> str:
+    """
+    Build factual memory content from call analysis (summary + evaluation).
+
+    Args:
+        analysis: Analysis section of the post-call payload
+
+    Returns:
+        Factual memory text, or empty string if there is nothing to store
+    """
+    # Handle both 'summary' and 'transcript_summary' fields
+    summary = analysis.get('summary') or analysis.get('transcript_summary', '')
+
+    # Handle both 'evaluation' and 'evaluation_criteria_results' fields
+    evaluation = analysis.get('evaluation') or analysis.get('evaluation_criteria_results', {})
+
+    # Combine summary and evaluation rationale
+    factual_content = summary
+    if evaluation:
+        # Handle both formats: direct rationale or criteria results
+        if isinstance(evaluation, dict):
+            # ElevenLabs format: evaluation_criteria_results with multiple criteria
+            if 'rationale' in evaluation:
+                # Direct format
+                rationale = evaluation.get('rationale', '')
+                if rationale:
+                    factual_content += f"\n\nEvaluation: {rationale}"
+            else:
+                # Criteria results format
+                eval_summary = []
+                for criteria_name, criteria_data in evaluation.items():
+                    if isinstance(criteria_data, dict):
+                        result = criteria_data.get('result', 'unknown')
+                        rationale = criteria_data.get('rationale', '')
+                        if rationale:
+                            eval_summary.append(f"{criteria_name}: {result} - {rationale}")
+                if eval_summary:
+                    factual_content += f"\n\nEvaluation:\n" + "\n".join(eval_summary)
+
+    return factual_content
+
+
+def transform_transcript(transcript: List[Any]) -> List[Dict[str, str]]:
+    """
+    Transform ElevenLabs transcript format to Mem0 message format.
+
+    ElevenLabs: {"role": "agent"/"user", "message": "..."}
+    Mem0: {"role": "assistant"/"user", "content": "..."}
+
+    Args:
+        transcript: ElevenLabs transcript list
+
+    Returns:
+        Mem0 messages, skipping entries without content
+    """
+    transformed_transcript = []
+    for msg in transcript or []:
+        if isinstance(msg, dict):
+            role = msg.get('role', 'user')
+            # Map 'agent' to 'assistant' for Mem0
+            if role == 'agent':
+                role = 'assistant'
+
+            # Get message content from either 'message' or 'content' field
+            content = msg.get('message') or msg.get('content', '')
+
+            if content:  # Only add messages with content
+                transformed_transcript.append({
+                    'role': role,
+                    'content': content
+                })
+    return transformed_transcript
+
+
+def store_factual_memory(caller_id: str, factual_content: str, common_metadata: Dict[str, Any]) -> None:
+    """
+    Store factual memory (summary + evaluation) in Mem0.
+
+    Args:
+        caller_id: Caller's phone number (Mem0 user_id)
+        factual_content: Output of build_factual_content
+        common_metadata: Metadata shared by all memories of this call
+    """
+    factual_metadata = {**common_metadata, 'type': 'factual'}
+
+    client.add(
+        messages=[{'role': 'assistant', 'content': factual_content}],
+        user_id=caller_id,
+        metadata=factual_metadata,
+        version="v2"
+    )
+    logger.info(f"Stored factual memory for {caller_id}")
+
+
+def store_semantic_memory(caller_id: str, messages: List[Dict[str, str]], common_metadata: Dict[str, Any],
+                          ledger: Optional[IngestLedger] = None) -> None:
+    """
+    Store semantic memory (transcript) in Mem0.
+
+    Filler turns are dropped and the transcript is split into overlapping
+    windows that are added concurrently, so a long call costs a few bounded
+    add() calls in parallel instead of one very slow one.
+
+    With a ledger, each stored window is marked as a part of the
+    semantic_memory stage, and windows marked by an earlier delivery are not
+    added again: a retry after a partial failure only re-adds the windows
+    that failed. Windows are identified by their content, which chunking
+    reproduces exactly for the same transcript.
+
+    Args:
+        caller_id: Caller's phone number (Mem0 user_id)
+        messages: Output of transform_transcript
+        common_metadata: Metadata shared by all memories of this call
+        ledger: Ingestion ledger holding the per-window markers (None disables them)
+
+    Raises:
+        RuntimeError: If any window failed to store (after all windows were attempted)
+    """
+    cleaned = clean_turns(messages)
+    windows = chunk_transcript(cleaned, SEMANTIC_WINDOW_SIZE, SEMANTIC_WINDOW_OVERLAP)
+    if not windows:
+        logger.warning(f"Transcript for {caller_id} only contained filler turns, skipping semantic memory")
+        return
+
+    conversation_id = common_metadata.get('conversation_id')
+    skipped = []
+
+    def add_window(index: int, window: List[Dict[str, str]]) -> None:
+        part = {'index': index, 'count': len(windows), 'messages': window}
+        if ledger is not None:
+            try:
+                if ledger.part_done(conversation_id, 'post_call_transcription', 'semantic_memory', part):
+                    skipped.append(index)
+                    return
+            except Exception as e:
+                # Adding the window again is better than losing it
+                logger.warning(f"Could not read semantic window marker for {conversation_id}: {str(e)}")
+
+        semantic_metadata = {**common_metadata, 'type': 'semantic'}
+        if len(windows) > 1:
+            semantic_metadata.update({'chunk_index': index, 'chunk_count': len(windows)})
+
+        client.add(
+            messages=window,
+            user_id=caller_id,
+            metadata=semantic_metadata,
+            version="v2"
+        )
+
+        if ledger is not None:
+            try:
+                ledger.record_part(conversation_id, 'post_call_transcription', 'semantic_memory', part)
+            except Exception as e:
+                logger.warning(f"Could not record semantic window {index} for {conversation_id}: {str(e)}")
+
+    results = submit_windows(windows, add_window, SEMANTIC_MAX_CONCURRENCY)
+
+    logger.info(json.dumps({
+        'event': 'semantic_chunk_timings',
+        'caller_id': caller_id,
+        'messages': len(messages),
+        'kept_messages': len(cleaned),
+        'skipped_chunks': sorted(skipped),
+        'chunks': [{'index': r['index'], 'messages': r['messages'], 'ok': r['ok'],
+                    'duration_ms': round(r['duration_ms'], 1)} for r in results]
+    }))
+
+    failed = [r['index'] for r in results if not r['ok']]
+    if failed:
+        raise RuntimeError(f"Failed to store {len(failed)}/{len(windows)} transcript windows: {failed}")
+
+    logger.info(f"Stored semantic memory for {caller_id} ({len(cleaned)} messages in {len(windows)} windows)")
+
+
+def refresh_caller_profile(caller_id: str, last_call_ts: Optional[str], conversation_id: str) -> str:
+    """
+    Rebuild the caller's profile from Mem0 and write it to S3.
+
+    The same memories are published as the caller's retrieval working set
+    (when WORKING_SET_BACKEND is set), so retrieve can answer the next call's
+    lookups without another get_all.
+
+    Mem0 may still be extracting memories from this call when get_all runs. The
+    profile is then saved without this call's conversation_id, so client_data
+    sees it predates the caller's version stamp and reads Mem0 instead; the
+    profile catches up on the caller's next post-call webhook. No working set
+    is published then: the caller's previous one predates the stamp as well,
+    so retrieve searches Mem0 until a set including this call exists.
+
+    Args:
+        caller_id: Caller's phone number (Mem0 user_id)
+        last_call_ts: ISO timestamp of the call just ingested
+        conversation_id: ElevenLabs conversation ID of that call
+
+    Returns:
+        S3 key of the profile
+    """
+    result = client.get_all(user_id=caller_id)
+    memories = result.get('results', []) if isinstance(result, dict) else result
+
+    includes_call = any(
+        isinstance(m, dict) and (m.get('metadata') or {}).get('conversation_id') == conversation_id
+        for m in memories or []
+    )
+    if not includes_call:
+        logger.info(f"Mem0 has no memories of {conversation_id} yet; saving the profile as predating it")
+
+    profile = build_caller_profile(caller_id, memories, last_call_ts=last_call_ts,
+                                   last_conversation_id=conversation_id if includes_call else None)
+    key = save_caller_profile(s3_client, S3_BUCKET_NAME, profile, codec=ARCHIVE_CODEC)
+    logger.info(f"Saved caller profile to s3://{S3_BUCKET_NAME}/{key} ({profile['memory_count']} memories)")
+
+    if working_set_store is not None and includes_call:
+        try:
+            working_set = build_working_set(caller_id, None, memories, max_memories=WORKING_SET_MAX_MEMORIES,
+                                            conversation_id=conversation_id)
+            publish_working_set(working_set_store, working_set, WORKING_SET_TTL_SECONDS)
+            logger.info(f"Published working set for {caller_id}: {len(working_set['memories'])} memories")
+        except Exception as e:
+            # retrieve searches Mem0 while the caller has no (or an older) working set
+            logger.error(f"Failed to publish working set for {caller_id}: {str(e)}", exc_info=True)
+    return key
+
+
+def index_conversation(caller_id: str, conversation_id: str, agent_id: str) -> None:
+    """
+    Record conversation_id -> caller_id for the audio webhook, and move this
+    conversation's audio to the caller's prefix if it arrived first.
+    """
+    record_conversation_caller(s3_client, S3_BUCKET_NAME, conversation_id, caller_id, agent_id)
+    relocate_orphan_audio(s3_client, S3_BUCKET_NAME, agent_id, conversation_id, caller_id)
+
+
+def run_concurrent_tasks(tasks: Dict[str, Callable[[], Any]], max_workers: int = MAX_WORKERS) -> Dict[str, Dict[str, Any]]:
+    """
+    Run independent post-call tasks concurrently on a bounded thread pool.
+
+    Each task is isolated: an exception in one task is logged and recorded but
+    does not affect the others.
+
+    Args:
+        tasks: Mapping of task name to zero-argument callable
+        max_workers: Maximum number of tasks running at once
+
+    Returns:
+        Mapping of task name to {'ok': bool, 'duration_ms': float, 'error': str|None}
+    """
+    def timed(name: str, fn: Callable[[], Any]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            fn()
+            return {'ok': True, 'duration_ms': (time.perf_counter() - start) * 1000, 'error': None}
+        except Exception as e:
+            logger.error(f"Error in post-call task {name}: {str(e)}", exc_info=True)
+            return {'ok': False, 'duration_ms': (time.perf_counter() - start) * 1000, 'error': str(e)}
+
+    results: Dict[str, Dict[str, Any]] = {}
+    if not tasks:
+        return results
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(tasks)))) as executor:
+        futures = {name: executor.submit(timed, name, fn) for name, fn in tasks.items()}
+        for name, future in futures.items():
+            results[name] = future.result()
+    wall_ms = (time.perf_counter() - wall_start) * 1000
+
+    for name, result in results.items():
+        status = 'ok' if result['ok'] else 'failed'
+        logger.info(f"Post-call task {name} {status} in {result['duration_ms']:.0f}ms")
+
+    metrics = MetricsRecorder({'Function': 'post_call'})
+    for name, result in results.items():
+        metrics.put(f"{name.title().replace('_', '')}Ms", round(result['duration_ms'], 1), 'Milliseconds')
+        metrics.count('TaskFailures', int(not result['ok']))
+    mem0_connection_stats.put_metrics(metrics)
+    metrics.flush()
+
+    logger.info(json.dumps({
+        'event': 'post_call_task_timings',
+        'wall_ms': round(wall_ms, 1),
+        'sum_ms': round(sum(r['duration_ms'] for r in results.values()), 1),
+        'tasks': {name: {'ok': r['ok'], 'duration_ms': round(r['duration_ms'], 1)} for name, r in results.items()}
+    }))
+
+    return results
+
+
+def get_ingest_ledger() -> Optional[IngestLedger]:
+    """Return the process-wide ingestion ledger (None when disabled), creating it on first use."""
+    global _ingest_ledger, _ingest_ledger_loaded
+    if not _ingest_ledger_loaded:
+        _ingest_ledger = create_ingest_ledger()
+        _ingest_ledger_loaded = True
+    return _ingest_ledger
+
+
+def run_once(conversation_id: Optional[str], webhook_type: str,
+             ingest: Callable[[Set[str]], Dict[str, Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Run a webhook's ingestion at most once per conversation_id and webhook type.
+
+    The delivery claims the webhook in the ingestion ledger, skips it if an
+    earlier delivery completed it, and otherwise passes the stages that did
+    complete to ingest() so only the missing ones run. Stages that succeed are
+    recorded even if others fail; the webhook is complete once every stage
+    outside BEST_EFFORT_TASKS has succeeded. Without a ledger (or a
+    conversation_id) ingest() simply runs, and so it does when the ledger is
+    unreachable: a duplicate is better than a lost call.
+
+    Args:
+        conversation_id: ElevenLabs conversation ID
+        webhook_type: post_call_transcription or post_call_audio
+        ingest: Runs the stages not in the given set and returns their results
+
+    Returns:
+        Per-task results of this delivery: empty if the webhook was already
+        ingested, a failed 'ingest_lease' result if another delivery holds the
+        claim (so a queued job is retried rather than acked)
+    """
+    ledger = get_ingest_ledger()
+    if ledger is None or not conversation_id or conversation_id == 'unknown':
+        return ingest(set())
+
+    metrics = MetricsRecorder({'Function': 'post_call'})
+    try:
+        lease = ledger.acquire(conversation_id, webhook_type)
+    except Exception as e:
+        logger.error(f"Ingestion ledger unavailable, processing {webhook_type} for {conversation_id} "
+                     f"without deduplication: {str(e)}", exc_info=True)
+        return ingest(set())
+    if lease is None:
+        # Not a success: if the lease holder then fails a stage, this delivery is the retry that resumes it
+        logger.info(f"{webhook_type} for {conversation_id} is already being processed, deferring this delivery")
+        metrics.count('InFlightWebhooks')
+        metrics.flush()
+        return {'ingest_lease': {'ok': False, 'duration_ms': 0.0, 'error': 'another delivery is processing this webhook'}}
+
+    try:
+        record = ledger.get(conversation_id, webhook_type)
+        if record['complete']:
+            logger.info(f"{webhook_type} for {conversation_id} was already ingested, skipping duplicate delivery")
+            metrics.count('DuplicateWebhooks')
+            return {}
+
+        completed = set(record['stages'])
+        if completed:
+            logger.info(f"Resuming {webhook_type} for {conversation_id}, already completed: {sorted(completed)}")
+            metrics.count('ResumedWebhooks')
+        results = ingest(completed)
+
+        required = {name: result for name, result in results.items() if name not in BEST_EFFORT_TASKS}
+        try:
+            ledger.record(
+                conversation_id,
+                webhook_type,
+                [name for name, result in required.items() if result['ok']],
+                complete=all(result['ok'] for result in required.values())
+            )
+        except Exception as e:
+            logger.error(f"Failed to record ingestion of {webhook_type} for {conversation_id}: {str(e)}", exc_info=True)
+        return results
+    finally:
+        try:
+            if not ledger.release(conversation_id, webhook_type, lease):
+                logger.warning(f"Ingestion lease for {conversation_id} expired before {webhook_type} finished")
+                metrics.count('ExpiredIngestLeases')
+        except Exception as e:
+            # The lease expires on its own after lease_seconds
+            logger.warning(f"Failed to release ingestion lease for {conversation_id}: {str(e)}")
+        metrics.flush()
+
+
+def parse_webhook_body(raw_body: Union[str, bytes]) -> Tuple[Optional[str], Dict[str, Any], Optional[WebhookScan]]:
+    """
+    Determine the webhook type and extract its data object.
+
+    In 'stream' parse mode only the fields ingestion reads are extracted
+    (scan_webhook); bodies the scanner rejects are parsed with json.loads.
+
+    Args:
+        raw_body: Raw webhook request body
+
+    Returns:
+        (webhook_type, webhook_data, scan), scan being None when json.loads was used
+    """
+    if PARSE_MODE == 'stream':
+        try:
+            scan = scan_webhook(raw_body)
+            webhook_type = scan.webhook_type or 'post_call_transcription'
+            logger.info(f"Scanned webhook body, type: {webhook_type}")
+            return webhook_type, scan.data, scan
+        except ValueError as e:
+            logger.warning(f"Streaming parse failed, falling back to json.loads: {str(e)}")
+
+    payload = json.loads(raw_body)
+
+    # Determine webhook type
+    webhook_type = None
+    webhook_data = None
+
+    # Handle ElevenLabs webhook formats:
+    # Format 1 (array): [{"type": "post_call_transcription", "data": {...}}]
+    # Format 2 (object): {"type": "post_call_transcription", "event_timestamp": ..., "data": {...}}
+    # Format 3 (object): {"type": "post_call_audio", "event_timestamp": ..., "data": {...}}
+
+    if isinstance(payload, list) and len(payload) > 0:
+        webhook_type = payload[0].get('type')
+        webhook_data = payload[0].get('data', {})
+        logger.info(f"Detected ElevenLabs array format, type: {webhook_type}")
+    elif isinstance(payload, dict) and 'type' in payload:
+        webhook_type = payload.get('type')
+        webhook_data = payload.get('data', {})
+        logger.info(f"Detected ElevenLabs object format, type: {webhook_type}")
+    else:
+        # Legacy format without type field
+        logger.info("Detected legacy format without type field, assuming transcription")
+        webhook_type = 'post_call_transcription'
+        webhook_data = payload
+
+    return webhook_type, webhook_data, None
+
+
+def process_webhook_body(raw_body: Union[str, bytes], retryable: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Process an already-verified post-call webhook body.
+
+    Parses the payload, then archives it to S3 and stores factual and semantic
+    memories, and finally refreshes the caller profile. Used by both the inline
+    webhook path and the queue worker. Retried deliveries of the same webhook
+    only run the stages that have not completed yet (see run_once).
+
+    Args:
+        raw_body: Raw webhook request body (HMAC already verified)
+        retryable: A failed stage makes the caller retry the body (queue worker)
+
+    Returns:
+        Per-task results from run_concurrent_tasks (empty if nothing was stored)
+    """
+    webhook_type, webhook_data, scan = parse_webhook_body(raw_body)
+
+    # Handle audio webhook separately (only saves audio, no memory storage)
+    if webhook_type == 'post_call_audio':
+        logger.info("Processing post_call_audio webhook")
+
+        def ingest_audio(completed: Set[str]) -> Dict[str, Dict[str, Any]]:
+            start = time.perf_counter()
+            ok = handle_audio_webhook(webhook_data)
+            return {'audio_archive': {'ok': ok, 'duration_ms': (time.perf_counter() - start) * 1000, 'error': None}}
+
+        # The queue worker retries (and eventually dead-letters) the job if the upload failed
+        return run_once(webhook_data.get('conversation_id'), webhook_type, ingest_audio)
+
+    # Continue with transcription webhook processing
+    payload = webhook_data
+
+    # Extract required fields
+    conversation_id = payload.get('conversation_id', 'unknown')
+    agent_id = payload.get('agent_id', 'unknown')
+
+    # Get metadata - handle both formats
+    metadata = payload.get('metadata', {})
+    call_duration = metadata.get('call_duration_secs', payload.get('call_duration', 0))
+
+    # Get transcript
+    transcript = payload.get('transcript', [])
+
+    # Get analysis - handle both formats
+    analysis = payload.get('analysis', {})
+
+    # Extract caller_id from multiple possible locations
+    caller_id = None
+
+    # 1. Try payload.external_number (root level)
+    caller_id = payload.get('external_number')
+    if caller_id:
+        logger.info(f"Extracted caller_id from payload.external_number: {caller_id}")
+
+    # 2. Try metadata.caller_id (direct format)
+    if not caller_id:
+        caller_id = metadata.get('caller_id')
+        if caller_id:
+            logger.info(f"Extracted caller_id from metadata.caller_id: {caller_id}")
+
+    # 3. Try metadata.phone_call.external_number (ElevenLabs format)
+    if not caller_id and 'phone_call' in metadata:
+        caller_id = metadata['phone_call'].get('external_number')
+        logger.info(f"Extracted caller_id from metadata.phone_call.external_number: {caller_id}")
+
+    # 4. Try conversation_initiation_client_data.dynamic_variables.system__caller_id
+    if not caller_id and 'conversation_initiation_client_data' in payload:
+        conv_init = payload['conversation_initiation_client_data']
+        dvars = conv_init.get('dynamic_variables', {})
+        caller_id = dvars.get('system__caller_id')
+        if caller_id:
+            logger.info(f"Extracted caller_id from conversation_initiation_client_data: {caller_id}")
+
+    if not caller_id:
+        logger.error("Missing caller_id in all expected locations")
+        logger.error(f"Payload keys: {list(payload.keys())}")
+        logger.error(f"Metadata keys: {list(metadata.keys())}")
+        return {}
+
+    logger.info(f"Processing post-call data for user_id: {caller_id}")
+
+    # Prepare timestamp
+    timestamp = datetime.utcnow().isoformat()
+
+    # Prepare common metadata
+    common_metadata = {
+        'agent_id': agent_id,
+        'conversation_id': conversation_id,
+        'call_duration': call_duration,
+        'timestamp': timestamp
+    }
+
+    factual_content = build_factual_content(analysis)
+    transformed_transcript = transform_transcript(transcript)
+
+    # S3 archive, factual memory and semantic memory are independent of each
+    # other, so run them concurrently: wall time becomes max() instead of sum()
+    # A failed archive only fails the stage when a ledger or queue retry will run it again
+    archive_retried = retryable or (conversation_id != 'unknown' and get_ingest_ledger() is not None)
+    tasks = {'s3_archive': lambda: save_to_s3(caller_id, conversation_id, payload, scan, archive_retried)}
+
+    if conversation_id != 'unknown':
+        tasks['conversation_index'] = lambda: index_conversation(caller_id, conversation_id, agent_id)
+
+    if factual_content:
+        tasks['factual_memory'] = lambda: store_factual_memory(caller_id, factual_content, common_metadata)
+
+    if transformed_transcript:
+        # Windows stored by an earlier delivery are skipped (conversation_id keys their markers)
+        window_ledger = get_ingest_ledger() if conversation_id != 'unknown' else None
+        tasks['semantic_memory'] = lambda: store_semantic_memory(caller_id, transformed_transcript, common_metadata,
+                                                                 window_ledger)
+    elif transcript:
+        logger.warning(f"No valid messages found in transcript for {caller_id}")
+
+    def ingest(completed: Set[str]) -> Dict[str, Dict[str, Any]]:
+        results = run_concurrent_tasks({name: fn for name, fn in tasks.items() if name not in completed},
+                                       max_workers=MAX_WORKERS)
+
+        # The profile summarizes the memories just written, so it runs after them;
+        # the version bump comes last so readers never see the new stamp with the old profile
+        memory_tasks = [name for name in ('factual_memory', 'semantic_memory') if name in results]
+        if any(results[name]['ok'] for name in memory_tasks):
+            if CALLER_PROFILE_ENABLED:
+                start_secs = metadata.get('start_time_unix_secs')
+                last_call_ts = datetime.utcfromtimestamp(start_secs).isoformat() if start_secs else timestamp
+                results.update(run_concurrent_tasks(
+                    {'caller_profile': lambda: refresh_caller_profile(caller_id, last_call_ts, conversation_id)},
+                    max_workers=1
+                ))
+            results.update(run_concurrent_tasks(
+                {'caller_version': lambda: bump_caller_version(s3_client, S3_BUCKET_NAME, caller_id, conversation_id)},
+                max_workers=1
+            ))
+        return results
+
+    results = run_once(conversation_id, 'post_call_transcription', ingest)
+
+    logger.info(f"Successfully processed post-call data for {caller_id}")
+    return results
+
+
+def persist_raw_body(raw_body: Union[str, bytes]) -> str:
+    """
+    Persist a verified webhook body to S3 so the worker stage can process it.
+
+    Args:
+        raw_body: Raw webhook request body
+
+    Returns:
+        S3 key of the stored body
+    """
+    now = datetime.utcnow()
+    raw_key = f"post-call/raw/{now.strftime('%Y/%m/%d')}/{now.strftime('%H%M%S')}_{uuid.uuid4().hex}.json"
+    s3_client.put_object(
+        Bucket=S3_BUCKET_NAME,
+        Key=raw_key,
+        Body=raw_body if isinstance(raw_body, bytes) else raw_body.encode('utf-8'),
+        ContentType='application/json',
+        Metadata={'timestamp': now.isoformat(), 'payload_type': 'raw_webhook'}
+    )
+    return raw_key
+
+
+def get_ingest_queue() -> IngestQueue:
+    """Return the process-wide ingestion queue, creating it on first use."""
+    global _ingest_queue
+    if _ingest_queue is None:
+        _ingest_queue = create_ingest_queue()
+    return _ingest_queue
+
+
+def enqueue_webhook(raw_body: Union[str, bytes]) -> str:
+    """
+    Webhook stage of queue mode: persist the raw body and enqueue an ingestion job.
+
+    Args:
+        raw_body: Raw webhook request body (HMAC already verified)
+
+    Returns:
+        Queue message id
+    """
+    raw_key = persist_raw_body(raw_body)
+    message_id = get_ingest_queue().enqueue({
+        'raw_key': raw_key,
+        'received_at': datetime.utcnow().isoformat()
+    })
+    logger.info(f"Enqueued post-call job {message_id} for s3://{S3_BUCKET_NAME}/{raw_key}")
+    return message_id
+
+
+def process_ingest_job(job: Dict[str, Any]) -> bool:
+    """
+    Worker stage: load a persisted webhook body and process it.
+
+    Args:
+        job: Job body created by enqueue_webhook
+
+    Returns:
+        True if every required task succeeded, False if the job should be retried
+    """
+    obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=job['raw_key'])
+    raw_body = obj['Body'].read().decode('utf-8')
+    results = process_webhook_body(raw_body, retryable=True)
+    return all(result['ok'] for name, result in results.items() if name not in BEST_EFFORT_TASKS)
+
+
+def drain_ingest_queue(queue: IngestQueue, batch_size: int = INGEST_BATCH_SIZE,
+                       max_attempts: int = INGEST_MAX_ATTEMPTS,
+                       retry_delay: float = INGEST_RETRY_DELAY_SECONDS) -> Dict[str, int]:
+    """
+    Consume jobs from a pollable queue in batches until it is empty.
+
+    Failed jobs are retried after retry_delay seconds and dead-lettered once
+    they have been attempted max_attempts times.
+
+    Returns:
+        Counters: processed, succeeded, retried, dead_lettered
+    """
+    stats = {'processed': 0, 'succeeded': 0, 'retried': 0, 'dead_lettered': 0}
+
+    def handle(message: Dict[str, Any]) -> str:
+        error = None
+        try:
+            ok = process_ingest_job(message['body'])
+            if not ok:
+                error = 'one or more post-call tasks failed'
+        except Exception as e:
+            logger.error(f"Error processing ingest job {message['id']}: {str(e)}", exc_info=True)
+            error = str(e)
+
+        if error is None:
+            queue.ack(message)
+            return 'succeeded'
+        if message['attempts'] >= max_attempts:
+            logger.error(f"Dead-lettering ingest job {message['id']} after {message['attempts']} attempts: {error}")
+            queue.dead_letter(message, error)
+            return 'dead_lettered'
+        queue.retry(message, retry_delay)
+        return 'retried'
+
+    with ThreadPoolExecutor(max_workers=INGEST_WORKER_CONCURRENCY) as executor:
+        while True:
+            batch = queue.receive(batch_size)
+            if not batch:
+                break
+            # Outcomes are counted here rather than in the workers, so stats needs no lock
+            for outcome in executor.map(handle, batch):
+                stats['processed'] += 1
+                stats[outcome] += 1
+
+    logger.info(f"Ingest queue drained: {json.dumps(stats)}")
+    return stats
+
+
+def worker_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Handle the worker stage of queue mode.
+
+    With an SQS event source, processes the delivered batch and reports partial
+    failures so SQS retries them (and dead-letters them via its redrive policy).
+    Without SQS records, polls the configured queue until it is empty.
+
+    Args:
+        event: SQS event or scheduled/manual invocation
+        context: Lambda context
+
+    Returns:
+        SQS partial batch response, or drain counters
+    """
+    records = event.get('Records')
+    if records is None:
+        return drain_ingest_queue(get_ingest_queue())
+
+    def handle(record: Dict[str, Any]) -> Optional[Dict[str, str]]:
+        try:
+            if process_ingest_job(json.loads(record['body'])):
+                return None
+        except Exception as e:
+            logger.error(f"Error processing SQS message {record.get('messageId')}: {str(e)}", exc_info=True)
+        return {'itemIdentifier': record['messageId']}
+
+    with ThreadPoolExecutor(max_workers=INGEST_WORKER_CONCURRENCY) as executor:
+        failures = [f for f in executor.map(handle, records) if f]
+
+    logger.info(f"Processed {len(records)} SQS ingest jobs, {len(failures)} failed")
+    return {'batchItemFailures': failures}
+
+
+def reconcile_handler(event: Dict[str, Any], context: Any) -> Dict[str, int]:
+    """
+    Move audio that arrived before its transcript to the caller's prefix.
+
+    Runs on a schedule; each run examines up to RECONCILE_MAX_OBJECTS parked
+    objects under post-call/audio-only/, continuing after the last key the
+    previous run examined.
+
+    Args:
+        event: Scheduled event (or manual invocation)
+        context: Lambda context
+
+    Returns:
+        Counters: examined, moved, unmatched, expired, failed
+    """
+    stats = reconcile_orphan_audio(s3_client, S3_BUCKET_NAME, max_objects=RECONCILE_MAX_OBJECTS,
+                                   max_age_seconds=RECONCILE_MAX_AGE_HOURS * 3600, resume=True)
+    metrics = MetricsRecorder({'Function': 'post_call'})
+    metrics.count('AudioReconciled', stats['moved'])
+    metrics.count('AudioUnmatched', stats['unmatched'])
+    metrics.count('AudioExpired', stats['expired'])
+    metrics.count('AudioReconcileFailures', stats['failed'])
+    metrics.flush()
+    logger.info(f"Audio reconciliation: {json.dumps(stats)}")
+    return stats
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Handle ElevenLabs Post-Call webhook asynchronously.
 
+    In inline mode (default) the webhook is processed before returning. In queue
+    mode (POST_CALL_MODE=queue) only HMAC verification, raw body persistence and
+    enqueueing happen here; worker_handler does the rest.
+
     Args:
         event: API Gateway event with call payload
         context: Lambda context
@@ -226,214 +1104,40 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
         Immediate 200 OK response
     """
     # Return 200 OK immediately
-    response = {
-        'statusCode': 200,
-        'headers': {'Content-Type': 'application/json'},
-        'body': json.dumps({'status': 'ok'})
-    }
+    response = json_response(200, {'status': 'ok'})
 
     # Process asynchronously (errors are logged but don't affect response)
     try:
         # Get raw body for HMAC verification
         raw_body = event.get('body', '{}')
+        is_base64 = bool(event.get('isBase64Encoded'))
         headers = event.get('headers', {})
         signature_header = headers.get('elevenlabs-signature') or headers.get('ElevenLabs-Signature')
 
-        # Verify HMAC signature
+        # Verify HMAC signature before touching the body
         if not signature_header:
             logger.error("Missing ElevenLabs-Signature header")
             return response
 
-        if not verify_hmac_signature(raw_body, signature_header):
+        if not verify_hmac_signature(raw_body, signature_header, is_base64):
             logger.error("Invalid HMAC signature")
             return response
 
-        # Parse payload
-        payload = json.loads(raw_body)
-        
-        # Determine webhook type
-        webhook_type = None
-        webhook_data = None
-        
-        # Handle ElevenLabs webhook formats:
-        # Format 1 (array): [{"type": "post_call_transcription", "data": {...}}]
-        # Format 2 (object): {"type": "post_call_transcription", "event_timestamp": ..., "data": {...}}
-        # Format 3 (object): {"type": "post_call_audio", "event_timestamp": ..., "data": {...}}
-        
-        if isinstance(payload, list) and len(payload) > 0:
-            webhook_type = payload[0].get('type')
-            webhook_data = payload[0].get('data', {})
-            logger.info(f"Detected ElevenLabs array format, type: {webhook_type}")
-        elif isinstance(payload, dict) and 'type' in payload:
-            webhook_type = payload.get('type')
-            webhook_data = payload.get('data', {})
-            logger.info(f"Detected ElevenLabs object format, type: {webhook_type}")
-        else:
-            # Legacy format without type field
-            logger.info("Detected legacy format without type field, assuming transcription")
-            webhook_type = 'post_call_transcription'
-            webhook_data = payload
-        
-        # Handle audio webhook separately (only saves audio, no memory storage)
-        if webhook_type == 'post_call_audio':
-            logger.info("Processing post_call_audio webhook")
-            return handle_audio_webhook(webhook_data, response)
-        
-        # Continue with transcription webhook processing
-        payload = webhook_data
-        
-        # Extract required fields
-        conversation_id = payload.get('conversation_id', 'unknown')
-        agent_id = payload.get('agent_id', 'unknown')
-        
-        # Get metadata - handle both formats
-        metadata = payload.get('metadata', {})
-        call_duration = metadata.get('call_duration_secs', payload.get('call_duration', 0))
-        
-        # Get transcript
-        transcript = payload.get('transcript', [])
-        
-        # Get analysis - handle both formats
-        analysis = payload.get('analysis', {})
-        
-        # Extract caller_id from multiple possible locations
-        caller_id = None
-        
-        # 1. Try payload.external_number (root level)
-        caller_id = payload.get('external_number')
-        if caller_id:
-            logger.info(f"Extracted caller_id from payload.external_number: {caller_id}")
-        
-        # 2. Try metadata.caller_id (direct format)
-        if not caller_id:
-            caller_id = metadata.get('caller_id')
-            if caller_id:
-                logger.info(f"Extracted caller_id from metadata.caller_id: {caller_id}")
-        
-        # 3. Try metadata.phone_call.external_number (ElevenLabs format)
-        if not caller_id and 'phone_call' in metadata:
-            caller_id = metadata['phone_call'].get('external_number')
-            logger.info(f"Extracted caller_id from metadata.phone_call.external_number: {caller_id}")
-        
-        # 4. Try conversation_initiation_client_data.dynamic_variables.system__caller_id
-        if not caller_id and 'conversation_initiation_client_data' in payload:
-            conv_init = payload['conversation_initiation_client_data']
-            dvars = conv_init.get('dynamic_variables', {})
-            caller_id = dvars.get('system__caller_id')
-            if caller_id:
-                logger.info(f"Extracted caller_id from conversation_initiation_client_data: {caller_id}")
-
-        if not caller_id:
-            logger.error("Missing caller_id in all expected locations")
-            logger.error(f"Payload keys: {list(payload.keys())}")
-            logger.error(f"Metadata keys: {list(metadata.keys())}")
-            return response
-
-        logger.info(f"Processing post-call data for user_id: {caller_id}")
-
-        # Save to S3 (JSON and MP3)
-        try:
-            save_to_s3(caller_id, conversation_id, payload)
-        except Exception as e:
-            logger.error(f"Error saving to S3: {str(e)}", exc_info=True)
-            # Continue processing - S3 failure shouldn't block memory storage
-
-        # Prepare timestamp
-        timestamp = datetime.utcnow().isoformat()
-
-        # Prepare common metadata
-        common_metadata = {
-            'agent_id': agent_id,
-            'conversation_id': conversation_id,
-            'call_duration': call_duration,
-            'timestamp': timestamp
-        }
+        if is_base64:
+            # Decoded once, after verification; json.loads and S3 take the bytes as they are
+            raw_body = base64.b64decode(raw_body)
 
-        # Store Factual Memory (summary + evaluation)
-        try:
-            # Handle both 'summary' and 'transcript_summary' fields
-            summary = analysis.get('summary') or analysis.get('transcript_summary', '')
-            
-            # Handle both 'evaluation' and 'evaluation_criteria_results' fields
-            evaluation = analysis.get('evaluation') or analysis.get('evaluation_criteria_results', {})
-
-            # Combine summary and evaluation rationale
-            factual_content = summary
-            if evaluation:
-                # Handle both formats: direct rationale or criteria results
-                if isinstance(evaluation, dict):
-                    # ElevenLabs format: evaluation_criteria_results with multiple criteria
-                    if 'rationale' in evaluation:
-                        # Direct format
-                        rationale = evaluation.get('rationale', '')
-                        if rationale:
-                            factual_content += f"\n\nEvaluation: {rationale}"
-                    else:
-                        # Criteria results format
-                        eval_summary = []
-                        for criteria_name, criteria_data in evaluation.items():
-                            if isinstance(criteria_data, dict):
-                                result = criteria_data.get('result', 'unknown')
-                                rationale = criteria_data.get('rationale', '')
-                                if rationale:
-                                    eval_summary.append(f"{criteria_name}: {result} - {rationale}")
-                        if eval_summary:
-                            factual_content += f"\n\nEvaluation:\n" + "\n".join(eval_summary)
-
-            if factual_content:
-                factual_metadata = {**common_metadata, 'type': 'factual'}
-
-                client.add(
-                    messages=[{'role': 'assistant', 'content': factual_content}],
-                    user_id=caller_id,
-                    metadata=factual_metadata,
-                    version="v2"
-                )
-                logger.info(f"Stored factual memory for {caller_id}")
-        except Exception as e:
-            logger.error(f"Error storing factual memory: {str(e)}", exc_info=True)
-
-        # Store Semantic Memory (full transcript)
-        try:
-            if transcript and len(transcript) > 0:
-                # Transform ElevenLabs transcript format to Mem0 format
-                # ElevenLabs: {"role": "agent"/"user", "message": "..."}
-                # Mem0: {"role": "assistant"/"user", "content": "..."}
-                transformed_transcript = []
-                for msg in transcript:
-                    if isinstance(msg, dict):
-                        role = msg.get('role', 'user')
-                        # Map 'agent' to 'assistant' for Mem0
-                        if role == 'agent':
-                            role = 'assistant'
-                        
-                        # Get message content from either 'message' or 'content' field
-                        content = msg.get('message') or msg.get('content', '')
-                        
-                        if content:  # Only add messages with content
-                            transformed_transcript.append({
-                                'role': role,
-                                'content': content
-                            })
-                
-                if transformed_transcript:
-                    semantic_metadata = {**common_metadata, 'type': 'semantic'}
-
-                    client.add(
-                        messages=transformed_transcript,
-                        user_id=caller_id,
-                        metadata=semantic_metadata,
-                        version="v2"
-                    )
-                    logger.info(f"Stored semantic memory for {caller_id} ({len(transformed_transcript)} messages)")
-                else:
-                    logger.warning(f"No valid messages found in transcript for {caller_id}")
-        except Exception as e:
-            logger.error(f"Error storing semantic memory: {str(e)}", exc_info=True)
+        if INGEST_MODE == 'queue':
+            try:
+                enqueue_webhook(raw_body)
+                return response
+            except Exception as e:
+                # Never drop a verified webhook: fall back to inline processing
+                logger.error(f"Failed to enqueue post-call webhook, processing inline: {str(e)}", exc_info=True)
 
-        logger.info(f"Successfully processed post-call data for {caller_id}")
+        process_webhook_body(raw_body)
 
     except Exception as e:
         logger.error(f"Error processing post-call webhook: {str(e)}", exc_info=True)
 
-    return response
\ No newline at end of file
+    return response
@@ -0,0 +1,168 @@
+"""
+Post-call ingestion ledger
+
+ElevenLabs retries webhooks, and every retry would otherwise repeat the Mem0
+add() calls (duplicate LLM extraction and duplicate memories) and rewrite the
+S3 archive. The ledger records, per conversation_id and webhook type, which
+ingestion stages have completed, in a shared KVStore:
+
+- ingest-lease:{webhook_type}:{conversation_id}: claimed with a conditional
+  write by the delivery that processes the webhook, so concurrent deliveries
+  do not both do the work. It expires after lease_seconds if its holder dies,
+  and is only released by its owner, so a holder that outlived its lease
+  cannot drop the claim of the delivery that took over.
+- ingest:{webhook_type}:{conversation_id}: {'stages': {name: completed_at}, 'complete': bool}
+- ingest-part:{webhook_type}:{conversation_id}:{stage}:{digest}: marks one
+  part of a stage (e.g. one transcript window of semantic_memory) as done.
+  Each part has its own key and is written as soon as it completes, so a
+  delivery that fails or times out halfway still keeps the parts it stored.
+
+A delivery whose record is complete is skipped; a delivery whose record lists
+some stages resumes only the missing ones, and skips the parts of a missing
+stage that already completed.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from agentic_memory_runtime.kv_store import KVStore, create_kv_store
+
+
+class IngestLedger:
+    """
+    Completion markers and processing leases for post-call webhooks.
+
+    Args:
+        store: Shared store supporting put_if_absent
+        ttl_seconds: How long completion records are kept (covers the webhook retry window)
+        lease_seconds: How long a claim is held at most (keep above the Lambda timeout)
+    """
+
+    def __init__(self, store: KVStore, ttl_seconds: float = 7 * 86400, lease_seconds: float = 300):
+        self.store = store
+        self.ttl_seconds = ttl_seconds
+        self.lease_seconds = lease_seconds
+
+    @staticmethod
+    def key(conversation_id: str, webhook_type: str) -> str:
+        return f"ingest:{webhook_type}:{conversation_id}"
+
+    @staticmethod
+    def lease_key(conversation_id: str, webhook_type: str) -> str:
+        return f"ingest-lease:{webhook_type}:{conversation_id}"
+
+    @staticmethod
+    def part_key(conversation_id: str, webhook_type: str, stage: str, part: Any) -> str:
+        digest = hashlib.sha256(json.dumps(part, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:32]
+        return f"ingest-part:{webhook_type}:{conversation_id}:{stage}:{digest}"
+
+    def acquire(self, conversation_id: str, webhook_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Claim a webhook for processing.
+
+        Returns:
+            The lease to pass to release(), or None if another delivery holds the claim
+        """
+        lease = {'owner': uuid.uuid4().hex, 'acquired_at': datetime.utcnow().isoformat()}
+        if not self.store.put_if_absent(self.lease_key(conversation_id, webhook_type), lease, self.lease_seconds):
+            return None
+        return lease
+
+    def release(self, conversation_id: str, webhook_type: str, lease: Dict[str, Any]) -> bool:
+        """
+        Give up a claim taken with acquire().
+
+        Args:
+            conversation_id: ElevenLabs conversation ID
+            webhook_type: post_call_transcription or post_call_audio
+            lease: The lease acquire() returned
+
+        Returns:
+            False if the lease expired and another delivery now holds the claim (left in place)
+        """
+        return self.store.delete_if_equal(self.lease_key(conversation_id, webhook_type), lease)
+
+    def get(self, conversation_id: str, webhook_type: str) -> Dict[str, Any]:
+        """The webhook's completion record ({'stages': {}, 'complete': False} if none)."""
+        record = self.store.get(self.key(conversation_id, webhook_type))
+        if not isinstance(record, dict):
+            return {'stages': {}, 'complete': False}
+        return {'stages': dict(record.get('stages') or {}), 'complete': bool(record.get('complete'))}
+
+    def record(self, conversation_id: str, webhook_type: str, stages: Iterable[str], complete: bool) -> Dict[str, Any]:
+        """
+        Add completed stages to the webhook's record.
+
+        Only call while holding the claim: the record is read, merged and
+        written back without a condition.
+
+        Args:
+            conversation_id: ElevenLabs conversation ID
+            webhook_type: post_call_transcription or post_call_audio
+            stages: Stages that completed in this delivery
+            complete: Whether every stage of the webhook has now completed
+
+        Returns:
+            The updated record
+        """
+        record = self.get(conversation_id, webhook_type)
+        now = datetime.utcnow().isoformat()
+        for stage in stages:
+            record['stages'].setdefault(stage, now)
+        record['complete'] = record['complete'] or complete
+        self.store.put(self.key(conversation_id, webhook_type), record, self.ttl_seconds)
+        return record
+
+    def part_done(self, conversation_id: str, webhook_type: str, stage: str, part: Any) -> bool:
+        """Whether record_part() was called for this part (identified by its content)."""
+        return self.store.get(self.part_key(conversation_id, webhook_type, stage, part)) is not None
+
+    def record_part(self, conversation_id: str, webhook_type: str, stage: str, part: Any) -> None:
+        """
+        Mark one part of a stage as completed.
+
+        Safe to call concurrently for different parts: each part is its own key.
+
+        Args:
+            conversation_id: ElevenLabs conversation ID
+            webhook_type: post_call_transcription or post_call_audio
+            stage: Stage the part belongs to (e.g. semantic_memory)
+            part: JSON-serializable content of the part (e.g. its index and messages)
+        """
+        self.store.put(
+            self.part_key(conversation_id, webhook_type, stage, part),
+            {'completed_at': datetime.utcnow().isoformat()},
+            self.ttl_seconds
+        )
+
+
+def create_ingest_ledger(backend: Optional[str] = None) -> Optional[IngestLedger]:
+    """
+    Build the ingestion ledger configured by environment variables.
+
+    INGEST_LEDGER_BACKEND: dynamodb, file, memory or none (default; disables deduplication)
+    INGEST_LEDGER_TABLE: DynamoDB table (dynamodb backend)
+    INGEST_LEDGER_PATH: Directory for the file backend
+    INGEST_LEDGER_TTL_SECONDS: Completion record lifetime (default 7 days)
+    INGEST_LEDGER_LEASE_SECONDS: Processing claim lifetime (default 300)
+
+    Returns:
+        The ledger, or None when disabled
+    """
+    backend = backend or os.environ.get('INGEST_LEDGER_BACKEND') or 'none'
+    if backend == 'none':
+        return None
+    store = create_kv_store(
+        backend,
+        table_name=os.environ.get('INGEST_LEDGER_TABLE'),
+        path=os.environ.get('INGEST_LEDGER_PATH') or None
+    )
+    return IngestLedger(
+        store,
+        ttl_seconds=float(os.environ.get('INGEST_LEDGER_TTL_SECONDS', 7 * 86400)),
+        lease_seconds=float(os.environ.get('INGEST_LEDGER_LEASE_SECONDS', 300))
+    )
@@ -0,0 +1,278 @@
+"""
+Post-call ingestion queue
+
+Pluggable job queue between the post-call webhook stage (verify, persist raw
+body, enqueue) and the worker stage (parse, archive, write memories).
+
+Backends:
+- SQSIngestQueue: production queue (worker is driven by the SQS event source)
+- SQLiteIngestQueue: durable local stand-in with visibility timeouts and a dead-letter table
+- InMemoryIngestQueue: process-local stand-in for tests and benchmarks
+
+Messages are dicts: {'id': str, 'body': dict, 'attempts': int}
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from agentic_memory_runtime.clients import lazy_sqs_client
+
+
+class IngestQueue(ABC):
+    """Interface implemented by all ingestion queue backends."""
+
+    @abstractmethod
+    def enqueue(self, body: Dict[str, Any]) -> str:
+        """Add a job and return its message id."""
+
+    @abstractmethod
+    def receive(self, max_messages: int = 10) -> List[Dict[str, Any]]:
+        """Claim up to max_messages visible jobs."""
+
+    @abstractmethod
+    def ack(self, message: Dict[str, Any]) -> None:
+        """Remove a successfully processed job."""
+
+    @abstractmethod
+    def retry(self, message: Dict[str, Any], delay_seconds: float = 0) -> None:
+        """Make a failed job visible again after delay_seconds."""
+
+    @abstractmethod
+    def dead_letter(self, message: Dict[str, Any], error: str) -> None:
+        """Move a job that exhausted its retries to the dead-letter path."""
+
+    @abstractmethod
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """Return jobs moved to the dead-letter path, each with its 'error'."""
+
+
+class InMemoryIngestQueue(IngestQueue):
+    """Thread-safe in-process queue. Jobs are lost when the process exits."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = deque()
+        self._delayed: List[Dict[str, Any]] = []
+        self._dead_letters: List[Dict[str, Any]] = []
+
+    def enqueue(self, body: Dict[str, Any]) -> str:
+        message = {'id': uuid.uuid4().hex, 'body': body, 'attempts': 0}
+        with self._lock:
+            self._pending.append(message)
+        return message['id']
+
+    def receive(self, max_messages: int = 10) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            ready = [m for m in self._delayed if m['visible_at'] <= now]
+            self._delayed = [m for m in self._delayed if m['visible_at'] > now]
+            self._pending.extend(ready)
+
+            batch = []
+            while self._pending and len(batch) < max_messages:
+                message = self._pending.popleft()
+                message['attempts'] += 1
+                batch.append(message)
+            return batch
+
+    def ack(self, message: Dict[str, Any]) -> None:
+        # Received messages are already off the pending deque
+        pass
+
+    def retry(self, message: Dict[str, Any], delay_seconds: float = 0) -> None:
+        with self._lock:
+            message['visible_at'] = time.time() + delay_seconds
+            self._delayed.append(message)
+
+    def dead_letter(self, message: Dict[str, Any], error: str) -> None:
+        with self._lock:
+            self._dead_letters.append({**message, 'error': error})
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self._dead_letters)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pending) + len(self._delayed)
+
+
+class SQLiteIngestQueue(IngestQueue):
+    """
+    Durable local queue backed by SQLite.
+
+    Received jobs become invisible for visibility_timeout seconds; a worker that
+    crashes without ack/retry lets the job reappear, mirroring SQS semantics.
+    """
+
+    def __init__(self, path: str = ':memory:', visibility_timeout: float = 300):
+        self.visibility_timeout = visibility_timeout
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS jobs ('
+            ' id TEXT PRIMARY KEY, body TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,'
+            ' status TEXT NOT NULL, visible_at REAL NOT NULL, error TEXT, seq INTEGER)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, visible_at, seq)')
+
+    def enqueue(self, body: Dict[str, Any]) -> str:
+        message_id = uuid.uuid4().hex
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, body, status, visible_at, seq) "
+                "VALUES (?, ?, 'pending', ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM jobs))",
+                (message_id, json.dumps(body), time.time())
+            )
+        return message_id
+
+    def receive(self, max_messages: int = 10) -> List[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows = self._conn.execute(
+                    "SELECT id, body, attempts FROM jobs WHERE status = 'pending' AND visible_at <= ? "
+                    "ORDER BY seq LIMIT ?",
+                    (now, max_messages)
+                ).fetchall()
+                self._conn.executemany(
+                    "UPDATE jobs SET attempts = attempts + 1, visible_at = ? WHERE id = ?",
+                    [(now + self.visibility_timeout, row[0]) for row in rows]
+                )
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        return [{'id': row[0], 'body': json.loads(row[1]), 'attempts': row[2] + 1} for row in rows]
+
+    def ack(self, message: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute('DELETE FROM jobs WHERE id = ?', (message['id'],))
+
+    def retry(self, message: Dict[str, Any], delay_seconds: float = 0) -> None:
+        with self._lock:
+            self._conn.execute(
+                'UPDATE jobs SET visible_at = ? WHERE id = ?',
+                (time.time() + delay_seconds, message['id'])
+            )
+
+    def dead_letter(self, message: Dict[str, Any], error: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'dead', error = ? WHERE id = ?",
+                (error, message['id'])
+            )
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, body, attempts, error FROM jobs WHERE status = 'dead' ORDER BY seq"
+            ).fetchall()
+        return [{'id': r[0], 'body': json.loads(r[1]), 'attempts': r[2], 'error': r[3]} for r in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'pending'").fetchone()[0]
+
+
+class SQSIngestQueue(IngestQueue):
+    """
+    Amazon SQS queue.
+
+    Retries and dead-lettering are handled by the queue's redrive policy, so
+    retry() only shortens the visibility timeout, dead_letter() is a no-op and
+    dead letters are read from the redrive target queue, not from here.
+    """
+
+    def __init__(self, queue_url: str, sqs_client: Any = None):
+        if sqs_client is None:
+            # The shared client, built on first use from the runtime config
+            sqs_client = lazy_sqs_client()
+        self.queue_url = queue_url
+        self._sqs = sqs_client
+
+    def enqueue(self, body: Dict[str, Any]) -> str:
+        response = self._sqs.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(body))
+        return response['MessageId']
+
+    def receive(self, max_messages: int = 10) -> List[Dict[str, Any]]:
+        response = self._sqs.receive_message(
+            QueueUrl=self.queue_url,
+            MaxNumberOfMessages=min(max_messages, 10),
+            AttributeNames=['ApproximateReceiveCount']
+        )
+        return [
+            {
+                'id': m['MessageId'],
+                'body': json.loads(m['Body']),
+                'attempts': int(m.get('Attributes', {}).get('ApproximateReceiveCount', 1)),
+                'receipt_handle': m['ReceiptHandle']
+            }
+            for m in response.get('Messages', [])
+        ]
+
+    def ack(self, message: Dict[str, Any]) -> None:
+        self._sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=message['receipt_handle'])
+
+    def retry(self, message: Dict[str, Any], delay_seconds: float = 0) -> None:
+        self._sqs.change_message_visibility(
+            QueueUrl=self.queue_url,
+            ReceiptHandle=message['receipt_handle'],
+            VisibilityTimeout=int(delay_seconds)
+        )
+
+    def dead_letter(self, message: Dict[str, Any], error: str) -> None:
+        # The SQS redrive policy moves the message after maxReceiveCount receives
+        pass
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        # They live in the dead-letter queue of the redrive policy
+        return []
+
+
+def ingest_queue_backend(backend: Optional[str] = None) -> str:
+    """
+    The ingestion queue backend configured by environment variables.
+
+    INGEST_QUEUE_BACKEND: sqs (default when INGEST_QUEUE_URL is set), sqlite or memory
+    INGEST_QUEUE_URL: SQS queue URL
+
+    A local backend must be chosen explicitly: falling back to a SQLite file in
+    a Lambda container's /tmp would strand jobs in that container.
+
+    Raises:
+        ValueError: Neither a backend nor INGEST_QUEUE_URL is configured, or sqs lacks its URL
+    """
+    queue_url = os.environ.get('INGEST_QUEUE_URL', '')
+    backend = backend or os.environ.get('INGEST_QUEUE_BACKEND') or ('sqs' if queue_url else '')
+    if not backend:
+        raise ValueError("Set INGEST_QUEUE_URL (or INGEST_QUEUE_BACKEND=sqlite/memory for a local queue)")
+    if backend == 'sqs' and not queue_url:
+        raise ValueError("INGEST_QUEUE_URL is required for the sqs ingest queue backend")
+    if backend not in ('sqs', 'sqlite', 'memory'):
+        raise ValueError(f"Unknown ingest queue backend: {backend}")
+    return backend
+
+
+def create_ingest_queue(backend: Optional[str] = None) -> IngestQueue:
+    """
+    Build the ingestion queue configured by environment variables.
+
+    See ingest_queue_backend for backend selection.
+    INGEST_QUEUE_PATH: SQLite database path (default /tmp/post_call_ingest.db)
+    """
+    backend = ingest_queue_backend(backend)
+    if backend == 'sqs':
+        return SQSIngestQueue(os.environ['INGEST_QUEUE_URL'])
+    if backend == 'sqlite':
+        return SQLiteIngestQueue(os.environ.get('INGEST_QUEUE_PATH', '/tmp/post_call_ingest.db'))
+    return InMemoryIngestQueue()
@@ -0,0 +1,272 @@
+"""
+Streaming parse of post-call webhook bodies
+
+json.loads on a post-call body materializes every field of every transcript
+turn (tool calls, LLM usage, RAG info, ...) and the whole base64 full_audio
+string, although ingestion only reads a handful of routing fields, the
+role/message of each turn, and hands the audio to a streaming upload.
+
+scan_webhook walks the body once with the stdlib json scanner (C-accelerated
+scanstring/raw_decode) and keeps only what a plan asks for:
+
+- routing fields (type, conversation_id, agent_id and the caller id
+  locations under metadata / conversation_initiation_client_data) are decoded
+- transcript turns are decoded one at a time and reduced to
+  role/message/content, so the full turn objects never accumulate
+- full_audio is returned as a TextSpan over the body instead of a copy, and
+  is fed to the S3 upload slice by slice
+- everything else is skipped; the archive is the raw text of the data object
+  (data_bytes), so it is never re-serialized
+
+Bodies the scanner does not understand raise ValueError; callers fall back to
+json.loads.
+"""
+
+import json
+import re
+from json.decoder import scanstring
+from typing import Any, Dict, Optional, Tuple, Union
+
+# Plan entries: DECODE a value, keep a string as a SPAN of the body, walk an
+# object ({key: plan}) or array ([item plan]), or decode an object with the C
+# scanner and keep only some of its keys (tuple of keys)
+DECODE = 'decode'
+SPAN = 'span'
+
+# Fields of a transcript turn that transform_transcript reads
+TURN_FIELDS = ('role', 'message', 'content')
+
+# Fields of the webhook data object that ingestion reads
+DATA_PLAN = {
+    'conversation_id': DECODE,
+    'agent_id': DECODE,
+    'external_number': DECODE,
+    'call_duration': DECODE,
+    'metadata': DECODE,
+    'analysis': DECODE,
+    'conversation_initiation_client_data': DECODE,
+    'transcript': [TURN_FIELDS],
+    'full_audio': SPAN
+}
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class TextSpan:
+    """
+    A JSON string value left in place in the body.
+
+    Supports len() and slicing (returning str), which is all the incremental
+    base64 decoder needs, so audio is decoded straight from the body.
+    """
+
+    __slots__ = ('text', 'start', 'end')
+
+    def __init__(self, text: str, start: int, end: int):
+        self.text = text
+        self.start = start
+        self.end = end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __getitem__(self, item: slice) -> str:
+        start, stop, _ = item.indices(len(self))
+        return self.text[self.start + start:self.start + stop]
+
+    def __str__(self) -> str:
+        return self.text[self.start:self.end]
+
+
+def _skip_ws(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()
+
+
+def _string_end(text: str, pos: int) -> int:
+    """Index just past the string starting at pos, without decoding it."""
+    end = pos + 1
+    while True:
+        end = text.find('"', end)
+        if end == -1:
+            raise ValueError(f"Unterminated string starting at {pos}")
+        backslash = end - 1
+        while text[backslash] == '\\':
+            backslash -= 1
+        if (end - 1 - backslash) % 2 == 0:
+            return end + 1
+        end += 1
+
+
+def _skip_value(text: str, pos: int) -> int:
+    if text[pos] == '"':
+        return _string_end(text, pos)
+    # Containers and scalars are decoded by the C scanner and dropped straight away
+    return _decoder.raw_decode(text, pos)[1]
+
+
+def _read_value(text: str, pos: int, plan: Any) -> Tuple[Any, int]:
+    if callable(plan):
+        return plan(text, pos)
+    if plan == SPAN and text[pos] == '"':
+        end = _string_end(text, pos)
+        if text.find('\\', pos, end) == -1:
+            return TextSpan(text, pos + 1, end - 1), end
+    elif isinstance(plan, dict) and text[pos] == '{':
+        return _read_object(text, pos, plan)
+    elif isinstance(plan, list) and text[pos] == '[':
+        return _read_array(text, pos, plan[0])
+    elif isinstance(plan, tuple):
+        value, end = _decoder.raw_decode(text, pos)
+        if isinstance(value, dict):
+            value = {key: value[key] for key in plan if key in value}
+        return value, end
+    return _decoder.raw_decode(text, pos)
+
+
+def _read_object(text: str, pos: int, plan: Dict[str, Any],
+                 spans: Optional[Dict[str, Tuple[int, int]]] = None) -> Tuple[Dict[str, Any], int]:
+    """
+    Read the object at pos, keeping only the keys in plan.
+
+    Args:
+        spans: Filled with the (start, end) of each kept value, if given
+
+    Returns:
+        (kept fields, index just past the object)
+    """
+    result = {}
+    pos = _skip_ws(text, pos + 1)
+    if text[pos] == '}':
+        return result, pos + 1
+    while True:
+        if text[pos] != '"':
+            raise ValueError(f"Expected property name at {pos}")
+        key, pos = scanstring(text, pos + 1)
+        pos = _skip_ws(text, pos)
+        if text[pos] != ':':
+            raise ValueError(f"Expected ':' at {pos}")
+        pos = _skip_ws(text, pos + 1)
+
+        field_plan = plan.get(key)
+        if field_plan is None:
+            pos = _skip_value(text, pos)
+        else:
+            start = pos
+            result[key], pos = _read_value(text, pos, field_plan)
+            if spans is not None:
+                spans[key] = (start, pos)
+
+        pos = _skip_ws(text, pos)
+        if text[pos] == '}':
+            return result, pos + 1
+        if text[pos] != ',':
+            raise ValueError(f"Expected ',' or '}}' at {pos}")
+        pos = _skip_ws(text, pos + 1)
+
+
+def _read_array(text: str, pos: int, item_plan: Any) -> Tuple[list, int]:
+    items = []
+    pos = _skip_ws(text, pos + 1)
+    if text[pos] == ']':
+        return items, pos + 1
+    while True:
+        item, pos = _read_value(text, pos, item_plan)
+        items.append(item)
+        pos = _skip_ws(text, pos)
+        if text[pos] == ']':
+            return items, pos + 1
+        if text[pos] != ',':
+            raise ValueError(f"Expected ',' or ']' at {pos}")
+        pos = _skip_ws(text, pos + 1)
+
+
+class WebhookScan:
+    """
+    Result of scan_webhook.
+
+    Attributes:
+        webhook_type: 'type' of the webhook (None for the legacy format without one)
+        data: The fields of the data object named in DATA_PLAN
+        text: The decoded body
+    """
+
+    def __init__(self, text: str, webhook_type: Optional[str], data: Dict[str, Any],
+                 data_span: Optional[Tuple[int, int]], field_spans: Dict[str, Tuple[int, int]],
+                 raw: Optional[bytes] = None):
+        self.text = text
+        # An ASCII body's byte offsets equal its text offsets, so the archive is sliced from it directly
+        self._raw = raw if raw is not None and raw.isascii() else None
+        self.webhook_type = webhook_type
+        self.data = data
+        self._data_span = data_span
+        self._field_spans = field_spans
+
+    def data_bytes(self, replace: Optional[Dict[str, Any]] = None) -> bytes:
+        """
+        UTF-8 JSON of the data object, exactly as received.
+
+        Args:
+            replace: Top-level fields of data whose value is replaced by the
+                JSON of the given value (e.g. full_audio -> pointer)
+        """
+        if self._data_span is None:
+            return b'{}'
+        start, end = self._data_span
+        edits = sorted((self._field_spans[key], key) for key in (replace or {}) if key in self._field_spans)
+        if not edits and self._raw is not None:
+            return self._raw[start:end]
+        pieces = []
+        position = start
+        for (value_start, value_end), key in edits:
+            pieces.append(self.text[position:value_start])
+            pieces.append(json.dumps(replace[key], separators=(',', ':'), ensure_ascii=False))
+            position = value_end
+        pieces.append(self.text[position:end])
+        return ''.join(pieces).encode('utf-8')
+
+
+def scan_webhook(raw_body: Union[str, bytes]) -> WebhookScan:
+    """
+    Scan a post-call webhook body for the fields ingestion needs.
+
+    Accepts the same three layouts as process_webhook_body: an array of
+    {"type", "data"} objects (first one used), a {"type", "data"} object,
+    and the legacy bare data object without a type.
+
+    Raises:
+        ValueError: The body is not valid JSON or not one of those layouts
+    """
+    raw = raw_body if isinstance(raw_body, bytes) else None
+    text = raw_body.decode('utf-8') if raw is not None else raw_body
+    field_spans: Dict[str, Tuple[int, int]] = {}
+
+    def read_data(text: str, pos: int) -> Tuple[Any, int]:
+        if text[pos] != '{':
+            raise ValueError("Webhook data is not an object")
+        return _read_object(text, pos, DATA_PLAN, field_spans)
+
+    try:
+        pos = _skip_ws(text, 0)
+        spans: Dict[str, Tuple[int, int]] = {}
+        if text[pos] == '[':
+            pos = _skip_ws(text, pos + 1)
+            if text[pos] != '{':
+                raise ValueError("Expected an object as the first array element")
+            envelope, _ = _read_object(text, pos, {'type': DECODE, 'data': read_data}, spans)
+            return WebhookScan(text, envelope.get('type'), envelope.get('data', {}), spans.get('data'), field_spans, raw)
+
+        if text[pos] != '{':
+            raise ValueError("Expected a JSON object or array")
+        start = pos
+        envelope, end = _read_object(text, pos, {'type': DECODE, 'data': read_data, **DATA_PLAN}, spans)
+        if _skip_ws(text, end) != len(text):
+            raise ValueError(f"Extra data at {end}")
+        if 'type' in envelope:
+            return WebhookScan(text, envelope['type'], envelope.get('data', {}), spans.get('data'), field_spans, raw)
+
+        # Legacy format: the object is the data itself
+        envelope.pop('data', None)
+        return WebhookScan(text, None, envelope, (start, end), spans, raw)
+    except IndexError:
+        raise ValueError("Truncated JSON body")
@@ -0,0 +1,122 @@
+"""
+Transcript chunking for semantic memory ingestion
+
+Splits a Mem0-formatted transcript into overlapping windows of turns so each
+window can be sent to Mem0 as a separate, bounded-size add() call. Turns made
+only of disfluencies ("um", "uh", "mm-hmm") are dropped first since they carry
+no memory content.
+"""
+
+import logging
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger()
+
+# Turns made up only of these tokens are treated as filler. Only disfluencies:
+# "yeah", "okay", "sure" are often the whole answer to a question
+FILLER_TOKENS = frozenset({
+    'uh', 'um', 'umm', 'uhm', 'er', 'erm', 'hm', 'hmm', 'mm', 'mmm', 'mhm', 'mm-hmm'
+})
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+
+
+def is_filler(content: str) -> bool:
+    """
+    Check whether a turn is empty or consists only of filler words.
+
+    Args:
+        content: Message text
+
+    Returns:
+        True if the turn should be dropped
+    """
+    tokens = _TOKEN_RE.findall(content.lower())
+    return all(token in FILLER_TOKENS for token in tokens)
+
+
+def clean_turns(messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Drop empty and filler turns from a Mem0-formatted transcript.
+
+    Args:
+        messages: [{"role": ..., "content": ...}, ...]
+
+    Returns:
+        Messages with meaningful content, in original order
+    """
+    return [m for m in messages if m.get('content') and not is_filler(m['content'])]
+
+
+def chunk_transcript(messages: List[Dict[str, str]], window_size: int, overlap: int) -> List[List[Dict[str, str]]]:
+    """
+    Split messages into overlapping windows of turns.
+
+    Consecutive windows share `overlap` turns so context spanning a window
+    boundary is seen by Mem0 in at least one window.
+
+    Args:
+        messages: Cleaned Mem0 messages
+        window_size: Turns per window (0 disables chunking)
+        overlap: Turns shared by consecutive windows (must be < window_size)
+
+    Returns:
+        List of windows; a transcript shorter than window_size is a single window
+    """
+    if window_size <= 0 or len(messages) <= window_size:
+        return [messages] if messages else []
+    if not 0 <= overlap < window_size:
+        raise ValueError(f"overlap ({overlap}) must be between 0 and window_size ({window_size})")
+
+    stride = window_size - overlap
+    windows = []
+    start = 0
+    while True:
+        windows.append(messages[start:start + window_size])
+        if start + window_size >= len(messages):
+            break
+        start += stride
+    return windows
+
+
+def submit_windows(
+    windows: List[List[Dict[str, str]]],
+    add_window: Callable[[int, List[Dict[str, str]]], Any],
+    max_concurrency: int
+) -> List[Dict[str, Any]]:
+    """
+    Submit transcript windows concurrently under a concurrency cap.
+
+    Args:
+        windows: Output of chunk_transcript
+        add_window: Called as add_window(index, messages) for each window
+        max_concurrency: Maximum windows in flight at once
+
+    Returns:
+        Per-window results in window order:
+        {'index', 'messages', 'ok', 'duration_ms', 'error'}
+    """
+    def submit(index: int, window: List[Dict[str, str]]) -> Dict[str, Any]:
+        start = time.perf_counter()
+        error = None
+        try:
+            add_window(index, window)
+        except Exception as e:
+            logger.error(f"Error storing transcript window {index}: {str(e)}", exc_info=True)
+            error = str(e)
+        return {
+            'index': index,
+            'messages': len(window),
+            'ok': error is None,
+            'duration_ms': (time.perf_counter() - start) * 1000,
+            'error': error
+        }
+
+    if not windows:
+        return []
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(windows)))) as executor:
+        return list(executor.map(lambda item: submit(*item), enumerate(windows)))
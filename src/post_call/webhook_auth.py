@@ -0,0 +1,185 @@
+"""
+ElevenLabs webhook signature verification
+
+ElevenLabs-Signature: t=<unix seconds>,v0=<hex HMAC-SHA256 of "<t>.<raw body>">
+A header may carry several v0= signatures (e.g. while ElevenLabs rotates the
+signing secret); the request is authentic if any of them matches.
+
+Checks run cheapest first, so a malformed, stale or replayed request is
+rejected before anything proportional to the body size happens:
+
+1. header shape (bounded length, one timestamp, 64-hex-digit signatures)
+2. timestamp within the tolerance window (both directions)
+3. (timestamp, signature) not already accepted by this container
+4. HMAC over the body
+
+The HMAC is fed the body in fixed-size slices: text bodies are encoded slice
+by slice and API Gateway isBase64Encoded bodies are decoded slice by slice,
+so verifying a multi-megabyte audio payload never holds a second full copy.
+"""
+
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+from audio_upload import iter_base64_decoded
+
+# Longest header accepted (a timestamp and a handful of signatures fit easily)
+MAX_HEADER_LENGTH = 1024
+
+# Characters of the body encoded (or decoded) and fed to the HMAC per step
+HMAC_CHUNK_CHARS = 64 * 1024
+
+_HEX_DIGITS = frozenset('0123456789abcdef')
+
+
+class ReplayCache:
+    """Bounded set of recently accepted (timestamp, signature) pairs, oldest evicted first."""
+
+    def __init__(self, max_entries: int = 4096, ttl_seconds: float = 1800, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            key, expires_at = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[key]
+
+    def seen(self, key: str) -> bool:
+        with self._lock:
+            self._expire(self._clock())
+            return key in self._entries
+
+    def add(self, key: str) -> bool:
+        """Record key; False if it was already present (a concurrent replay)."""
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            if key in self._entries:
+                return False
+            self._entries[key] = now + self.ttl_seconds
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return True
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def parse_signature_header(header: str) -> Optional[Tuple[int, List[str]]]:
+    """
+    Parse an ElevenLabs-Signature header.
+
+    Returns:
+        (timestamp, [hex signature, ...]), or None if the header is malformed
+    """
+    if not header or len(header) > MAX_HEADER_LENGTH:
+        return None
+    timestamp = None
+    signatures = []
+    for part in header.split(','):
+        name, sep, value = part.strip().partition('=')
+        if not sep:
+            return None
+        if name == 't':
+            if timestamp is not None or not value.isdigit():
+                return None
+            timestamp = int(value)
+        elif name == 'v0':
+            value = value.lower()
+            if len(value) != 64 or not _HEX_DIGITS.issuperset(value):
+                return None
+            signatures.append(value)
+        # Unknown schemes (future vN=) are ignored
+    if timestamp is None or not signatures:
+        return None
+    return timestamp, signatures
+
+
+def body_signature(key: bytes, timestamp: int, body: Union[str, bytes], is_base64: bool = False) -> str:
+    """
+    Hex HMAC-SHA256 of "<timestamp>.<body>", computed incrementally.
+
+    Args:
+        key: Signing secret
+        timestamp: Header timestamp
+        body: Request body as received (text, or base64 text when is_base64)
+        is_base64: The body is API Gateway base64 and is signed in decoded form
+    """
+    mac = hmac.new(key, f"{timestamp}.".encode('ascii'), hashlib.sha256)
+    if is_base64:
+        for chunk in iter_base64_decoded(body, HMAC_CHUNK_CHARS):
+            mac.update(chunk)
+    elif isinstance(body, str):
+        for offset in range(0, len(body), HMAC_CHUNK_CHARS):
+            mac.update(body[offset:offset + HMAC_CHUNK_CHARS].encode('utf-8'))
+    else:
+        mac.update(body)
+    return mac.hexdigest()
+
+
+class WebhookVerifier:
+    """
+    Verify ElevenLabs webhook signatures against one or more signing secrets.
+
+    Args:
+        keys: Signing secrets to accept (current first; older ones during rotation)
+        tolerance_seconds: Maximum age (and clock skew into the future) of the timestamp
+        replay_cache: Accepted signatures, rejected if presented again (None disables)
+        clock: Epoch seconds
+    """
+
+    def __init__(self, keys: Sequence[str], tolerance_seconds: float = 30 * 60,
+                 replay_cache: Optional[ReplayCache] = None, clock: Callable[[], float] = time.time):
+        self.keys = [key.encode('utf-8') for key in keys if key]
+        self.tolerance_seconds = tolerance_seconds
+        self.replay_cache = replay_cache
+        self._clock = clock
+
+    def verify(self, body: Union[str, bytes], signature_header: str, is_base64: bool = False) -> Tuple[bool, str]:
+        """
+        Check a request's signature.
+
+        Args:
+            body: Raw request body (base64 text when is_base64)
+            signature_header: ElevenLabs-Signature header value
+            is_base64: API Gateway isBase64Encoded flag
+
+        Returns:
+            (valid, reason); reason is 'ok', 'malformed', 'expired', 'future', 'replayed' or 'mismatch'
+        """
+        parsed = parse_signature_header(signature_header)
+        if parsed is None:
+            return False, 'malformed'
+        timestamp, signatures = parsed
+
+        now = self._clock()
+        if timestamp < now - self.tolerance_seconds:
+            return False, 'expired'
+        if timestamp > now + self.tolerance_seconds:
+            return False, 'future'
+
+        if self.replay_cache is not None and any(self.replay_cache.seen(f"{timestamp}:{s}") for s in signatures):
+            return False, 'replayed'
+
+        for key in self.keys:
+            try:
+                expected = body_signature(key, timestamp, body, is_base64)
+            except ValueError:
+                # binascii.Error: the isBase64Encoded body is not valid base64
+                return False, 'malformed'
+            matched = next((s for s in signatures if hmac.compare_digest(s, expected)), None)
+            if matched is None:
+                continue
+            if self.replay_cache is not None and not self.replay_cache.add(f"{timestamp}:{matched}"):
+                return False, 'replayed'
+            return True, 'ok'
+        return False, 'mismatch'
@@ -2,29 +2,362 @@
 AgenticMemoriesRetrieve Lambda Handler
 
 Handles in-call semantic memory retrieval.
-Returns relevant memories based on query and user_id.
+Returns relevant memories based on query (or a batch of queries) and user_id.
 """
 
 import json
-import os
-import logging
-from typing import Dict, Any
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Callable, Dict, Any, List, Optional, Tuple
 
-from mem0 import MemoryClient
+from agentic_memory_runtime.caller_version import get_caller_version, normalize_caller_id, read_caller_stamp
+from agentic_memory_runtime.clients import lazy_mem0_client, lazy_s3_client
+from agentic_memory_runtime.config import configure_logging, env_float, env_int, env_str, get_config
+from agentic_memory_runtime.hedging import DeadlineExceeded, LatencyTracker, hedged_call
+from agentic_memory_runtime.kv_store import create_kv_store
+from agentic_memory_runtime.metrics import MetricsRecorder
+from agentic_memory_runtime.query_cache import QueryCache, query_cache_key
+from agentic_memory_runtime.rerank import LexicalReranker
+from agentic_memory_runtime.responses import error_response, json_response
+from agentic_memory_runtime.transport import mem0_connection_stats
+from agentic_memory_runtime.ttl_cache import TTLCache
+from agentic_memory_runtime.working_set import load_working_set, search_working_set, working_set_is_current
 
 # Configure logging
-logger = logging.getLogger()
-logger.setLevel(logging.INFO)
-
-# Initialize Mem0 client outside handler for reuse across invocations
-client = MemoryClient(
-    api_key=os.environ['MEM0_API_KEY'],
-    org_id=os.environ['MEM0_ORG_ID'],
-    project_id=os.environ['MEM0_PROJECT_ID']
+logger = configure_logging()
+
+# Mem0 client, imported and built on first use and reused across invocations
+client = lazy_mem0_client()
+
+# S3 client for caller version stamps, built on first use
+s3_client = lazy_s3_client()
+S3_BUCKET_NAME = get_config().s3_bucket_name
+
+SEARCH_LIMIT = env_int('MEM0_SEARCH_LIMIT', 3)
+
+# 'lexical' asks Mem0 for RERANK_CANDIDATES results and reranks them locally (BM25 +
+# recency + Mem0 score) down to MEM0_SEARCH_LIMIT; 'off' returns Mem0's top results as-is
+RERANK_MODE = env_str('RERANK_MODE', 'off')
+RERANK_CANDIDATES = env_int('RERANK_CANDIDATES', 10)
+reranker = LexicalReranker(half_life_days=env_float('RERANK_HALF_LIFE_DAYS', 30))
+
+# Deadline for a Mem0 search; past it the agent gets an empty result flagged timed_out.
+# Capped by the Lambda's remaining time minus RESPONSE_RESERVE_MS
+SEARCH_TIMEOUT_SECONDS = env_float('MEM0_TIMEOUT', 5)
+RESPONSE_RESERVE_MS = env_int('RESPONSE_RESERVE_MS', 250)
+
+# A search still running after the RETRIEVE_HEDGE_PERCENTILE latency of recent searches
+# (RETRIEVE_HEDGE_DELAY_MS until enough are recorded) is hedged with a second identical
+# request; the first response wins. RETRIEVE_HEDGE_PERCENTILE=0 disables hedging
+HEDGE_PERCENTILE = env_float('RETRIEVE_HEDGE_PERCENTILE', 95)
+HEDGE_DELAY_MS = env_int('RETRIEVE_HEDGE_DELAY_MS', 1000)
+HEDGE_MIN_DELAY_MS = env_int('RETRIEVE_HEDGE_MIN_DELAY_MS', 100)
+
+search_latency = LatencyTracker()
+
+# Longest wait for the caller version stamp (an S3 HEAD, counted against the search
+# deadline); past it the query cache is skipped for this search
+VERSION_TIMEOUT_MS = env_int('RETRIEVE_VERSION_TIMEOUT_MS', 200)
+
+# Per-call working set client_data copies from the one post_call publishes after each call
+# (same WORKING_SET_BACKEND / WORKING_SET_TABLE); searched before Mem0 when it includes the
+# caller's last ingested call, and kept in this container for WORKING_SET_LOCAL_TTL_SECONDS.
+# 'none' disables
+WORKING_SET_BACKEND = env_str('WORKING_SET_BACKEND', 'none')
+working_set_store = create_kv_store(
+    WORKING_SET_BACKEND,
+    table_name=env_str('WORKING_SET_TABLE'),
+    path=env_str('WORKING_SET_PATH') or None
+) if WORKING_SET_BACKEND != 'none' else None
+working_set_cache = TTLCache(max_entries=32, ttl_seconds=env_float('WORKING_SET_LOCAL_TTL_SECONDS', 60))
+# Best BM25 score a working set hit needs; weaker matches (e.g. only common terms) go to Mem0
+WORKING_SET_MIN_SCORE = env_float('WORKING_SET_MIN_SCORE', 0.5)
+# Longest wait for the caller version stamp and the store read (counted against the search
+# deadline); past it the request goes to Mem0
+WORKING_SET_TIMEOUT_MS = env_int('WORKING_SET_TIMEOUT_MS', 200)
+
+# Reused across invocations; searches that outlive their deadline finish here
+search_executor = ThreadPoolExecutor(max_workers=env_int('RETRIEVE_MAX_WORKERS', 8), thread_name_prefix='mem0-search')
+
+# The caller version and working set reads that gate a search run on their own workers, so
+# they never queue behind Mem0 searches. When every worker is still busy with reads past
+# their timeout a new one would only queue behind them, so the search skips it (no query
+# cache / no working set) straight away
+LOOKUP_MAX_WORKERS = env_int('RETRIEVE_LOOKUP_WORKERS', 4)
+lookup_executor = ThreadPoolExecutor(max_workers=LOOKUP_MAX_WORKERS, thread_name_prefix='retrieve-lookup')
+lookup_slots = threading.BoundedSemaphore(LOOKUP_MAX_WORKERS)
+
+# Batch requests ({"queries": [...]}): at most RETRIEVE_MAX_QUERIES per request, of which
+# RETRIEVE_BATCH_CONCURRENCY are searched at once
+MAX_QUERIES = env_int('RETRIEVE_MAX_QUERIES', 5)
+batch_executor = ThreadPoolExecutor(max_workers=env_int('RETRIEVE_BATCH_CONCURRENCY', 4), thread_name_prefix='retrieve-batch')
+
+# Search results cached per (caller, normalized query, limit): 'memory' keeps them in this
+# container, 'file' / 'dynamodb' also share them through QUERY_CACHE_PATH / QUERY_CACHE_TABLE,
+# 'none' disables caching. post_call's caller version bump invalidates a caller's entries
+QUERY_CACHE_BACKEND = env_str('QUERY_CACHE_BACKEND', 'memory')
+query_cache = QueryCache(
+    TTLCache(
+        max_entries=env_int('QUERY_CACHE_SIZE', 512) if QUERY_CACHE_BACKEND != 'none' else 0,
+        ttl_seconds=env_float('QUERY_CACHE_TTL_SECONDS', 300)
+    ),
+    shared=create_kv_store(
+        QUERY_CACHE_BACKEND,
+        table_name=env_str('QUERY_CACHE_TABLE'),
+        path=env_str('QUERY_CACHE_PATH') or None
+    ) if QUERY_CACHE_BACKEND in ('file', 'dynamodb') else None
 )
 
-SEARCH_LIMIT = int(os.environ.get('MEM0_SEARCH_LIMIT', '3'))
-TIMEOUT = int(os.environ.get('MEM0_TIMEOUT', '5'))
+
+def search_timeout(context: Any) -> float:
+    """Seconds a search may take: MEM0_TIMEOUT, capped by the invocation's remaining time."""
+    timeout = SEARCH_TIMEOUT_SECONDS
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        timeout = min(timeout, (context.get_remaining_time_in_millis() - RESPONSE_RESERVE_MS) / 1000)
+    return max(0.001, timeout)
+
+
+def hedge_delay() -> Optional[float]:
+    """Seconds before a search is hedged, or None when hedging is disabled."""
+    if HEDGE_PERCENTILE <= 0:
+        return None
+    observed = search_latency.percentile(HEDGE_PERCENTILE)
+    delay_ms = observed * 1000 if observed is not None else HEDGE_DELAY_MS
+    return max(HEDGE_MIN_DELAY_MS, delay_ms) / 1000
+
+
+def submit_lookup(fn: Callable[[], Any]) -> Optional[Future]:
+    """
+    Start a version or working set read on lookup_executor if a worker is free.
+
+    Returns:
+        The read's future, or None when every worker is busy
+    """
+    if not lookup_slots.acquire(blocking=False):
+        return None
+
+    def run() -> Any:
+        try:
+            return fn()
+        finally:
+            lookup_slots.release()
+
+    try:
+        return lookup_executor.submit(run)
+    except Exception:
+        lookup_slots.release()
+        raise
+
+
+def get_working_set(user_id: str, call_sid: Optional[str], deadline: float,
+                    metrics: MetricsRecorder) -> Optional[Dict[str, Any]]:
+    """
+    The working set client_data published for this call (or the caller's latest one).
+
+    A set is only used when it includes the last call post_call ingested for
+    the caller, so the caller's version stamp is read with it; a set that
+    predates the stamp, or whose stamp cannot be read, is ignored.
+
+    Args:
+        user_id: Caller phone number
+        call_sid: Call the lookup is made from (None reads the caller's latest set)
+        deadline: Monotonic time by which the searches must finish; reading the
+            stamp and the set gets at most WORKING_SET_TIMEOUT_MS of it
+        metrics: Receives WorkingSetTimeouts, WorkingSetStale and LookupsSkipped
+
+    Returns:
+        The working set, or None when disabled, not published (yet), stale,
+        unreadable, not read in time or every lookup worker is busy
+    """
+    if working_set_store is None or not S3_BUCKET_NAME:
+        return None
+    key = f"{normalize_caller_id(user_id)}:{call_sid or ''}"
+
+    def load() -> Tuple[Optional[Dict[str, Any]], bool]:
+        stamp = read_caller_stamp(s3_client, S3_BUCKET_NAME, user_id)
+        working_set = working_set_cache.get(key)
+        if working_set is None:
+            working_set = load_working_set(working_set_store, user_id, call_sid)
+            # Misses are not cached: client_data may still be publishing this call's set
+            if working_set is not None:
+                working_set_cache.put(key, working_set)
+        if working_set is not None and not working_set_is_current(working_set, stamp):
+            return None, True
+        return working_set, False
+
+    future = submit_lookup(load)
+    if future is None:
+        logger.warning(f"All {LOOKUP_MAX_WORKERS} lookup workers are busy, searching Mem0 without a working set")
+        metrics.count('LookupsSkipped')
+        return None
+    try:
+        working_set, stale = future.result(
+            timeout=max(0.001, min(WORKING_SET_TIMEOUT_MS / 1000, deadline - time.monotonic()))
+        )
+    except FuturesTimeoutError:
+        logger.warning(f"Working set for {user_id} took over {WORKING_SET_TIMEOUT_MS}ms, searching Mem0")
+        metrics.count('WorkingSetTimeouts')
+        return None
+    except Exception as e:
+        logger.warning(f"Could not read working set for {user_id}: {str(e)}")
+        return None
+    if stale:
+        logger.info(f"Working set for {user_id} predates their last ingested call, searching Mem0")
+        metrics.count('WorkingSetStale')
+    return working_set
+
+
+def search_memories(query: str, user_id: str, limit: int, metrics: MetricsRecorder, timeout: float,
+                    working_set: Optional[Dict[str, Any]] = None) -> List[Any]:
+    """
+    Search a caller's memories: the call's working set first, then Mem0 via the query cache.
+
+    Query cache entries are only used (and stored) when the caller's version
+    stamp can be read, so results never outlive the memories they were
+    computed from. With RERANK_MODE=lexical the candidates (from the working
+    set or the cache) are oversampled and reranked on every request.
+
+    Args:
+        query: Search query
+        user_id: Caller's phone number (Mem0 user_id)
+        limit: Maximum memories returned
+        metrics: Recorder for the search latency and hedging counters
+        timeout: Seconds to wait for Mem0
+        working_set: This call's working set, if a current one was published
+
+    Returns:
+        Matching memories
+
+    Raises:
+        DeadlineExceeded: Mem0 did not answer within timeout
+    """
+    fetch_limit = max(limit, RERANK_CANDIDATES) if RERANK_MODE == 'lexical' else limit
+    candidates = None
+    if working_set is not None:
+        candidates = search_working_set(working_set, query, fetch_limit, WORKING_SET_MIN_SCORE) or None
+        metrics.count('WorkingSetHits' if candidates else 'WorkingSetMisses')
+    if candidates is None:
+        candidates = fetch_candidates(query, user_id, fetch_limit, metrics, timeout)
+    if RERANK_MODE != 'lexical':
+        return candidates
+    with metrics.timer('RerankMs'):
+        return reranker.rerank(query, candidates, limit)
+
+
+def fetch_candidates(query: str, user_id: str, limit: int, metrics: MetricsRecorder, timeout: float) -> List[Any]:
+    """
+    Mem0 search results for query (up to limit), from the query cache when possible.
+
+    The caller version read that keys the cache shares the timeout with the
+    search and is cut off after VERSION_TIMEOUT_MS, which counts as a cache miss,
+    as does every lookup worker being busy.
+    """
+    deadline = time.monotonic() + timeout
+    key = query_cache_key(user_id, query, limit)
+    version = None
+    cacheable = query_cache.enabled and bool(S3_BUCKET_NAME)
+    future = submit_lookup(lambda: get_caller_version(s3_client, S3_BUCKET_NAME, user_id)) if cacheable else None
+    if cacheable and future is None:
+        logger.warning(f"All {LOOKUP_MAX_WORKERS} lookup workers are busy, bypassing query cache for {user_id}")
+        metrics.count('LookupsSkipped')
+        cacheable = False
+    if future is not None:
+        try:
+            version = future.result(timeout=min(VERSION_TIMEOUT_MS / 1000, timeout))
+            cached = query_cache.get(key, version)
+            if cached is not None:
+                logger.info(f"Query cache hit for user_id: {user_id}")
+                return cached
+        except FuturesTimeoutError:
+            logger.warning(f"Caller version for {user_id} took over {VERSION_TIMEOUT_MS}ms, bypassing query cache")
+            metrics.count('VersionTimeouts')
+            cacheable = False
+        except Exception as e:
+            logger.warning(f"Could not read caller version for {user_id}, bypassing query cache: {str(e)}")
+            cacheable = False
+
+    hedge_stats = {'hedges': 0, 'hedge_wins': 0}
+    try:
+        with metrics.timer('Mem0SearchMs'):
+            result = hedged_call(
+                lambda: client.search(query=query, user_id=user_id, limit=limit),
+                search_executor,
+                timeout=max(0.001, deadline - time.monotonic()),
+                hedge_delay=hedge_delay(),
+                tracker=search_latency,
+                stats=hedge_stats
+            )
+    finally:
+        metrics.count('HedgesFired', hedge_stats['hedges'])
+        metrics.count('HedgeWins', hedge_stats['hedge_wins'])
+
+    # Extract memories from result (format: {"results": [...]})
+    memories = (result.get('results', []) if isinstance(result, dict) else result) or []
+    if cacheable:
+        query_cache.put(key, memories, version)
+    return memories
+
+
+def search_before(query: str, user_id: str, metrics: MetricsRecorder, deadline: float,
+                  working_set: Optional[Dict[str, Any]] = None) -> Tuple[List[Any], bool]:
+    """
+    Search until a monotonic deadline.
+
+    Returns:
+        (memories, timed_out); an empty list when the deadline passed, since an
+        empty answer now beats dead air on the call and the agent can ask again
+    """
+    timeout = max(0.001, deadline - time.monotonic())
+    try:
+        return search_memories(query, user_id, SEARCH_LIMIT, metrics, timeout, working_set), False
+    except DeadlineExceeded:
+        logger.warning(f"Search for user_id {user_id} exceeded {timeout:.2f}s, returning no memories")
+        return [], True
+
+
+def memory_identity(memory: Any) -> str:
+    """Key used to de-duplicate memories across queries: the Mem0 id, else the text."""
+    if isinstance(memory, dict):
+        return str(memory.get('id') or memory.get('memory') or json.dumps(memory, sort_keys=True))
+    return str(memory)
+
+
+def search_batch(queries: List[str], user_id: str, metrics: MetricsRecorder, deadline: float,
+                 working_set: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Run several searches concurrently and merge their results.
+
+    Repeated queries are searched once. Merged memories keep the order of
+    first appearance (query order, then rank) and are de-duplicated by id.
+
+    Args:
+        queries: Search queries
+        user_id: Caller's phone number (Mem0 user_id)
+        metrics: Recorder shared by the searches
+        deadline: Monotonic time by which every search must finish
+        working_set: This call's working set, if a current one was published
+
+    Returns:
+        {'results': [{'query', 'memories', 'timed_out'}, ...], 'memories': merged, 'timed_out': any}
+    """
+    unique_queries = list(dict.fromkeys(queries))
+    futures = {q: batch_executor.submit(search_before, q, user_id, metrics, deadline, working_set) for q in unique_queries}
+    outcomes = {q: future.result() for q, future in futures.items()}
+
+    results = []
+    merged = {}
+    for query in queries:
+        memories, timed_out = outcomes[query]
+        results.append({'query': query, 'memories': memories, 'timed_out': timed_out})
+        for memory in memories:
+            merged.setdefault(memory_identity(memory), memory)
+
+    return {
+        'results': results,
+        'memories': list(merged.values()),
+        'timed_out': any(result['timed_out'] for result in results)
+    }
 
 
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
@@ -32,63 +365,63 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     Handle semantic memory search during active call.
 
     Args:
-        event: API Gateway event with query and user_id
+        event: API Gateway event with query (or queries: [...]), user_id and optionally call_sid
         context: Lambda context
 
     Returns:
-        Top N relevant memories based on semantic search
+        Top N relevant memories based on semantic search; for a batch, also
+        the per-query result sets
     """
     try:
         # Parse request body
         body = json.loads(event.get('body', '{}'))
         query = body.get('query')
+        queries = body.get('queries')
         user_id = body.get('user_id')
+        call_sid = body.get('call_sid') or body.get('system__call_sid')
 
-        if not query:
+        if queries is not None:
+            if not isinstance(queries, list) or not queries or not all(isinstance(q, str) and q for q in queries):
+                logger.error("Invalid queries in request")
+                return error_response(400, 'queries must be a non-empty list of strings')
+            if len(queries) > MAX_QUERIES:
+                logger.error(f"Too many queries in request: {len(queries)}")
+                return error_response(400, f'At most {MAX_QUERIES} queries per request')
+        elif not query:
             logger.error("Missing query in request")
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json'},
-                'body': json.dumps({'error': 'Missing query'})
-            }
+            return error_response(400, 'Missing query')
 
         if not user_id:
             logger.error("Missing user_id in request")
-            return {
-                'statusCode': 400,
-                'headers': {'Content-Type': 'application/json'},
-                'body': json.dumps({'error': 'Missing user_id'})
-            }
+            return error_response(400, 'Missing user_id')
 
-        logger.info(f"Searching memories for user_id: {user_id}, query: {query}")
+        logger.info(f"Searching memories for user_id: {user_id}, queries: {queries or [query]}")
 
         # Perform semantic search
-        result = client.search(
-            query=query,
-            user_id=user_id,
-            limit=SEARCH_LIMIT
-        )
-
-        # Extract memories from result (format: {"results": [...]})
-        memories = result.get('results', []) if isinstance(result, dict) else result
-
-        logger.info(f"Found {len(memories) if memories else 0} memories for query")
+        metrics = MetricsRecorder({'Function': 'retrieve'})
+        deadline = time.monotonic() + search_timeout(context)
+        with metrics.timer('RetrieveMs'):
+            working_set = get_working_set(user_id, call_sid, deadline, metrics)
+            if queries is not None:
+                response_data = search_batch(queries, user_id, metrics, deadline, working_set)
+            else:
+                memories, timed_out = search_before(query, user_id, metrics, deadline, working_set)
+                response_data = {
+                    'memories': memories,
+                    'timed_out': timed_out
+                }
 
-        # Return search results
-        response_data = {
-            'memories': memories or []
-        }
+        logger.info(f"Found {len(response_data['memories'])} memories for {len(queries or [query])} queries")
+        metrics.put('QueriesPerRequest', len(queries or [query]))
+        metrics.put('MemoriesReturned', len(response_data['memories']))
+        metrics.put('SearchTimeouts', int(response_data['timed_out']))
+        for name, value in query_cache.drain_counters().items():
+            metrics.put(f"QueryCache{name.title().replace('_', '')}", value)
+        mem0_connection_stats.put_metrics(metrics)
+        metrics.flush()
 
-        return {
-            'statusCode': 200,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps(response_data)
-        }
+        return json_response(200, response_data)
 
     except Exception as e:
         logger.error(f"Error processing search: {str(e)}", exc_info=True)
-        return {
-            'statusCode': 500,
-            'headers': {'Content-Type': 'application/json'},
-            'body': json.dumps({'error': str(e)})
-        }
\ No newline at end of file
+        return error_response(500, str(e))
\ No newline at end of file
@@ -8,6 +8,8 @@ Tests both webhook types:
 """
 
 import json
+import os
+import sys
 import requests
 import boto3
 import time
@@ -15,6 +17,10 @@ import hmac
 import hashlib
 import base64
 
+# Archived JSON may be gzip/zstd compressed; decode it with the shared runtime codec
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layer'))
+from agentic_memory_runtime.archive_codec import decode_archive
+
 # Configuration
 POST_CALL_URL = "https://knh457q7q7.execute-api.us-east-1.amazonaws.com/Prod/post-call"
 S3_BUCKET_NAME = "elevenlabs-agentic-memory-424875385161-us-east-1"
@@ -115,7 +121,7 @@ def test_transcription_webhook():
                 print(f"✅ PASS - JSON file saved: {expected_json_key}")
                 
                 # Verify content
-                content = json.loads(obj['Body'].read())
+                content = decode_archive(obj['Body'].read())
                 has_transcript = 'transcript' in content
                 has_analysis = 'analysis' in content
                 
@@ -135,18 +141,13 @@ def test_transcription_webhook():
         return False
 
 
-def test_audio_webhook():
-    """Test post_call_audio webhook (audio only)."""
-    print("\n" + "="*80)
-    print("  Test 2: Audio Webhook (post_call_audio)")
-    print("="*80 + "\n")
-    
-    # Create audio webhook payload (separate webhook with only audio)
+def post_audio_webhook(conversation_id: str) -> bool:
+    """POST a post_call_audio webhook (audio only) and check for HTTP 200."""
     payload = {
         "type": "post_call_audio",
         "event_timestamp": int(time.time()),
         "data": {
-            "conversation_id": TEST_CONVERSATION_ID,
+            "conversation_id": conversation_id,
             "agent_id": TEST_AGENT,
             "full_audio": create_fake_mp3_audio()
         }
@@ -156,54 +157,91 @@ def test_audio_webhook():
     timestamp = int(time.time())
     signature = generate_hmac_signature(body, timestamp)
     
-    print(f"Conversation ID: {TEST_CONVERSATION_ID}")
+    print(f"Conversation ID: {conversation_id}")
     print(f"Webhook Type: post_call_audio")
     print(f"Contains: Only audio (base64-encoded MP3)\n")
     
+    response = requests.post(
+        POST_CALL_URL,
+        data=body,
+        headers={
+            'Content-Type': 'application/json',
+            'ElevenLabs-Signature': signature
+        },
+        timeout=30
+    )
+    
+    print(f"Status Code: {response.status_code}")
+    
+    if response.status_code != 200:
+        print(f"❌ FAIL - Expected 200, got {response.status_code}")
+        return False
+    
+    print(f"✅ PASS - HTTP 200 OK")
+    return True
+
+
+def wait_for_mp3(expected_mp3_key: str) -> bool:
+    """Poll S3 for the MP3 object for up to 10 seconds."""
+    print(f"\nWaiting for MP3 file in S3...")
+    
+    for attempt in range(10):
+        try:
+            obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=expected_mp3_key)
+            audio_size = len(obj['Body'].read())
+            
+            print(f"✅ PASS - MP3 file saved: {expected_mp3_key}")
+            print(f"✅ PASS - File size: {audio_size} bytes")
+            
+            # Verify metadata
+            metadata = obj['Metadata']
+            print(f"✅ PASS - Metadata contains webhook_type: {metadata.get('webhook_type')}")
+            
+            return True
+            
+        except s3_client.exceptions.NoSuchKey:
+            time.sleep(1)
+            print(f"  Attempt {attempt + 1}/10: Not found yet...")
+            
+    print(f"❌ FAIL - MP3 file not found after 10 seconds")
+    print(f"  Expected: s3://{S3_BUCKET_NAME}/{expected_mp3_key}")
+    return False
+
+
+def test_audio_webhook():
+    """Test post_call_audio webhook (audio only) after its transcription."""
+    print("\n" + "="*80)
+    print("  Test 2: Audio Webhook (post_call_audio)")
+    print("="*80 + "\n")
+    
     try:
-        response = requests.post(
-            POST_CALL_URL,
-            data=body,
-            headers={
-                'Content-Type': 'application/json',
-                'ElevenLabs-Signature': signature
-            },
-            timeout=30
-        )
-        
-        print(f"Status Code: {response.status_code}")
-        
-        if response.status_code != 200:
-            print(f"❌ FAIL - Expected 200, got {response.status_code}")
+        if not post_audio_webhook(TEST_CONVERSATION_ID):
             return False
         
-        print(f"✅ PASS - HTTP 200 OK")
-        
-        # Wait for MP3 file in audio-only directory
-        print(f"\nWaiting for MP3 file in S3...")
-        expected_mp3_key = f"post-call/audio-only/{TEST_AGENT}/{TEST_CONVERSATION_ID}.mp3"
+        # Test 1 indexed the conversation, so the MP3 lands next to the caller's JSON archive
+        return wait_for_mp3(f"post-call/{TEST_CALLER}/{TEST_CONVERSATION_ID}.mp3")
         
-        for attempt in range(10):
-            try:
-                obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=expected_mp3_key)
-                audio_size = len(obj['Body'].read())
-                
-                print(f"✅ PASS - MP3 file saved: {expected_mp3_key}")
-                print(f"✅ PASS - File size: {audio_size} bytes")
-                
-                # Verify metadata
-                metadata = obj['Metadata']
-                print(f"✅ PASS - Metadata contains webhook_type: {metadata.get('webhook_type')}")
-                
-                return True
-                
-            except s3_client.exceptions.NoSuchKey:
-                time.sleep(1)
-                print(f"  Attempt {attempt + 1}/10: Not found yet...")
-                
-        print(f"❌ FAIL - MP3 file not found after 10 seconds")
-        print(f"  Expected: s3://{S3_BUCKET_NAME}/{expected_mp3_key}")
+    except Exception as e:
+        print(f"❌ FAIL - Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
         return False
+
+
+def test_orphan_audio_webhook():
+    """Test post_call_audio webhook for a conversation without a transcription."""
+    print("\n" + "="*80)
+    print("  Test 3: Audio Webhook Without Transcription (post_call_audio)")
+    print("="*80 + "\n")
+    
+    conversation_id = f"{TEST_CONVERSATION_ID}_orphan"
+    
+    try:
+        if not post_audio_webhook(conversation_id):
+            return False
+        
+        # No index entry for the conversation: the MP3 is parked under audio-only until reconciled
+        return wait_for_mp3(f"post-call/audio-only/{TEST_AGENT}/{conversation_id}.mp3")
         
     except Exception as e:
         print(f"❌ FAIL - Error: {str(e)}")
@@ -279,6 +317,9 @@ def main():
     # Test audio webhook
     results["Audio Webhook"] = test_audio_webhook()
     
+    # Test audio webhook with no transcription
+    results["Orphan Audio Webhook"] = test_orphan_audio_webhook()
+    
     # Show S3 structure
     verify_s3_structure()
     
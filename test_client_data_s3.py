@@ -12,11 +12,17 @@ Tests:
 """
 
 import json
+import os
+import sys
 import requests
 import boto3
 import time
 from datetime import datetime
 
+# Archived JSON may be gzip/zstd compressed; decode it with the shared runtime codec
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layer'))
+from agentic_memory_runtime.archive_codec import decode_archive
+
 # Configuration
 CLIENT_DATA_URL = "https://idr7oxv9q6.execute-api.us-east-1.amazonaws.com/Prod/client-data"
 S3_BUCKET_NAME = "elevenlabs-agentic-memory-424875385161-us-east-1"
@@ -89,10 +95,10 @@ def verify_s3_files(caller_id, call_sid, max_wait=10):
             # If both files found, download and return
             if received_key and response_key:
                 received_obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=received_key)
-                received_content = json.loads(received_obj['Body'].read())
+                received_content = decode_archive(received_obj['Body'].read())
                 
                 response_obj = s3_client.get_object(Bucket=S3_BUCKET_NAME, Key=response_key)
-                response_content = json.loads(response_obj['Body'].read())
+                response_content = decode_archive(response_obj['Body'].read())
                 
                 print(f"    Found S3 files:")
                 print(f"    - {received_key}")
@@ -7,12 +7,18 @@ s3://elevenlabs-agentic-memory-{account}-{region}/post-call/{caller_id}/{convers
 """
 
 import json
+import os
+import sys
 import requests
 import boto3
 import time
 import hmac
 import hashlib
 
+# Archived JSON may be gzip/zstd compressed; decode it with the shared runtime codec
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layer'))
+from agentic_memory_runtime.archive_codec import decode_archive
+
 # Configuration
 POST_CALL_URL = "https://knh457q7q7.execute-api.us-east-1.amazonaws.com/Prod/post-call"
 S3_BUCKET_NAME = "elevenlabs-agentic-memory-424875385161-us-east-1"
@@ -110,7 +116,7 @@ def test_post_call_s3_path():
                 print(f"✅ PASS - Correct path: s3://{S3_BUCKET_NAME}/{expected_json_key}")
                 
                 # Verify content
-                content = json.loads(obj['Body'].read())
+                content = decode_archive(obj['Body'].read())
                 
                 checks = [
                     (content.get('conversation_id') == TEST_CONVERSATION_ID, "Conversation ID matches"),
@@ -0,0 +1,97 @@
+"""
+Unit tests for the shared archive codec
+
+Tests encoding, transparent decoding and S3 metadata for each codec.
+"""
+
+import json
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+# Add the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime import archive_codec
+from agentic_memory_runtime.archive_codec import RawJSON, decode_archive, encode_archive, put_json_archive, read_json_archive
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'test_data')
+
+PAYLOAD = {'caller_id': '+16129782029', 'notes': ['Prefers email', 'Gold tier'], 'name': 'Zoë'}
+
+
+class TestEncodeDecode:
+    """Round-trip every codec through decode_archive"""
+
+    @pytest.mark.parametrize('codec', ['pretty', 'json', 'gzip'])
+    def test_round_trip(self, codec):
+        body, _ = encode_archive(PAYLOAD, codec)
+        assert decode_archive(body) == PAYLOAD
+
+    def test_zstd_round_trip(self):
+        pytest.importorskip('zstandard')
+        body, headers = encode_archive(PAYLOAD, 'zstd')
+        assert headers['ContentEncoding'] == 'zstd'
+        assert decode_archive(body) == PAYLOAD
+
+    def test_zstd_falls_back_to_gzip(self, monkeypatch):
+        monkeypatch.setattr(archive_codec, 'zstandard', None)
+        body, headers = encode_archive(PAYLOAD, 'zstd')
+        assert headers['ContentEncoding'] == 'gzip'
+        assert decode_archive(body) == PAYLOAD
+
+    def test_legacy_pretty_json_decodes(self):
+        assert decode_archive(json.dumps(PAYLOAD, indent=2).encode('utf-8')) == PAYLOAD
+
+    def test_headers(self):
+        assert encode_archive(PAYLOAD, 'json')[1] == {'ContentType': 'application/json'}
+        assert encode_archive(PAYLOAD, 'gzip')[1] == {'ContentType': 'application/json', 'ContentEncoding': 'gzip'}
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            encode_archive(PAYLOAD, 'brotli')
+
+    @pytest.mark.parametrize('codec', ['pretty', 'json', 'gzip'])
+    def test_raw_json_round_trip(self, codec):
+        raw = RawJSON(json.dumps(PAYLOAD, indent=1).encode('utf-8'))
+        assert decode_archive(encode_archive(raw, codec)[0]) == PAYLOAD
+
+    def test_raw_json_is_stored_verbatim(self):
+        raw = RawJSON(b'{"name": "Zo\\u00eb",  "notes": []}')
+        assert encode_archive(raw, 'json')[0] == bytes(raw)
+
+    def test_gzip_is_deterministic(self):
+        assert encode_archive(PAYLOAD, 'gzip')[0] == encode_archive(PAYLOAD, 'gzip')[0]
+
+    def test_compression_shrinks_conversation(self):
+        with open(os.path.join(TEST_DATA_DIR, 'conv_01jxk1wejhenk8x8tt9enzxw4a.json')) as f:
+            conversation = json.load(f)
+        pretty = len(encode_archive(conversation, 'pretty')[0])
+        compressed = len(encode_archive(conversation, 'gzip')[0])
+        assert compressed < pretty / 4
+
+
+class TestS3Helpers:
+    """Test cases for put_json_archive and read_json_archive"""
+
+    def test_put_sets_encoding_and_metadata(self):
+        s3 = mock.Mock()
+        written = put_json_archive(s3, 'bucket', 'a.json', PAYLOAD, {'caller_id': '+1'}, codec='gzip')
+        kwargs = s3.put_object.call_args.kwargs
+        assert kwargs['ContentEncoding'] == 'gzip'
+        assert kwargs['ContentType'] == 'application/json'
+        assert kwargs['Metadata'] == {'caller_id': '+1', 'archive_codec': 'gzip'}
+        assert written == len(kwargs['Body'])
+
+    def test_read_decodes_transparently(self):
+        s3 = mock.Mock()
+        body, _ = encode_archive(PAYLOAD, 'gzip')
+        s3.get_object.return_value = {'Body': mock.Mock(read=mock.Mock(return_value=body))}
+        assert read_json_archive(s3, 'bucket', 'a.json') == PAYLOAD
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,128 @@
+"""
+Unit tests for streaming base64 audio upload
+
+Tests chunked decoding, multipart part handling and bounded peak memory.
+"""
+
+import base64
+import hashlib
+import os
+import sys
+import tracemalloc
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call'))
+
+from audio_upload import iter_base64_decoded, stream_base64_to_s3
+
+MB = 1024 * 1024
+
+
+class HashingS3:
+    """S3 stand-in that hashes uploaded bytes instead of keeping them"""
+
+    def __init__(self, fail_on_part=None):
+        self.fail_on_part = fail_on_part
+        self.digest = hashlib.sha256()
+        self.part_sizes = []
+        self.calls = []
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.calls.append('put_object')
+        self.digest.update(Body)
+        self.part_sizes.append(len(Body))
+
+    def create_multipart_upload(self, Bucket, Key, **kwargs):
+        self.calls.append('create_multipart_upload')
+        return {'UploadId': 'upload-1'}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append('upload_part')
+        if PartNumber == self.fail_on_part:
+            raise RuntimeError('part failed')
+        self.digest.update(Body)
+        self.part_sizes.append(len(Body))
+        return {'ETag': f'etag-{PartNumber}'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        self.calls.append('complete_multipart_upload')
+        self.completed_parts = MultipartUpload['Parts']
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append('abort_multipart_upload')
+
+
+class TestIterBase64Decoded:
+    """Test cases for iter_base64_decoded"""
+
+    @pytest.mark.parametrize('size', [0, 1, 2, 3, 100, 65536, 100001])
+    def test_matches_b64decode(self, size):
+        raw = os.urandom(size)
+        encoded = base64.b64encode(raw).decode('ascii')
+        assert b''.join(iter_base64_decoded(encoded, chunk_chars=1024)) == raw
+
+    def test_bytes_input_with_line_breaks(self):
+        raw = os.urandom(5000)
+        encoded = base64.encodebytes(raw)  # 76-char lines separated by newlines
+        assert b''.join(iter_base64_decoded(encoded, chunk_chars=256)) == raw
+
+    def test_invalid_base64_raises(self):
+        with pytest.raises(Exception):
+            b''.join(iter_base64_decoded('abcde'))
+
+
+class TestStreamBase64ToS3:
+    """Test cases for stream_base64_to_s3"""
+
+    def test_small_object_uses_put_object(self):
+        raw = os.urandom(1000)
+        s3 = HashingS3()
+        size = stream_base64_to_s3(s3, 'bucket', 'a.mp3', base64.b64encode(raw).decode(), 'audio/mpeg', {})
+        assert size == 1000
+        assert s3.calls == ['put_object']
+        assert s3.digest.digest() == hashlib.sha256(raw).digest()
+
+    def test_large_object_uses_multipart(self):
+        raw = os.urandom(3 * MB + 123)
+        s3 = HashingS3()
+        size = stream_base64_to_s3(s3, 'bucket', 'a.mp3', base64.b64encode(raw).decode(), 'audio/mpeg', {},
+                                   part_size=MB)
+        assert size == len(raw)
+        assert s3.calls[0] == 'create_multipart_upload'
+        assert s3.calls[-1] == 'complete_multipart_upload'
+        assert [p['PartNumber'] for p in s3.completed_parts] == list(range(1, len(s3.part_sizes) + 1))
+        assert len(s3.part_sizes) >= 3
+        assert all(s >= MB for s in s3.part_sizes[:-1])
+        assert s3.digest.digest() == hashlib.sha256(raw).digest()
+
+    def test_failed_part_aborts_upload(self):
+        raw = os.urandom(3 * MB)
+        s3 = HashingS3(fail_on_part=2)
+        with pytest.raises(RuntimeError):
+            stream_base64_to_s3(s3, 'bucket', 'a.mp3', base64.b64encode(raw).decode(), 'audio/mpeg', {},
+                                part_size=MB)
+        assert s3.calls[-1] == 'abort_multipart_upload'
+
+    def test_peak_memory_is_bounded_by_part_size(self):
+        """Peak allocations stay ~one part, not a full decoded copy of the audio"""
+        audio_size = 24 * MB
+        encoded = base64.b64encode(os.urandom(audio_size)).decode('ascii')
+        s3 = HashingS3()
+
+        tracemalloc.start()
+        try:
+            stream_base64_to_s3(s3, 'bucket', 'a.mp3', encoded, 'audio/mpeg', {}, part_size=MB)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert sum(s3.part_sizes) == audio_size
+        assert peak < 3 * MB
+        assert peak < audio_size / 8
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
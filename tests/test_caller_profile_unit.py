@@ -0,0 +1,238 @@
+"""
+Unit tests for caller profile snapshots
+
+Tests profile derivation from Mem0 memories, S3 round trips, freshness against
+the caller version stamp, and that client_data builds the same response from a
+stored profile as from get_all (and ignores stale or empty profiles).
+"""
+
+import io
+import json
+import os
+import random
+import sys
+from unittest import mock
+
+import pytest
+
+# Set dummy environment variables before importing handler
+os.environ['MEM0_API_KEY'] = 'test-key'
+os.environ['MEM0_ORG_ID'] = 'test-org'
+os.environ['MEM0_PROJECT_ID'] = 'test-project'
+
+# Add src and the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'client_data'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.caller_profile import (
+    build_caller_profile, classify_memory, classify_profile_fields, load_caller_profile, profile_is_current,
+    profile_key, save_caller_profile
+)
+from agentic_memory_runtime.caller_version import bump_caller_version, read_caller_stamp
+from agentic_memory_runtime.ttl_cache import TTLCache
+
+MEMORIES = [
+    {'memory': "The user's name is Stefan Anderson", 'metadata': {'type': 'factual'}},
+    {'memory': 'Has a premium account', 'metadata': {'type': 'factual'}},
+    {'memory': 'Prefers email updates', 'metadata': {'type': 'factual'}},
+    {'memory': 'Asked about the previous billing issue', 'metadata': {'type': 'semantic'}},
+    {'memory': 'Lives in Minneapolis'}
+]
+
+
+class NoSuchKey(Exception):
+    response = {'Error': {'Code': 'NoSuchKey'}}
+
+
+class FakeS3:
+    """Minimal dict-backed S3 client"""
+
+    def __init__(self):
+        self.objects = {}
+        self.metadata = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+        self.metadata[Key] = kwargs.get('Metadata', {})
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NoSuchKey(Key)
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NoSuchKey(Key)
+        return {'ETag': f'"{len(self.objects[Key])}"', 'Metadata': self.metadata[Key]}
+
+
+class TestBuildCallerProfile:
+    """Test cases for build_caller_profile"""
+
+    def test_profile_fields(self):
+        profile = build_caller_profile('+16125550100', MEMORIES, last_call_ts='2025-06-10T12:00:00')
+
+        assert profile['caller_name'] == 'Stefan Anderson'
+        assert profile['account_status'] == 'Has a premium account'
+        assert profile['preferences'] == ['Prefers email updates']
+        assert profile['last_interaction'] == 'Asked about the previous billing issue'
+        assert profile['memory_count'] == 5
+        assert profile['top_facts'][-1] == 'Lives in Minneapolis'
+        assert profile['highlights'] == ['Asked about the previous billing issue']
+        assert profile['last_call_ts'] == '2025-06-10T12:00:00'
+
+    def test_new_caller(self):
+        profile = build_caller_profile('+16125550100', [])
+        assert profile['memory_count'] == 0
+        assert profile['caller_name'] is None
+        assert profile['top_facts'] == []
+
+
+class TestMemoryClassifier:
+    """Test cases for the single-pass memory classifier"""
+
+    def test_classify_tags_all_categories(self):
+        lowered, categories = classify_memory('Gold member, PREFERS email after the previous issue')
+        assert lowered == 'gold member, prefers email after the previous issue'
+        assert categories == {'tier', 'tier_metal', 'preference', 'channel_email', 'interaction', 'followup_concern'}
+
+    def test_classify_plain_memory(self):
+        assert classify_memory('Lives in Oslo')[1] == frozenset()
+
+    def test_matches_original_keyword_scans(self):
+        words = ['Premium', 'gold', 'VIP', 'basic', 'prefers', 'likes', 'wants', 'needs', 'last time', 'previous',
+                 'inquiry', 'issue', 'request', 'question', 'problem', 'email', 'phone', 'Oslo', 'dogs', 'silver']
+        rng = random.Random(99)
+        for _ in range(500):
+            facts = [' '.join(rng.sample(words, 3)) for _ in range(5)]
+            highlights = [' '.join(rng.sample(words, 3)) for _ in range(3)]
+
+            account_status, last_interaction, preferences = None, None, []
+            for fact in facts:
+                if any(word in fact.lower() for word in ['premium', 'gold', 'silver', 'basic', 'vip']):
+                    account_status = fact
+                if any(word in fact.lower() for word in ['prefer', 'likes', 'wants', 'needs']):
+                    preferences.append(fact)
+            for conv in highlights:
+                if not last_interaction and any(word in conv.lower() for word in ['last time', 'previous', 'inquiry', 'issue', 'request']):
+                    last_interaction = conv
+
+            assert classify_profile_fields(facts, highlights)[:3] == (account_status, preferences, last_interaction)
+
+
+class TestProfileStorage:
+    """Test cases for save_caller_profile / load_caller_profile"""
+
+    def test_round_trip(self):
+        s3 = FakeS3()
+        profile = build_caller_profile('+16125550100', MEMORIES)
+        key = save_caller_profile(s3, 'bucket', profile)
+
+        assert key == profile_key('+16125550100') == 'profiles/16125550100.json'
+        assert load_caller_profile(s3, 'bucket', '+16125550100') == profile
+
+    def test_missing_profile(self):
+        assert load_caller_profile(FakeS3(), 'bucket', '+16125550100') is None
+
+    def test_unknown_schema_version_ignored(self):
+        s3 = FakeS3()
+        s3.objects['profiles/16125550100.json'] = json.dumps({'schema_version': 99}).encode()
+        assert load_caller_profile(s3, 'bucket', '+16125550100') is None
+
+
+class TestProfileFreshness:
+    """Test cases for profile_is_current against the caller version stamp"""
+
+    def test_stamp_records_conversation(self):
+        s3 = FakeS3()
+        bump_caller_version(s3, 'bucket', '+16125550100', 'conv_2')
+        stamp = read_caller_stamp(s3, 'bucket', '+16125550100')
+        assert stamp['conversation_id'] == 'conv_2' and stamp['bumped_at']
+
+    def test_profile_for_stamped_call_is_current(self):
+        profile = build_caller_profile('+16125550100', MEMORIES, last_conversation_id='conv_2')
+        assert profile_is_current(profile, {'version': 'e', 'conversation_id': 'conv_2', 'bumped_at': '2099-01-01'})
+
+    def test_profile_before_stamped_call_is_stale(self):
+        profile = build_caller_profile('+16125550100', MEMORIES, last_conversation_id='conv_1')
+        assert not profile_is_current(profile, {'version': 'e', 'conversation_id': 'conv_2', 'bumped_at': '2099-01-01'})
+
+    def test_profile_rebuilt_after_stamp_is_current(self):
+        profile = build_caller_profile('+16125550100', MEMORIES)
+        assert profile_is_current(profile, {'version': 'e', 'conversation_id': 'conv_2', 'bumped_at': '2000-01-01'})
+
+    def test_unknown_stamp_trusts_profile(self):
+        profile = build_caller_profile('+16125550100', MEMORIES)
+        assert profile_is_current(profile, None)
+        assert profile_is_current(profile, {'version': 'e', 'conversation_id': None, 'bumped_at': None})
+
+
+class TestClientDataUsesProfile:
+    """Test that client_data reads the stored profile instead of get_all"""
+
+    @pytest.fixture
+    def client_data(self, monkeypatch):
+        with mock.patch('mem0.MemoryClient'):
+            import handler
+        fake_client = mock.Mock()
+        fake_client.get_all.return_value = {'results': MEMORIES}
+        s3 = FakeS3()
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 's3_client', s3)
+        monkeypatch.setattr(handler, 'S3_BUCKET_NAME', 'bucket')
+        monkeypatch.setattr(handler, 'ARCHIVE_MODE', 'sync')
+        monkeypatch.setattr(handler, 'save_client_data_to_s3', lambda **kwargs: None)
+        monkeypatch.setattr(handler, 'context_cache', TTLCache(max_entries=0))
+        return handler, fake_client, s3
+
+    def invoke(self, handler):
+        event = {'body': json.dumps({'caller_id': '+16125550100', 'call_sid': 'CA1'})}
+        response = handler.lambda_handler(event, None)
+        assert response['statusCode'] == 200
+        return json.loads(response['body'])
+
+    def test_profile_response_matches_get_all_response(self, client_data):
+        handler, fake_client, s3 = client_data
+
+        from_memories = self.invoke(handler)
+        assert fake_client.get_all.call_count == 1
+
+        save_caller_profile(s3, 'bucket', build_caller_profile('+16125550100', MEMORIES))
+        from_profile = self.invoke(handler)
+
+        assert fake_client.get_all.call_count == 1
+        assert from_profile == from_memories
+        assert from_profile['conversation_config_override']['agent']['first_message'] == (
+            "Hello Stefan Anderson! I see you're a premium customer, and I hope we resolved your previous concern. "
+            "How can I assist you today?"
+        )
+        assert from_profile['dynamic_variables']['caller_name'] == 'Stefan Anderson'
+
+    def test_profile_older_than_last_call_is_ignored(self, client_data):
+        handler, fake_client, s3 = client_data
+        save_caller_profile(s3, 'bucket', build_caller_profile('+16125550100', MEMORIES, last_conversation_id='conv_1'))
+        bump_caller_version(s3, 'bucket', '+16125550100', 'conv_2')
+
+        self.invoke(handler)
+        assert fake_client.get_all.call_count == 1
+
+    def test_profile_of_last_call_is_used(self, client_data):
+        handler, fake_client, s3 = client_data
+        save_caller_profile(s3, 'bucket', build_caller_profile('+16125550100', MEMORIES, last_conversation_id='conv_2'))
+        bump_caller_version(s3, 'bucket', '+16125550100', 'conv_2')
+
+        self.invoke(handler)
+        assert not fake_client.get_all.called
+
+    def test_empty_profile_is_ignored(self, client_data):
+        handler, fake_client, s3 = client_data
+        save_caller_profile(s3, 'bucket', build_caller_profile('+16125550100', []))
+
+        body = self.invoke(handler)
+        assert fake_client.get_all.call_count == 1
+        assert body['dynamic_variables']['caller_name'] == 'Stefan Anderson'
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
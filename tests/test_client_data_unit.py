@@ -4,9 +4,13 @@ Unit tests for client_data Lambda handler functions
 Tests the helper functions for name extraction and greeting generation.
 """
 
+import json
 import pytest
 import sys
 import os
+import threading
+import time
+from unittest import mock
 
 # Set dummy environment variables before importing handler
 os.environ['MEM0_API_KEY'] = 'test-key'
@@ -14,9 +18,11 @@ os.environ['MEM0_ORG_ID'] = 'test-org'
 os.environ['MEM0_PROJECT_ID'] = 'test-project'
 os.environ['ELEVENLABS_WORKSPACE_KEY'] = 'test-workspace-key'
 
-# Add src to path for imports
+# Add src and the shared runtime layer to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'client_data'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
 
+import handler
 from handler import extract_caller_name, generate_personalized_greeting
 
 
@@ -265,6 +271,41 @@ class TestNameExtractionPatterns:
         assert result == "Jennifer"
 
 
+class TestDeferredArchive:
+    """Test that S3 archival does not delay the webhook response"""
+
+    def test_response_returned_before_archive_completes(self):
+        release = threading.Event()
+        puts = []
+
+        class BlockingS3:
+            def put_object(self, **kwargs):
+                release.wait()
+                puts.append(kwargs['Key'])
+
+        fake_client = mock.Mock()
+        fake_client.get_all.return_value = {'results': []}
+        event = {'body': json.dumps({'caller_id': '+15550001111', 'agent_id': 'agent_x', 'call_sid': 'CA1'})}
+
+        with mock.patch.object(handler, 'client', fake_client), \
+                mock.patch.object(handler, 's3_client', BlockingS3()), \
+                mock.patch.object(handler, 'S3_BUCKET_NAME', 'test-bucket'), \
+                mock.patch.object(handler, 'ARCHIVE_MODE', 'deferred'):
+            start = time.perf_counter()
+            response = handler.lambda_handler(event, None)
+            elapsed = time.perf_counter() - start
+
+            assert response['statusCode'] == 200
+            assert elapsed < 0.5
+            assert puts == []
+
+            release.set()
+            assert handler.archive_writer.drain(2.0)
+
+        assert len(puts) == 2
+        assert puts[0].startswith('client-data/15550001111/') and puts[0].endswith('_CA1/received.json')
+
+
 if __name__ == "__main__":
     # Run tests with pytest
     pytest.main([__file__, "-v", "--tb=short"])
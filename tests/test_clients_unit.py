@@ -0,0 +1,90 @@
+"""
+Unit tests for lazy service clients
+
+Tests that clients are built once, on first use, and that importing a
+handler no longer imports or constructs mem0/boto3.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+# Add the shared runtime layer to path for imports
+LAYER_DIR = os.path.join(os.path.dirname(__file__), '..', 'layer')
+sys.path.insert(0, LAYER_DIR)
+
+from agentic_memory_runtime.clients import LazyClient
+
+SRC_DIR = os.path.join(os.path.dirname(__file__), '..', 'src')
+
+
+class TestLazyClient:
+    """Test cases for LazyClient"""
+
+    def test_built_on_first_attribute_access(self):
+        built = []
+
+        class Client:
+            def ping(self):
+                return 'pong'
+
+        lazy = LazyClient(lambda: built.append(1) or Client(), 'test')
+        assert not lazy.built and built == []
+        assert lazy.ping() == 'pong'
+        assert lazy.ping() == 'pong'
+        assert lazy.built and built == [1]
+
+    def test_concurrent_first_use_builds_once(self):
+        built = []
+        barrier = threading.Barrier(8)
+
+        def factory():
+            built.append(1)
+            return object()
+
+        lazy = LazyClient(factory, 'test')
+
+        def use():
+            barrier.wait()
+            lazy.get()
+
+        threads = [threading.Thread(target=use) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert built == [1]
+
+
+class TestHandlerImport:
+    """Importing a handler must not import mem0/boto3 or build clients"""
+
+    @pytest.mark.parametrize('function_name', ['client_data', 'retrieve', 'post_call'])
+    def test_no_eager_dependencies(self, function_name):
+        handler_dir = os.path.join(SRC_DIR, function_name)
+        code = (
+            "import importlib.util, sys\n"
+            "spec = importlib.util.spec_from_file_location('handler', sys.argv[1])\n"
+            "spec.loader.exec_module(importlib.util.module_from_spec(spec))\n"
+            "print(','.join(m for m in ('mem0', 'boto3') if m in sys.modules))\n"
+        )
+        env = {
+            **os.environ,
+            'PYTHONPATH': os.pathsep.join([handler_dir, LAYER_DIR]),
+            'MEM0_API_KEY': 'test-key', 'MEM0_ORG_ID': 'test-org', 'MEM0_PROJECT_ID': 'test-project',
+            'ELEVENLABS_HMAC_KEY': 'test-hmac-key', 'S3_BUCKET_NAME': 'test-bucket'
+        }
+        result = subprocess.run(
+            [sys.executable, '-c', code, os.path.join(handler_dir, 'handler.py')],
+            capture_output=True, text=True, env=env, timeout=60
+        )
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == ''
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,277 @@
+"""
+Unit tests for the client_data caller context cache
+
+Tests TTL/LRU behaviour, version-stamp invalidation, EMF metric records, that
+a warm client_data container skips Mem0 for repeat callers, and the degraded
+response when the context budget runs out.
+"""
+
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+# Set dummy environment variables before importing handler
+os.environ['MEM0_API_KEY'] = 'test-key'
+os.environ['MEM0_ORG_ID'] = 'test-org'
+os.environ['MEM0_PROJECT_ID'] = 'test-project'
+
+# Add src and the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'client_data'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.caller_version import bump_caller_version, get_caller_version, normalize_caller_id
+from agentic_memory_runtime.metrics import emit_metrics
+from agentic_memory_runtime.ttl_cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class NotFound(Exception):
+    response = {'Error': {'Code': '404'}}
+
+
+class FakeS3:
+    """Dict-backed S3 client returning a fresh ETag per put"""
+
+    def __init__(self):
+        self.objects = {}
+        self.puts = 0
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.puts += 1
+        self.objects[Key] = (Body, f'"etag-{self.puts}"')
+        return {'ETag': f'"etag-{self.puts}"'}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NotFound(Key)
+        return {'ETag': self.objects[Key][1]}
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NotFound(Key)
+        return {'Body': io.BytesIO(self.objects[Key][0])}
+
+
+class TestTTLCache:
+    """Test cases for TTLCache"""
+
+    def test_hit_and_miss(self):
+        cache = TTLCache(max_entries=4, ttl_seconds=60)
+        assert cache.get('a') is None
+        cache.put('a', 1)
+        assert cache.get('a') == 1
+        assert cache.drain_counters() == {'hits': 1, 'misses': 1, 'expired': 0, 'stale': 0, 'evictions': 0, 'size': 1}
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = TTLCache(max_entries=4, ttl_seconds=60, clock=clock)
+        cache.put('a', 1)
+        clock.now = 61
+        assert cache.get('a') is None
+        assert cache.drain_counters()['expired'] == 1
+        assert cache.peek('a') == 1
+
+    def test_version_mismatch_is_stale(self):
+        cache = TTLCache(max_entries=4, ttl_seconds=60)
+        cache.put('a', 1, version='v1')
+        assert cache.get('a', version='v1') == 1
+        assert cache.get('a', version='v2') is None
+        assert cache.drain_counters()['stale'] == 1
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1 and cache.get('c') == 3
+        assert cache.drain_counters()['evictions'] == 1
+
+    def test_zero_size_disables(self):
+        cache = TTLCache(max_entries=0)
+        cache.put('a', 1)
+        assert not cache.enabled
+        assert cache.get('a') is None
+
+
+class TestCallerVersion:
+    """Test cases for caller version stamps"""
+
+    @pytest.mark.parametrize('raw', ['+1 (612) 555-0100', '16125550100', ' +16125550100 '])
+    def test_normalize(self, raw):
+        assert normalize_caller_id(raw) == '+16125550100'
+
+    def test_bump_changes_stamp(self):
+        s3 = FakeS3()
+        assert get_caller_version(s3, 'bucket', '+16125550100') is None
+        first = bump_caller_version(s3, 'bucket', '+16125550100', 'conv_1')
+        assert get_caller_version(s3, 'bucket', '+16125550100') == first
+        second = bump_caller_version(s3, 'bucket', '+16125550100', 'conv_2')
+        assert second != first
+        assert get_caller_version(s3, 'bucket', '+16125550100') == second
+
+
+class TestEmitMetrics:
+    """Test cases for emit_metrics"""
+
+    def test_emf_record(self, capsys):
+        emit_metrics({'ContextCacheHits': 1}, dimensions={'Function': 'client_data'})
+        record = json.loads(capsys.readouterr().out)
+        directive = record['_aws']['CloudWatchMetrics'][0]
+        assert directive['Dimensions'] == [['Function']]
+        assert directive['Metrics'] == [{'Name': 'ContextCacheHits', 'Unit': 'Count'}]
+        assert record['ContextCacheHits'] == 1 and record['Function'] == 'client_data'
+
+
+class TestClientDataContextCache:
+    """Test that client_data serves repeat callers from the warm cache"""
+
+    @pytest.fixture
+    def client_data(self, monkeypatch):
+        with mock.patch('mem0.MemoryClient'):
+            import handler
+        fake_client = mock.Mock()
+        fake_client.get_all.return_value = {'results': [{'memory': 'User name is Dana Reyes', 'metadata': {'type': 'factual'}}]}
+        s3 = FakeS3()
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 's3_client', s3)
+        monkeypatch.setattr(handler, 'S3_BUCKET_NAME', 'bucket')
+        monkeypatch.setattr(handler, 'CALLER_PROFILE_ENABLED', False)
+        monkeypatch.setattr(handler, 'save_client_data_to_s3', lambda **kwargs: None)
+        monkeypatch.setattr(handler, 'context_cache', TTLCache(max_entries=8, ttl_seconds=300))
+        return handler, fake_client, s3
+
+    def invoke(self, handler, caller_id='+16125550100'):
+        response = handler.lambda_handler({'body': json.dumps({'caller_id': caller_id})}, None)
+        assert response['statusCode'] == 200
+        return json.loads(response['body'])
+
+    def test_repeat_caller_is_cached(self, client_data, capsys):
+        handler, fake_client, _ = client_data
+        first = self.invoke(handler)
+        second = self.invoke(handler, caller_id='+1 612-555-0100')
+
+        assert fake_client.get_all.call_count == 1
+        assert second['conversation_config_override'] == first['conversation_config_override']
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+        assert [r['ContextCacheHits'] for r in records] == [0, 1]
+
+    def test_version_bump_invalidates(self, client_data):
+        handler, fake_client, s3 = client_data
+        self.invoke(handler)
+        bump_caller_version(s3, 'bucket', '+16125550100')
+        self.invoke(handler)
+        assert fake_client.get_all.call_count == 2
+
+
+class TestContextBudget:
+    """Test the deadline-aware degraded response"""
+
+    class LambdaContext:
+        def __init__(self, remaining_ms):
+            self.remaining_ms = remaining_ms
+
+        def get_remaining_time_in_millis(self):
+            return self.remaining_ms
+
+    @pytest.fixture
+    def client_data(self, monkeypatch):
+        with mock.patch('mem0.MemoryClient'):
+            import handler
+        release = threading.Event()
+        fake_client = mock.Mock()
+
+        def slow_get_all(**kwargs):
+            release.wait(2.0)
+            return {'results': [{'memory': 'User name is Dana Reyes', 'metadata': {'type': 'factual'}}]}
+
+        fake_client.get_all.side_effect = slow_get_all
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 's3_client', FakeS3())
+        monkeypatch.setattr(handler, 'S3_BUCKET_NAME', 'bucket')
+        monkeypatch.setattr(handler, 'CALLER_PROFILE_ENABLED', False)
+        monkeypatch.setattr(handler, 'MEMORY_FETCH_MODE', 'all')
+        monkeypatch.setattr(handler, 'save_client_data_to_s3', lambda **kwargs: None)
+        monkeypatch.setattr(handler, 'context_cache', TTLCache(max_entries=8, ttl_seconds=300))
+        monkeypatch.setattr(handler, 'CONTEXT_BUDGET_MS', 50)
+        executor = ThreadPoolExecutor(max_workers=2)
+        monkeypatch.setattr(handler, 'context_executor', executor)
+        monkeypatch.setattr(handler, 'context_slots', threading.BoundedSemaphore(2))
+        yield handler, release
+        # Let abandoned lookups finish before the patched globals are restored
+        release.set()
+        executor.shutdown(wait=True)
+
+    def invoke(self, handler, context=None):
+        response = handler.lambda_handler({'body': json.dumps({'caller_id': '+16125550100'})}, context)
+        assert response['statusCode'] == 200
+        return json.loads(response['body'])
+
+    def test_budget_capped_by_remaining_time(self, client_data):
+        handler, _ = client_data
+        assert handler.context_budget_ms(None) == 50
+        assert handler.context_budget_ms(self.LambdaContext(260)) == 10
+        assert handler.context_budget_ms(self.LambdaContext(100)) == 1
+
+    def test_overrun_returns_generic_greeting(self, client_data, capsys):
+        handler, _ = client_data
+        body = self.invoke(handler)
+
+        assert body['dynamic_variables']['context_partial'] == 'yes'
+        assert body['conversation_config_override']['agent']['first_message'] == "Hello! How may I help you today?"
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+        assert records[-1]['ContextBudgetOverruns'] == 1
+
+    def test_saturated_pool_skips_lookup(self, client_data, capsys):
+        handler, _ = client_data
+        # Both workers stay stuck on abandoned lookups
+        self.invoke(handler)
+        self.invoke(handler)
+
+        body = self.invoke(handler)
+        assert body['dynamic_variables']['context_partial'] == 'yes'
+        assert handler.client.get_all.call_count == 2
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+        assert records[-1]['ContextPoolSaturated'] == 1
+
+    def test_late_result_is_cached_for_next_call(self, client_data):
+        handler, release = client_data
+        assert self.invoke(handler)['dynamic_variables']['context_partial'] == 'yes'
+
+        release.set()
+        for _ in range(200):
+            if len(handler.context_cache):
+                break
+            threading.Event().wait(0.01)
+
+        body = self.invoke(handler)
+        assert body['dynamic_variables']['context_partial'] == 'no'
+        assert body['dynamic_variables']['caller_name'] == 'Dana Reyes'
+
+    def test_overrun_serves_last_known_context(self, client_data):
+        handler, release = client_data
+        handler.context_cache.put('+16125550100', ({'caller_id': '+16125550100', 'caller_name': 'Dana Reyes'}, 'ctx', 'Hello Dana!'), version='old')
+
+        body = self.invoke(handler)
+
+        assert body['dynamic_variables']['context_partial'] == 'yes'
+        assert body['conversation_config_override']['agent']['first_message'] == 'Hello Dana!'
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
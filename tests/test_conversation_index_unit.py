@@ -0,0 +1,247 @@
+"""
+Unit tests for the conversation-to-caller index and the local S3 stand-in
+
+Tests LocalS3Client against the S3 calls the handlers make, the
+conversation index, and that post_call stores audio under the caller's
+prefix: directly when the transcript came first, and via relocation or
+the reconciler when the audio came first.
+"""
+
+import base64
+import importlib.util
+import json
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+# Set dummy environment variables before importing handler
+os.environ['MEM0_API_KEY'] = 'test-key'
+os.environ['MEM0_ORG_ID'] = 'test-org'
+os.environ['MEM0_PROJECT_ID'] = 'test-project'
+os.environ['ELEVENLABS_HMAC_KEY'] = 'test-hmac-key'
+os.environ['S3_BUCKET_NAME'] = 'test-bucket'
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+# Add src and the shared runtime layer to path for imports
+HANDLER_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call')
+sys.path.insert(0, HANDLER_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime import clients
+from agentic_memory_runtime.caller_version import bump_caller_version, get_caller_version
+from agentic_memory_runtime.config import load_config
+from agentic_memory_runtime.local_s3 import LocalS3Client, LocalS3Error
+from audio_upload import stream_base64_to_s3
+from conversation_index import (
+    caller_audio_key,
+    lookup_conversation_caller,
+    orphan_audio_key,
+    read_reconcile_cursor,
+    reconcile_orphan_audio,
+    record_conversation_caller,
+)
+
+
+def load_handler():
+    """Load post_call handler under a unique module name with Mem0 mocked out"""
+    spec = importlib.util.spec_from_file_location('post_call_index_handler', os.path.join(HANDLER_DIR, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch('mem0.MemoryClient'):
+        spec.loader.exec_module(module)
+    return module
+
+
+handler = load_handler()
+
+AUDIO = b'ID3' + bytes(range(256)) * 4
+
+
+def transcription_body(conversation_id: str = 'conv_index') -> str:
+    """Build a minimal post_call_transcription webhook body"""
+    return json.dumps({
+        'type': 'post_call_transcription',
+        'data': {
+            'conversation_id': conversation_id,
+            'agent_id': 'agent_test',
+            'metadata': {'phone_call': {'external_number': '+15555550100'}},
+            'transcript': [{'role': 'agent', 'message': 'Hello'}, {'role': 'user', 'message': 'Hi'}],
+            'analysis': {'transcript_summary': 'Short call.'}
+        }
+    })
+
+
+def audio_body(conversation_id: str = 'conv_index') -> str:
+    """Build a post_call_audio webhook body"""
+    return json.dumps({
+        'type': 'post_call_audio',
+        'data': {'conversation_id': conversation_id, 'agent_id': 'agent_test',
+                 'full_audio': base64.b64encode(AUDIO).decode('ascii')}
+    })
+
+
+@pytest.fixture
+def s3(tmp_path):
+    return LocalS3Client(str(tmp_path / 's3'))
+
+
+class TestLocalS3Client:
+    """Test cases for LocalS3Client"""
+
+    def test_put_get_head(self, s3):
+        s3.put_object(Bucket='b', Key='a/b.json', Body='{}', ContentType='application/json', Metadata={'k': 'v'})
+        obj = s3.get_object(Bucket='b', Key='a/b.json')
+        assert obj['Body'].read() == b'{}'
+        head = s3.head_object(Bucket='b', Key='a/b.json')
+        assert head['ContentType'] == 'application/json'
+        assert head['Metadata'] == {'k': 'v'}
+        assert head['ContentLength'] == 2
+
+    def test_missing_keys_use_botocore_error_codes(self, s3):
+        with pytest.raises(LocalS3Error) as e:
+            s3.get_object(Bucket='b', Key='missing')
+        assert e.value.response['Error']['Code'] == 'NoSuchKey'
+        with pytest.raises(LocalS3Error) as e:
+            s3.head_object(Bucket='b', Key='missing')
+        assert e.value.response['Error']['Code'] == '404'
+
+    def test_etag_changes_with_content(self, s3):
+        first = s3.put_object(Bucket='b', Key='k', Body=b'1')['ETag']
+        assert s3.put_object(Bucket='b', Key='k', Body=b'2')['ETag'] != first
+
+    def test_if_none_match(self, s3):
+        s3.put_object(Bucket='b', Key='k', Body=b'1', IfNoneMatch='*')
+        with pytest.raises(LocalS3Error) as e:
+            s3.put_object(Bucket='b', Key='k', Body=b'2', IfNoneMatch='*')
+        assert e.value.response['Error']['Code'] == 'PreconditionFailed'
+
+    def test_list_paginates(self, s3):
+        for i in range(5):
+            s3.put_object(Bucket='b', Key=f"p/{i}.mp3", Body=b'x')
+        s3.put_object(Bucket='b', Key='other/0.mp3', Body=b'x')
+        first = s3.list_objects_v2(Bucket='b', Prefix='p/', MaxKeys=3)
+        assert [o['Key'] for o in first['Contents']] == ['p/0.mp3', 'p/1.mp3', 'p/2.mp3']
+        assert first['IsTruncated']
+        second = s3.list_objects_v2(Bucket='b', Prefix='p/', MaxKeys=3, ContinuationToken=first['NextContinuationToken'])
+        assert [o['Key'] for o in second['Contents']] == ['p/3.mp3', 'p/4.mp3']
+        assert not second['IsTruncated']
+
+    def test_copy_and_delete(self, s3):
+        s3.put_object(Bucket='b', Key='src', Body=b'x', Metadata={'k': 'v'})
+        s3.copy_object(Bucket='b', Key='dst', CopySource={'Bucket': 'b', 'Key': 'src'})
+        s3.delete_object(Bucket='b', Key='src')
+        s3.delete_object(Bucket='b', Key='src')
+        assert s3.head_object(Bucket='b', Key='dst')['Metadata'] == {'k': 'v'}
+        assert s3.list_objects_v2(Bucket='b')['KeyCount'] == 1
+
+    def test_multipart_upload(self, s3):
+        data = os.urandom(3000)
+        uploaded = stream_base64_to_s3(s3, 'b', 'audio.mp3', base64.b64encode(data).decode('ascii'),
+                                       content_type='audio/mpeg', metadata={}, part_size=1024)
+        assert uploaded == len(data)
+        assert s3.get_object(Bucket='b', Key='audio.mp3')['Body'].read() == data
+
+    def test_caller_version_stamps(self, s3):
+        assert get_caller_version(s3, 'b', '+15555550100') is None
+        bump_caller_version(s3, 'b', '+15555550100', 'conv_1')
+        assert get_caller_version(s3, 'b', '+15555550100') is not None
+
+    def test_selected_by_local_s3_path(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(clients, '_clients', {})
+        client = clients.get_s3_client(load_config({'LOCAL_S3_PATH': str(tmp_path)}))
+        assert isinstance(client, LocalS3Client)
+
+
+class TestConversationIndex:
+    """Test cases for the index and the reconciler"""
+
+    def test_record_and_lookup(self, s3):
+        assert lookup_conversation_caller(s3, 'b', 'conv_1') is None
+        record_conversation_caller(s3, 'b', 'conv_1', '+15555550100', 'agent_test')
+        assert lookup_conversation_caller(s3, 'b', 'conv_1') == '+15555550100'
+
+    def test_reconcile_moves_only_indexed_audio(self, s3):
+        s3.put_object(Bucket='b', Key=orphan_audio_key('agent_test', 'conv_1'), Body=AUDIO, ContentType='audio/mpeg')
+        s3.put_object(Bucket='b', Key=orphan_audio_key('agent_test', 'conv_2'), Body=AUDIO, ContentType='audio/mpeg')
+        record_conversation_caller(s3, 'b', 'conv_1', '+15555550100')
+
+        assert reconcile_orphan_audio(s3, 'b') == {'examined': 2, 'moved': 1, 'unmatched': 1, 'expired': 0, 'failed': 0}
+        moved = s3.head_object(Bucket='b', Key=caller_audio_key('+15555550100', 'conv_1'))
+        assert moved['Metadata']['external_number'] == '+15555550100'
+        assert moved['ContentType'] == 'audio/mpeg'
+        assert [o['Key'] for o in s3.list_objects_v2(Bucket='b', Prefix='post-call/audio-only/')['Contents']] == \
+            [orphan_audio_key('agent_test', 'conv_2')]
+
+    def test_reconcile_respects_max_objects(self, s3):
+        for i in range(3):
+            s3.put_object(Bucket='b', Key=orphan_audio_key('agent_test', f"conv_{i}"), Body=AUDIO)
+        assert reconcile_orphan_audio(s3, 'b', max_objects=2)['examined'] == 2
+
+    def test_reconcile_resumes_where_the_last_run_stopped(self, s3):
+        for i in range(3):
+            s3.put_object(Bucket='b', Key=orphan_audio_key('agent_test', f"conv_{i}"), Body=AUDIO)
+        assert reconcile_orphan_audio(s3, 'b', max_objects=2, resume=True)['examined'] == 2
+        assert read_reconcile_cursor(s3, 'b') == orphan_audio_key('agent_test', 'conv_1')
+
+        # Audio parked past the first run's limit is reached by the next one, which then wraps around
+        record_conversation_caller(s3, 'b', 'conv_2', '+15555550100')
+        assert reconcile_orphan_audio(s3, 'b', max_objects=2, resume=True) == \
+            {'examined': 1, 'moved': 1, 'unmatched': 0, 'expired': 0, 'failed': 0}
+        assert read_reconcile_cursor(s3, 'b') is None
+        assert reconcile_orphan_audio(s3, 'b', max_objects=2, resume=True)['unmatched'] == 2
+
+    def test_reconcile_moves_out_audio_that_never_matches(self, s3):
+        s3.put_object(Bucket='b', Key=orphan_audio_key('agent_test', 'conv_web'), Body=AUDIO, ContentType='audio/mpeg')
+        assert reconcile_orphan_audio(s3, 'b', max_age_seconds=3600)['unmatched'] == 1
+
+        assert reconcile_orphan_audio(s3, 'b', max_age_seconds=0)['expired'] == 1
+        assert s3.list_objects_v2(Bucket='b', Prefix='post-call/audio-only/')['KeyCount'] == 0
+        assert s3.head_object(Bucket='b', Key='post-call/audio-unmatched/agent_test/conv_web.mp3')['ContentType'] == 'audio/mpeg'
+        assert reconcile_orphan_audio(s3, 'b', max_age_seconds=0)['examined'] == 0
+
+
+class TestPostCallAudioRouting:
+    """Test that post_call files audio under the caller whatever the webhook order"""
+
+    @pytest.fixture
+    def post_call(self, s3, monkeypatch):
+        fake_client = mock.Mock()
+        fake_client.get_all.return_value = {'results': []}
+        monkeypatch.setattr(handler, 's3_client', s3)
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 'S3_BUCKET_NAME', 'test-bucket')
+        return s3
+
+    def audio_keys(self, s3):
+        return sorted(o['Key'] for o in s3.list_objects_v2(Bucket='test-bucket')['Contents'] if o['Key'].endswith('.mp3'))
+
+    def test_transcript_first(self, post_call):
+        handler.process_webhook_body(transcription_body())
+        handler.process_webhook_body(audio_body())
+        assert self.audio_keys(post_call) == [caller_audio_key('+15555550100', 'conv_index')]
+        key = caller_audio_key('+15555550100', 'conv_index')
+        assert post_call.get_object(Bucket='test-bucket', Key=key)['Body'].read() == AUDIO
+
+    def test_audio_first_is_moved_by_transcript(self, post_call):
+        handler.process_webhook_body(audio_body())
+        assert self.audio_keys(post_call) == [orphan_audio_key('agent_test', 'conv_index')]
+
+        results = handler.process_webhook_body(transcription_body())
+        assert results['conversation_index']['ok']
+        assert self.audio_keys(post_call) == [caller_audio_key('+15555550100', 'conv_index')]
+
+    def test_reconcile_handler(self, post_call, capsys):
+        handler.process_webhook_body(audio_body())
+        record_conversation_caller(post_call, 'test-bucket', 'conv_index', '+15555550100')
+
+        stats = handler.reconcile_handler({}, None)
+        assert stats['moved'] == 1
+        assert self.audio_keys(post_call) == [caller_audio_key('+15555550100', 'conv_index')]
+        assert read_reconcile_cursor(post_call, 'test-bucket') is None
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+        assert records[-1]['AudioReconciled'] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,177 @@
+"""
+Unit tests for the deferred background writer
+
+Tests non-blocking submission, failure isolation, backlog bounds and draining,
+and that work is drained after each response (through the Lambda Extensions
+API) and on SIGTERM when the container is recycled.
+"""
+
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.deferred_writer import DeferredWriter, PostInvokeDrain, drain_on_sigterm
+
+
+class TestDeferredWriter:
+    """Test cases for DeferredWriter"""
+
+    def test_submit_does_not_wait_for_task(self):
+        writer = DeferredWriter()
+        release = threading.Event()
+
+        start = time.perf_counter()
+        assert writer.submit('slow', release.wait)
+        assert time.perf_counter() - start < 0.05
+        assert writer.pending() == 1
+
+        release.set()
+        assert writer.drain(1.0)
+        assert writer.stats() == {'pending': 0, 'completed': 1, 'failed': 0, 'dropped': 0}
+
+    def test_tasks_run_in_order(self):
+        writer = DeferredWriter()
+        seen = []
+        for i in range(5):
+            writer.submit(f'task {i}', lambda i=i: seen.append(i))
+        assert writer.drain(1.0)
+        assert seen == [0, 1, 2, 3, 4]
+
+    def test_failure_does_not_stop_worker(self):
+        writer = DeferredWriter()
+        seen = []
+
+        def fail():
+            raise RuntimeError('S3 unavailable')
+
+        writer.submit('fail', fail)
+        writer.submit('ok', lambda: seen.append('ok'))
+        assert writer.drain(1.0)
+        assert seen == ['ok']
+        assert writer.failed == 1 and writer.completed == 1
+
+    def test_full_backlog_drops(self):
+        writer = DeferredWriter(max_pending=1)
+        release = threading.Event()
+        started = threading.Event()
+
+        writer.submit('running', lambda: (started.set(), release.wait()))
+        assert started.wait(1.0)
+        assert writer.submit('queued', lambda: None)
+        assert not writer.submit('overflow', lambda: None)
+        assert writer.dropped == 1
+
+        release.set()
+        assert writer.drain(1.0)
+
+    def test_drain_times_out(self):
+        writer = DeferredWriter()
+        release = threading.Event()
+        writer.submit('blocked', release.wait)
+        assert not writer.drain(0.05)
+        release.set()
+        assert writer.drain(1.0)
+
+
+class FakeRuntimeAPI:
+    """
+    Local Lambda Extensions API: hands out one INVOKE event, then records
+    when the extension asks for the next one (the point Lambda would freeze)
+    """
+
+    def __init__(self, on_freeze):
+        self.registrations = []
+        self.frozen = threading.Event()
+        self.shutdown = threading.Event()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers['Content-Length']))
+                api.registrations.append((self.headers['Lambda-Extension-Name'], json.loads(body)))
+                self.send_response(200)
+                self.send_header('Lambda-Extension-Identifier', 'ext-1')
+                self.send_header('Content-Length', '2')
+                self.end_headers()
+                self.wfile.write(b'{}')
+
+            def do_GET(self):
+                if api.requests_served:
+                    on_freeze()
+                    api.frozen.set()
+                    api.shutdown.wait(5.0)
+                    event = {'eventType': 'SHUTDOWN'}
+                else:
+                    event = {'eventType': 'INVOKE', 'deadlineMs': int((time.time() + 5) * 1000)}
+                api.requests_served += 1
+                body = json.dumps(event).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.requests_served = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.address = f"127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self):
+        self.shutdown.set()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestLambdaLifecycle:
+    """Test that pending work is not left behind when Lambda freezes or recycles the container"""
+
+    def test_environment_freezes_only_after_drain(self):
+        writer = DeferredWriter()
+        completed_at_freeze = []
+        api = FakeRuntimeAPI(on_freeze=lambda: completed_at_freeze.append(writer.completed))
+        try:
+            drain = PostInvokeDrain(writer, runtime_api=api.address, name='test-archive')
+            assert drain.register()
+            assert api.registrations == [('test-archive', {'events': ['INVOKE']})]
+
+            # The handler returns its response, leaving a slow archive behind
+            writer.submit('archive', lambda: time.sleep(0.2))
+            drain.invocation_done()
+
+            assert api.frozen.wait(2.0)
+            assert completed_at_freeze == [1]
+        finally:
+            api.close()
+
+    def test_no_runtime_api_outside_lambda(self):
+        assert not PostInvokeDrain(DeferredWriter(), runtime_api='').register()
+
+    def test_recycled_container_drains_on_sigterm(self):
+        writer = DeferredWriter()
+        previous = signal.getsignal(signal.SIGTERM)
+        try:
+            assert drain_on_sigterm(writer, timeout=1.0)
+            release = threading.Event()
+            writer.submit('archive', lambda: release.wait(0.1))
+
+            # Lambda sends SIGTERM before shutting a recycled environment down
+            os.kill(os.getpid(), signal.SIGTERM)
+            assert writer.stats() == {'pending': 0, 'completed': 1, 'failed': 0, 'dropped': 0}
+        finally:
+            signal.signal(signal.SIGTERM, previous)
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,174 @@
+"""
+Unit tests for search deadlines and hedged requests
+
+Tests LatencyTracker percentiles, hedged_call deadline/hedge/error handling,
+and that retrieve answers a slow Mem0 search with an empty timed_out result.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+# Add the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.hedging import DeadlineExceeded, LatencyTracker, hedged_call
+
+RETRIEVE_HANDLER = os.path.join(os.path.dirname(__file__), '..', 'src', 'retrieve', 'handler.py')
+
+
+@pytest.fixture
+def executor():
+    executor = ThreadPoolExecutor(max_workers=4)
+    yield executor
+    executor.shutdown(wait=False)
+
+
+class TestLatencyTracker:
+    """Test cases for LatencyTracker"""
+
+    def test_needs_min_samples(self):
+        tracker = LatencyTracker(min_samples=3)
+        tracker.record(0.1)
+        tracker.record(0.2)
+        assert tracker.percentile(95) is None
+
+    def test_nearest_rank_percentile(self):
+        tracker = LatencyTracker(min_samples=1)
+        for ms in range(1, 101):
+            tracker.record(ms / 1000)
+        assert tracker.percentile(95) == 0.095
+        assert tracker.percentile(50) == 0.05
+        assert tracker.percentile(100) == 0.1
+
+    def test_window_is_bounded(self):
+        tracker = LatencyTracker(window=10, min_samples=1)
+        for _ in range(50):
+            tracker.record(1.0)
+        assert len(tracker) == 10
+
+
+class TestHedgedCall:
+    """Test cases for hedged_call"""
+
+    def test_fast_call_is_not_hedged(self, executor):
+        stats = {}
+        tracker = LatencyTracker(min_samples=1)
+        assert hedged_call(lambda: 'ok', executor, timeout=1, hedge_delay=0.5, tracker=tracker, stats=stats) == 'ok'
+        assert stats.get('hedges', 0) == 0
+        assert len(tracker) == 1
+
+    def test_hedge_wins_when_primary_is_slow(self, executor):
+        calls = []
+        release = threading.Event()
+
+        def request():
+            calls.append(1)
+            if len(calls) == 1:
+                release.wait(2)
+                return 'primary'
+            return 'hedge'
+
+        stats = {}
+        start = time.monotonic()
+        assert hedged_call(request, executor, timeout=1, hedge_delay=0.05, stats=stats) == 'hedge'
+        assert time.monotonic() - start < 0.5
+        assert stats == {'hedges': 1, 'hedge_wins': 1}
+        release.set()
+
+    def test_deadline_exceeded(self, executor):
+        release = threading.Event()
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded):
+            hedged_call(lambda: release.wait(2), executor, timeout=0.1)
+        assert time.monotonic() - start < 0.5
+        release.set()
+
+    def test_failed_primary_is_hedged_immediately(self, executor):
+        calls = []
+
+        def request():
+            calls.append(1)
+            if len(calls) == 1:
+                raise RuntimeError('connection reset')
+            return 'hedge'
+
+        assert hedged_call(request, executor, timeout=1, hedge_delay=0.8) == 'hedge'
+
+    def test_error_without_hedge_is_raised(self, executor):
+        with pytest.raises(RuntimeError):
+            hedged_call(mock.Mock(side_effect=RuntimeError('boom')), executor, timeout=1)
+
+    def test_both_failing_raises_last_error(self, executor):
+        with pytest.raises(RuntimeError):
+            hedged_call(mock.Mock(side_effect=RuntimeError('boom')), executor, timeout=1, hedge_delay=0.01)
+
+
+class TestRetrieveDeadline:
+    """Test that retrieve degrades to an empty result instead of a 500"""
+
+    class LambdaContext:
+        def __init__(self, remaining_ms):
+            self.remaining_ms = remaining_ms
+
+        def get_remaining_time_in_millis(self):
+            return self.remaining_ms
+
+    @pytest.fixture
+    def retrieve(self, monkeypatch, executor):
+        spec = importlib.util.spec_from_file_location('retrieve_handler', RETRIEVE_HANDLER)
+        handler = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(handler)
+        monkeypatch.setattr(handler, 'search_executor', executor)
+        monkeypatch.setattr(handler, 'S3_BUCKET_NAME', '')
+        monkeypatch.setattr(handler, 'SEARCH_TIMEOUT_SECONDS', 0.1)
+        monkeypatch.setattr(handler, 'HEDGE_PERCENTILE', 0)
+        release = threading.Event()
+        yield handler, release
+        release.set()
+
+    def invoke(self, handler, context=None):
+        event = {'body': json.dumps({'query': 'travel', 'user_id': '+16125550100'})}
+        response = handler.lambda_handler(event, context)
+        assert response['statusCode'] == 200
+        return json.loads(response['body'])
+
+    def test_slow_search_times_out(self, retrieve):
+        handler, release = retrieve
+        handler.client = mock.Mock()
+        handler.client.search.side_effect = lambda **kwargs: release.wait(2)
+        assert self.invoke(handler) == {'memories': [], 'timed_out': True}
+
+    def test_fast_search(self, retrieve):
+        handler, _ = retrieve
+        handler.client = mock.Mock()
+        handler.client.search.return_value = {'results': [{'id': 'm1'}]}
+        assert self.invoke(handler) == {'memories': [{'id': 'm1'}], 'timed_out': False}
+
+    def test_timeout_capped_by_remaining_time(self, retrieve):
+        handler, _ = retrieve
+        handler.SEARCH_TIMEOUT_SECONDS = 5
+        assert handler.search_timeout(None) == 5
+        assert handler.search_timeout(self.LambdaContext(1250)) == 1.0
+        assert handler.search_timeout(self.LambdaContext(100)) == 0.001
+
+    def test_hedge_delay_follows_observed_latency(self, retrieve):
+        handler, _ = retrieve
+        handler.HEDGE_PERCENTILE = 95
+        assert handler.hedge_delay() == handler.HEDGE_DELAY_MS / 1000
+        for _ in range(handler.search_latency.min_samples):
+            handler.search_latency.record(0.4)
+        assert handler.hedge_delay() == 0.4
+        handler.HEDGE_PERCENTILE = 0
+        assert handler.hedge_delay() is None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
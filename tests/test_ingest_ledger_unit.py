@@ -0,0 +1,385 @@
+"""
+Unit tests for idempotent post-call ingestion
+
+Tests conditional writes (put_if_absent) on every key-value store backend,
+the IngestLedger claims and completion records, and that post_call skips
+retried webhooks and resumes only the stages a failed delivery left undone.
+"""
+
+import importlib.util
+import io
+import json
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+# Set dummy environment variables before importing handler
+os.environ['MEM0_API_KEY'] = 'test-key'
+os.environ['MEM0_ORG_ID'] = 'test-org'
+os.environ['MEM0_PROJECT_ID'] = 'test-project'
+os.environ['ELEVENLABS_HMAC_KEY'] = 'test-hmac-key'
+os.environ['S3_BUCKET_NAME'] = 'test-bucket'
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+# Add src and the shared runtime layer to path for imports
+HANDLER_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call')
+sys.path.insert(0, HANDLER_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.kv_store import DynamoDBKVStore, FileKVStore, InMemoryKVStore
+from ingest_ledger import IngestLedger, create_ingest_ledger
+
+
+def load_handler():
+    """Load post_call handler under a unique module name with Mem0 mocked out"""
+    spec = importlib.util.spec_from_file_location('post_call_ledger_handler', os.path.join(HANDLER_DIR, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch('mem0.MemoryClient'):
+        spec.loader.exec_module(module)
+    return module
+
+
+handler = load_handler()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConditionalCheckFailed(Exception):
+    response = {'Error': {'Code': 'ConditionalCheckFailedException'}}
+
+
+class FakeDynamoDB:
+    """Dict-backed DynamoDB client supporting the put_if_absent and delete_if_equal conditions"""
+
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, TableName, Key):
+        item = self.items.get(Key['pk']['S'])
+        return {'Item': item} if item else {}
+
+    def put_item(self, TableName, Item, ConditionExpression=None, ExpressionAttributeValues=None):
+        existing = self.items.get(Item['pk']['S'])
+        if ConditionExpression and existing:
+            if float(existing['expires_at']['N']) > float(ExpressionAttributeValues[':now']['N']):
+                raise ConditionalCheckFailed()
+        self.items[Item['pk']['S']] = Item
+
+    def delete_item(self, TableName, Key, ConditionExpression=None, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None):
+        existing = self.items.get(Key['pk']['S'])
+        if ConditionExpression and (not existing or existing['value'] != ExpressionAttributeValues[':value']):
+            raise ConditionalCheckFailed()
+        self.items.pop(Key['pk']['S'], None)
+
+
+class NotFound(Exception):
+    response = {'Error': {'Code': '404'}}
+
+
+class FakeS3:
+    """Minimal dict-backed S3 client for handler tests"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body.encode('utf-8') if isinstance(Body, str) else Body
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NotFound(Key)
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NotFound(Key)
+        return {'ContentLength': len(self.objects[Key]), 'Metadata': {}}
+
+
+def transcription_body(conversation_id: str = 'conv_retry') -> str:
+    """Build a minimal post_call_transcription webhook body"""
+    return json.dumps({
+        'type': 'post_call_transcription',
+        'data': {
+            'conversation_id': conversation_id,
+            'agent_id': 'agent_test',
+            'metadata': {'phone_call': {'external_number': '+15555550100'}},
+            'transcript': [{'role': 'agent', 'message': 'Your flight is booked'}, {'role': 'user', 'message': 'Thanks'}],
+            'analysis': {'transcript_summary': 'Booked a flight.'}
+        }
+    })
+
+
+class TestPutIfAbsent:
+    """Test conditional writes on every key-value store backend"""
+
+    @pytest.fixture(params=['memory', 'file', 'dynamodb'])
+    def store_and_clock(self, request, tmp_path):
+        clock = FakeClock()
+        if request.param == 'memory':
+            return InMemoryKVStore(clock=clock), clock
+        if request.param == 'file':
+            return FileKVStore(str(tmp_path), clock=clock), clock
+        return DynamoDBKVStore('table', dynamodb_client=FakeDynamoDB(), clock=clock), clock
+
+    def test_only_first_write_wins(self, store_and_clock):
+        store, _ = store_and_clock
+        assert store.put_if_absent('k', 'first', ttl_seconds=60)
+        assert not store.put_if_absent('k', 'second', ttl_seconds=60)
+        assert store.get('k') == 'first'
+
+    def test_expired_item_counts_as_absent(self, store_and_clock):
+        store, clock = store_and_clock
+        assert store.put_if_absent('k', 'first', ttl_seconds=60)
+        clock.now += 60
+        assert store.put_if_absent('k', 'second', ttl_seconds=60)
+        assert store.get('k') == 'second'
+
+    def test_deleted_item_can_be_claimed_again(self, store_and_clock):
+        store, _ = store_and_clock
+        assert store.put_if_absent('k', 'first', ttl_seconds=60)
+        store.delete('k')
+        assert store.put_if_absent('k', 'second', ttl_seconds=60)
+
+    def test_delete_if_equal_only_removes_matching_value(self, store_and_clock):
+        store, _ = store_and_clock
+        store.put('k', {'owner': 'a'}, ttl_seconds=60)
+        assert not store.delete_if_equal('k', {'owner': 'b'})
+        assert store.get('k') == {'owner': 'a'}
+        assert store.delete_if_equal('k', {'owner': 'a'})
+        assert store.get('k') is None
+        assert not store.delete_if_equal('k', {'owner': 'a'})
+
+    def test_file_store_leaves_no_temporary_files(self, tmp_path):
+        store = FileKVStore(str(tmp_path))
+        store.put_if_absent('k', 'first', ttl_seconds=60)
+        store.put_if_absent('k', 'second', ttl_seconds=60)
+        assert len(os.listdir(tmp_path)) == 1
+
+
+class TestIngestLedger:
+    """Test cases for IngestLedger"""
+
+    def test_claim_is_exclusive_until_released(self):
+        ledger = IngestLedger(InMemoryKVStore())
+        lease = ledger.acquire('conv_1', 'post_call_transcription')
+        assert lease
+        assert not ledger.acquire('conv_1', 'post_call_transcription')
+        assert ledger.acquire('conv_1', 'post_call_audio')
+        assert ledger.release('conv_1', 'post_call_transcription', lease)
+        assert ledger.acquire('conv_1', 'post_call_transcription')
+
+    def test_expired_holder_cannot_release_the_new_claim(self):
+        clock = FakeClock()
+        ledger = IngestLedger(InMemoryKVStore(clock=clock), lease_seconds=300)
+        stale = ledger.acquire('conv_1', 'post_call_transcription')
+        clock.now += 300
+        assert ledger.acquire('conv_1', 'post_call_transcription')
+        assert not ledger.release('conv_1', 'post_call_transcription', stale)
+        assert not ledger.acquire('conv_1', 'post_call_transcription')
+
+    def test_abandoned_claim_expires(self):
+        clock = FakeClock()
+        ledger = IngestLedger(InMemoryKVStore(clock=clock), lease_seconds=300)
+        assert ledger.acquire('conv_1', 'post_call_transcription')
+        clock.now += 300
+        assert ledger.acquire('conv_1', 'post_call_transcription')
+
+    def test_record_merges_stages(self):
+        ledger = IngestLedger(InMemoryKVStore())
+        assert ledger.get('conv_1', 'post_call_transcription') == {'stages': {}, 'complete': False}
+        ledger.record('conv_1', 'post_call_transcription', ['s3_archive', 'factual_memory'], complete=False)
+        record = ledger.record('conv_1', 'post_call_transcription', ['semantic_memory'], complete=True)
+        assert set(record['stages']) == {'s3_archive', 'factual_memory', 'semantic_memory'}
+        assert ledger.get('conv_1', 'post_call_transcription')['complete']
+
+    def test_create_ingest_ledger(self, monkeypatch, tmp_path):
+        monkeypatch.delenv('INGEST_LEDGER_BACKEND', raising=False)
+        assert create_ingest_ledger() is None
+        monkeypatch.setenv('INGEST_LEDGER_BACKEND', 'file')
+        monkeypatch.setenv('INGEST_LEDGER_PATH', str(tmp_path))
+        monkeypatch.setenv('INGEST_LEDGER_LEASE_SECONDS', '60')
+        ledger = create_ingest_ledger()
+        assert isinstance(ledger.store, FileKVStore)
+        assert ledger.lease_seconds == 60
+
+
+class TestIdempotentPostCall:
+    """Test that post_call ingests each webhook once"""
+
+    @pytest.fixture
+    def post_call(self, monkeypatch):
+        ledger = IngestLedger(InMemoryKVStore())
+        fake_client = mock.Mock()
+        fake_client.get_all.return_value = {'results': []}
+        fake_s3 = FakeS3()
+        monkeypatch.setattr(handler, '_ingest_ledger', ledger)
+        monkeypatch.setattr(handler, '_ingest_ledger_loaded', True)
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 's3_client', fake_s3)
+        monkeypatch.setattr(handler, 'SEMANTIC_WINDOW_SIZE', 0)
+        return ledger, fake_client, fake_s3
+
+    def test_retry_is_skipped(self, post_call, capsys):
+        ledger, fake_client, _ = post_call
+        first = handler.process_webhook_body(transcription_body())
+        assert first['factual_memory']['ok'] and first['semantic_memory']['ok']
+        assert fake_client.add.call_count == 2
+
+        assert handler.process_webhook_body(transcription_body()) == {}
+        assert fake_client.add.call_count == 2
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+        assert records[-1]['DuplicateWebhooks'] == 1
+
+    def test_partial_failure_resumes_missing_stage(self, post_call):
+        ledger, fake_client, _ = post_call
+        calls = []
+
+        def add(messages, user_id, metadata, version):
+            calls.append(metadata['type'])
+            if metadata['type'] == 'semantic' and calls.count('semantic') == 1:
+                raise RuntimeError('mem0 timeout')
+
+        fake_client.add.side_effect = add
+        first = handler.process_webhook_body(transcription_body())
+        assert not first['semantic_memory']['ok']
+        assert not ledger.get('conv_retry', 'post_call_transcription')['complete']
+
+        second = handler.process_webhook_body(transcription_body())
+        assert set(second) == {'semantic_memory', 'caller_profile', 'caller_version'}
+        assert sorted(calls) == ['factual', 'semantic', 'semantic']
+        assert ledger.get('conv_retry', 'post_call_transcription')['complete']
+
+    def test_resume_only_re_adds_failed_windows(self, post_call, monkeypatch):
+        ledger, fake_client, _ = post_call
+        monkeypatch.setattr(handler, 'SEMANTIC_WINDOW_SIZE', 2)
+        monkeypatch.setattr(handler, 'SEMANTIC_WINDOW_OVERLAP', 0)
+        body = json.loads(transcription_body())
+        body['data']['transcript'] = [
+            {'role': 'agent', 'message': 'Where are you flying to?'},
+            {'role': 'user', 'message': 'Lisbon next Friday'},
+            {'role': 'agent', 'message': 'Window or aisle?'},
+            {'role': 'user', 'message': 'Aisle please, I have long legs'},
+            {'role': 'agent', 'message': 'Any meal preference?'},
+            {'role': 'user', 'message': 'Vegetarian'}
+        ]
+        added = []
+
+        def add(messages, user_id, metadata, version):
+            if metadata['type'] == 'semantic':
+                if metadata['chunk_index'] == 1 and not added.count(1):
+                    added.append(1)
+                    raise RuntimeError('mem0 timeout')
+                added.append(metadata['chunk_index'])
+
+        fake_client.add.side_effect = add
+        first = handler.process_webhook_body(json.dumps(body))
+        assert not first['semantic_memory']['ok']
+        assert sorted(added) == [0, 1, 2]
+
+        second = handler.process_webhook_body(json.dumps(body))
+        assert second['semantic_memory']['ok']
+        # Windows 0 and 2 were stored by the first delivery; only window 1 is added again
+        assert sorted(added) == [0, 1, 1, 2]
+        assert ledger.get('conv_retry', 'post_call_transcription')['complete']
+
+    def test_failed_archive_is_retried(self, post_call, monkeypatch):
+        ledger, fake_client, fake_s3 = post_call
+        put_object = fake_s3.put_object
+        failures = []
+
+        def flaky_put(Bucket, Key, Body, **kwargs):
+            if Key == 'post-call/+15555550100/conv_retry.json' and not failures:
+                failures.append(Key)
+                raise RuntimeError('s3 down')
+            put_object(Bucket, Key, Body, **kwargs)
+
+        monkeypatch.setattr(fake_s3, 'put_object', flaky_put)
+        first = handler.process_webhook_body(transcription_body())
+        assert not first['s3_archive']['ok']
+        record = ledger.get('conv_retry', 'post_call_transcription')
+        assert 's3_archive' not in record['stages'] and not record['complete']
+
+        second = handler.process_webhook_body(transcription_body())
+        assert set(second) == {'s3_archive'} and second['s3_archive']['ok']
+        assert 'post-call/+15555550100/conv_retry.json' in fake_s3.objects
+        assert ledger.get('conv_retry', 'post_call_transcription')['complete']
+        assert fake_client.add.call_count == 2
+
+    def test_failed_archive_fails_the_queued_job(self, post_call, monkeypatch):
+        ledger, _, fake_s3 = post_call
+        monkeypatch.setattr(handler, '_ingest_ledger', None)
+        fake_s3.objects['post-call/raw/job.json'] = transcription_body().encode('utf-8')
+        monkeypatch.setattr(handler, 'put_json_archive', mock.Mock(side_effect=RuntimeError('s3 down')))
+        assert not handler.process_ingest_job({'raw_key': 'post-call/raw/job.json'})
+
+    def test_in_flight_delivery_is_deferred(self, post_call):
+        ledger, fake_client, _ = post_call
+        ledger.acquire('conv_retry', 'post_call_transcription')
+        results = handler.process_webhook_body(transcription_body())
+        assert set(results) == {'ingest_lease'} and not results['ingest_lease']['ok']
+        assert not fake_client.add.called
+
+    def test_queued_job_is_retried_while_another_delivery_holds_the_claim(self, post_call):
+        ledger, fake_client, fake_s3 = post_call
+        fake_s3.objects['post-call/raw/job.json'] = transcription_body().encode('utf-8')
+        lease = ledger.acquire('conv_retry', 'post_call_transcription')
+        assert not handler.process_ingest_job({'raw_key': 'post-call/raw/job.json'})
+
+        # The holder finishes without completing every stage; the retried job resumes it
+        ledger.release('conv_retry', 'post_call_transcription', lease)
+        assert handler.process_ingest_job({'raw_key': 'post-call/raw/job.json'})
+        assert fake_client.add.call_count == 2
+
+    def test_unavailable_ledger_still_ingests(self, post_call):
+        ledger, fake_client, _ = post_call
+        ledger.store.put_if_absent = mock.Mock(side_effect=RuntimeError('throttled'))
+        results = handler.process_webhook_body(transcription_body())
+        assert results['factual_memory']['ok']
+        assert fake_client.add.call_count == 2
+
+    def test_queued_retry_is_acknowledged_without_work(self, post_call):
+        _, fake_client, fake_s3 = post_call
+        fake_s3.objects['post-call/raw/job.json'] = transcription_body().encode('utf-8')
+        assert handler.process_ingest_job({'raw_key': 'post-call/raw/job.json'})
+        assert handler.process_ingest_job({'raw_key': 'post-call/raw/job.json'})
+        assert fake_client.add.call_count == 2
+
+    def test_audio_retry_is_skipped(self, post_call, monkeypatch):
+        upload = mock.Mock(return_value=3)
+        monkeypatch.setattr(handler, 'stream_base64_to_s3', upload)
+        body = json.dumps({'type': 'post_call_audio', 'data': {'conversation_id': 'conv_retry', 'agent_id': 'a', 'full_audio': 'AAAA'}})
+        handler.process_webhook_body(body)
+        handler.process_webhook_body(body)
+        assert upload.call_count == 1
+
+    def test_failed_audio_upload_is_retried(self, post_call, monkeypatch):
+        upload = mock.Mock(side_effect=[RuntimeError('s3 down'), 3])
+        monkeypatch.setattr(handler, 'stream_base64_to_s3', upload)
+        body = json.dumps({'type': 'post_call_audio', 'data': {'conversation_id': 'conv_retry', 'agent_id': 'a', 'full_audio': 'AAAA'}})
+        handler.process_webhook_body(body)
+        handler.process_webhook_body(body)
+        handler.process_webhook_body(body)
+        assert upload.call_count == 2
+
+    def test_failed_audio_upload_fails_the_queued_job(self, post_call, monkeypatch):
+        _, _, fake_s3 = post_call
+        upload = mock.Mock(side_effect=[RuntimeError('s3 down'), 3])
+        monkeypatch.setattr(handler, 'stream_base64_to_s3', upload)
+        body = {'type': 'post_call_audio', 'data': {'conversation_id': 'conv_retry', 'agent_id': 'a', 'full_audio': 'AAAA'}}
+        fake_s3.objects['post-call/raw/audio.json'] = json.dumps(body).encode('utf-8')
+        assert not handler.process_ingest_job({'raw_key': 'post-call/raw/audio.json'})
+        assert handler.process_ingest_job({'raw_key': 'post-call/raw/audio.json'})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
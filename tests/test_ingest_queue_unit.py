@@ -0,0 +1,122 @@
+"""
+Unit tests for the post_call ingestion queue backends
+
+Tests enqueue/receive/ack/retry/dead-letter semantics of the local stand-ins.
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+# Add src and the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.clients import LazyClient
+from ingest_queue import IngestQueue, InMemoryIngestQueue, SQLiteIngestQueue, SQSIngestQueue, create_ingest_queue
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def queue(request, tmp_path):
+    """Each test runs against both local queue backends"""
+    if request.param == 'memory':
+        return InMemoryIngestQueue()
+    return SQLiteIngestQueue(str(tmp_path / 'ingest.db'))
+
+
+class TestIngestQueue:
+    """Test cases shared by the local queue backends"""
+
+    def test_fifo_batches(self, queue):
+        for i in range(5):
+            queue.enqueue({'n': i})
+        first = queue.receive(3)
+        second = queue.receive(3)
+        assert [m['body']['n'] for m in first] == [0, 1, 2]
+        assert [m['body']['n'] for m in second] == [3, 4]
+        assert queue.receive(3) == []
+
+    def test_ack_removes_job(self, queue):
+        queue.enqueue({'n': 1})
+        message = queue.receive(1)[0]
+        queue.ack(message)
+        assert len(queue) == 0
+
+    def test_retry_increments_attempts(self, queue):
+        queue.enqueue({'n': 1})
+        message = queue.receive(1)[0]
+        assert message['attempts'] == 1
+        queue.retry(message, 0)
+        again = queue.receive(1)[0]
+        assert again['id'] == message['id']
+        assert again['attempts'] == 2
+
+    def test_retry_delay_hides_job(self, queue):
+        queue.enqueue({'n': 1})
+        queue.retry(queue.receive(1)[0], 60)
+        assert queue.receive(1) == []
+
+    def test_dead_letter(self, queue):
+        queue.enqueue({'n': 1})
+        message = queue.receive(1)[0]
+        queue.dead_letter(message, 'boom')
+        assert queue.receive(1) == []
+        dead = queue.dead_letters()
+        assert dead[0]['body'] == {'n': 1}
+        assert dead[0]['error'] == 'boom'
+
+
+class TestSQLiteIngestQueue:
+    """SQLite-specific behavior"""
+
+    def test_visibility_timeout_redelivers(self, tmp_path):
+        queue = SQLiteIngestQueue(str(tmp_path / 'ingest.db'), visibility_timeout=0.05)
+        queue.enqueue({'n': 1})
+        assert len(queue.receive(1)) == 1
+        assert queue.receive(1) == []
+        time.sleep(0.06)
+        assert queue.receive(1)[0]['attempts'] == 2
+
+    def test_jobs_survive_reopen(self, tmp_path):
+        path = str(tmp_path / 'ingest.db')
+        SQLiteIngestQueue(path).enqueue({'n': 1})
+        assert SQLiteIngestQueue(path).receive(1)[0]['body'] == {'n': 1}
+
+
+class TestCreateIngestQueue:
+    """Test cases for create_ingest_queue factory"""
+
+    def test_memory_backend(self):
+        assert isinstance(create_ingest_queue('memory'), InMemoryIngestQueue)
+
+    def test_sqs_requires_url(self, monkeypatch):
+        monkeypatch.delenv('INGEST_QUEUE_URL', raising=False)
+        with pytest.raises(ValueError):
+            create_ingest_queue('sqs')
+
+    def test_sqs_uses_the_shared_lazy_client(self, monkeypatch):
+        monkeypatch.setenv('INGEST_QUEUE_URL', 'https://sqs.us-east-1.amazonaws.com/123456789012/ingest')
+        queue = create_ingest_queue('sqs')
+        assert isinstance(queue, SQSIngestQueue)
+        assert isinstance(queue._sqs, LazyClient) and not queue._sqs.built
+
+    def test_no_queue_configured(self, monkeypatch):
+        monkeypatch.delenv('INGEST_QUEUE_URL', raising=False)
+        monkeypatch.delenv('INGEST_QUEUE_BACKEND', raising=False)
+        with pytest.raises(ValueError):
+            create_ingest_queue()
+
+    def test_interface_is_abstract(self):
+        with pytest.raises(TypeError):
+            IngestQueue()
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            create_ingest_queue('kafka')
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,134 @@
+"""
+Unit tests for bounded memory fetch
+
+Tests that paged/typed fetches stop early, report the full memory count and
+give client_data the same context as an unbounded get_all.
+"""
+
+import json
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+# Set dummy environment variables before importing handler
+os.environ['MEM0_API_KEY'] = 'test-key'
+os.environ['MEM0_ORG_ID'] = 'test-org'
+os.environ['MEM0_PROJECT_ID'] = 'test-project'
+
+# Add src and the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'client_data'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.memory_fetch import fetch_memories_by_type, fetch_memories_paged
+from agentic_memory_runtime.ttl_cache import TTLCache
+
+
+def history(n):
+    """n memories, every third one semantic, the first one carrying the name"""
+    memories = [{'memory': 'User name is Dana Reyes', 'metadata': {'type': 'factual'}}]
+    for i in range(1, n):
+        memory_type = 'semantic' if i % 3 == 0 else 'factual'
+        memories.append({'memory': f'{memory_type} memory {i} about the previous request', 'metadata': {'type': memory_type}})
+    return memories
+
+
+class FakeMem0:
+    """Serves get_all v2 pages (and the unpaginated v1 form) over a fixed history"""
+
+    def __init__(self, memories):
+        self.memories = memories
+        self.calls = []
+
+    def get_all(self, version='v1', filters=None, page=None, page_size=None, **kwargs):
+        self.calls.append({'version': version, 'filters': filters, 'page': page, 'page_size': page_size, **kwargs})
+        memories = self.memories
+        if filters and 'AND' in filters:
+            memory_type = filters['AND'][1]['metadata']['type']
+            memories = [m for m in memories if m['metadata']['type'] == memory_type]
+        if page is None:
+            return {'results': memories}
+        start = (page - 1) * page_size
+        return {
+            'count': len(memories),
+            'next': 'more' if start + page_size < len(memories) else None,
+            'results': memories[start:start + page_size]
+        }
+
+
+class TestFetchMemoriesPaged:
+    """Test cases for fetch_memories_paged"""
+
+    @pytest.mark.parametrize('size', [10, 1000, 10000])
+    def test_requests_stay_flat_as_history_grows(self, size):
+        client = FakeMem0(history(size))
+        memories, total = fetch_memories_paged(client, '+16125550100', 5, 3, page_size=10)
+
+        assert total == size
+        assert len(client.calls) == 1
+        assert len(memories) == min(size, 10)
+
+    def test_keeps_paging_until_enough_semantic(self):
+        memories = [{'memory': f'fact {i}', 'metadata': {'type': 'factual'}} for i in range(25)]
+        memories.append({'memory': 'semantic', 'metadata': {'type': 'semantic'}})
+        client = FakeMem0(memories)
+
+        fetched, total = fetch_memories_paged(client, '+16125550100', 5, 1, page_size=10)
+
+        assert [c['page'] for c in client.calls] == [1, 2, 3]
+        assert fetched[-1]['memory'] == 'semantic' and total == 26
+
+    def test_max_pages_caps_requests(self):
+        client = FakeMem0([{'memory': f'fact {i}', 'metadata': {'type': 'factual'}} for i in range(100)])
+        fetch_memories_paged(client, '+16125550100', 5, 3, page_size=10, max_pages=2)
+        assert len(client.calls) == 2
+
+    def test_unpaginated_response(self):
+        client = mock.Mock()
+        client.get_all.return_value = history(4)
+        memories, total = fetch_memories_paged(client, '+16125550100', 5, 3)
+        assert total == 4 and len(memories) == 4
+
+
+class TestFetchMemoriesByType:
+    """Test cases for fetch_memories_by_type"""
+
+    def test_filters_and_sizes(self):
+        client = FakeMem0(history(1000))
+        memories, total = fetch_memories_by_type(client, '+16125550100', 5, 3)
+
+        assert total == 1000
+        assert [m['metadata']['type'] for m in memories] == ['factual'] * 5 + ['semantic'] * 3
+        assert sorted(c['page_size'] for c in client.calls) == [3, 5]
+        assert all(c['filters']['AND'][0] == {'user_id': '+16125550100'} for c in client.calls)
+
+
+class TestClientDataBoundedFetch:
+    """Test that client_data's bounded modes match the unbounded context"""
+
+    @pytest.fixture
+    def client_data(self, monkeypatch):
+        with mock.patch('mem0.MemoryClient'):
+            import handler
+        monkeypatch.setattr(handler, 'CALLER_PROFILE_ENABLED', False)
+        monkeypatch.setattr(handler, 'context_cache', TTLCache(max_entries=0))
+        monkeypatch.setattr(handler, 'save_client_data_to_s3', lambda **kwargs: None)
+        monkeypatch.setattr(handler, 'ARCHIVE_MODE', 'sync')
+        return handler
+
+    def invoke(self, handler, monkeypatch, mode, memories):
+        monkeypatch.setattr(handler, 'MEMORY_FETCH_MODE', mode)
+        monkeypatch.setattr(handler, 'client', FakeMem0(memories))
+        response = handler.lambda_handler({'body': json.dumps({'caller_id': '+16125550100'})}, None)
+        return json.loads(response['body'])
+
+    @pytest.mark.parametrize('mode', ['bounded', 'typed'])
+    def test_same_context_as_get_all(self, client_data, monkeypatch, mode):
+        memories = history(500)
+        assert self.invoke(client_data, monkeypatch, mode, memories) == self.invoke(client_data, monkeypatch, 'all', memories)
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
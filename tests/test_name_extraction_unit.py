@@ -0,0 +1,79 @@
+"""
+Unit tests for the compiled caller name extractor
+
+Checks that extract_caller_name returns exactly what the original per-call
+regex loop returned, including pattern priority and rejected candidates.
+"""
+
+import os
+import random
+import re
+import sys
+
+import pytest
+
+# Add the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.caller_profile import NAME_KEYWORDS, _NAME_PREFILTER, extract_caller_name
+
+WORDS = [
+    'user', 'User', "user's", 'customer', 'Customer', 'caller', 'called', 'name', 'is', 'Name:', 'goes', 'by',
+    'I', 'am', "I'm", 'my', 'the', 'Emily', 'Stefan', 'Anderson', 'wants', 'help', 'account', 'email',
+    'premium', 'billing', 'issue', 'previous', 'O\'Brien', 'Zoë', 'mary-jane', '42', 'USER', 'NAME', 'IS'
+]
+
+
+def reference_extract_caller_name(all_memories):
+    """The original implementation"""
+    name_patterns = [
+        r"(?:name is|called|goes by)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"(?:user(?:'s)?\s+name:?\s*)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"(?:customer name:?\s*)([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"(?:my name is|i am|i'm)\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"user\s+name\s+is\s+([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)",
+        r"([A-Z][a-z]+(?:\s+[A-Z][a-z]+)?)\s+is\s+(?:the\s+)?(?:user|customer|caller)",
+        r"user\s+([A-Z][a-z]+)",
+        r"customer\s+([A-Z][a-z]+)",
+    ]
+    for memory in all_memories:
+        for pattern in name_patterns:
+            match = re.search(pattern, memory, re.IGNORECASE)
+            if match:
+                name = match.group(1).strip()
+                if re.match(r"^[A-Za-z\s]{2,30}$", name) and len(name.split()) <= 3:
+                    excluded_words = {'wants', 'needs', 'help', 'account', 'update', 'email', 'phone', 'address', 'user', 'customer'}
+                    if name.lower() not in excluded_words:
+                        return name.title()
+    return None
+
+
+class TestCompiledNameExtraction:
+    """Equivalence of the compiled extractor with the original loop"""
+
+    @pytest.mark.parametrize('keyword', NAME_KEYWORDS)
+    def test_prefilter_accepts_every_keyword(self, keyword):
+        assert _NAME_PREFILTER.search(f"x {keyword.upper()} y")
+        assert _NAME_PREFILTER.search(f"x {keyword} y")
+
+    @pytest.mark.parametrize('memories', [
+        ["User Emily called about billing issue", "Previous conversation about account update"],
+        ["Customer wants help", "My name is Stefan Anderson"],
+        ["Stefan is the caller", "user name is Emily"],
+        ["No names here", "Prefers email"],
+        ["The user's name: Dana"],
+        []
+    ])
+    def test_known_cases(self, memories):
+        assert extract_caller_name(memories) == reference_extract_caller_name(memories)
+
+    def test_randomized_memories(self):
+        rng = random.Random(1234)
+        for _ in range(2000):
+            memories = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 8))) for _ in range(rng.randint(1, 4))]
+            assert extract_caller_name(memories) == reference_extract_caller_name(memories), memories
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,167 @@
+"""
+Unit tests for the streaming webhook body scanner
+
+Tests that scan_webhook extracts the same fields json.loads would for every
+webhook layout, keeps full_audio as a span of the body, archives the raw
+data object, rejects what it does not understand, and that post_call
+ingests a scanned body exactly like a fully parsed one.
+"""
+
+import base64
+import importlib.util
+import json
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+# Set dummy environment variables before importing handler
+os.environ['MEM0_API_KEY'] = 'test-key'
+os.environ['MEM0_ORG_ID'] = 'test-org'
+os.environ['MEM0_PROJECT_ID'] = 'test-project'
+os.environ['ELEVENLABS_HMAC_KEY'] = 'test-hmac-key'
+os.environ['S3_BUCKET_NAME'] = 'test-bucket'
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+# Add src and the shared runtime layer to path for imports
+HANDLER_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call')
+sys.path.insert(0, HANDLER_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.archive_codec import read_json_archive
+from agentic_memory_runtime.local_s3 import LocalS3Client
+from audio_upload import iter_base64_decoded
+from payload_stream import TextSpan, scan_webhook
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'test_data')
+TEST_FILES = sorted(name for name in os.listdir(TEST_DATA_DIR) if name.endswith('.json'))
+
+
+def load_handler():
+    """Load post_call handler under a unique module name with Mem0 mocked out"""
+    spec = importlib.util.spec_from_file_location('post_call_stream_handler', os.path.join(HANDLER_DIR, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch('mem0.MemoryClient'):
+        spec.loader.exec_module(module)
+    return module
+
+
+handler = load_handler()
+
+
+def webhook_data(payload):
+    """The data object process_webhook_body extracts from a parsed body"""
+    if isinstance(payload, list):
+        return payload[0].get('data', {})
+    return payload.get('data', {}) if 'type' in payload else payload
+
+
+def kept_turn(turn):
+    return {key: turn[key] for key in ('role', 'message', 'content') if key in turn}
+
+
+class TestScanWebhook:
+    """Test scan_webhook against json.loads"""
+
+    @pytest.mark.parametrize('name', TEST_FILES)
+    def test_matches_json_loads(self, name):
+        with open(os.path.join(TEST_DATA_DIR, name), 'rb') as f:
+            raw = f.read()
+        data = webhook_data(json.loads(raw))
+        scan = scan_webhook(raw)
+
+        for key in ('conversation_id', 'agent_id', 'metadata', 'analysis', 'conversation_initiation_client_data'):
+            assert scan.data.get(key) == data.get(key)
+        assert scan.data.get('transcript') == [kept_turn(turn) for turn in data.get('transcript', [])]
+        assert json.loads(scan.data_bytes()) == data
+
+    @pytest.mark.parametrize('layout', ['array', 'object', 'legacy'])
+    def test_layouts(self, layout):
+        data = {'conversation_id': 'conv_1', 'status': 'done', 'transcript': [{'role': 'user', 'message': 'Hi', 'llm_usage': {}}]}
+        body = {'array': [{'type': 'post_call_transcription', 'data': data}],
+                'object': {'type': 'post_call_transcription', 'event_timestamp': 1, 'data': data},
+                'legacy': data}[layout]
+        scan = scan_webhook(json.dumps(body).encode('utf-8'))
+        assert scan.webhook_type == (None if layout == 'legacy' else 'post_call_transcription')
+        assert scan.data == {'conversation_id': 'conv_1', 'transcript': [{'role': 'user', 'message': 'Hi'}]}
+        assert json.loads(scan.data_bytes()) == data
+
+    def test_audio_is_a_span_of_the_body(self):
+        audio = os.urandom(3000)
+        encoded = base64.b64encode(audio).decode('ascii')
+        body = json.dumps({'type': 'post_call_audio', 'data': {'conversation_id': 'c', 'full_audio': encoded}})
+        span = scan_webhook(body.encode('utf-8')).data['full_audio']
+        assert isinstance(span, TextSpan)
+        assert len(span) == len(encoded) and str(span) == encoded
+        assert b''.join(iter_base64_decoded(span, 100)) == audio
+
+    def test_escaped_audio_is_decoded(self):
+        body = '{"type":"post_call_audio","data":{"full_audio":"YWJj\\/ZA=="}}'
+        assert scan_webhook(body).data['full_audio'] == 'YWJj/ZA=='
+
+    def test_replaced_fields_in_archive(self):
+        body = '{"type":"t","data":{"a":1,"full_audio":"QUJD","z":"\\u00e9"}}'
+        archived = scan_webhook(body).data_bytes({'full_audio': {'archived_as': 's3://b/k.mp3'}})
+        assert json.loads(archived) == {'a': 1, 'full_audio': {'archived_as': 's3://b/k.mp3'}, 'z': 'é'}
+
+    @pytest.mark.parametrize('body', ['', '"text"', '[]', '[1]', '{"type":"t","data":[]}', '{"a":1} x',
+                                      '{"a":', '{"a":"unterminated}', '{"a" 1}', b'\xff{}'])
+    def test_rejects(self, body):
+        with pytest.raises(ValueError):
+            scan_webhook(body)
+
+
+class TestPostCallParseModes:
+    """Test that post_call ingests a scanned body like a fully parsed one"""
+
+    def ingest(self, monkeypatch, tmp_path, mode, raw):
+        s3 = LocalS3Client(str(tmp_path / mode))
+        fake_client = mock.Mock()
+        fake_client.get_all.return_value = {'results': []}
+        monkeypatch.setattr(handler, 's3_client', s3)
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 'PARSE_MODE', mode)
+        monkeypatch.setattr(handler, 'CALLER_PROFILE_ENABLED', False)
+        results = handler.process_webhook_body(raw)
+        adds = sorted(json.dumps(c.kwargs, sort_keys=True, default=str) for c in fake_client.add.call_args_list)
+        return s3, results, [json.loads(a) for a in adds]
+
+    def test_same_memories_and_archive(self, monkeypatch, tmp_path):
+        with open(os.path.join(TEST_DATA_DIR, 'conv_01jxd5y165f62a0v7gtr6bkg56.json'), 'rb') as f:
+            data = json.load(f)
+        data['metadata'].setdefault('phone_call', {})['external_number'] = '+15555550100'
+        raw = json.dumps({'type': 'post_call_transcription', 'data': data}).encode('utf-8')
+
+        full_s3, full_results, full_adds = self.ingest(monkeypatch, tmp_path, 'full', raw)
+        stream_s3, stream_results, stream_adds = self.ingest(monkeypatch, tmp_path, 'stream', raw)
+
+        assert sorted(stream_results) == sorted(full_results)
+        assert all(result['ok'] for result in stream_results.values())
+        for adds in (full_adds, stream_adds):
+            for add in adds:
+                add['metadata'].pop('timestamp')
+        assert stream_adds == full_adds
+
+        key = f"post-call/+15555550100/{data['conversation_id']}.json"
+        assert read_json_archive(stream_s3, 'test-bucket', key) == read_json_archive(full_s3, 'test-bucket', key) == data
+
+    def test_slim_archive_of_embedded_audio(self, monkeypatch, tmp_path):
+        audio = os.urandom(2000)
+        raw = json.dumps({'type': 'post_call_transcription', 'data': {
+            'conversation_id': 'conv_audio', 'external_number': '+15555550100',
+            'full_audio': base64.b64encode(audio).decode('ascii')
+        }})
+        s3, _, _ = self.ingest(monkeypatch, tmp_path, 'stream', raw)
+        archive = read_json_archive(s3, 'test-bucket', 'post-call/+15555550100/conv_audio.json')
+        assert archive['full_audio']['size_bytes'] == len(audio)
+        assert s3.get_object(Bucket='test-bucket', Key='post-call/+15555550100/conv_audio.mp3')['Body'].read() == audio
+
+    def test_falls_back_to_json_loads(self, monkeypatch):
+        monkeypatch.setattr(handler, 'PARSE_MODE', 'stream')
+        # Valid JSON the scanner does not accept: the first array element is not an object
+        assert handler.parse_webhook_body('[]') == ('post_call_transcription', [], None)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,442 @@
+"""
+Unit tests for post_call Lambda handler functions
+
+Tests payload transformation helpers and concurrent post-call task execution.
+"""
+
+import base64
+import hashlib
+import hmac
+import importlib.util
+import io
+import json
+import os
+import sys
+import threading
+import time
+from unittest import mock
+
+import pytest
+
+# Set dummy environment variables before importing handler
+os.environ['MEM0_API_KEY'] = 'test-key'
+os.environ['MEM0_ORG_ID'] = 'test-org'
+os.environ['MEM0_PROJECT_ID'] = 'test-project'
+os.environ['ELEVENLABS_HMAC_KEY'] = 'test-hmac-key'
+os.environ['S3_BUCKET_NAME'] = 'test-bucket'
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+# Add src and the shared runtime layer to path for imports
+HANDLER_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call')
+sys.path.insert(0, HANDLER_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.archive_codec import decode_archive
+from webhook_auth import ReplayCache
+
+
+def load_handler():
+    """Load post_call handler under a unique module name with Mem0 mocked out"""
+    spec = importlib.util.spec_from_file_location('post_call_handler', os.path.join(HANDLER_DIR, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch('mem0.MemoryClient'):
+        spec.loader.exec_module(module)
+    return module
+
+
+handler = load_handler()
+
+
+class NotFound(Exception):
+    response = {'Error': {'Code': '404'}}
+
+
+class FakeS3:
+    """Minimal dict-backed S3 client for handler tests"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body.encode('utf-8') if isinstance(Body, str) else Body
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NotFound(Key)
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NotFound(Key)
+        return {'ContentLength': len(self.objects[Key]), 'Metadata': {}}
+
+
+def transcription_body(conversation_id: str = 'conv_test') -> str:
+    """Build a minimal post_call_transcription webhook body"""
+    return json.dumps({
+        'type': 'post_call_transcription',
+        'data': {
+            'conversation_id': conversation_id,
+            'agent_id': 'agent_test',
+            'metadata': {'phone_call': {'external_number': '+15555550100'}},
+            'transcript': [{'role': 'agent', 'message': 'Hello'}, {'role': 'user', 'message': 'Hi'}],
+            'analysis': {'transcript_summary': 'Short call.'}
+        }
+    })
+
+
+def sign(body: str, key: str = 'test-hmac-key') -> str:
+    """Build an ElevenLabs-Signature header for body"""
+    timestamp = int(time.time())
+    mac = hmac.new(key.encode('utf-8'), f"{timestamp}.{body}".encode('utf-8'), hashlib.sha256)
+    return f"t={timestamp},v0={mac.hexdigest()}"
+
+
+class TestTransformTranscript:
+    """Test cases for transform_transcript function"""
+
+    def test_maps_agent_to_assistant(self):
+        result = handler.transform_transcript([
+            {'role': 'agent', 'message': 'Hello'},
+            {'role': 'user', 'message': 'Hi'}
+        ])
+        assert result == [
+            {'role': 'assistant', 'content': 'Hello'},
+            {'role': 'user', 'content': 'Hi'}
+        ]
+
+    def test_skips_empty_messages(self):
+        result = handler.transform_transcript([
+            {'role': 'agent', 'message': None},
+            {'role': 'user', 'content': 'Only content'},
+            'not-a-dict'
+        ])
+        assert result == [{'role': 'user', 'content': 'Only content'}]
+
+
+class TestBuildFactualContent:
+    """Test cases for build_factual_content function"""
+
+    def test_summary_with_criteria_results(self):
+        content = handler.build_factual_content({
+            'transcript_summary': 'Caller asked about billing.',
+            'evaluation_criteria_results': {
+                'resolved': {'result': 'success', 'rationale': 'Issue fixed'}
+            }
+        })
+        assert content.startswith('Caller asked about billing.')
+        assert 'resolved: success - Issue fixed' in content
+
+    def test_empty_analysis(self):
+        assert handler.build_factual_content({}) == ''
+
+
+class TestRunConcurrentTasks:
+    """Test cases for run_concurrent_tasks function"""
+
+    def test_wall_time_is_max_not_sum(self):
+        tasks = {name: (lambda: time.sleep(0.2)) for name in ('a', 'b', 'c')}
+        start = time.perf_counter()
+        results = handler.run_concurrent_tasks(tasks, max_workers=3)
+        elapsed = time.perf_counter() - start
+        assert all(r['ok'] for r in results.values())
+        assert elapsed < 0.5
+        assert all(r['duration_ms'] >= 190 for r in results.values())
+
+    def test_failure_is_isolated(self):
+        completed = []
+
+        def boom():
+            raise RuntimeError('mem0 down')
+
+        results = handler.run_concurrent_tasks({
+            'bad': boom,
+            'good': lambda: completed.append(True)
+        })
+        assert results['bad']['ok'] is False
+        assert results['bad']['error'] == 'mem0 down'
+        assert results['good']['ok'] is True
+        assert completed == [True]
+
+    def test_respects_worker_bound(self):
+        active = []
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+
+        handler.run_concurrent_tasks({str(i): work for i in range(6)}, max_workers=2)
+        assert max(peak) <= 2
+
+    def test_no_tasks(self):
+        assert handler.run_concurrent_tasks({}) == {}
+
+
+class TestLambdaHandlerConcurrency:
+    """Test that lambda_handler fans out archive and memory writes"""
+
+    def test_transcription_webhook_runs_all_tasks(self, monkeypatch):
+        fake_client = mock.Mock()
+        fake_s3 = mock.Mock()
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 's3_client', fake_s3)
+
+        body = transcription_body()
+        response = handler.lambda_handler(
+            {'body': body, 'headers': {'elevenlabs-signature': sign(body)}}, None
+        )
+
+        assert response['statusCode'] == 200
+        types = sorted(call.kwargs['metadata']['type'] for call in fake_client.add.call_args_list)
+        assert types == ['factual', 'semantic']
+        assert fake_s3.put_object.called
+
+    def test_transcription_tasks_run_together_at_default_pool_size(self, monkeypatch):
+        monkeypatch.setattr(handler, 'client', mock.Mock())
+        monkeypatch.setattr(handler, 's3_client', mock.Mock())
+        # Every task waits for the other three, so a pool smaller than four breaks the barrier
+        barrier = threading.Barrier(4, timeout=2)
+        started = []
+
+        def task(name):
+            def run(*args, **kwargs):
+                barrier.wait()
+                started.append(name)
+            return run
+
+        for name in ('save_to_s3', 'index_conversation', 'store_factual_memory', 'store_semantic_memory'):
+            monkeypatch.setattr(handler, name, task(name))
+
+        body = transcription_body('conv_pool')
+        handler.lambda_handler({'body': body, 'headers': {'elevenlabs-signature': sign(body)}}, None)
+
+        assert handler.MAX_WORKERS >= 4
+        assert len(started) == 4
+
+    def test_long_transcript_is_written_in_windows(self, monkeypatch):
+        fake_client = mock.Mock()
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 'SEMANTIC_WINDOW_SIZE', 4)
+        monkeypatch.setattr(handler, 'SEMANTIC_WINDOW_OVERLAP', 1)
+        messages = [{'role': 'user', 'content': f'fact number {i}'} for i in range(10)]
+        messages.insert(3, {'role': 'assistant', 'content': 'Mm-hmm.'})
+
+        handler.store_semantic_memory('+15555550100', messages, {'conversation_id': 'conv_test'})
+
+        calls = sorted(fake_client.add.call_args_list, key=lambda c: c.kwargs['metadata']['chunk_index'])
+        assert len(calls) == 3
+        assert all(c.kwargs['metadata']['chunk_count'] == 3 for c in calls)
+        assert all(c.kwargs['metadata']['type'] == 'semantic' for c in calls)
+        assert all('Mm-hmm.' not in [m['content'] for m in c.kwargs['messages']] for c in calls)
+
+    def test_failed_window_fails_semantic_task(self, monkeypatch):
+        fake_client = mock.Mock()
+        fake_client.add.side_effect = [None, RuntimeError('timeout'), None]
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 'SEMANTIC_WINDOW_SIZE', 4)
+        monkeypatch.setattr(handler, 'SEMANTIC_WINDOW_OVERLAP', 1)
+        monkeypatch.setattr(handler, 'SEMANTIC_MAX_CONCURRENCY', 1)
+        messages = [{'role': 'user', 'content': f'fact number {i}'} for i in range(10)]
+
+        with pytest.raises(RuntimeError):
+            handler.store_semantic_memory('+15555550100', messages, {})
+        assert fake_client.add.call_count == 3
+
+
+class TestSlimArchive:
+    """Test that base64 audio is archived once, as binary"""
+
+    @pytest.fixture
+    def fake_s3(self, monkeypatch):
+        fake_s3 = FakeS3()
+        monkeypatch.setattr(handler, 's3_client', fake_s3)
+        return fake_s3
+
+    def payload(self, audio: bytes):
+        return {'conversation_id': 'conv_audio', 'transcript': [], 'full_audio': base64.b64encode(audio).decode()}
+
+    def test_slim_mode_replaces_audio_with_pointer(self, fake_s3, monkeypatch):
+        monkeypatch.setattr(handler, 'ARCHIVE_MODE', 'slim')
+        audio = os.urandom(30000)
+        payload = self.payload(audio)
+
+        handler.save_to_s3('+15555550100', 'conv_audio', payload)
+
+        archived = decode_archive(fake_s3.objects['post-call/+15555550100/conv_audio.json'])
+        pointer = archived['full_audio']
+        assert pointer['key'] == 'post-call/+15555550100/conv_audio.mp3'
+        assert pointer['size_bytes'] == len(audio)
+        assert fake_s3.objects[pointer['key']] == audio
+        assert len(fake_s3.objects['post-call/+15555550100/conv_audio.json']) < 1000
+        # Caller's payload is not mutated
+        assert isinstance(payload['full_audio'], str)
+
+    def test_full_mode_keeps_base64(self, fake_s3, monkeypatch):
+        monkeypatch.setattr(handler, 'ARCHIVE_MODE', 'full')
+        payload = self.payload(os.urandom(300))
+
+        handler.save_to_s3('+15555550100', 'conv_audio', payload)
+
+        archived = decode_archive(fake_s3.objects['post-call/+15555550100/conv_audio.json'])
+        assert archived['full_audio'] == payload['full_audio']
+
+    def test_failed_audio_upload_keeps_base64(self, fake_s3, monkeypatch):
+        monkeypatch.setattr(handler, 'ARCHIVE_MODE', 'slim')
+        monkeypatch.setattr(handler, 'stream_base64_to_s3', mock.Mock(side_effect=RuntimeError('s3 down')))
+        payload = self.payload(os.urandom(300))
+
+        handler.save_to_s3('+15555550100', 'conv_audio', payload)
+
+        archived = decode_archive(fake_s3.objects['post-call/+15555550100/conv_audio.json'])
+        assert archived['full_audio'] == payload['full_audio']
+
+
+class TestCallerProfile:
+    """Test that post_call rebuilds the caller profile after storing memories"""
+
+    def test_profile_written_after_memories(self, monkeypatch):
+        fake_s3 = FakeS3()
+        fake_client = mock.Mock()
+        fake_client.get_all.return_value = {'results': [
+            {'memory': 'User name is Dana Reyes', 'metadata': {'type': 'factual', 'conversation_id': 'conv_profile'}},
+            {'memory': 'Has a premium account', 'metadata': {'type': 'factual', 'conversation_id': 'conv_older'}}
+        ]}
+        monkeypatch.setattr(handler, 's3_client', fake_s3)
+        monkeypatch.setattr(handler, 'client', fake_client)
+
+        results = handler.process_webhook_body(transcription_body('conv_profile'))
+
+        assert results['caller_profile']['ok']
+        profile = decode_archive(fake_s3.objects['profiles/15555550100.json'])
+        assert profile['caller_name'] == 'Dana Reyes'
+        assert profile['memory_count'] == 2
+        assert profile['last_conversation_id'] == 'conv_profile'
+        assert results['caller_version']['ok']
+        assert 'caller-versions/15555550100' in fake_s3.objects
+
+    def test_profile_without_this_call_predates_it(self, monkeypatch):
+        fake_s3 = FakeS3()
+        fake_client = mock.Mock()
+        # Mem0 is still extracting this call's memories
+        fake_client.get_all.return_value = {'results': [
+            {'memory': 'Has a premium account', 'metadata': {'type': 'factual', 'conversation_id': 'conv_older'}}
+        ]}
+        monkeypatch.setattr(handler, 's3_client', fake_s3)
+        monkeypatch.setattr(handler, 'client', fake_client)
+
+        handler.process_webhook_body(transcription_body('conv_profile'))
+
+        profile = decode_archive(fake_s3.objects['profiles/15555550100.json'])
+        assert profile['last_conversation_id'] is None
+
+    def test_profile_skipped_when_memory_writes_fail(self, monkeypatch):
+        fake_s3 = FakeS3()
+        fake_client = mock.Mock()
+        fake_client.add.side_effect = RuntimeError('mem0 down')
+        monkeypatch.setattr(handler, 's3_client', fake_s3)
+        monkeypatch.setattr(handler, 'client', fake_client)
+
+        results = handler.process_webhook_body(transcription_body())
+
+        assert 'caller_profile' not in results
+        assert not fake_client.get_all.called
+
+    def test_profile_failure_does_not_retry_job(self, monkeypatch):
+        fake_s3 = FakeS3()
+        fake_client = mock.Mock()
+        fake_client.get_all.side_effect = RuntimeError('mem0 down')
+        monkeypatch.setattr(handler, 's3_client', fake_s3)
+        monkeypatch.setattr(handler, 'client', fake_client)
+        fake_s3.objects['post-call/raw/job.json'] = transcription_body().encode('utf-8')
+
+        assert handler.process_ingest_job({'raw_key': 'post-call/raw/job.json'})
+
+
+class TestQueueMode:
+    """Test the two-stage webhook/worker ingestion pipeline"""
+
+    @pytest.fixture
+    def pipeline(self, monkeypatch):
+        from ingest_queue import InMemoryIngestQueue
+        queue = InMemoryIngestQueue()
+        fake_s3 = FakeS3()
+        fake_client = mock.Mock()
+        monkeypatch.setattr(handler, 'INGEST_MODE', 'queue')
+        monkeypatch.setattr(handler, '_ingest_queue', queue)
+        monkeypatch.setattr(handler, 's3_client', fake_s3)
+        monkeypatch.setattr(handler, 'client', fake_client)
+        # Tests re-send identical bodies within the same second; isolate their replay history
+        monkeypatch.setattr(handler.webhook_verifier, 'replay_cache', ReplayCache())
+        return queue, fake_s3, fake_client
+
+    def test_queue_mode_without_queue_fails_at_startup(self, monkeypatch):
+        monkeypatch.setenv('POST_CALL_MODE', 'queue')
+        monkeypatch.delenv('INGEST_QUEUE_URL', raising=False)
+        monkeypatch.delenv('INGEST_QUEUE_BACKEND', raising=False)
+        with pytest.raises(ValueError):
+            load_handler()
+
+    def test_webhook_stage_only_persists_and_enqueues(self, pipeline):
+        queue, fake_s3, fake_client = pipeline
+        body = transcription_body()
+        response = handler.lambda_handler({'body': body, 'headers': {'elevenlabs-signature': sign(body)}}, None)
+
+        assert response['statusCode'] == 200
+        assert len(queue) == 1
+        assert not fake_client.add.called
+        raw_keys = [k for k in fake_s3.objects if k.startswith('post-call/raw/')]
+        assert len(raw_keys) == 1
+        assert fake_s3.objects[raw_keys[0]] == body.encode('utf-8')
+
+    def test_invalid_signature_is_not_enqueued(self, pipeline):
+        queue, _, _ = pipeline
+        body = transcription_body()
+        handler.lambda_handler({'body': body, 'headers': {'elevenlabs-signature': sign(body, 'wrong')}}, None)
+        assert len(queue) == 0
+
+    def test_worker_drains_queue(self, pipeline):
+        queue, fake_s3, fake_client = pipeline
+        for i in range(3):
+            body = transcription_body(f'conv_{i}')
+            handler.lambda_handler({'body': body, 'headers': {'elevenlabs-signature': sign(body)}}, None)
+
+        stats = handler.worker_handler({}, None)
+
+        assert stats == {'processed': 3, 'succeeded': 3, 'retried': 0, 'dead_lettered': 0}
+        assert fake_client.add.call_count == 6
+        assert 'post-call/+15555550100/conv_2.json' in fake_s3.objects
+
+    def test_worker_retries_then_dead_letters(self, pipeline):
+        queue, _, fake_client = pipeline
+        fake_client.add.side_effect = RuntimeError('mem0 down')
+        body = transcription_body()
+        handler.lambda_handler({'body': body, 'headers': {'elevenlabs-signature': sign(body)}}, None)
+
+        stats = handler.drain_ingest_queue(queue, max_attempts=2, retry_delay=0)
+
+        assert stats['retried'] == 1
+        assert stats['dead_lettered'] == 1
+        assert queue.dead_letters()[0]['attempts'] == 2
+
+    def test_sqs_event_reports_partial_failures(self, pipeline):
+        _, fake_s3, fake_client = pipeline
+        fake_s3.objects['post-call/raw/ok.json'] = transcription_body().encode('utf-8')
+        event = {'Records': [
+            {'messageId': 'm1', 'body': json.dumps({'raw_key': 'post-call/raw/ok.json'})},
+            {'messageId': 'm2', 'body': json.dumps({'raw_key': 'post-call/raw/missing.json'})}
+        ]}
+
+        result = handler.worker_handler(event, None)
+
+        assert result == {'batchItemFailures': [{'itemIdentifier': 'm2'}]}
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
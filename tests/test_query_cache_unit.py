@@ -0,0 +1,266 @@
+"""
+Unit tests for the retrieve query-result cache
+
+Tests query normalization, the key-value store backends, the two-level
+QueryCache with version stamps, and that the retrieve handler serves repeated
+queries without calling Mem0 until post_call bumps the caller's version.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+# Add the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.caller_version import bump_caller_version
+from agentic_memory_runtime.kv_store import DynamoDBKVStore, FileKVStore, InMemoryKVStore, create_kv_store
+from agentic_memory_runtime.query_cache import QueryCache, normalize_query, query_cache_key
+from agentic_memory_runtime.ttl_cache import TTLCache
+
+RETRIEVE_HANDLER = os.path.join(os.path.dirname(__file__), '..', 'src', 'retrieve', 'handler.py')
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class NotFound(Exception):
+    response = {'Error': {'Code': '404'}}
+
+
+class FakeS3:
+    """Dict-backed S3 client returning a fresh ETag per put"""
+
+    def __init__(self):
+        self.objects = {}
+        self.puts = 0
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.puts += 1
+        self.objects[Key] = f'"etag-{self.puts}"'
+        return {'ETag': self.objects[Key]}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NotFound(Key)
+        return {'ETag': self.objects[Key]}
+
+
+class FakeDynamoDB:
+    """Dict-backed DynamoDB client (GetItem/PutItem/DeleteItem on a 'pk' table)"""
+
+    def __init__(self):
+        self.items = {}
+
+    def get_item(self, TableName, Key):
+        item = self.items.get(Key['pk']['S'])
+        return {'Item': item} if item else {}
+
+    def put_item(self, TableName, Item):
+        self.items[Item['pk']['S']] = Item
+
+    def delete_item(self, TableName, Key):
+        self.items.pop(Key['pk']['S'], None)
+
+
+class TestQueryKeys:
+    """Test cases for query normalization and cache keys"""
+
+    def test_normalize_query(self):
+        assert normalize_query('  What did they say about TRAVEL?? ') == 'what did they say about travel'
+        assert normalize_query("caller's  last\tissue") == "caller's last issue"
+
+    def test_key_ignores_formatting(self):
+        assert query_cache_key('+1 612-555-0100', 'Travel plans?', 3) == query_cache_key('16125550100', 'travel plans', 3)
+
+    def test_key_depends_on_limit_and_caller(self):
+        key = query_cache_key('+16125550100', 'travel', 3)
+        assert key != query_cache_key('+16125550100', 'travel', 5)
+        assert key != query_cache_key('+16125550199', 'travel', 3)
+
+
+class TestKVStores:
+    """Test cases for the key-value store backends"""
+
+    @pytest.fixture(params=['memory', 'file', 'dynamodb'])
+    def store_and_clock(self, request, tmp_path):
+        clock = FakeClock()
+        if request.param == 'memory':
+            return InMemoryKVStore(clock=clock), clock
+        if request.param == 'file':
+            return FileKVStore(str(tmp_path), clock=clock), clock
+        return DynamoDBKVStore('table', dynamodb_client=FakeDynamoDB(), clock=clock), clock
+
+    def test_put_get_delete(self, store_and_clock):
+        store, _ = store_and_clock
+        assert store.get('k') is None
+        store.put('k', {'memories': [1, 2]}, ttl_seconds=60)
+        assert store.get('k') == {'memories': [1, 2]}
+        store.delete('k')
+        assert store.get('k') is None
+        store.delete('k')
+
+    def test_expiry(self, store_and_clock):
+        store, clock = store_and_clock
+        store.put('k', 'v', ttl_seconds=60)
+        clock.now += 59
+        assert store.get('k') == 'v'
+        clock.now += 1
+        assert store.get('k') is None
+
+    def test_file_store_is_shared_between_instances(self, tmp_path):
+        FileKVStore(str(tmp_path)).put('k', [1], ttl_seconds=60)
+        assert FileKVStore(str(tmp_path)).get('k') == [1]
+
+    def test_create_kv_store(self, tmp_path):
+        assert isinstance(create_kv_store('memory'), InMemoryKVStore)
+        assert isinstance(create_kv_store('file', path=str(tmp_path)), FileKVStore)
+        with pytest.raises(ValueError):
+            create_kv_store('dynamodb')
+        with pytest.raises(ValueError):
+            create_kv_store('redis')
+
+
+class TestQueryCache:
+    """Test cases for the two-level QueryCache"""
+
+    def test_version_mismatch_is_a_miss(self):
+        cache = QueryCache(TTLCache(max_entries=8, ttl_seconds=60))
+        cache.put('k', ['m'], version='v1')
+        assert cache.get('k', 'v1') == ['m']
+        assert cache.get('k', 'v2') is None
+
+    def test_shared_level_fills_local(self):
+        shared = InMemoryKVStore()
+        QueryCache(TTLCache(max_entries=8, ttl_seconds=60), shared).put('k', ['m'], 'v1')
+
+        other_container = QueryCache(TTLCache(max_entries=8, ttl_seconds=60), shared)
+        assert other_container.get('k', 'v1') == ['m']
+        assert other_container.get('k', 'v2') is None
+        assert len(other_container.local) == 1
+        assert other_container.drain_counters()['shared_hits'] == 1
+
+    def test_shared_errors_are_not_raised(self):
+        shared = mock.Mock()
+        shared.get.side_effect = RuntimeError('down')
+        shared.put.side_effect = RuntimeError('down')
+        cache = QueryCache(TTLCache(max_entries=8, ttl_seconds=60), shared)
+        assert cache.get('k', None) is None
+        cache.put('k', ['m'], None)
+        assert cache.get('k', None) == ['m']
+        assert cache.drain_counters()['shared_errors'] == 2
+
+    def test_disabled_cache_stores_nothing(self):
+        shared = InMemoryKVStore()
+        cache = QueryCache(TTLCache(max_entries=0, ttl_seconds=60), shared)
+        cache.put('k', ['m'], None)
+        assert cache.get('k', None) is None
+        assert len(shared) == 0
+
+
+class TestRetrieveQueryCache:
+    """Test that retrieve serves repeated queries from the cache"""
+
+    @pytest.fixture
+    def retrieve(self, monkeypatch):
+        spec = importlib.util.spec_from_file_location('retrieve_handler', RETRIEVE_HANDLER)
+        handler = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(handler)
+
+        fake_client = mock.Mock()
+        fake_client.search.return_value = {'results': [{'id': 'm1', 'memory': 'Prefers window seats'}]}
+        s3 = FakeS3()
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 's3_client', s3)
+        monkeypatch.setattr(handler, 'S3_BUCKET_NAME', 'bucket')
+        monkeypatch.setattr(handler, 'query_cache', QueryCache(TTLCache(max_entries=8, ttl_seconds=300)))
+        return handler, fake_client, s3
+
+    def invoke(self, handler, query, user_id='+16125550100'):
+        response = handler.lambda_handler({'body': json.dumps({'query': query, 'user_id': user_id})}, None)
+        assert response['statusCode'] == 200
+        return json.loads(response['body'])['memories']
+
+    def test_repeat_query_is_cached(self, retrieve, capsys):
+        handler, fake_client, _ = retrieve
+        first = self.invoke(handler, 'What about travel?')
+        second = self.invoke(handler, 'what about travel')
+
+        assert second == first == [{'id': 'm1', 'memory': 'Prefers window seats'}]
+        assert fake_client.search.call_count == 1
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+        assert [r['QueryCacheHits'] for r in records] == [0, 1]
+
+    def test_post_call_write_invalidates(self, retrieve):
+        handler, fake_client, s3 = retrieve
+        self.invoke(handler, 'travel')
+        bump_caller_version(s3, 'bucket', '+16125550100')
+        self.invoke(handler, 'travel')
+        assert fake_client.search.call_count == 2
+
+    def test_version_read_failure_bypasses_cache(self, retrieve):
+        handler, fake_client, s3 = retrieve
+        s3.head_object = mock.Mock(side_effect=RuntimeError('throttled'))
+        self.invoke(handler, 'travel')
+        self.invoke(handler, 'travel')
+        assert fake_client.search.call_count == 2
+        assert len(handler.query_cache.local) == 0
+
+    def test_slow_version_read_is_a_cache_miss(self, retrieve, monkeypatch):
+        handler, fake_client, s3 = retrieve
+        monkeypatch.setattr(handler, 'VERSION_TIMEOUT_MS', 50)
+        s3.head_object = mock.Mock(side_effect=lambda **kwargs: time.sleep(0.5))
+
+        start = time.monotonic()
+        memories = self.invoke(handler, 'travel')
+        assert time.monotonic() - start < 0.4
+        assert memories == [{'id': 'm1', 'memory': 'Prefers window seats'}]
+        assert fake_client.search.call_count == 1
+        assert len(handler.query_cache.local) == 0
+
+
+    def test_cache_hit_while_search_workers_are_busy(self, retrieve, monkeypatch):
+        handler, fake_client, _ = retrieve
+        self.invoke(handler, 'travel')
+
+        # Searches left running past their deadline hold every search worker
+        release = threading.Event()
+        busy = ThreadPoolExecutor(max_workers=1)
+        busy.submit(release.wait)
+        monkeypatch.setattr(handler, 'search_executor', busy)
+        try:
+            start = time.monotonic()
+            assert self.invoke(handler, 'travel') == [{'id': 'm1', 'memory': 'Prefers window seats'}]
+            assert time.monotonic() - start < 0.2
+            assert fake_client.search.call_count == 1
+        finally:
+            release.set()
+            busy.shutdown(wait=False)
+
+    def test_busy_lookup_workers_bypass_cache(self, retrieve, monkeypatch, capsys):
+        handler, fake_client, s3 = retrieve
+        monkeypatch.setattr(handler, 'lookup_slots', threading.BoundedSemaphore(1))
+        handler.lookup_slots.acquire()
+        s3.head_object = mock.Mock()
+
+        assert self.invoke(handler, 'travel') == [{'id': 'm1', 'memory': 'Prefers window seats'}]
+        assert not s3.head_object.called
+        assert len(handler.query_cache.local) == 0
+        record = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert record['LookupsSkipped'] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,144 @@
+"""
+Unit tests for the lexical reranker
+
+Tests tokenization, timestamp parsing, BM25 against a direct per-document
+computation, and the combined lexical/recency/upstream ordering, plus
+retrieve's oversample-and-rerank mode.
+"""
+
+import importlib.util
+import json
+import math
+import os
+import sys
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+
+# Add the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.rerank import LexicalReranker, memory_timestamp, tokenize
+
+RETRIEVE_HANDLER = os.path.join(os.path.dirname(__file__), '..', 'src', 'retrieve', 'handler.py')
+
+NOW = datetime(2026, 6, 1).timestamp()
+
+
+def reference_bm25(query_terms, documents, k1=1.2, b=0.75):
+    n = len(documents)
+    avg_length = sum(len(d) for d in documents) / n
+    scores = []
+    for doc in documents:
+        counts = Counter(doc)
+        score = 0.0
+        for term in dict.fromkeys(query_terms):
+            df = sum(1 for d in documents if term in d)
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            tf = counts[term]
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(doc) / avg_length))
+        scores.append(score)
+    return scores
+
+
+class TestTokenize:
+    """Test cases for tokenize and memory_timestamp"""
+
+    def test_tokenize_drops_stopwords(self):
+        assert tokenize("What did the user say about Travel to Norway?") == ['say', 'travel', 'norway']
+
+    def test_memory_timestamp_sources(self):
+        utc_midnight = datetime(2026, 6, 1, tzinfo=timezone.utc).timestamp()
+        assert memory_timestamp({'metadata': {'timestamp': '2026-06-01T00:00:00'}}) == utc_midnight
+        assert memory_timestamp({'created_at': '2026-06-01T00:00:00Z'}) == utc_midnight
+        assert memory_timestamp({'metadata': {'timestamp': 'garbage'}, 'created_at': 1700000000}) == 1700000000.0
+        assert memory_timestamp({'memory': 'undated'}) is None
+        assert memory_timestamp('plain string') is None
+
+
+class TestLexicalReranker:
+    """Test cases for LexicalReranker"""
+
+    def test_bm25_matches_reference(self):
+        documents = [tokenize(t) for t in [
+            'Travelling to Norway in June for a fjord cruise',
+            'Prefers email over phone',
+            'Norway trip booked, Norway cruise paid',
+            'Billing issue with the June invoice',
+        ]]
+        query_terms = tokenize('norway cruise june')
+        scores = LexicalReranker().bm25(query_terms, documents)
+        assert scores.tolist() == pytest.approx(reference_bm25(query_terms, documents))
+
+    def test_empty_inputs(self):
+        reranker = LexicalReranker()
+        assert reranker.rerank('travel', [], 3) == []
+        assert reranker.bm25([], [['a']]).tolist() == [0.0]
+
+    def test_lexical_match_outranks_upstream_order(self):
+        candidates = [
+            {'id': 'm1', 'memory': 'Likes jazz music', 'score': 0.52},
+            {'id': 'm2', 'memory': 'Planning a trip to Norway in June', 'score': 0.50},
+            {'id': 'm3', 'memory': 'Has two dogs', 'score': 0.49},
+        ]
+        top = LexicalReranker(recency_weight=0).rerank('norway trip', candidates, 2, now=NOW)
+        assert [m['id'] for m in top] == ['m2', 'm1']
+
+    def test_recency_breaks_lexical_ties(self):
+        old = (datetime(2026, 6, 1) - timedelta(days=200)).isoformat()
+        recent = (datetime(2026, 6, 1) - timedelta(days=2)).isoformat()
+        candidates = [
+            {'id': 'old', 'memory': 'Billing issue with invoice', 'metadata': {'timestamp': old}},
+            {'id': 'new', 'memory': 'Billing issue with invoice', 'metadata': {'timestamp': recent}},
+        ]
+        top = LexicalReranker().rerank('billing issue', candidates, 1, now=NOW)
+        assert top[0]['id'] == 'new'
+
+    def test_ties_keep_upstream_order(self):
+        candidates = [{'id': str(i), 'memory': 'same text'} for i in range(5)]
+        top = LexicalReranker(upstream_weight=0).rerank('other', candidates, 5, now=NOW)
+        assert [m['id'] for m in top] == ['0', '1', '2', '3', '4']
+
+
+class TestRetrieveRerank:
+    """Test retrieve's oversample-and-rerank mode"""
+
+    @pytest.fixture
+    def retrieve(self, monkeypatch):
+        spec = importlib.util.spec_from_file_location('retrieve_handler', RETRIEVE_HANDLER)
+        handler = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(handler)
+        fake_client = mock.Mock()
+        fake_client.search.return_value = {'results': [
+            {'id': 'm1', 'memory': 'Likes jazz music', 'score': 0.52},
+            {'id': 'm2', 'memory': 'Has two dogs', 'score': 0.51},
+            {'id': 'm3', 'memory': 'Planning a trip to Norway in June', 'score': 0.50},
+        ]}
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 'S3_BUCKET_NAME', '')
+        monkeypatch.setattr(handler, 'HEDGE_PERCENTILE', 0)
+        monkeypatch.setattr(handler, 'SEARCH_LIMIT', 1)
+        return handler, fake_client
+
+    def invoke(self, handler):
+        response = handler.lambda_handler({'body': json.dumps({'query': 'norway trip', 'user_id': '+16125550100'})}, None)
+        return json.loads(response['body'])['memories']
+
+    def test_oversamples_and_reranks(self, retrieve, monkeypatch):
+        handler, fake_client = retrieve
+        monkeypatch.setattr(handler, 'RERANK_MODE', 'lexical')
+        monkeypatch.setattr(handler, 'RERANK_CANDIDATES', 10)
+        assert [m['id'] for m in self.invoke(handler)] == ['m3']
+        assert fake_client.search.call_args.kwargs['limit'] == 10
+
+    def test_off_uses_mem0_order(self, retrieve):
+        handler, fake_client = retrieve
+        assert handler.RERANK_MODE == 'off'
+        self.invoke(handler)
+        assert fake_client.search.call_args.kwargs['limit'] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
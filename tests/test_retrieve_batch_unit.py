@@ -0,0 +1,129 @@
+"""
+Unit tests for batch retrieve requests
+
+Tests that {"queries": [...]} fans out concurrently, returns per-query result
+sets plus a merged list de-duplicated by memory id, and validates its input.
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+
+# Add the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+RETRIEVE_HANDLER = os.path.join(os.path.dirname(__file__), '..', 'src', 'retrieve', 'handler.py')
+
+SEARCH_RESULTS = {
+    'name': [{'id': 'm1', 'memory': 'Name is Dana Reyes'}],
+    'preferences': [{'id': 'm2', 'memory': 'Prefers email'}, {'id': 'm1', 'memory': 'Name is Dana Reyes'}],
+    'last issue': [{'id': 'm3', 'memory': 'Billing issue in May'}],
+}
+
+
+@pytest.fixture
+def retrieve(monkeypatch):
+    spec = importlib.util.spec_from_file_location('retrieve_handler', RETRIEVE_HANDLER)
+    handler = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(handler)
+
+    search_executor = ThreadPoolExecutor(max_workers=8)
+    batch_executor = ThreadPoolExecutor(max_workers=2)
+    fake_client = mock.Mock()
+    fake_client.search.side_effect = lambda query, **kwargs: {'results': SEARCH_RESULTS.get(query, [])}
+    monkeypatch.setattr(handler, 'client', fake_client)
+    monkeypatch.setattr(handler, 'S3_BUCKET_NAME', '')
+    monkeypatch.setattr(handler, 'HEDGE_PERCENTILE', 0)
+    monkeypatch.setattr(handler, 'search_executor', search_executor)
+    monkeypatch.setattr(handler, 'batch_executor', batch_executor)
+    yield handler, fake_client
+    search_executor.shutdown(wait=False)
+    batch_executor.shutdown(wait=False)
+
+
+def invoke(handler, **body):
+    response = handler.lambda_handler({'body': json.dumps({'user_id': '+16125550100', **body})}, None)
+    return response['statusCode'], json.loads(response['body'])
+
+
+class TestBatchRetrieve:
+    """Test cases for multi-query retrieve"""
+
+    def test_per_query_results_and_merged_dedupe(self, retrieve):
+        handler, fake_client = retrieve
+        status, body = invoke(handler, queries=['name', 'preferences', 'last issue'])
+
+        assert status == 200
+        assert [r['query'] for r in body['results']] == ['name', 'preferences', 'last issue']
+        assert body['results'][1]['memories'] == SEARCH_RESULTS['preferences']
+        assert [m['id'] for m in body['memories']] == ['m1', 'm2', 'm3']
+        assert body['timed_out'] is False
+        assert fake_client.search.call_count == 3
+
+    def test_repeated_query_searched_once(self, retrieve):
+        handler, fake_client = retrieve
+        status, body = invoke(handler, queries=['name', 'name'])
+
+        assert status == 200
+        assert len(body['results']) == 2
+        assert fake_client.search.call_count == 1
+
+    def test_searches_run_concurrently(self, retrieve):
+        handler, fake_client = retrieve
+        barrier = threading.Barrier(2, timeout=2)
+
+        def search(query, **kwargs):
+            barrier.wait()
+            return {'results': SEARCH_RESULTS[query]}
+
+        fake_client.search.side_effect = search
+        status, body = invoke(handler, queries=['name', 'last issue'])
+        assert status == 200
+        assert [m['id'] for m in body['memories']] == ['m1', 'm3']
+
+    def test_timed_out_query_is_flagged(self, retrieve):
+        handler, fake_client = retrieve
+        release = threading.Event()
+        handler.SEARCH_TIMEOUT_SECONDS = 0.1
+
+        def search(query, **kwargs):
+            if query == 'last issue':
+                release.wait(2)
+            return {'results': SEARCH_RESULTS[query]}
+
+        fake_client.search.side_effect = search
+        status, body = invoke(handler, queries=['name', 'last issue'])
+        release.set()
+
+        assert status == 200
+        assert [r['timed_out'] for r in body['results']] == [False, True]
+        assert body['timed_out'] is True
+        assert [m['id'] for m in body['memories']] == ['m1']
+
+    @pytest.mark.parametrize('queries', [[], 'name', ['name', ''], ['name', 3]])
+    def test_invalid_queries(self, retrieve, queries):
+        handler, _ = retrieve
+        status, _ = invoke(handler, queries=queries)
+        assert status == 400
+
+    def test_too_many_queries(self, retrieve):
+        handler, fake_client = retrieve
+        status, body = invoke(handler, queries=[f'q{i}' for i in range(handler.MAX_QUERIES + 1)])
+        assert status == 400
+        fake_client.search.assert_not_called()
+
+    def test_single_query_unchanged(self, retrieve):
+        handler, _ = retrieve
+        status, body = invoke(handler, query='name')
+        assert status == 200
+        assert body == {'memories': SEARCH_RESULTS['name'], 'timed_out': False}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,295 @@
+"""
+Unit tests for the shared runtime: config, responses, metrics recorder and client pools
+
+Tests that the config is parsed with the expected defaults, that response
+helpers build API Gateway proxy responses, that MetricsRecorder emits one EMF
+record with per-metric units, and that the pooled clients are configured and
+count connection reuse.
+"""
+
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# Add the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime import transport
+from agentic_memory_runtime.clients import build_http_client, build_s3_config, build_sqs_config
+from agentic_memory_runtime.config import configure_logging, env_bool, env_int, load_config
+from agentic_memory_runtime.metrics import MetricsRecorder
+from agentic_memory_runtime.responses import CORS_HEADERS, error_response, json_response
+from agentic_memory_runtime.transport import ConnectionStats
+
+
+class TestConfig:
+    """Test cases for load_config and the env helpers"""
+
+    def test_defaults(self):
+        config = load_config({})
+        assert config.mem0_api_key is None
+        assert config.s3_bucket_name == ''
+        assert config.archive_codec == 'gzip'
+        assert config.caller_profile_enabled is True
+        assert config.log_level == 'INFO'
+        assert config.http_max_keepalive_connections == config.http_max_connections
+        assert config.http2_enabled is True
+
+    def test_parses_environment(self):
+        config = load_config({
+            'MEM0_API_KEY': 'key', 'S3_BUCKET_NAME': 'bucket', 'CALLER_PROFILE_ENABLED': 'false',
+            'MEM0_TIMEOUT': '5', 'S3_MAX_POOL_CONNECTIONS': '50', 'LOG_LEVEL': 'debug'
+        })
+        assert config.mem0_api_key == 'key'
+        assert config.s3_bucket_name == 'bucket'
+        assert config.caller_profile_enabled is False
+        assert config.mem0_timeout_seconds == 5.0
+        assert config.s3_max_pool_connections == 50
+        assert config.log_level == 'DEBUG'
+
+    def test_config_is_frozen(self):
+        config = load_config({})
+        with pytest.raises(Exception):
+            config.archive_codec = 'json'
+
+    def test_env_helpers(self):
+        assert env_int('N', 3, {}) == 3
+        assert env_int('N', 3, {'N': '7'}) == 7
+        assert env_bool('B', True, {}) is True
+        assert env_bool('B', True, {'B': 'False'}) is False
+        assert env_bool('B', False, {'B': 'TRUE'}) is True
+
+    def test_configure_logging(self):
+        assert configure_logging('WARNING').level == 30
+        assert configure_logging('INFO').level == 20
+
+
+class TestResponses:
+    """Test cases for response helpers"""
+
+    def test_json_response(self):
+        response = json_response(200, {'memories': []})
+        assert response == {
+            'statusCode': 200,
+            'headers': {'Content-Type': 'application/json'},
+            'body': '{"memories": []}'
+        }
+
+    def test_extra_headers(self):
+        response = json_response(200, {}, CORS_HEADERS)
+        assert response['headers']['Content-Type'] == 'application/json'
+        assert response['headers']['Access-Control-Allow-Origin'] == '*'
+
+    def test_error_response(self):
+        response = error_response(400, 'Missing query')
+        assert response['statusCode'] == 400
+        assert json.loads(response['body']) == {'error': 'Missing query'}
+
+
+class TestMetricsRecorder:
+    """Test cases for MetricsRecorder"""
+
+    def test_flush_emits_one_record_with_units(self, capsys):
+        metrics = MetricsRecorder({'Function': 'retrieve'}, namespace='Test')
+        with metrics.timer('SearchMs'):
+            pass
+        metrics.count('Failures')
+        metrics.count('Failures', 2)
+        record = metrics.flush()
+
+        assert json.loads(capsys.readouterr().out) == record
+        units = {m['Name']: m['Unit'] for m in record['_aws']['CloudWatchMetrics'][0]['Metrics']}
+        assert units == {'SearchMs': 'Milliseconds', 'Failures': 'Count'}
+        assert record['Failures'] == 3
+        assert record['Function'] == 'retrieve'
+
+    def test_flush_resets(self, capsys):
+        metrics = MetricsRecorder()
+        assert metrics.flush() is None
+        metrics.put('Hits', 1)
+        metrics.flush()
+        assert metrics.flush() is None
+        assert len(capsys.readouterr().out.splitlines()) == 1
+
+    def test_timer_records_on_error(self):
+        metrics = MetricsRecorder()
+        with pytest.raises(ValueError):
+            with metrics.timer('FailingMs'):
+                raise ValueError('boom')
+        assert 'FailingMs' in metrics._values
+
+
+class TestClientPools:
+    """Test cases for pooled client configuration"""
+
+    def test_http_client_limits(self):
+        config = load_config({'HTTP_MAX_CONNECTIONS': '8', 'HTTP_MAX_KEEPALIVE_CONNECTIONS': '4', 'MEM0_TIMEOUT': '5'})
+        http = build_http_client(config)
+        try:
+            pool = http._transport._pool
+            assert pool._max_connections == 8
+            assert pool._max_keepalive_connections == 4
+            assert http.timeout.read == 5.0
+            assert http.timeout.connect == config.http_connect_timeout_seconds
+            assert http.timeout.pool == config.http_pool_timeout_seconds
+        finally:
+            http.close()
+
+    @pytest.mark.parametrize('enabled,available', [('true', True), ('true', False), ('false', True)])
+    def test_http2_only_when_enabled_and_available(self, monkeypatch, enabled, available):
+        monkeypatch.setattr(transport, 'http2_available', lambda: available)
+        http = build_http_client(load_config({'HTTP2_ENABLED': enabled}))
+        try:
+            assert http._transport._pool._http2 is (enabled == 'true' and available)
+        finally:
+            http.close()
+
+    def test_s3_config(self):
+        s3_config = build_s3_config(load_config({'S3_MAX_POOL_CONNECTIONS': '32'}))
+        assert s3_config.max_pool_connections == 32
+        assert s3_config.tcp_keepalive is True
+        assert s3_config.retries == {'max_attempts': 3, 'mode': 'standard'}
+
+    def test_sqs_config(self):
+        sqs_config = build_sqs_config(load_config({'S3_READ_TIMEOUT_SECONDS': '4'}))
+        assert sqs_config.read_timeout == 4
+        assert sqs_config.tcp_keepalive is True
+        assert sqs_config.retries == {'max_attempts': 3, 'mode': 'standard'}
+
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), '..', 'template.yaml')
+
+
+def load_template():
+    """Parse template.yaml, reading CloudFormation tags (!Ref, !If, ...) as plain values"""
+    yaml = pytest.importorskip('yaml')
+
+    class TemplateLoader(yaml.SafeLoader):
+        pass
+
+    def construct_tag(loader, suffix, node):
+        if isinstance(node, yaml.ScalarNode):
+            return loader.construct_scalar(node)
+        if isinstance(node, yaml.SequenceNode):
+            return loader.construct_sequence(node)
+        return loader.construct_mapping(node)
+
+    TemplateLoader.add_multi_constructor('!', construct_tag)
+    with open(TEMPLATE_PATH) as f:
+        return yaml.load(f, Loader=TemplateLoader)
+
+
+class TestTemplateSettings:
+    """Test the runtime config each deployed function actually gets"""
+
+    @pytest.mark.parametrize('resource', ['AgenticMemoriesPostCall', 'AgenticMemoriesPostCallWorker'])
+    def test_post_call_mem0_timeout_covers_slow_adds(self, resource):
+        template = load_template()
+        function = template['Resources'][resource]['Properties']
+        env = {**template['Globals']['Function']['Environment']['Variables'], **function['Environment']['Variables']}
+        config = load_config({name: str(value) for name, value in env.items()})
+        # test_data/README: factual adds take ~52s and semantic adds ~68s
+        assert config.mem0_timeout_seconds >= 100
+        assert config.mem0_timeout_seconds < function['Timeout']
+
+    def test_client_data_mem0_timeout_frees_context_workers(self):
+        template = load_template()
+        function = template['Resources']['AgenticMemoriesClientData']['Properties']
+        env = {**template['Globals']['Function']['Environment']['Variables'], **function['Environment']['Variables']}
+        config = load_config({name: str(value) for name, value in env.items()})
+        # An abandoned paged fetch gives its worker back within one invocation timeout
+        pages = int(env['MEMORY_FETCH_MAX_PAGES'])
+        assert config.mem0_timeout_seconds * pages < template['Globals']['Function']['Timeout']
+
+    @pytest.mark.parametrize('resource', ['AgenticMemoriesPostCall', 'AgenticMemoriesPostCallWorker'])
+    def test_post_call_pool_fits_all_transcription_tasks(self, resource):
+        function = load_template()['Resources'][resource]['Properties']
+        # S3 archive, conversation index, factual and semantic writes run side by side
+        assert int(function['Environment']['Variables']['POST_CALL_MAX_WORKERS']) >= 4
+
+    def test_ingest_worker_batch_fits_in_timeout(self):
+        template = load_template()
+        worker = template['Resources']['AgenticMemoriesPostCallWorker']['Properties']
+        event = worker['Events']['IngestQueue']['Properties']
+        queue = template['Resources']['PostCallIngestQueue']['Properties']
+        # One wave of concurrent jobs per invocation, so each job gets the full Timeout
+        assert event['BatchSize'] <= int(worker['Environment']['Variables']['INGEST_WORKER_CONCURRENCY'])
+        assert 'ReportBatchItemFailures' in event['FunctionResponseTypes']
+        assert queue['VisibilityTimeout'] >= 6 * worker['Timeout']
+
+
+class OkHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+class TestConnectionStats:
+    """Test connection reuse counting against a local keep-alive server"""
+
+    @pytest.fixture
+    def server_url(self):
+        server = ThreadingHTTPServer(('127.0.0.1', 0), OkHandler)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+        server.shutdown()
+        server.server_close()
+
+    def test_counts_reuse(self, server_url):
+        stats = ConnectionStats()
+        http = build_http_client(load_config({'HTTP2_ENABLED': 'false'}), stats)
+        try:
+            for _ in range(3):
+                assert http.get(f"{server_url}/v1/memories/").status_code == 200
+        finally:
+            http.close()
+        counters = stats.drain_counters()
+        assert counters['requests'] == 3
+        assert counters['connections'] == 1
+        assert counters['reused_requests'] == 2
+        assert counters['tls_handshakes'] == 0
+        assert counters['connect_ms'] >= 0
+        assert stats.drain_counters()['requests'] == 0
+
+    def test_counts_failed_connects(self):
+        stats = ConnectionStats()
+        http = build_http_client(load_config({'HTTP_CONNECT_TIMEOUT_SECONDS': '1'}), stats)
+        try:
+            with pytest.raises(Exception):
+                http.get('http://127.0.0.1:9/')
+        finally:
+            http.close()
+        assert stats.drain_counters()['connect_failures'] == 1
+
+    def test_put_metrics(self, capsys):
+        stats = ConnectionStats()
+        metrics = MetricsRecorder({'Function': 'retrieve'})
+        stats.put_metrics(metrics)
+        assert metrics.flush() is None
+
+        for event in ('connection.connect_tcp.started', 'connection.connect_tcp.complete',
+                      'http2.send_request_headers.started', 'http2.send_request_headers.started'):
+            stats.trace(event, {})
+        stats.put_metrics(metrics)
+        record = metrics.flush()
+        assert record['Mem0Requests'] == 2
+        assert record['Mem0Http2Requests'] == 2
+        assert record['Mem0ReusedRequests'] == 1
+        units = {m['Name']: m['Unit'] for m in record['_aws']['CloudWatchMetrics'][0]['Metrics']}
+        assert units['Mem0ConnectMs'] == 'Milliseconds'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
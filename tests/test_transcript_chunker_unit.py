@@ -0,0 +1,134 @@
+"""
+Unit tests for post_call transcript chunking
+
+Tests filler removal, overlapping windows and concurrent window submission.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call'))
+
+from transcript_chunker import chunk_transcript, clean_turns, is_filler, submit_windows
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'test_data')
+
+
+def turns(n):
+    return [{'role': 'user' if i % 2 else 'assistant', 'content': f'turn {i}'} for i in range(n)]
+
+
+class TestFillerRemoval:
+    """Test cases for is_filler and clean_turns"""
+
+    @pytest.mark.parametrize('text', ['Um.', 'Uh, erm...', 'Mm-hmm.', '...', '', 'Hmm? Um!'])
+    def test_filler(self, text):
+        assert is_filler(text)
+
+    @pytest.mark.parametrize('text', ['I prefer email', '5 0 7', "I'm Sheila", 'No, Norway', 'Yeah.', 'Okay', 'Sure!'])
+    def test_not_filler(self, text):
+        assert not is_filler(text)
+
+    def test_clean_turns_keeps_order(self):
+        messages = [
+            {'role': 'user', 'content': 'Hello there'},
+            {'role': 'assistant', 'content': 'Mm-hmm.'},
+            {'role': 'user', 'content': ''},
+            {'role': 'user', 'content': 'I went to Oslo'}
+        ]
+        assert [m['content'] for m in clean_turns(messages)] == ['Hello there', 'I went to Oslo']
+
+    def test_one_word_answer_survives(self):
+        messages = [
+            {'role': 'assistant', 'content': 'Should I book the aisle seat again?'},
+            {'role': 'user', 'content': 'Um...'},
+            {'role': 'user', 'content': 'Yeah.'}
+        ]
+        assert [m['content'] for m in clean_turns(messages)] == ['Should I book the aisle seat again?', 'Yeah.']
+
+
+class TestChunkTranscript:
+    """Test cases for chunk_transcript"""
+
+    def test_short_transcript_is_single_window(self):
+        assert chunk_transcript(turns(5), 10, 2) == [turns(5)]
+
+    def test_empty_transcript(self):
+        assert chunk_transcript([], 10, 2) == []
+
+    def test_windows_overlap(self):
+        windows = chunk_transcript(turns(10), 4, 1)
+        assert [[m['content'] for m in w] for w in windows] == [
+            ['turn 0', 'turn 1', 'turn 2', 'turn 3'],
+            ['turn 3', 'turn 4', 'turn 5', 'turn 6'],
+            ['turn 6', 'turn 7', 'turn 8', 'turn 9']
+        ]
+
+    def test_every_turn_covered(self):
+        messages = turns(161)
+        windows = chunk_transcript(messages, 24, 4)
+        covered = {m['content'] for w in windows for m in w}
+        assert covered == {m['content'] for m in messages}
+        assert all(len(w) <= 24 for w in windows)
+
+    def test_window_size_zero_disables_chunking(self):
+        assert chunk_transcript(turns(50), 0, 0) == [turns(50)]
+
+    def test_invalid_overlap(self):
+        with pytest.raises(ValueError):
+            chunk_transcript(turns(20), 4, 4)
+
+    def test_real_conversation_window_count(self):
+        with open(os.path.join(TEST_DATA_DIR, 'conv_01jxd5y165f62a0v7gtr6bkg56.json')) as f:
+            transcript = json.load(f)['transcript']
+        messages = [{'role': m['role'], 'content': m.get('message') or ''} for m in transcript]
+        cleaned = clean_turns(messages)
+        windows = chunk_transcript(cleaned, 24, 4)
+        assert len(cleaned) <= len(messages)
+        assert 1 < len(windows) <= len(cleaned) // 20 + 1
+
+
+class TestSubmitWindows:
+    """Test cases for submit_windows"""
+
+    def test_concurrency_cap_and_latency_report(self):
+        lock = threading.Lock()
+        active = [0]
+        peak = [0]
+
+        def add_window(index, window):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.05)
+            with lock:
+                active[0] -= 1
+
+        start = time.perf_counter()
+        results = submit_windows([turns(3)] * 8, add_window, max_concurrency=4)
+        elapsed = time.perf_counter() - start
+
+        assert peak[0] <= 4
+        assert elapsed < 0.3
+        assert [r['index'] for r in results] == list(range(8))
+        assert all(r['ok'] and r['duration_ms'] >= 45 and r['messages'] == 3 for r in results)
+
+    def test_failed_window_is_isolated(self):
+        def add_window(index, window):
+            if index == 1:
+                raise RuntimeError('timeout')
+
+        results = submit_windows([turns(2)] * 3, add_window, max_concurrency=2)
+        assert [r['ok'] for r in results] == [True, False, True]
+        assert results[1]['error'] == 'timeout'
+
+
+if __name__ == "__main__":
+    # Run tests with pytest
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -0,0 +1,208 @@
+"""
+Unit tests for post-call webhook signature verification
+
+Tests header parsing, incremental HMAC over text and base64 bodies, key
+rotation, the replay cache, and that post_call rejects bad requests before
+parsing the body and decodes isBase64Encoded bodies once verified.
+"""
+
+import base64
+import hashlib
+import hmac
+import importlib.util
+import json
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+# Set dummy environment variables before importing handler
+os.environ['MEM0_API_KEY'] = 'test-key'
+os.environ['MEM0_ORG_ID'] = 'test-org'
+os.environ['MEM0_PROJECT_ID'] = 'test-project'
+os.environ['ELEVENLABS_HMAC_KEY'] = 'test-hmac-key'
+os.environ['S3_BUCKET_NAME'] = 'test-bucket'
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+# Add src and the shared runtime layer to path for imports
+HANDLER_DIR = os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call')
+sys.path.insert(0, HANDLER_DIR)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+import webhook_auth
+from webhook_auth import ReplayCache, WebhookVerifier, body_signature, parse_signature_header
+
+NOW = 1_760_000_000
+
+
+def load_handler():
+    """Load post_call handler under a unique module name with Mem0 mocked out"""
+    spec = importlib.util.spec_from_file_location('post_call_auth_handler', os.path.join(HANDLER_DIR, 'handler.py'))
+    module = importlib.util.module_from_spec(spec)
+    with mock.patch('mem0.MemoryClient'):
+        spec.loader.exec_module(module)
+    return module
+
+
+handler = load_handler()
+
+
+class FakeClock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def reference_signature(body: bytes, key: str = 'test-hmac-key', timestamp: int = NOW) -> str:
+    """Signature computed the way ElevenLabs documents it, over the whole body at once"""
+    return hmac.new(key.encode('utf-8'), f"{timestamp}.".encode('utf-8') + body, hashlib.sha256).hexdigest()
+
+
+def header(*signatures: str, timestamp: int = NOW) -> str:
+    return ','.join([f"t={timestamp}"] + [f"v0={s}" for s in signatures])
+
+
+class TestParseSignatureHeader:
+    """Test cases for parse_signature_header"""
+
+    def test_single_and_multiple_signatures(self):
+        assert parse_signature_header(header('a' * 64)) == (NOW, ['a' * 64])
+        assert parse_signature_header(header('a' * 64, 'B' * 64)) == (NOW, ['a' * 64, 'b' * 64])
+
+    def test_unknown_schemes_are_ignored(self):
+        assert parse_signature_header(f"t={NOW},v1=xyz,v0={'a' * 64}") == (NOW, ['a' * 64])
+
+    @pytest.mark.parametrize('value', [
+        '', 'garbage', f"t={NOW}", 'v0=' + 'a' * 64, f"t=abc,v0={'a' * 64}", f"t={NOW},v0=abc",
+        f"t={NOW},t={NOW},v0={'a' * 64}", f"t={NOW},v0={'g' * 64}", f"t={NOW}," + ','.join(['v0=' + 'a' * 64] * 20)
+    ])
+    def test_malformed(self, value):
+        assert parse_signature_header(value) is None
+
+
+class TestBodySignature:
+    """Test that the incremental HMAC matches a one-shot reference"""
+
+    def test_text_body_across_chunks(self, monkeypatch):
+        monkeypatch.setattr(webhook_auth, 'HMAC_CHUNK_CHARS', 7)
+        body = json.dumps({'data': {'summary': 'Caller asked about the café ☕ and a refund' * 5}})
+        assert body_signature(b'test-hmac-key', NOW, body) == reference_signature(body.encode('utf-8'))
+
+    def test_bytes_body(self):
+        assert body_signature(b'test-hmac-key', NOW, b'{"a":1}') == reference_signature(b'{"a":1}')
+
+    def test_base64_body_is_signed_decoded(self, monkeypatch):
+        monkeypatch.setattr(webhook_auth, 'HMAC_CHUNK_CHARS', 8)
+        body = os.urandom(1000)
+        encoded = base64.b64encode(body).decode('ascii')
+        assert body_signature(b'test-hmac-key', NOW, encoded, is_base64=True) == reference_signature(body)
+
+
+class TestWebhookVerifier:
+    """Test cases for WebhookVerifier"""
+
+    BODY = '{"type":"post_call_transcription","data":{}}'
+
+    def verifier(self, keys=('test-hmac-key',), replay=True, clock=None):
+        clock = clock or FakeClock()
+        cache = ReplayCache(ttl_seconds=1800, clock=clock) if replay else None
+        return WebhookVerifier(keys, tolerance_seconds=1800, replay_cache=cache, clock=clock)
+
+    def test_valid(self):
+        assert self.verifier().verify(self.BODY, header(reference_signature(self.BODY.encode()))) == (True, 'ok')
+
+    def test_mismatch(self):
+        assert self.verifier().verify(self.BODY, header('0' * 64)) == (False, 'mismatch')
+
+    def test_any_of_several_signatures(self):
+        signature = reference_signature(self.BODY.encode())
+        assert self.verifier().verify(self.BODY, header('0' * 64, signature)) == (True, 'ok')
+
+    def test_previous_key_during_rotation(self):
+        signature = reference_signature(self.BODY.encode(), key='old-key')
+        assert self.verifier(keys=('new-key', 'old-key')).verify(self.BODY, header(signature)) == (True, 'ok')
+        assert self.verifier(keys=('new-key',)).verify(self.BODY, header(signature)) == (False, 'mismatch')
+
+    def test_stale_and_future_timestamps(self):
+        verifier = self.verifier()
+        old = NOW - 1801
+        future = NOW + 1801
+        assert verifier.verify(self.BODY, header(reference_signature(self.BODY.encode(), timestamp=old), timestamp=old)) == (False, 'expired')
+        assert verifier.verify(self.BODY, header(reference_signature(self.BODY.encode(), timestamp=future), timestamp=future)) == (False, 'future')
+
+    def test_replay_is_rejected_until_it_expires(self):
+        clock = FakeClock()
+        verifier = self.verifier(clock=clock)
+        signed = header(reference_signature(self.BODY.encode()))
+        assert verifier.verify(self.BODY, signed) == (True, 'ok')
+        assert verifier.verify(self.BODY, signed) == (False, 'replayed')
+        # By the time the cache forgets it, the timestamp check rejects it
+        clock.now += 1801
+        assert verifier.verify(self.BODY, signed) == (False, 'expired')
+
+    def test_rejected_requests_never_hash_the_body(self, monkeypatch):
+        verifier = self.verifier()
+        signed = header(reference_signature(self.BODY.encode()))
+        verifier.verify(self.BODY, signed)
+        hashed = mock.Mock(side_effect=AssertionError('body hashed'))
+        monkeypatch.setattr(webhook_auth, 'body_signature', hashed)
+        assert verifier.verify(self.BODY, 'garbage') == (False, 'malformed')
+        assert verifier.verify(self.BODY, header('0' * 64, timestamp=NOW - 3600)) == (False, 'expired')
+        assert verifier.verify(self.BODY, signed) == (False, 'replayed')
+
+    def test_invalid_base64(self):
+        assert self.verifier().verify('not base64!', header('0' * 64), is_base64=True) == (False, 'malformed')
+
+    def test_replay_cache_is_bounded(self):
+        cache = ReplayCache(max_entries=2, ttl_seconds=60)
+        for key in ('a', 'b', 'c'):
+            assert cache.add(key)
+        assert len(cache) == 2
+        assert not cache.seen('a')
+        assert not cache.add('c')
+
+
+class TestPostCallAuthentication:
+    """Test authentication in the post_call webhook handler"""
+
+    @pytest.fixture
+    def post_call(self, monkeypatch):
+        process = mock.Mock(return_value={})
+        monkeypatch.setattr(handler, 'process_webhook_body', process)
+        monkeypatch.setattr(handler, 'INGEST_MODE', 'inline')
+        monkeypatch.setattr(handler.webhook_verifier, 'replay_cache', ReplayCache())
+        monkeypatch.setattr(handler.webhook_verifier, '_clock', FakeClock())
+        return process
+
+    def event(self, body: bytes, signature: str, is_base64: bool = False):
+        return {
+            'body': base64.b64encode(body).decode('ascii') if is_base64 else body.decode('utf-8'),
+            'isBase64Encoded': is_base64,
+            'headers': {'elevenlabs-signature': header(signature)}
+        }
+
+    def test_base64_body_is_decoded_after_verification(self, post_call):
+        body = json.dumps({'type': 'post_call_audio', 'data': {'conversation_id': 'c'}}).encode('utf-8')
+        handler.lambda_handler(self.event(body, reference_signature(body), is_base64=True), None)
+        post_call.assert_called_once_with(body)
+
+    def test_replayed_request_is_not_processed(self, post_call):
+        body = b'{"type":"post_call_audio","data":{}}'
+        event = self.event(body, reference_signature(body))
+        handler.lambda_handler(event, None)
+        handler.lambda_handler(event, None)
+        assert post_call.call_count == 1
+
+    def test_rejections_are_counted(self, post_call, capsys):
+        handler.lambda_handler(self.event(b'{}', '0' * 64), None)
+        assert not post_call.called
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+        assert records[-1]['WebhookRejections'] == 1
+        assert records[-1]['Reason'] == 'mismatch'
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
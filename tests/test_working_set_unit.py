@@ -0,0 +1,312 @@
+"""
+Unit tests for the per-call retrieval working set
+
+Tests building and BM25-searching a working set, publishing it under the call
+and 'latest' keys, that post_call publishes one when it rebuilds the caller
+profile, that client_data copies a current one for each call, and that
+retrieve answers from it without calling Mem0 (falling back on a miss, a weak
+match or a set predating the caller's last ingested call).
+"""
+
+import importlib.util
+import json
+import os
+import sys
+import time
+from unittest import mock
+
+import pytest
+
+# Set dummy environment variables before importing handler
+os.environ['MEM0_API_KEY'] = 'test-key'
+os.environ['MEM0_ORG_ID'] = 'test-org'
+os.environ['MEM0_PROJECT_ID'] = 'test-project'
+os.environ['ELEVENLABS_HMAC_KEY'] = 'test-hmac-key'
+os.environ['S3_BUCKET_NAME'] = 'test-bucket'
+
+# Add post_call's helper modules and the shared runtime layer to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'layer'))
+
+from agentic_memory_runtime.caller_version import bump_caller_version
+from agentic_memory_runtime.kv_store import InMemoryKVStore
+from agentic_memory_runtime.working_set import (
+    WORKING_SET_SCHEMA_VERSION,
+    build_working_set,
+    load_working_set,
+    publish_call_working_set,
+    publish_working_set,
+    search_working_set,
+    working_set_is_current,
+    working_set_key,
+)
+
+RETRIEVE_HANDLER = os.path.join(os.path.dirname(__file__), '..', 'src', 'retrieve', 'handler.py')
+POST_CALL_HANDLER = os.path.join(os.path.dirname(__file__), '..', 'src', 'post_call', 'handler.py')
+CLIENT_DATA_HANDLER = os.path.join(os.path.dirname(__file__), '..', 'src', 'client_data', 'handler.py')
+
+MEMORIES = [
+    {'id': 'm1', 'memory': 'Prefers window seats on long flights', 'metadata': {'type': 'factual'}, 'user_id': 'x'},
+    {'id': 'm2', 'memory': 'Booked a flight to Lisbon, flight delayed twice', 'metadata': {'type': 'episodic'}},
+    {'id': 'm3', 'memory': 'Allergic to peanuts'},
+    {'id': 'm4', 'memory': ''},
+]
+
+# The same memories as Mem0 returns them once it has extracted call conv_1
+CALL_MEMORIES = [{**m, 'metadata': {**(m.get('metadata') or {}), 'conversation_id': 'conv_1'}} for m in MEMORIES]
+
+
+class NotFound(Exception):
+    response = {'Error': {'Code': '404'}}
+
+
+class FakeS3:
+    """Dict-backed S3 client keeping object metadata, for caller version stamps"""
+
+    def __init__(self):
+        self.objects = {}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = (Body, kwargs.get('Metadata', {}), f'"etag-{len(self.objects) + 1}-{Body[-8:]}"')
+        return {'ETag': self.objects[Key][2]}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise NotFound(Key)
+        return {'ETag': self.objects[Key][2], 'Metadata': self.objects[Key][1]}
+
+
+class TestWorkingSet:
+    """Test cases for building, searching and storing working sets"""
+
+    def test_build_keeps_returned_fields(self):
+        working_set = build_working_set('+16125550100', 'CA1', MEMORIES)
+        assert working_set['schema_version'] == WORKING_SET_SCHEMA_VERSION
+        assert [m['id'] for m in working_set['memories']] == ['m1', 'm2', 'm3']
+        assert 'user_id' not in working_set['memories'][0]
+        assert working_set['postings']['peanuts'] == [[2, 1]]
+        assert working_set['postings']['flight'] == [[1, 2]]
+
+    def test_max_memories(self):
+        working_set = build_working_set('+16125550100', 'CA1', MEMORIES, max_memories=1)
+        assert len(working_set['memories']) == 1
+
+    def test_search_ranks_by_bm25(self):
+        working_set = build_working_set('+16125550100', 'CA1', MEMORIES)
+        assert [m['id'] for m in search_working_set(working_set, 'window seats flight', 3)] == ['m1', 'm2']
+        assert [m['id'] for m in search_working_set(working_set, 'lisbon delayed seats', 3)] == ['m2', 'm1']
+        assert [m['id'] for m in search_working_set(working_set, 'lisbon delayed seats', 1)] == ['m2']
+
+    def test_search_miss(self):
+        working_set = build_working_set('+16125550100', 'CA1', MEMORIES)
+        assert search_working_set(working_set, 'hotel', 3) == []
+        assert search_working_set(build_working_set('+16125550100', 'CA1', []), 'flight', 3) == []
+
+    def test_score_floor(self):
+        # In a set this small a one-term match scores about 1, a two-term match about 2
+        working_set = build_working_set('+16125550100', 'CA1', MEMORIES)
+        assert search_working_set(working_set, 'lisbon', 3, min_score=1.5) == []
+        assert [m['id'] for m in search_working_set(working_set, 'window seats', 3, min_score=1.5)] == ['m1']
+
+    def test_survives_json_round_trip(self):
+        store = InMemoryKVStore()
+        publish_working_set(store, build_working_set('+16125550100', 'CA1', MEMORIES), ttl_seconds=60)
+        working_set = load_working_set(store, '+16125550100', 'CA1')
+        assert [m['id'] for m in search_working_set(working_set, 'peanut allergy', 3)] == []
+        assert [m['id'] for m in search_working_set(working_set, 'peanuts', 3)] == ['m3']
+
+    def test_published_under_call_and_latest_keys(self):
+        store = InMemoryKVStore()
+        publish_working_set(store, build_working_set('+1 612-555-0100', 'CA1', MEMORIES), ttl_seconds=60)
+        assert store.get(working_set_key('+16125550100', 'CA1')) is not None
+        assert load_working_set(store, '+16125550100')['call_sid'] == 'CA1'
+        assert load_working_set(store, '+16125550100', 'CA2') is None
+
+    def test_current_only_with_the_last_ingested_call(self):
+        working_set = build_working_set('+16125550100', None, MEMORIES, conversation_id='conv_1')
+        assert working_set_is_current(working_set, None)
+        assert working_set_is_current(working_set, {'version': '"1"', 'conversation_id': 'conv_1', 'bumped_at': None})
+        assert not working_set_is_current(working_set, {'version': '"2"', 'conversation_id': 'conv_2', 'bumped_at': None})
+
+    def test_call_copy_of_current_set(self):
+        store = InMemoryKVStore()
+        publish_working_set(store, build_working_set('+16125550100', None, MEMORIES, conversation_id='conv_1'), 86400)
+        stamp = {'version': '"1"', 'conversation_id': 'conv_1', 'bumped_at': None}
+        assert publish_call_working_set(store, '+16125550100', 'CA1', stamp, 60)['call_sid'] == 'CA1'
+        assert load_working_set(store, '+16125550100', 'CA1')['conversation_id'] == 'conv_1'
+
+        stamp = {'version': '"2"', 'conversation_id': 'conv_2', 'bumped_at': None}
+        assert publish_call_working_set(store, '+16125550100', 'CA2', stamp, 60) is None
+        assert load_working_set(store, '+16125550100', 'CA2') is None
+
+    def test_unknown_schema_version_is_ignored(self):
+        store = InMemoryKVStore()
+        store.put(working_set_key('+16125550100'), {'schema_version': 0, 'memories': []}, 60)
+        assert load_working_set(store, '+16125550100') is None
+
+
+class TestPostCallPublish:
+    """Test that post_call publishes the working set from the memories of the caller profile"""
+
+    @pytest.fixture
+    def post_call(self, monkeypatch):
+        spec = importlib.util.spec_from_file_location('post_call_working_set_handler', POST_CALL_HANDLER)
+        handler = importlib.util.module_from_spec(spec)
+        with mock.patch('mem0.MemoryClient'):
+            spec.loader.exec_module(handler)
+        fake_client = mock.Mock()
+        fake_client.get_all.return_value = {'results': CALL_MEMORIES}
+        store = InMemoryKVStore()
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 's3_client', mock.Mock())
+        monkeypatch.setattr(handler, 'working_set_store', store)
+        return handler, store
+
+    def test_publishes_latest_working_set(self, post_call):
+        handler, store = post_call
+        handler.refresh_caller_profile('+16125550100', '2026-01-01T00:00:00', 'conv_1')
+
+        working_set = load_working_set(store, '+16125550100')
+        assert [m['id'] for m in working_set['memories']] == ['m1', 'm2', 'm3']
+        assert working_set['conversation_id'] == 'conv_1'
+        # One get_all serves both the profile and the working set
+        assert handler.client.get_all.call_count == 1
+
+    def test_call_not_extracted_yet_is_not_published(self, post_call):
+        handler, store = post_call
+        handler.refresh_caller_profile('+16125550100', '2026-01-01T00:00:00', 'conv_2')
+        assert load_working_set(store, '+16125550100') is None
+
+    def test_publish_failure_keeps_profile(self, post_call):
+        handler, store = post_call
+        store.put = mock.Mock(side_effect=RuntimeError('throttled'))
+        handler.refresh_caller_profile('+16125550100', '2026-01-01T00:00:00', 'conv_1')
+        assert handler.s3_client.put_object.called
+
+
+class TestClientDataPublish:
+    """Test that client_data copies the caller's current working set for each call"""
+
+    @pytest.fixture
+    def client_data(self, monkeypatch):
+        spec = importlib.util.spec_from_file_location('client_data_working_set_handler', CLIENT_DATA_HANDLER)
+        handler = importlib.util.module_from_spec(spec)
+        with mock.patch('mem0.MemoryClient'):
+            spec.loader.exec_module(handler)
+        fake_client = mock.Mock()
+        fake_client.get_all.return_value = {'results': CALL_MEMORIES}
+        store = InMemoryKVStore()
+        s3 = FakeS3()
+        publish_working_set(store, build_working_set('+16125550100', None, CALL_MEMORIES, conversation_id='conv_1'),
+                            ttl_seconds=86400)
+        bump_caller_version(s3, 'bucket', '+16125550100', 'conv_1')
+        monkeypatch.setattr(handler, 'client', fake_client)
+        monkeypatch.setattr(handler, 's3_client', s3)
+        monkeypatch.setattr(handler, 'S3_BUCKET_NAME', 'bucket')
+        monkeypatch.setattr(handler, 'CALLER_PROFILE_ENABLED', False)
+        monkeypatch.setattr(handler, 'MEMORY_FETCH_MODE', 'all')
+        monkeypatch.setattr(handler, 'save_client_data_to_s3', lambda **kwargs: None)
+        monkeypatch.setattr(handler, 'working_set_store', store)
+        return handler, store, s3
+
+    def invoke(self, handler, **body):
+        response = handler.lambda_handler({'body': json.dumps({'caller_id': '+16125550100', **body})}, None)
+        assert response['statusCode'] == 200
+
+    def test_publishes_call_working_set(self, client_data):
+        handler, store, _ = client_data
+        self.invoke(handler, call_sid='CA1')
+
+        working_set = load_working_set(store, '+16125550100', 'CA1')
+        assert working_set['call_sid'] == 'CA1'
+        assert [m['id'] for m in working_set['memories']] == ['m1', 'm2', 'm3']
+        assert store._items[working_set_key('+16125550100', 'CA1')][1] <= time.time() + handler.WORKING_SET_CALL_TTL_SECONDS
+
+    def test_stale_latest_set_is_not_copied(self, client_data):
+        handler, store, s3 = client_data
+        bump_caller_version(s3, 'bucket', '+16125550100', 'conv_2')
+        self.invoke(handler, call_sid='CA1')
+        assert load_working_set(store, '+16125550100', 'CA1') is None
+
+    def test_publish_failure_does_not_fail_webhook(self, client_data):
+        handler, store, _ = client_data
+        store.put = mock.Mock(side_effect=RuntimeError('throttled'))
+        self.invoke(handler, call_sid='CA1')
+
+
+class TestRetrieveWorkingSet:
+    """Test that retrieve searches the call's working set before Mem0"""
+
+    @pytest.fixture
+    def retrieve(self, monkeypatch):
+        spec = importlib.util.spec_from_file_location('retrieve_handler', RETRIEVE_HANDLER)
+        handler = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(handler)
+        store = InMemoryKVStore()
+        s3 = FakeS3()
+        publish_working_set(store, build_working_set('+16125550100', 'CA1', CALL_MEMORIES, conversation_id='conv_1'),
+                            ttl_seconds=60)
+        bump_caller_version(s3, 'bucket', '+16125550100', 'conv_1')
+        handler.client = mock.Mock()
+        handler.client.search.return_value = {'results': [{'id': 'remote'}]}
+        monkeypatch.setattr(handler, 's3_client', s3)
+        monkeypatch.setattr(handler, 'S3_BUCKET_NAME', 'bucket')
+        monkeypatch.setattr(handler, 'RERANK_MODE', 'off')
+        monkeypatch.setattr(handler, 'working_set_store', store)
+        return handler
+
+    def invoke(self, handler, **body):
+        response = handler.lambda_handler({'body': json.dumps({'user_id': '+16125550100', **body})}, None)
+        assert response['statusCode'] == 200
+        return json.loads(response['body'])
+
+    def test_hit_skips_mem0(self, retrieve):
+        body = self.invoke(retrieve, query='window seats', call_sid='CA1')
+        assert [m['id'] for m in body['memories']] == ['m1']
+        retrieve.client.search.assert_not_called()
+
+    def test_latest_set_without_call_sid(self, retrieve):
+        body = self.invoke(retrieve, queries=['peanuts', 'lisbon'])
+        assert [r['memories'][0]['id'] for r in body['results']] == ['m3', 'm2']
+        retrieve.client.search.assert_not_called()
+
+    def test_unpublished_call_falls_back_to_mem0(self, retrieve):
+        assert self.invoke(retrieve, query='window seats', call_sid='CA2')['memories'] == [{'id': 'remote'}]
+
+    def test_miss_falls_back_to_mem0(self, retrieve):
+        body = self.invoke(retrieve, query='hotel preferences', call_sid='CA1')
+        assert body['memories'] == [{'id': 'remote'}]
+        retrieve.client.search.assert_called_once()
+
+    def test_weak_match_falls_back_to_mem0(self, retrieve, monkeypatch):
+        monkeypatch.setattr(retrieve, 'WORKING_SET_MIN_SCORE', 100.0)
+        assert self.invoke(retrieve, query='window seats', call_sid='CA1')['memories'] == [{'id': 'remote'}]
+        retrieve.client.search.assert_called_once()
+
+    def test_set_predating_the_last_call_falls_back_to_mem0(self, retrieve, capsys):
+        bump_caller_version(retrieve.s3_client, 'bucket', '+16125550100', 'conv_2')
+        assert self.invoke(retrieve, query='window seats', call_sid='CA1')['memories'] == [{'id': 'remote'}]
+        record = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert record['WorkingSetStale'] == 1
+
+    def test_unreadable_stamp_falls_back_to_mem0(self, retrieve, monkeypatch):
+        monkeypatch.setattr(retrieve.s3_client, 'head_object', mock.Mock(side_effect=RuntimeError('throttled')))
+        assert self.invoke(retrieve, query='window seats', call_sid='CA1')['memories'] == [{'id': 'remote'}]
+
+    def test_store_errors_fall_back_to_mem0(self, retrieve):
+        retrieve.working_set_store.get = mock.Mock(side_effect=RuntimeError('throttled'))
+        assert self.invoke(retrieve, query='window seats', call_sid='CA1')['memories'] == [{'id': 'remote'}]
+
+    def test_slow_store_falls_back_to_mem0(self, retrieve, monkeypatch, capsys):
+        monkeypatch.setattr(retrieve, 'WORKING_SET_TIMEOUT_MS', 50)
+        retrieve.working_set_store.get = mock.Mock(side_effect=lambda key: time.sleep(0.5))
+
+        start = time.monotonic()
+        assert self.invoke(retrieve, query='window seats', call_sid='CA1')['memories'] == [{'id': 'remote'}]
+        assert time.monotonic() - start < 0.4
+        record = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert record['WorkingSetTimeouts'] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])